@@ -2,6 +2,7 @@
 
 from src.parser import R6TrackerParser
 from src.database import Database
+from src.db_access import DatabaseAccess
 from src.calculator import MetricsCalculator
 from src.comparator import PlayerComparator
 from src.analyzer import InsightAnalyzer
@@ -10,7 +11,8 @@ from src.stack_manager import StackManager
 from src.team_analyzer import TeamAnalyzer
 from src.matchup_analyzer import MatchupAnalyzer
 from src.thresholds import MIN_RELIABLE_ROUNDS_PER_HOUR
-from src.api_client import TrackerAPIClient
+from src.async_api_client import AsyncTrackerAPIClient, get_shared_async_client
+from src.sync_scheduler import SyncScheduler
 from src.plugins.v3_round_analysis import RoundAnalysisPlugin
 from src.plugins.v3_teammate_chemistry import TeammateChemistryPlugin
 from src.plugins.v3_lobby_quality import LobbyQualityPlugin
@@ -20,6 +22,7 @@ from src.plugins.v3_enemy_operator_threat import EnemyOperatorThreatPlugin
 from src.plugins.v2_operator_stats import OperatorStatsPlugin
 from src.plugins.v2_map_stats import MapStatsPlugin
 from datetime import datetime
+import asyncio
 import time
 
 DEFAULT_MATCH_HISTORY_CAP = None
@@ -79,7 +82,7 @@ def _oldest_detail_timestamp(detail_rows: list[dict]) -> str | None:
     return oldest.isoformat()
 
 
-def _backfill_one_page(db: Database, api_client: TrackerAPIClient, username: str, player_id: int) -> dict:
+def _backfill_one_page(db: Database, api_client: AsyncTrackerAPIClient, username: str, player_id: int) -> dict:
     state = db.get_backfill_state(username)
     if state.get("backfill_complete"):
         return {
@@ -95,11 +98,13 @@ def _backfill_one_page(db: Database, api_client: TrackerAPIClient, username: str
         next_page = 1
 
     existing_ids = db.get_existing_match_detail_ids(player_id)
-    result = api_client.scrape_backfill_page(
-        username,
-        next_page=next_page,
-        skip_match_ids=existing_ids,
-        show_progress=True,
+    result = asyncio.run(
+        api_client.scrape_backfill_page(
+            username,
+            next_page=next_page,
+            skip_match_ids=existing_ids,
+            show_progress=True,
+        )
     )
     details = result.get("details", []) or []
     save_summary = {"matches": 0, "round_rows": 0}
@@ -182,7 +187,11 @@ def main():
     stack_manager = StackManager(db)
     team_analyzer = TeamAnalyzer(db)
     matchup_analyzer = MatchupAnalyzer(db)
-    api_client = TrackerAPIClient()
+    api_client = get_shared_async_client()
+    # Match details already fetched for any tracked player are reused from the DB.
+    # The client awaits the store, so it gets thread-owned connections, not `db`.
+    payload_access = DatabaseAccess(db.db_path, readers=1)
+    api_client.payload_store = payload_access.database
 
     try:
         while True:
@@ -205,7 +214,7 @@ def main():
                     print(f"Syncing {username} (full season)...")
                     result = {"errors": []}
 
-                    profile = api_client.get_profile(username)
+                    profile = asyncio.run(api_client.get_profile(username))
                     season_raw = profile.get("season_stats") or {}
                     if not season_raw:
                         raise RuntimeError("Season stats missing; sync cannot continue")
@@ -216,13 +225,13 @@ def main():
                     _safe_print("✅ Profile stats")
 
                     try:
-                        result["map_stats"] = api_client.get_map_stats(username)
+                        result["map_stats"] = asyncio.run(api_client.get_map_stats(username))
                     except Exception as exc:
                         result["map_stats"] = []
                         result["errors"].append(f"Map stats failed: {exc}")
 
                     try:
-                        result["operator_stats"] = api_client.get_operator_stats(username)
+                        result["operator_stats"] = asyncio.run(api_client.get_operator_stats(username))
                     except Exception as exc:
                         result["operator_stats"] = []
                         result["errors"].append(f"Operator stats failed: {exc}")
@@ -235,12 +244,14 @@ def main():
                     detail_rows = []
                     try:
                         existing_ids = db.get_existing_match_detail_ids(existing_player_id)
-                        detail_rows = api_client.scrape_full_match_history(
-                            username,
-                            max_matches=match_cap,
-                            since_date=since_date,
-                            skip_match_ids=existing_ids,
-                            show_progress=True,
+                        detail_rows = asyncio.run(
+                            api_client.scrape_full_match_history(
+                                username,
+                                max_matches=match_cap,
+                                since_date=since_date,
+                                skip_match_ids=existing_ids,
+                                show_progress=True,
+                            )
                         )
                     except Exception as exc:
                         result.setdefault("errors", []).append(f"Match detail sync failed: {exc}")
@@ -344,87 +355,41 @@ def main():
                         ui.show_error("No players in database yet")
                         continue
 
-                    total = len(players)
-                    success = 0
-                    failed = 0
+                    def _persist_profile(username, season_stats, map_stats, operator_stats):
+                        return _save_scraped_profile(
+                            db,
+                            calculator,
+                            analyzer,
+                            username=username,
+                            season_stats=season_stats,
+                            map_stats=map_stats,
+                            operator_stats=operator_stats,
+                        )
 
-                    for idx, player in enumerate(players, 1):
-                        username = player.get("username")
-                        last_synced_at = db.get_player_last_match_synced_at(username)
-                        is_initial_sync = last_synced_at is None
-                        match_cap = INITIAL_MATCH_SYNC_CAP if is_initial_sync else DEFAULT_MATCH_HISTORY_CAP
-                        since_date = None if is_initial_sync else last_synced_at
-                        print(f"Syncing {idx}/{total}: {username} (full season)...")
-                        try:
-                            result = {"errors": []}
-
-                            profile = api_client.get_profile(username)
-                            season_raw = profile.get("season_stats") or {}
-                            if not season_raw:
-                                raise RuntimeError("Season stats missing")
-                            result["season_stats"] = api_client.season_stats_to_snapshot(season_raw)
-                            tracker_uuid = profile.get("uuid")
-                            if tracker_uuid:
-                                db.update_player_tracker_uuid(username, tracker_uuid)
-                            _safe_print("✅ Profile stats")
-
-                            try:
-                                result["map_stats"] = api_client.get_map_stats(username)
-                            except Exception as exc:
-                                result["map_stats"] = []
-                                result["errors"].append(f"Map stats failed: {exc}")
-
-                            try:
-                                result["operator_stats"] = api_client.get_operator_stats(username)
-                            except Exception as exc:
-                                result["operator_stats"] = []
-                                result["errors"].append(f"Operator stats failed: {exc}")
-
-                            detail_rows = []
-                            try:
-                                existing_ids = db.get_existing_match_detail_ids(player["player_id"])
-                                detail_rows = api_client.scrape_full_match_history(
-                                    username,
-                                    max_matches=match_cap,
-                                    since_date=since_date,
-                                    skip_match_ids=existing_ids,
-                                    show_progress=True,
-                                )
-                            except Exception as exc:
-                                result.setdefault("errors", []).append(f"Match detail sync failed: {exc}")
-
-                            _, _, _, detail_summary = _save_scraped_profile(
-                                db,
-                                calculator,
-                                analyzer,
-                                username=username,
-                                season_stats=result["season_stats"],
-                                map_stats=result.get("map_stats", []),
-                                operator_stats=result.get("operator_stats", []),
-                                match_details=detail_rows,
-                            )
-                            _safe_print(
-                                f"✅ OK (match detail: {detail_summary['matches']} matches, {detail_summary['round_rows']} rounds)"
-                            )
-                            latest_synced_at = _latest_detail_timestamp(detail_rows)
-                            if latest_synced_at:
-                                db.update_player_last_match_synced_at(username, latest_synced_at)
-                            if is_initial_sync:
-                                oldest_synced_at = _oldest_detail_timestamp(detail_rows)
-                                db.update_backfill_state(
-                                    username,
-                                    oldest_match_synced_at=oldest_synced_at,
-                                    backfill_next_page=1,
-                                    backfill_complete=False,
-                                )
-                            success += 1
-                        except Exception as e:
-                            _safe_print(f"❌ Sync failed: {e}")
-                            failed += 1
-
-                        time.sleep(2)
-
-                    print(f"Synced {success}/{total} players ({failed} failed)")
+                    scheduler = SyncScheduler(
+                        db,
+                        api_client,
+                        persist_profile=_persist_profile,
+                        initial_match_cap=INITIAL_MATCH_SYNC_CAP,
+                        default_match_cap=DEFAULT_MATCH_HISTORY_CAP,
+                    )
+                    usernames = [p.get("username") for p in players if p.get("username")]
+                    print(f"Syncing {len(usernames)} players (shared rate budget, resumable)...")
+                    summary = asyncio.run(scheduler.run(usernames))
+
+                    for row in summary["players"]:
+                        status = "✅" if row["ok"] else "❌"
+                        _safe_print(
+                            f"{status} {row['username']}: {row['matches']} matches, {row['round_rows']} rounds"
+                        )
+                        for err in row["errors"]:
+                            print(f"    - {err}")
+                    print(
+                        f"Synced {summary['succeeded']}/{len(usernames)} players ({summary['failed']} failed); "
+                        f"{summary['details_fetched']} match details fetched, "
+                        f"{summary['shared_matches']} shared across players, "
+                        f"{summary['elapsed_seconds']:.1f}s"
+                    )
 
                 except Exception as e:
                     ui.show_error(str(e))
@@ -738,6 +703,7 @@ def main():
 
     finally:
         # Ensure database is always closed
+        payload_access.close()
         db.close()
 
 
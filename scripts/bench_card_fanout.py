@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.database import Database
+from src.plugins.v2_map_stats import MapStatsPlugin
+from src.plugins.v3_round_analysis import RoundAnalysisPlugin
+
+MAPS = ["Bank", "Villa", "Oregon", "Clubhouse", "Kafe Dostoyevsky"]
+OPERATORS = ["Ash", "Thermite", "Sledge", "Jager", "Mute", "Smoke"]
+
+# The pre-fix round query: joining cards on match_id alone repeats each round per card.
+LEGACY_ROUND_SQL = """
+    SELECT COUNT(*)
+    FROM player_rounds pr
+    JOIN round_outcomes ro ON pr.match_id = ro.match_id AND pr.round_id = ro.round_id
+    LEFT JOIN scraped_match_cards smc ON pr.match_id = smc.match_id
+    WHERE pr.username = ? AND pr.match_type = 'Ranked'
+"""
+
+
+def seed(db: Database, matches: int, copies: int) -> None:
+    rng = random.Random(11)
+    owner = db.add_player("bench")
+    cur = db.conn.cursor()
+    for m in range(matches):
+        match_id = f"match-{m:05d}"
+        won = rng.random() < 0.5
+        card = ("bench", match_id, rng.choice(MAPS), "Ranked", f"2026-01-{1 + m % 28:02d}T00:00:00Z")
+        # Every re-scrape of a match adds another card row for the same match_id.
+        cur.executemany(
+            "INSERT INTO scraped_match_cards (username, match_id, map_name, mode, match_date) VALUES (?, ?, ?, ?, ?)",
+            [card] * copies,
+        )
+        cur.execute(
+            """
+            INSERT INTO match_detail_players (player_id, match_id, match_type, username, team_id, result,
+                                              kills, deaths, rank_points_delta)
+            VALUES (?, ?, 'Ranked', 'bench', 0, ?, ?, ?, ?)
+            """,
+            (owner, match_id, "win" if won else "loss", rng.randint(2, 12), rng.randint(2, 10), 22 if won else -19),
+        )
+        for round_id in range(1, 10):
+            side = rng.choice(("attacker", "defender"))
+            victory = rng.random() < 0.5
+            cur.execute(
+                "INSERT INTO round_outcomes (player_id, match_id, match_type, round_id, end_reason, winner_side) "
+                "VALUES (?, ?, 'Ranked', ?, ?, ?)",
+                (owner, match_id, round_id, rng.choice(("bomb_exploded", "attackers_eliminated")), side),
+            )
+            cur.execute(
+                """
+                INSERT INTO player_rounds (player_id, match_id, match_type, round_id, username, side, operator,
+                                           result, kills, deaths, first_blood, first_death, clutch_won, clutch_lost)
+                VALUES (?, ?, 'Ranked', ?, 'bench', ?, ?, ?, ?, ?, ?, ?, 0, 0)
+                """,
+                (
+                    owner, match_id, round_id, side, rng.choice(OPERATORS), "victory" if victory else "defeat",
+                    rng.randint(0, 3), int(not victory), int(rng.random() < 0.15), int(rng.random() < 0.15),
+                ),
+            )
+    db.conn.commit()
+    db.refresh_match_latest_cards()
+
+
+def run(matches: int, copies: int, repeat: int) -> dict:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db = Database(path)
+    try:
+        seed(db, matches, copies)
+        best = float("inf")
+        outputs = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            outputs = {
+                "round_analysis": RoundAnalysisPlugin(db, "bench").analyze(),
+                "map_stats": MapStatsPlugin(db, "bench").analyze(),
+            }
+            best = min(best, time.perf_counter() - t0)
+        legacy_rows = db.conn.execute(LEGACY_ROUND_SQL, ("bench",)).fetchone()[0]
+        return {
+            "copies": copies,
+            "ms": best * 1000.0,
+            "legacy_join_rows": legacy_rows,
+            "total_rounds": outputs["round_analysis"].get("total_rounds"),
+            "digest": json.dumps(outputs, sort_keys=True, default=str),
+        }
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Regression check: duplicate scraped cards must not change plugin output or runtime"
+    )
+    ap.add_argument("--matches", type=int, default=500)
+    ap.add_argument("--copies", type=int, nargs="+", default=[1, 5, 20])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--max-slowdown", type=float, default=1.5, help="Allowed runtime ratio vs 1 copy")
+    args = ap.parse_args()
+
+    results = [run(args.matches, copies, args.repeat) for copies in sorted(set(args.copies))]
+    baseline = results[0]
+    ok = True
+    for r in results:
+        same = r["digest"] == baseline["digest"]
+        ratio = r["ms"] / max(baseline["ms"], 1e-6)
+        # Small absolute floor so timer noise on tiny runs does not fail the check.
+        within = r["ms"] <= baseline["ms"] * args.max_slowdown + 5.0
+        ok = ok and same and within
+        print(
+            f"copies={r['copies']:>3}  rounds={r['total_rounds']}  legacy_join_rows={r['legacy_join_rows']:>7}  "
+            f"plugins={r['ms']:8.1f}ms  x{ratio:4.2f}  output={'same' if same else 'CHANGED'}"
+        )
+    print("OK" if ok else "FAIL: output or runtime changed with duplicate cards")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.database import Database
+from src.db_access import DatabaseAccess
+
+OPERATORS = ["Ash", "Thermite", "Sledge", "Hibana", "Jager", "Bandit", "Mute", "Valkyrie", "Kaid", "Smoke"]
+
+# Shaped like the workspace row load + per-operator rollup behind /api/dashboard-workspace.
+DASHBOARD_SQL = """
+    SELECT pr.match_id, pr.round_id, pr.side, pr.operator, pr.username, pr.kills, pr.deaths,
+           ro.winner_side, smc.map_name
+    FROM player_rounds pr
+    LEFT JOIN round_outcomes ro
+      ON ro.player_id = pr.player_id AND ro.match_id = pr.match_id AND ro.round_id = pr.round_id
+    LEFT JOIN scraped_match_cards smc ON smc.match_id = pr.match_id
+    WHERE pr.player_id = ? AND pr.match_type = 'Ranked'
+"""
+
+
+def seed(db: Database, matches: int) -> int:
+    rng = random.Random(3)
+    player_id = db.add_player("bench")
+    cur = db.conn.cursor()
+    db.save_scraped_match_cards(
+        "bench", [{"match_id": f"seed-{m}", "map": "Bank", "mode": "Ranked"} for m in range(matches)]
+    )
+    for m in range(matches):
+        match_id = f"seed-{m}"
+        for rid in range(1, 10):
+            cur.execute(
+                "INSERT INTO round_outcomes (player_id, match_id, round_id, winner_side) VALUES (?, ?, ?, ?)",
+                (player_id, match_id, rid, rng.choice(("attacker", "defender"))),
+            )
+            cur.executemany(
+                """
+                INSERT INTO player_rounds (player_id, match_id, match_type, round_id, username, side,
+                                           operator, kills, deaths)
+                VALUES (?, ?, 'Ranked', ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (player_id, match_id, rid, f"p{slot}", "attacker" if slot < 5 else "defender",
+                     rng.choice(OPERATORS), rng.randint(0, 2), rng.randint(0, 1))
+                    for slot in range(10)
+                ],
+            )
+    db.conn.commit()
+    return player_id
+
+
+def dashboard(db: Database, player_id: int) -> int:
+    by_op: dict[str, list[int]] = {}
+    for row in db.conn.execute(DASHBOARD_SQL, (player_id,)):
+        agg = by_op.setdefault(row["operator"], [0, 0, 0])
+        agg[0] += 1
+        agg[1] += row["kills"] or 0
+        agg[2] += 1 if row["winner_side"] == row["side"] else 0
+    return len(by_op)
+
+
+def scrape_batch(db: Database, batch: int, n: int) -> None:
+    cards = [{"match_id": f"live-{batch}-{i}", "map": "Villa", "mode": "Ranked"} for i in range(n)]
+    db.save_scraped_match_cards("bench", cards)
+
+
+def pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run_mode(mode: str, db: Database, access: DatabaseAccess | None, player_id: int, args) -> dict:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    saved = [0]
+
+    async def heartbeat() -> None:
+        # Stands in for the websocket progress stream: how late does each tick fire?
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - t0 - 0.01)
+
+    async def scraper() -> None:
+        batch = 0
+        while not stop.is_set():
+            if access is None:
+                scrape_batch(db, batch, args.cards)
+            else:
+                await access.run_write(lambda b=batch: scrape_batch(access.current(), b, args.cards))
+            batch += 1
+            saved[0] += args.cards
+            await asyncio.sleep(0.02)
+
+    async def request(t0: float) -> float:
+        # Latency is measured from the wave's arrival, so time queued behind other requests counts.
+        if access is None:
+            dashboard(db, player_id)
+        else:
+            await access.run_read(lambda: dashboard(access.current(), player_id))
+        return time.perf_counter() - t0
+
+    background = [asyncio.create_task(heartbeat()), asyncio.create_task(scraper())]
+    await asyncio.sleep(0.05)
+    latencies: list[float] = []
+    saved_before, t_waves = saved[0], time.perf_counter()
+    for _ in range(args.waves):
+        arrived = time.perf_counter()
+        latencies.extend(await asyncio.gather(*(request(arrived) for _ in range(args.parallel))))
+    elapsed = time.perf_counter() - t_waves
+    scraped = saved[0] - saved_before
+    stop.set()
+    await asyncio.gather(*background)
+    return {
+        "cards_per_second": scraped / elapsed if elapsed else 0.0,
+        "mode": mode,
+        "p50": statistics.median(latencies) * 1000.0,
+        "p95": pct(latencies, 0.95) * 1000.0,
+        "max_lag": max(lags or [0.0]) * 1000.0,
+        "p95_lag": pct(lags or [0.0], 0.95) * 1000.0,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Dashboard-style reads under an active scrape: inline vs pooled DB access")
+    ap.add_argument("--matches", type=int, default=400, help="Seeded matches (9 rounds x 10 players each)")
+    ap.add_argument("--parallel", type=int, default=20, help="Concurrent dashboard requests per wave")
+    ap.add_argument("--waves", type=int, default=3)
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--cards", type=int, default=25, help="Cards saved per scrape batch")
+    args = ap.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db = Database(path)
+    try:
+        player_id = seed(db, args.matches)
+        print(f"seeded {args.matches * 90} player-round rows; {args.parallel} parallel requests x {args.waves} waves")
+        results = [asyncio.run(run_mode("inline", db, None, player_id, args))]
+        access = DatabaseAccess(path, readers=args.readers)
+        try:
+            results.append(asyncio.run(run_mode(f"pooled/{args.readers}", db, access, player_id, args)))
+        finally:
+            access.close()
+        for r in results:
+            print(
+                f"  {r['mode']:<10} request p50={r['p50']:8.1f}ms p95={r['p95']:8.1f}ms  "
+                f"loop lag p95={r['p95_lag']:7.1f}ms max={r['max_lag']:7.1f}ms  "
+                f"scrape saves during load={r['cards_per_second']:7.1f} cards/s"
+            )
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
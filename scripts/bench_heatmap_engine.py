@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from src.analytics import heatmap_engine
+from src.analytics.heatmap_engine import PairGrid, compute_cells, scatter_pair_counts
+
+ATTACKERS = [f"atk{i:02d}" for i in range(36)]
+DEFENDERS = [f"def{i:02d}" for i in range(38)]
+OPTIONS = [
+    (norm, lift, interval)
+    for norm in ("global", "attacker")
+    for lift in ("percent_delta", "logit_lift", "log_odds_ratio")
+    for interval in ("wilson", "wald")
+]
+
+
+def make_rounds(count: int) -> list[tuple[set, set, int]]:
+    rng = random.Random(23)
+    atk_weights = [1.0 / (i + 1) for i in range(len(ATTACKERS))]
+    def_weights = [1.0 / (i + 1) for i in range(len(DEFENDERS))]
+    return [
+        (
+            set(rng.choices(ATTACKERS, weights=atk_weights, k=5)),
+            set(rng.choices(DEFENDERS, weights=def_weights, k=5)),
+            int(rng.random() < 0.47),
+        )
+        for _ in range(count)
+    ]
+
+
+def legacy(rounds: list[tuple[set, set, int]]) -> list:
+    """Per-round Python set counting, then one scalar cell loop per option set."""
+    pair_stats, atk_counts, atk_wins, def_counts = {}, {}, {}, {}
+    for atk, dfn, win in rounds:
+        for a in atk:
+            atk_counts[a] = atk_counts.get(a, 0) + 1
+            atk_wins[a] = atk_wins.get(a, 0) + win
+            for d in dfn:
+                cell = pair_stats.setdefault((a, d), {"n": 0, "atk_wins": 0})
+                cell["n"] += 1
+                cell["atk_wins"] += win
+        for d in dfn:
+            def_counts[d] = def_counts.get(d, 0) + 1
+    grid = PairGrid(
+        pair_stats=pair_stats,
+        atk_counts=atk_counts,
+        atk_wins_by_op=atk_wins,
+        def_counts=def_counts,
+        total_units=len(rounds),
+        atk_unit_wins=sum(r[2] for r in rounds),
+    )
+    saved, heatmap_engine.np = heatmap_engine.np, None
+    try:
+        return [render(grid, *opts) for opts in OPTIONS]
+    finally:
+        heatmap_engine.np = saved
+
+
+def engine(atk: np.ndarray, dfn: np.ndarray, win: np.ndarray) -> list:
+    """One scatter-add over the incidence matrices, then vectorized cells per option set."""
+    counts = scatter_pair_counts(atk, dfn, win)
+    pair_n, pair_w = counts["pair_n"], counts["pair_w"]
+    grid = PairGrid(
+        pair_stats={
+            (ATTACKERS[a], DEFENDERS[d]): {"n": int(pair_n[a, d]), "atk_wins": int(pair_w[a, d])}
+            for a, d in zip(*np.nonzero(pair_n))
+        },
+        atk_counts={ATTACKERS[i]: int(counts["atk_n"][i]) for i in np.flatnonzero(counts["atk_n"])},
+        atk_wins_by_op={ATTACKERS[i]: int(counts["atk_w"][i]) for i in np.flatnonzero(counts["atk_n"])},
+        def_counts={DEFENDERS[i]: int(counts["def_n"][i]) for i in np.flatnonzero(counts["def_n"])},
+        total_units=counts["units"],
+        atk_unit_wins=counts["atk_unit_wins"],
+    )
+    return [render(grid, *opts) for opts in OPTIONS]
+
+
+def render(grid: PairGrid, norm: str, lift: str, interval: str) -> tuple:
+    return compute_cells(
+        grid,
+        norm_key=norm,
+        lift_key=lift,
+        interval_key=interval,
+        pct_digits=1,
+        lift_digits=3 if lift != "percent_delta" else 1,
+    )
+
+
+def incidence(rounds: list[tuple[set, set, int]]) -> tuple:
+    a_idx = {name: i for i, name in enumerate(ATTACKERS)}
+    d_idx = {name: i for i, name in enumerate(DEFENDERS)}
+    atk = np.zeros((len(rounds), len(ATTACKERS)), dtype=np.uint8)
+    dfn = np.zeros((len(rounds), len(DEFENDERS)), dtype=np.uint8)
+    for row, (a_ops, d_ops, _win) in enumerate(rounds):
+        atk[row, [a_idx[a] for a in a_ops]] = 1
+        dfn[row, [d_idx[d] for d in d_ops]] = 1
+    return atk, dfn, np.array([r[2] for r in rounds], dtype=np.float64)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="ATK x DEF heatmap: Python counting + scalar cells vs incidence scatter-add + vectorized cells"
+    )
+    ap.add_argument("--rounds", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    ok = True
+    for count in args.rounds:
+        rounds = make_rounds(count)
+        atk, dfn, win = incidence(rounds)
+        same = json.dumps(legacy(rounds)) == json.dumps(engine(atk, dfn, win))
+        ok = ok and same
+        old_ms = best_of(lambda: legacy(rounds), args.repeat)
+        new_ms = best_of(lambda: engine(atk, dfn, win), args.repeat)
+        print(
+            f"rounds={count:>7}  legacy={old_ms:8.1f}ms  engine={new_ms:8.1f}ms  "
+            f"speedup=x{old_ms / max(new_ms, 1e-6):5.1f}  output={'same' if same else 'CHANGED'}"
+        )
+    print(f"({len(OPTIONS)} normalization/lift/interval combinations per run)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
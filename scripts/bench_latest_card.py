@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.database import Database
+
+LEGACY_SQL = """
+    WITH latest_card AS (
+        SELECT match_id, MAX(scraped_at) AS scraped_at
+        FROM scraped_match_cards
+        GROUP BY match_id
+    )
+    SELECT smc.match_id, smc.map_name, smc.mode, lc.scraped_at
+    FROM player_rounds pr
+    JOIN latest_card lc ON lc.match_id = pr.match_id
+    JOIN scraped_match_cards smc
+      ON smc.match_id = lc.match_id
+     AND smc.scraped_at = lc.scraped_at
+    WHERE pr.player_id = ?
+"""
+
+MATERIALIZED_SQL = """
+    SELECT lc.match_id, lc.map_name, lc.mode, lc.scraped_at
+    FROM player_rounds pr
+    JOIN match_latest_card lc ON lc.match_id = pr.match_id
+    WHERE pr.player_id = ?
+"""
+
+
+def seed(db: Database, matches: int, cards_per_match: int) -> int:
+    owner_id = db.add_player("bench_owner")
+    cur = db.conn.cursor()
+    cards = []
+    rounds = []
+    for m in range(matches):
+        match_id = f"bench-{m:06d}"
+        for c in range(cards_per_match):
+            cards.append((f"owner{c}", match_id, "Bank", "Ranked", "ranked", "2026-01-01T00:00:00Z", "{}"))
+        for r in range(1, 10):
+            rounds.append((owner_id, match_id, r, "bench_owner", "attacker", "Ash", "ash", "win"))
+    cur.executemany(
+        """
+        INSERT INTO scraped_match_cards (username, match_id, map_name, mode, mode_key, match_date, summary_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        cards,
+    )
+    cur.executemany(
+        """
+        INSERT INTO player_rounds (player_id, match_id, round_id, username, side, operator, operator_key, result)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rounds,
+    )
+    db.refresh_match_latest_cards()
+    return owner_id
+
+
+def timed(db: Database, sql: str, player_id: int, repeats: int) -> tuple[float, int]:
+    cur = db.conn.cursor()
+    rows = 0
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        cur.execute(sql, (player_id,))
+        rows = len(cur.fetchall())
+    return (time.perf_counter() - t0) * 1000 / repeats, rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare latest-card CTE vs match_latest_card join")
+    ap.add_argument("--matches", type=int, default=2000)
+    ap.add_argument("--cards", type=int, nargs="+", default=[1, 4, 10], help="Duplicate cards per match")
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+
+    for cards_per_match in args.cards:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        db = Database(path)
+        try:
+            player_id = seed(db, args.matches, cards_per_match)
+            legacy_ms, legacy_rows = timed(db, LEGACY_SQL, player_id, args.repeats)
+            new_ms, new_rows = timed(db, MATERIALIZED_SQL, player_id, args.repeats)
+            print(
+                f"cards/match={cards_per_match:>3} matches={args.matches} "
+                f"legacy={legacy_ms:8.1f}ms rows={legacy_rows:>7} | "
+                f"match_latest_card={new_ms:8.1f}ms rows={new_rows:>7}"
+            )
+        finally:
+            db.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.analytics.round_operator_sets import count_operator_pairs, window_matches
+from src.database import Database
+
+ATTACKERS = ["Ash", "Thermite", "Sledge", "Hibana", "Zofia", "Iana", "Ace", "Buck", "Twitch", "Maverick"]
+DEFENDERS = ["Jager", "Bandit", "Mute", "Valkyrie", "Kaid", "Smoke", "Mira", "Azami", "Melusi", "Wamai"]
+
+# The heatmap's previous row load: every player-round row of the window, joined per request.
+LEGACY_ROWS_SQL = """
+    SELECT pr.match_id, pr.round_id, pr.side, pr.operator, pr.username, ro.winner_side, lc.map_name, lc.mode
+    FROM player_rounds pr
+    JOIN match_latest_card lc ON lc.match_id = pr.match_id
+    JOIN round_outcomes ro ON ro.player_id = pr.player_id AND ro.match_id = pr.match_id AND ro.round_id = pr.round_id
+    WHERE pr.player_id = ?
+      AND pr.operator IS NOT NULL
+      AND TRIM(pr.operator) != ''
+      AND DATETIME(COALESCE(lc.scraped_at, '1970-01-01 00:00:00')) >= DATETIME('now', '-90 days')
+    ORDER BY pr.match_id, pr.round_id
+"""
+
+
+def seed(db: Database, matches: int) -> int:
+    rng = random.Random(17)
+    player_id = db.add_player("bench")
+    db.save_scraped_match_cards("bench", [{"match_id": f"m{m}", "map": "Bank", "mode": "Ranked"} for m in range(matches)])
+    for m in range(matches):
+        outcomes, rounds = [], []
+        for rid in range(1, 10):
+            outcomes.append({"round_id": rid, "winner_side": rng.choice(("attacker", "defender"))})
+            for side, pool in (("attacker", ATTACKERS), ("defender", DEFENDERS)):
+                for slot in range(5):
+                    rounds.append({"round_id": rid, "side": side, "operator": rng.choice(pool), "player_id_tracker": f"{side}{slot}"})
+        db.save_round_outcomes(player_id, f"m{m}", outcomes, match_type="Ranked", commit=False)
+        db.save_player_rounds(player_id, f"m{m}", rounds, match_type="Ranked", commit=False)
+    db.conn.commit()
+    return player_id
+
+
+def legacy(db: Database, player_id: int) -> int:
+    rounds: dict[tuple, dict] = {}
+    for r in [dict(row) for row in db.conn.execute(LEGACY_ROWS_SQL, (player_id,))]:
+        b = rounds.setdefault((r["match_id"], r["round_id"]), {"winner": r["winner_side"], "atk": set(), "def": set()})
+        b["atk" if r["side"] == "attacker" else "def"].add(r["operator"])
+    pairs: dict[tuple, list[int]] = {}
+    for v in rounds.values():
+        if not v["atk"] or not v["def"]:
+            continue
+        win = 1 if v["winner"] == "attacker" else 0
+        for a in v["atk"]:
+            for d in v["def"]:
+                cell = pairs.setdefault((a, d), [0, 0])
+                cell[0] += 1
+                cell[1] += win
+    return len(pairs)
+
+
+def masks(db: Database, player_id: int) -> int:
+    cur = db.conn.cursor()
+    match_ids = [m["match_id"] for m in window_matches(cur, player_id, 90)]
+    return len(count_operator_pairs(cur, player_id, match_ids)["pair_stats"])
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="ATK/DEF heatmap counting: per-row Python sets vs round_operator_sets")
+    ap.add_argument("--matches", type=int, nargs="+", default=[100, 500, 2000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for matches in args.matches:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        db = Database(path)
+        try:
+            player_id = seed(db, matches)
+            assert legacy(db, player_id) == masks(db, player_id)
+            old_ms = best_of(lambda: legacy(db, player_id), args.repeat)
+            new_ms = best_of(lambda: masks(db, player_id), args.repeat)
+            print(
+                f"matches={matches:>5} rounds={matches * 9:>6}  legacy={old_ms:8.1f}ms  "
+                f"masks={new_ms:8.1f}ms  speedup=x{old_ms / max(new_ms, 1e-6):.1f}"
+            )
+        finally:
+            db.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
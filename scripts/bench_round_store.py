@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.analytics import round_store
+from src.analytics.round_store import RoundStore
+from src.analytics.workspace_panels import (
+    _compute_matchup_block,
+    _compute_operator_scatter,
+    _integrity_counters,
+)
+
+ATTACKERS = ["Ash", "Thermite", "Sledge", "Hibana", "Ace", "Zofia", "Buck", "Iana", "Twitch", "Thatcher"]
+DEFENDERS = ["Jager", "Bandit", "Mute", "Valkyrie", "Kaid", "Smoke", "Mira", "Azami", "Wamai", "Echo"]
+
+
+def synth_rows(rounds: int, seed: int = 1) -> list[dict]:
+    """Player-round dicts shaped like `_load_workspace_rows` (operators profile)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(rounds):
+        match_id = f"match-{i // 8:06d}"
+        winner = rng.choice(("attacker", "defender"))
+        for side, pool in (("attacker", ATTACKERS), ("defender", DEFENDERS)):
+            for slot, op in enumerate(rng.sample(pool, 5)):
+                rows.append(
+                    {
+                        "pr_id": len(rows) + 1,
+                        "player_id": 1,
+                        "match_id": match_id,
+                        "round_id": i % 8 + 1,
+                        "side": side,
+                        "operator": op,
+                        "operator_key": op.lower(),
+                        "username": f"{side[:3]}{slot}",
+                        "player_id_tracker": f"t-{side[:3]}{slot}",
+                        "kills": rng.randint(0, 2),
+                        "deaths": rng.randint(0, 1),
+                        "assists": rng.randint(0, 1),
+                        "headshots": 0,
+                        "first_blood": 0,
+                        "first_death": 0,
+                        "clutch_won": 0,
+                        "clutch_lost": 0,
+                        "match_type": "Ranked",
+                        "match_type_key": "ranked",
+                        "winner_side": winner,
+                        "map_name": "Bank",
+                        "card_mode": "Ranked",
+                        "match_date": "2026-01-01T00:00:00Z",
+                        "scraped_at": f"2026-01-01T00:{(i // 8) % 60:02d}:00Z",
+                    }
+                )
+    return rows
+
+
+def measure_bytes(build) -> tuple[object, int]:
+    tracemalloc.start()
+    obj = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def time_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def run(rounds: int, repeat: int) -> None:
+    records = [tuple(r.values()) for r in synth_rows(rounds)]
+    keys = list(synth_rows(1)[0].keys())
+    rows, dict_bytes = measure_bytes(lambda: [dict(zip(keys, rec)) for rec in records])
+    store, store_bytes = measure_bytes(lambda: RoundStore.from_rows(rows))
+    backend = "numpy" if round_store.numpy_available() else "python"
+    print(
+        f"rounds={rounds:>7} rows={len(rows):>8}  dict={dict_bytes / 1e6:8.2f}MB  "
+        f"store={store_bytes / 1e6:7.2f}MB  per-10k-rounds dict={dict_bytes * 1e4 / rounds / 1e6:6.2f}MB "
+        f"store={store_bytes * 1e4 / rounds / 1e6:5.2f}MB  backend={backend}"
+    )
+    panels = (
+        ("scatter", lambda src: _compute_operator_scatter(src)),
+        ("scatter/matches", lambda src: _compute_operator_scatter(src, weighting="matches")),
+        ("matchup", lambda src: _compute_matchup_block(src)),
+        ("matchup/matches", lambda src: _compute_matchup_block(src, weighting="matches")),
+        ("integrity", lambda src: _integrity_counters(src)),
+    )
+    for label, fn in panels:
+        dict_ms = time_ms(lambda: fn(rows), repeat)
+        store_ms = time_ms(lambda: fn(store), repeat)
+        print(f"  {label:<16} dict={dict_ms:9.2f}ms  store={store_ms:8.2f}ms  x{dict_ms / max(store_ms, 1e-6):6.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare workspace panels on row dicts vs the columnar RoundStore")
+    ap.add_argument("--rounds", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--no-numpy", action="store_true", help="Force the pure-Python group-by fallback")
+    args = ap.parse_args()
+    if args.no_numpy:
+        round_store.np = None
+    for rounds in args.rounds:
+        run(rounds, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.jakal_scraper.db import SQLiteStore
+
+MIGRATIONS = ROOT / "src" / "jakal_scraper" / "migrations"
+
+
+def write_match(store: SQLiteStore, match_id: str) -> None:
+    """The runner's per-match write set: match, 10 players, 9 rounds, 90 player-rounds, kills, status."""
+    players = [{"player_uuid": f"{match_id}-p{i}", "handle": f"p{i}", "team_id": i % 2} for i in range(10)]
+    store.upsert_match({"match_id": match_id, "map_name": "Bank", "gamemode": "ranked"})
+    store.upsert_match_players(match_id, players)
+    store.upsert_rounds(match_id, [{"round_id": r, "winner_team_id": r % 2} for r in range(1, 10)])
+    store.upsert_player_rounds(
+        match_id,
+        [{"round_id": r, "player_uuid": p["player_uuid"], "kills": 1} for r in range(1, 10) for p in players],
+    )
+    store.upsert_kill_events(
+        match_id,
+        [{"round_id": r, "timestamp_ms": 1000 * k, "victim_uuid": players[k]["player_uuid"]} for r in range(1, 10) for k in range(5)],
+    )
+    store.mark_match_success(match_id, v2_done=True, v1_done=False)
+
+
+def run(mode: str, matches: int, batch: int) -> tuple[float, int]:
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    store = SQLiteStore.open(Path(path))
+    try:
+        store.apply_migrations(MIGRATIONS)
+        store.commits = 0
+        if mode == "write-behind":
+            store.begin_write_behind(max_units=batch, max_age_s=60.0)
+        t0 = time.perf_counter()
+        for m in range(matches):
+            if mode == "per-call":
+                write_match(store, f"m{m:05d}")
+            else:
+                with store.transaction():
+                    write_match(store, f"m{m:05d}")
+        store.flush()
+        return time.perf_counter() - t0, store.commits
+    finally:
+        store.close()
+        os.remove(path)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Scraper store ingest: commit per upsert vs per match vs write-behind batch")
+    ap.add_argument("--matches", type=int, default=300)
+    ap.add_argument("--batch", type=int, default=25)
+    args = ap.parse_args()
+
+    base = None
+    for mode in ("per-call", "per-match", "write-behind"):
+        elapsed, commits = run(mode, args.matches, args.batch)
+        base = base or elapsed
+        print(
+            f"{mode:>12}: {args.matches / elapsed:8.1f} matches/s  commits={commits:>5}  "
+            f"x{base / max(elapsed, 1e-9):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.database import Database
+
+FIXTURE = ROOT / "tests" / "fixtures" / "match1.json"
+
+
+def seed(db: Database, cards: int) -> None:
+    summary_json = FIXTURE.read_text(encoding="utf-8")
+    json.loads(summary_json)
+    db.conn.executemany(
+        """
+        INSERT INTO scraped_match_cards (username, match_id, map_name, mode, mode_key, match_date, summary_json)
+        VALUES (?, ?, 'Bank', 'Ranked', 'ranked', '2026-01-01T00:00:00Z', ?)
+        """,
+        [(f"owner{i % 5}", f"bench-{i:06d}", summary_json) for i in range(cards)],
+    )
+    db.conn.commit()
+
+
+def run(cards: int, batch_size: int, workers: int) -> dict:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db = Database(path)
+    try:
+        seed(db, cards)
+        return db.unpack_pending_scraped_match_cards(batch_size=batch_size, workers=workers)
+    finally:
+        db.close()
+        os.remove(path)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Measure scraped-card unpack throughput")
+    ap.add_argument("--cards", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = ap.parse_args()
+
+    # batch_size=1 inline approximates the old one-transaction-per-card path.
+    for label, batch_size, workers in (
+        ("per-card", 1, 0),
+        ("batched", 250, 0),
+        (f"batched+{args.workers}proc", 250, args.workers),
+    ):
+        stats = run(args.cards, batch_size, workers)
+        print(
+            f"{label:<18} cards={stats['scanned']:>6} unpacked={stats['unpacked_matches']:>6} "
+            f"{stats['elapsed_seconds']:7.2f}s  {stats['cards_per_second']:8.1f} cards/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import card_payloads
+from src.database import Database
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def _file_bytes(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Move scraped match card JSON into the compressed scraped_card_payloads table"
+    )
+    ap.add_argument("--db", default="data/jakal.db", help="Path to SQLite DB")
+    ap.add_argument("--batch-size", type=int, default=500, help="Cards per transaction")
+    ap.add_argument("--codec", default=card_payloads.DEFAULT_CODEC, help="Payload codec (zlib-d1, zstd-d1, zlib)")
+    ap.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM; the file keeps its size until one runs")
+    args = ap.parse_args()
+
+    db = Database(args.db)
+    try:
+        before_file = _file_bytes(db.db_path)
+        before = db.get_scraped_card_payload_stats()
+        print(
+            f"[MIGRATE] {db.db_path}: file={_mb(before_file)} legacy_cards={before['legacy_cards']} "
+            f"legacy_json={_mb(before['legacy_bytes'])} codec={args.codec}"
+        )
+
+        def progress(stats: dict) -> None:
+            print(f"[MIGRATE] cards={stats['cards']} payloads={stats['payloads']} stored={_mb(stats['stored_bytes'])}")
+
+        stats = db.migrate_scraped_card_payloads(batch_size=args.batch_size, codec=args.codec, progress=progress)
+        if not args.no_vacuum and stats["cards"]:
+            print("[MIGRATE] VACUUM ...")
+            db.conn.execute("VACUUM")
+        after = db.get_scraped_card_payload_stats()
+    finally:
+        db.close()
+    # Measured after close, once the WAL has been checkpointed into the main file.
+    after_file = _file_bytes(db.db_path)
+
+    ratio = stats["legacy_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0.0
+    print(
+        f"[MIGRATE] migrated {stats['cards']} cards ({stats['payloads']} payloads, {stats['emptied']} empty dropped) "
+        f"in {stats['elapsed_seconds']}s"
+    )
+    print(f"[MIGRATE] card JSON: {_mb(stats['legacy_bytes'])} -> {_mb(stats['stored_bytes'])} (x{ratio:.1f})")
+    print(
+        f"[MIGRATE] payload table: {after['payloads']} payloads, {_mb(after['stored_bytes'])} stored "
+        f"for {_mb(after['raw_bytes'])} of JSON; legacy cards left: {after['legacy_cards']}"
+    )
+    saved = before_file - after_file
+    print(f"[MIGRATE] db file: {_mb(before_file)} -> {_mb(after_file)} ({_mb(saved)} saved)")
+
+
+if __name__ == "__main__":
+    main()
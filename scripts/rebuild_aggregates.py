@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.database import Database
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Rebuild agg_* tables and their contribution ledger from scratch")
+    ap.add_argument("--db", default="data/jakal.db", help="Path to SQLite DB")
+    ap.add_argument("--tracker", action="append", dest="trackers", help="Only rebuild these tracker IDs")
+    args = ap.parse_args()
+
+    db = Database(args.db)
+    try:
+        t0 = time.perf_counter()
+        if args.trackers:
+            db.refresh_aggregates_for_tracker_ids(args.trackers)
+            count = len(args.trackers)
+        else:
+            count = db.rebuild_all_aggregates()
+        print(f"OK: rebuilt aggregates for {count} trackers in {time.perf_counter() - t0:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
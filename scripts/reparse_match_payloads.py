@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.api_client import TrackerAPIClient
+from src.database import Database
+
+
+def reparse(db: Database, match_ids: list[str] | None = None, attach_tracked: bool = False) -> dict[str, int]:
+    """Re-run parse_match_detail over stored payloads and re-save them for their owners (no network)."""
+    client = TrackerAPIClient()
+    tracked = {}
+    if attach_tracked:
+        tracked = {
+            Database._username_key(p.get("username")): int(p["player_id"])
+            for p in db.get_all_players()
+            if p.get("username")
+        }
+
+    ids = sorted(match_ids) if match_ids else sorted(db.get_match_detail_payload_ids())
+    summary = {"payloads": 0, "saves": 0, "attached": 0, "round_rows": 0, "errors": 0}
+    for match_id in ids:
+        payload = db.get_match_detail_payload(match_id)
+        if payload is None:
+            continue
+        summary["payloads"] += 1
+        try:
+            detail = client.parse_match_detail(match_id, payload)
+        except Exception as exc:
+            summary["errors"] += 1
+            print(f"[REPARSE] {match_id}: parse failed: {exc}")
+            continue
+
+        owners = set(db.get_match_detail_owner_ids(match_id))
+        if tracked:
+            for player in detail.get("players", []):
+                owner = tracked.get(Database._username_key(player.get("username")))
+                if owner is not None and owner not in owners:
+                    owners.add(owner)
+                    summary["attached"] += 1
+        for owner in sorted(owners):
+            saved = db.save_full_match_detail_history(owner, [detail])
+            summary["saves"] += 1
+            summary["round_rows"] += int(saved.get("round_rows", 0))
+    return summary
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Rebuild match detail rows from the stored raw payloads")
+    ap.add_argument("--db", default="data/jakal.db", help="Path to SQLite DB")
+    ap.add_argument("--match-id", action="append", dest="match_ids", help="Limit to these match IDs")
+    ap.add_argument(
+        "--attach-tracked",
+        action="store_true",
+        help="Also save each match for tracked players found in the lobby who do not have it yet",
+    )
+    args = ap.parse_args()
+
+    db = Database(args.db)
+    try:
+        t0 = time.perf_counter()
+        summary = reparse(db, match_ids=args.match_ids, attach_tracked=args.attach_tracked)
+        stats = db.get_match_detail_payload_stats()
+        print(
+            f"OK: reparsed {summary['payloads']} payloads -> {summary['saves']} saves "
+            f"({summary['attached']} newly attached, {summary['round_rows']} round rows, "
+            f"{summary['errors']} errors) in {time.perf_counter() - t0:.1f}s"
+        )
+        if stats["raw_bytes"]:
+            print(
+                f"Store: {stats['payloads']} payloads, {stats['raw_bytes'] / 1e6:.1f}MB raw -> "
+                f"{stats['stored_bytes'] / 1e6:.1f}MB compressed"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,18 @@ def parse_args() -> argparse.Namespace:
     ap.add_argument("--poison-cooldown-days", type=int, default=7, help="Cooldown after max attempts")
     ap.add_argument("--max-session-restarts", type=int, default=3, help="Browser session restarts allowed after repeated timeouts")
     ap.add_argument("--restart-backoff", type=float, default=5.0, help="Seconds to sleep before restarting the browser session")
+    ap.add_argument("--tabs", type=int, default=1, help="Browser tabs capturing match details concurrently")
+    ap.add_argument("--max-rate", type=float, default=1.0, help="Match detail navigations per second across all tabs (0 = unlimited)")
+    ap.add_argument("--tab-max-errors", type=int, default=3, help="Consecutive timeouts/errors before a tab is replaced")
+    ap.add_argument("--tab-max-restarts", type=int, default=5, help="Tab replacements allowed before the whole session restarts")
+    ap.add_argument(
+        "--capture-mode",
+        choices=["block", "observe", "off"],
+        default="block",
+        help="Abort resources the captured XHRs don't need (block), only measure them (observe), or load everything (off)",
+    )
+    ap.add_argument("--write-batch", type=int, default=25, help="Matches committed per SQLite transaction (1 = commit every match)")
+    ap.add_argument("--write-batch-age", type=float, default=5.0, help="Seconds before a partial write batch is committed")
     ap.add_argument("--user-agent", type=str, default=None, help="Optional UA override")
     return ap.parse_args()
 
@@ -59,6 +71,13 @@ def main() -> None:
         poison_cooldown_days=a.poison_cooldown_days,
         max_session_restarts=a.max_session_restarts,
         restart_backoff_s=a.restart_backoff,
+        tabs=a.tabs,
+        max_match_rate_per_s=a.max_rate,
+        tab_max_consecutive_errors=a.tab_max_errors,
+        tab_max_restarts=a.tab_max_restarts,
+        capture_mode=a.capture_mode,
+        write_batch_size=a.write_batch,
+        write_batch_max_age_s=a.write_batch_age,
         user_agent=a.user_agent,
     )
     asyncio.run(_run(cfg))
@@ -0,0 +1,351 @@
+"""
+ATK x DEF cell engine shared by the heatmap endpoint and the workspace matchup matrix.
+
+Counting produces per-pair, per-attacker and per-defender unit counts; this module
+turns them into dense attacker x defender matrices and computes every cell's win
+rate, baseline, interval and lift (percent_delta, logit_lift, log_odds_ratio) as
+array operations. `scatter_pair_counts` builds those counts from round x operator
+incidence matrices with one matrix product per statistic.
+
+NumPy is optional. Without it cells are computed one at a time with the same
+formulas, in the same order, so both paths return identical JSON. Logarithms go
+through math.log on either path: np.log can differ from libm in the last bit, which
+would show up at rounding ties.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Z = 1.96
+EPS = 1e-6
+LIFT_MODES = ("percent_delta", "logit_lift", "log_odds_ratio")
+
+
+def cell_options(normalization: str, lift_mode: str, interval_method: str) -> tuple[str, str, str]:
+    """Validated (normalization, lift_mode, interval_method) keys with the endpoint defaults."""
+    norm_key = str(normalization or "global").strip().lower()
+    if norm_key not in {"global", "attacker"}:
+        norm_key = "global"
+    lift_key = str(lift_mode or "percent_delta").strip().lower()
+    if lift_key not in LIFT_MODES:
+        lift_key = "percent_delta"
+    interval_key = str(interval_method or "wilson").strip().lower()
+    if interval_key not in {"wilson", "wald"}:
+        interval_key = "wilson"
+    return norm_key, lift_key, interval_key
+
+
+def scatter_pair_counts(atk: Any, dfn: Any, win: Any) -> dict:
+    """
+    Pair and per-operator counts from unit x operator incidence matrices (NumPy only).
+
+    `atk` and `dfn` are 0/1 arrays of shape (units, operators) over a shared operator
+    index; `win` is 1 where the attackers won the unit. Units missing either side are
+    dropped. Returns float matrices pair_n / pair_w and vectors atk_n / atk_w / def_n,
+    plus the number of kept units and their attacker wins.
+    """
+    valid = atk.any(axis=1) & dfn.any(axis=1)
+    atk = atk[valid].astype(np.float64)
+    dfn = dfn[valid].astype(np.float64)
+    win = np.asarray(win, dtype=np.float64)[valid]
+    return {
+        "units": int(valid.sum()),
+        "atk_unit_wins": int(win.sum()),
+        "pair_n": atk.T @ dfn,
+        "pair_w": (atk * win[:, None]).T @ dfn,
+        "atk_n": atk.sum(axis=0),
+        "atk_w": win @ atk,
+        "def_n": dfn.sum(axis=0),
+    }
+
+
+class PairGrid:
+    """
+    Attacker x defender counts for one heatmap, operators ordered by (-units, name).
+
+    Built from the counters the counting paths return: pair_stats {(atk, def): {"n",
+    "atk_wins"}}, atk_counts, atk_wins_by_op, def_counts, plus the unit totals.
+    """
+
+    def __init__(
+        self,
+        *,
+        pair_stats: dict,
+        atk_counts: dict,
+        atk_wins_by_op: dict,
+        def_counts: dict,
+        total_units: int,
+        atk_unit_wins: int,
+    ):
+        self.pair_stats = pair_stats
+        self.atk_counts = atk_counts
+        self.atk_wins_by_op = atk_wins_by_op
+        self.def_counts = def_counts
+        self.total_units = int(total_units)
+        self.atk_unit_wins = int(atk_unit_wins)
+        self.attackers = sorted(atk_counts, key=lambda x: (-atk_counts.get(x, 0), x))
+        self.defenders = sorted(def_counts, key=lambda x: (-def_counts.get(x, 0), x))
+        self._matrices = None
+
+    @property
+    def global_baseline(self) -> float:
+        return (self.atk_unit_wins / self.total_units) * 100.0 if self.total_units else 0.0
+
+    def matrices(self) -> tuple:
+        """(n, wins) as dense float arrays in attacker x defender order (NumPy only, cached)."""
+        if self._matrices is not None:
+            return self._matrices
+        a_idx = {a: i for i, a in enumerate(self.attackers)}
+        d_idx = {d: j for j, d in enumerate(self.defenders)}
+        n = np.zeros((len(self.attackers), len(self.defenders)), dtype=np.float64)
+        wins = np.zeros_like(n)
+        for (a, d), cell in self.pair_stats.items():
+            i, j = a_idx.get(a), d_idx.get(d)
+            if i is None or j is None:
+                continue
+            n[i, j] = int(cell["n"])
+            wins[i, j] = int(cell["atk_wins"])
+        self._matrices = (n, wins)
+        return self._matrices
+
+
+def _log(values: Any) -> Any:
+    return np.fromiter(map(math.log, values.tolist()), dtype=np.float64, count=len(values))
+
+
+def _round_array(values: Any, places: int) -> list[float]:
+    """
+    round(v, places) for every value, vectorized.
+
+    Away from a .5 boundary the nearest integer of v * 10**places is unambiguous and
+    k / 10**places is the same correctly rounded float round() returns. Values whose
+    scaled product lands next to a tie are rounded by round() itself.
+    """
+    scale = 10.0 ** places
+    scaled = values * scale
+    out = (np.round(scaled) / scale).tolist()
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) <= 1e-7 * np.maximum(1.0, np.abs(scaled))
+    for i in np.flatnonzero(near_tie).tolist():
+        out[i] = round(float(values[i]), places)
+    return out
+
+
+def _cells_numpy(grid: PairGrid, norm_key: str, lift_key: str, interval_key: str) -> tuple[dict, dict]:
+    n_mat, w_mat = grid.matrices()
+    rows, cols = np.nonzero(n_mat)
+    n = n_mat[rows, cols]
+    wins = w_mat[rows, cols]
+    atk_n = np.array([grid.atk_counts.get(a, 0) for a in grid.attackers], dtype=np.float64)[rows]
+    atk_w = np.array([grid.atk_wins_by_op.get(a, 0) for a in grid.attackers], dtype=np.float64)[rows]
+    global_baseline = grid.global_baseline
+
+    win_pct = (wins / n) * 100.0
+    if norm_key == "attacker":
+        baseline_used = np.where(atk_n > 0, (atk_w / np.where(atk_n > 0, atk_n, 1.0)) * 100.0, global_baseline)
+    else:
+        baseline_used = np.full(len(n), global_baseline)
+    p = wins / n
+    if interval_key == "wilson":
+        z2 = Z * Z
+        denom = 1.0 + (z2 / n)
+        center = (p + (z2 / (2.0 * n))) / denom
+        half = (Z / denom) * np.sqrt((p * (1.0 - p) / n) + (z2 / (4.0 * n * n)))
+        lo_p = np.maximum(0.0, center - half)
+        hi_p = np.minimum(1.0, center + half)
+    else:
+        se = np.sqrt((p * (1.0 - p)) / n)
+        lo_p = np.maximum(0.0, p - Z * se)
+        hi_p = np.minimum(1.0, p + Z * se)
+
+    baseline_prob = np.clip(baseline_used / 100.0, EPS, 1.0 - EPS)
+    lo_prob = np.clip(lo_p, EPS, 1.0 - EPS)
+    hi_prob = np.clip(hi_p, EPS, 1.0 - EPS)
+    p_prob = np.clip(p, EPS, 1.0 - EPS)
+    eps_clips = sum(int(np.count_nonzero((x == EPS) | (x == 1.0 - EPS))) for x in (baseline_prob, lo_prob, hi_prob, p_prob))
+    continuity = 0
+
+    if lift_key == "percent_delta":
+        metric = win_pct - baseline_used
+        ci_low = (lo_p * 100.0) - baseline_used
+        ci_high = (hi_p * 100.0) - baseline_used
+    elif lift_key == "logit_lift":
+        # Jeffreys-smoothed mean for stable logit when wins==0 or wins==n.
+        p_smooth = np.clip((wins + 0.5) / (n + 1.0), EPS, 1.0 - EPS)
+        base_logit = _log(baseline_prob / (1.0 - baseline_prob))
+        metric = _log(p_smooth / (1.0 - p_smooth)) - base_logit
+        ci_low = _log(lo_prob / (1.0 - lo_prob)) - base_logit
+        ci_high = _log(hi_prob / (1.0 - hi_prob)) - base_logit
+    else:
+        a_count = wins.copy()
+        b_count = np.maximum(0.0, n - wins)
+        if norm_key == "attacker":
+            c_count = np.maximum(0.0, atk_w - a_count)
+            d_count = np.maximum(0.0, (atk_n - atk_w) - b_count)
+        else:
+            total_wins = float(grid.atk_unit_wins)
+            total_losses = float(max(0, grid.total_units - grid.atk_unit_wins))
+            c_count = np.maximum(0.0, total_wins - a_count)
+            d_count = np.maximum(0.0, total_losses - b_count)
+        # Continuity correction for zero cells to avoid infinities.
+        zero = np.minimum(np.minimum(a_count, b_count), np.minimum(c_count, d_count)) <= 0.0
+        continuity = int(np.count_nonzero(zero))
+        bump = np.where(zero, 0.5, 0.0)
+        a_count, b_count, c_count, d_count = a_count + bump, b_count + bump, c_count + bump, d_count + bump
+        metric = _log((a_count * d_count) / (b_count * c_count))
+        se_log_or = np.sqrt((1.0 / a_count) + (1.0 / b_count) + (1.0 / c_count) + (1.0 / d_count))
+        ci_low = metric - (1.96 * se_log_or)
+        ci_high = metric + (1.96 * se_log_or)
+
+    non_finite = 0
+    for arr in (metric, ci_low, ci_high):
+        bad = ~np.isfinite(arr)
+        non_finite += int(np.count_nonzero(bad))
+        arr[bad] = 0.0
+    columns = {
+        "attacker": [grid.attackers[i] for i in rows.tolist()],
+        "defender": [grid.defenders[j] for j in cols.tolist()],
+        "n_rounds": n.astype(np.int64).tolist(),
+        "atk_wins": wins.astype(np.int64).tolist(),
+        "win_pct": win_pct,
+        "baseline_wr": baseline_used,
+        "win_ci_low": lo_p * 100.0,
+        "win_ci_high": hi_p * 100.0,
+        "lift": metric,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+    }
+    pathology = {
+        "or_continuity_applied_count": continuity,
+        "logit_eps_clips_count": eps_clips,
+        "nan_or_inf_cells_count": non_finite,
+    }
+    return columns, pathology
+
+
+def _cells_python(grid: PairGrid, norm_key: str, lift_key: str, interval_key: str) -> tuple[dict, dict]:
+    columns: dict[str, list] = {
+        key: []
+        for key in (
+            "attacker", "defender", "n_rounds", "atk_wins", "win_pct", "baseline_wr",
+            "win_ci_low", "win_ci_high", "lift", "ci_low", "ci_high",
+        )
+    }
+    pathology = {"or_continuity_applied_count": 0, "logit_eps_clips_count": 0, "nan_or_inf_cells_count": 0}
+    global_baseline = grid.global_baseline
+    for a in grid.attackers:
+        for d in grid.defenders:
+            cell = grid.pair_stats.get((a, d))
+            if not cell or not cell["n"]:
+                continue
+            n = int(cell["n"])
+            wins = int(cell["atk_wins"])
+            win_pct = (wins / n) * 100.0
+            atk_total = grid.atk_counts.get(a, 0)
+            row_baseline = (grid.atk_wins_by_op.get(a, 0) / atk_total) * 100.0 if atk_total else global_baseline
+            baseline_used = row_baseline if norm_key == "attacker" else global_baseline
+            p = wins / n
+            if interval_key == "wilson":
+                z2 = Z * Z
+                denom = 1.0 + (z2 / n)
+                center = (p + (z2 / (2.0 * n))) / denom
+                half = (Z / denom) * math.sqrt((p * (1.0 - p) / n) + (z2 / (4.0 * n * n)))
+                lo_p = max(0.0, center - half)
+                hi_p = min(1.0, center + half)
+            else:
+                se = math.sqrt((p * (1.0 - p)) / n)
+                lo_p = max(0.0, p - Z * se)
+                hi_p = min(1.0, p + Z * se)
+
+            probs = [max(EPS, min(1.0 - EPS, x)) for x in (baseline_used / 100.0, lo_p, hi_p, p)]
+            pathology["logit_eps_clips_count"] += sum(1 for x in probs if x in {EPS, 1.0 - EPS})
+            baseline_prob, lo_prob, hi_prob, _p_prob = probs
+
+            if lift_key == "percent_delta":
+                metric = win_pct - baseline_used
+                ci_low = (lo_p * 100.0) - baseline_used
+                ci_high = (hi_p * 100.0) - baseline_used
+            elif lift_key == "logit_lift":
+                p_smooth = max(EPS, min(1.0 - EPS, (wins + 0.5) / (n + 1.0)))
+                base_logit = math.log(baseline_prob / (1.0 - baseline_prob))
+                metric = math.log(p_smooth / (1.0 - p_smooth)) - base_logit
+                ci_low = math.log(lo_prob / (1.0 - lo_prob)) - base_logit
+                ci_high = math.log(hi_prob / (1.0 - hi_prob)) - base_logit
+            else:
+                a_count = float(wins)
+                b_count = float(max(0, n - wins))
+                if norm_key == "attacker":
+                    row_total = float(grid.atk_counts.get(a, 0))
+                    row_wins = float(grid.atk_wins_by_op.get(a, 0))
+                    c_count = float(max(0.0, row_wins - a_count))
+                    d_count = float(max(0.0, (row_total - row_wins) - b_count))
+                else:
+                    c_count = float(max(0.0, float(grid.atk_unit_wins) - a_count))
+                    d_count = float(max(0.0, float(max(0, grid.total_units - grid.atk_unit_wins)) - b_count))
+                if min(a_count, b_count, c_count, d_count) <= 0.0:
+                    pathology["or_continuity_applied_count"] += 1
+                    a_count += 0.5
+                    b_count += 0.5
+                    c_count += 0.5
+                    d_count += 0.5
+                metric = math.log((a_count * d_count) / (b_count * c_count))
+                se_log_or = math.sqrt((1.0 / a_count) + (1.0 / b_count) + (1.0 / c_count) + (1.0 / d_count))
+                ci_low = metric - (1.96 * se_log_or)
+                ci_high = metric + (1.96 * se_log_or)
+
+            values = []
+            for value in (metric, ci_low, ci_high):
+                if not math.isfinite(value):
+                    pathology["nan_or_inf_cells_count"] += 1
+                    value = 0.0
+                values.append(value)
+            for key, value in zip(
+                columns,
+                (a, d, n, wins, win_pct, baseline_used, lo_p * 100.0, hi_p * 100.0, *values),
+            ):
+                columns[key].append(value)
+    return columns, pathology
+
+
+def compute_cells(
+    grid: PairGrid,
+    *,
+    norm_key: str,
+    lift_key: str,
+    interval_key: str,
+    pct_digits: int,
+    lift_digits: int,
+) -> tuple[list[dict], dict]:
+    """
+    Rendered cells (attacker-major, non-empty pairs only) and pathology counters.
+
+    Percent fields round to `pct_digits`; lift and its interval to `lift_digits`.
+    """
+    if np is not None and grid.pair_stats:
+        columns, pathology = _cells_numpy(grid, norm_key, lift_key, interval_key)
+    else:
+        columns, pathology = _cells_python(grid, norm_key, lift_key, interval_key)
+    digits = {
+        "win_pct": pct_digits,
+        "baseline_wr": pct_digits,
+        "win_ci_low": pct_digits,
+        "win_ci_high": pct_digits,
+        "lift": lift_digits,
+        "ci_low": lift_digits,
+        "ci_high": lift_digits,
+    }
+    for key, places in digits.items():
+        values = columns[key]
+        if isinstance(values, list):
+            columns[key] = [round(v, places) for v in values]
+        else:
+            columns[key] = _round_array(values, places)
+    keys = list(columns)
+    cells = [dict(zip(keys, values)) for values in zip(*columns.values())]
+    return cells, pathology
@@ -68,7 +68,7 @@ def build_insight_features(
             f"""
             SELECT me.match_id, LOWER(TRIM(COALESCE(me.result, ''))) AS result
             FROM match_detail_players me
-            WHERE LOWER(TRIM(me.username)) = LOWER(TRIM(?))
+            WHERE me.username_key = LOWER(TRIM(?))
               AND me.match_id IN ({ph})
             """,
             (username_l, *chunk),
@@ -77,13 +77,13 @@ def build_insight_features(
 
         cur.execute(
             f"""
-            SELECT me.match_id, LOWER(TRIM(tm.username)) AS teammate
+            SELECT me.match_id, tm.username_key AS teammate
             FROM match_detail_players me
             JOIN match_detail_players tm
               ON tm.match_id = me.match_id
              AND tm.team_id = me.team_id
-             AND LOWER(TRIM(tm.username)) != LOWER(TRIM(me.username))
-            WHERE LOWER(TRIM(me.username)) = LOWER(TRIM(?))
+             AND tm.username_key != me.username_key
+            WHERE me.username_key = LOWER(TRIM(?))
               AND me.match_id IN ({ph})
             """,
             (username_l, *chunk),
@@ -110,17 +110,9 @@ def build_insight_features(
 
         cur.execute(
             f"""
-            WITH latest AS (
-                SELECT match_id, MAX(scraped_at) AS scraped_at
-                FROM scraped_match_cards
-                WHERE match_id IN ({ph})
-                GROUP BY match_id
-            )
-            SELECT smc.match_id, COALESCE(NULLIF(TRIM(smc.map_name), ''), 'unknown') AS map_name
-            FROM scraped_match_cards smc
-            JOIN latest l
-              ON l.match_id = smc.match_id
-             AND l.scraped_at = smc.scraped_at
+            SELECT match_id, COALESCE(NULLIF(TRIM(map_name), ''), 'unknown') AS map_name
+            FROM match_latest_card
+            WHERE match_id IN ({ph})
             """,
             (*chunk,),
         )
@@ -0,0 +1,249 @@
+"""
+Shared per-player dataset for the v2/v3 analysis plugins.
+
+Every plugin used to run its own full-history SQL over player_rounds and
+match_detail_players for the same username. A PlayerDataset loads those rows once
+(ranked rounds with their round outcome, the player's match rows, every
+participant of those matches, and latest-card metadata) and the plugins compute
+from memory. The web app caches one dataset per (username, db revision).
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Iterable
+
+RANKED_MATCH_TYPE = "Ranked"
+_IN_CHUNK = 500
+
+_ROUND_COLUMNS = (
+    "player_id",
+    "match_id",
+    "round_id",
+    "side",
+    "operator",
+    "result",
+    "kills",
+    "deaths",
+    "first_blood",
+    "first_death",
+    "clutch_won",
+    "clutch_lost",
+    "killed_by_operator",
+)
+_MATCH_COLUMNS = (
+    "match_id",
+    "team_id",
+    "result",
+    "rank_points",
+    "rank_points_delta",
+    "kills",
+    "deaths",
+    "kd_ratio",
+    "scraped_at",
+)
+_PARTICIPANT_COLUMNS = (
+    "match_id",
+    "username",
+    "team_id",
+    "result",
+    "kills",
+    "deaths",
+    "kd_ratio",
+    "rank_points",
+    "rank_points_delta",
+)
+
+
+def _connection(db_or_conn: Any) -> Any:
+    return db_or_conn.conn if hasattr(db_or_conn, "conn") else db_or_conn
+
+
+def _dict_rows(cur: Any) -> list[dict]:
+    columns = [d[0] for d in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def _chunked_in(conn: Any, sql: str, values: Iterable[str]) -> list[dict]:
+    """Run `sql` (with one `{placeholders}` slot) over `values` in bound-parameter chunks."""
+    ordered = sorted(set(values))
+    rows: list[dict] = []
+    cur = conn.cursor()
+    for start in range(0, len(ordered), _IN_CHUNK):
+        chunk = ordered[start:start + _IN_CHUNK]
+        cur.execute(sql.format(placeholders=",".join("?" * len(chunk))), chunk)
+        rows.extend(_dict_rows(cur))
+    return rows
+
+
+class PlayerDataset:
+    """
+    Ranked rows for one player, pre-joined in memory.
+
+    - ``rounds``: the player's ranked player_rounds rows ordered by (match_id, round_id),
+      each carrying ``end_reason``/``winner_side`` (None when the round has no outcome),
+      ``has_outcome`` and the latest card's ``map_name``.
+    - ``matches``: the player's ranked match_detail_players rows, newest scrape first.
+    - ``participants``: match_id -> every match_detail_players row of those matches.
+    - ``cards``: match_id -> latest-card metadata (map_name, mode, match_date).
+    """
+
+    def __init__(
+        self,
+        username: str,
+        rounds: list[dict],
+        matches: list[dict],
+        participants: dict[str, list[dict]],
+        cards: dict[str, dict],
+        revision: str = "",
+    ):
+        self.username = str(username or "").strip()
+        self.rounds = rounds
+        self.matches = matches
+        self.participants = participants
+        self.cards = cards
+        self.revision = str(revision or "")
+
+    @classmethod
+    def load(cls, db_or_conn: Any, username: str, revision: str = "") -> "PlayerDataset":
+        conn = _connection(db_or_conn)
+        clean_username = str(username or "").strip()
+        cur = conn.cursor()
+
+        cur.execute(
+            f"""
+            SELECT {", ".join(_ROUND_COLUMNS)}
+            FROM player_rounds
+            WHERE username = ?
+              AND match_type = ?
+            ORDER BY match_id, round_id
+            """,
+            (clean_username, RANKED_MATCH_TYPE),
+        )
+        rounds = _dict_rows(cur)
+
+        cur.execute(
+            f"""
+            SELECT {", ".join(_MATCH_COLUMNS)}
+            FROM match_detail_players
+            WHERE username = ?
+              AND match_type = ?
+            ORDER BY scraped_at DESC
+            """,
+            (clean_username, RANKED_MATCH_TYPE),
+        )
+        matches = _dict_rows(cur)
+
+        participants: dict[str, list[dict]] = {}
+        for row in _chunked_in(
+            conn,
+            f"""
+            SELECT {", ".join(_PARTICIPANT_COLUMNS)}
+            FROM match_detail_players
+            WHERE match_id IN ({{placeholders}})
+            ORDER BY id
+            """,
+            (m["match_id"] for m in matches),
+        ):
+            participants.setdefault(row["match_id"], []).append(row)
+
+        round_match_ids = {r["match_id"] for r in rounds}
+        outcomes: dict[tuple, dict] = {}
+        for row in _chunked_in(
+            conn,
+            """
+            SELECT match_id, round_id, end_reason, winner_side
+            FROM round_outcomes
+            WHERE match_id IN ({placeholders})
+            ORDER BY id
+            """,
+            round_match_ids,
+        ):
+            # Several tracked players can own the same match; one outcome per round.
+            outcomes.setdefault((row["match_id"], row["round_id"]), row)
+
+        cards = {
+            row["match_id"]: row
+            for row in _chunked_in(
+                conn,
+                """
+                SELECT match_id, map_name, mode, match_date
+                FROM match_latest_card
+                WHERE match_id IN ({placeholders})
+                """,
+                round_match_ids | {m["match_id"] for m in matches},
+            )
+        }
+
+        for r in rounds:
+            outcome = outcomes.get((r["match_id"], r["round_id"]))
+            r["has_outcome"] = outcome is not None
+            r["end_reason"] = outcome["end_reason"] if outcome else None
+            r["winner_side"] = outcome["winner_side"] if outcome else None
+            r["map_name"] = (cards.get(r["match_id"]) or {}).get("map_name")
+
+        return cls(clean_username, rounds, matches, participants, cards, revision=revision)
+
+    @classmethod
+    def coerce(cls, db_or_dataset: Any, username: str) -> "PlayerDataset":
+        """Return `db_or_dataset` if it already is a dataset for `username`, else load one."""
+        if isinstance(db_or_dataset, cls):
+            if db_or_dataset.username != str(username or "").strip():
+                raise ValueError(
+                    f"PlayerDataset is for '{db_or_dataset.username}', not '{str(username or '').strip()}'"
+                )
+            return db_or_dataset
+        return cls.load(db_or_dataset, username)
+
+    def card(self, match_id: str) -> dict | None:
+        return self.cards.get(match_id)
+
+    def map_name(self, match_id: str) -> str | None:
+        return (self.cards.get(match_id) or {}).get("map_name")
+
+    def match_date(self, match_id: str) -> str | None:
+        return (self.cards.get(match_id) or {}).get("match_date")
+
+    def same_team(self, me: dict) -> list[dict]:
+        """Participants on `me`'s team in `me`'s match, excluding rows with `me`'s username."""
+        team_id = me.get("team_id")
+        if team_id is None:
+            return []
+        me_name = me.get("username", self.username)
+        return [
+            p
+            for p in self.participants.get(me["match_id"], ())
+            if p["team_id"] == team_id and p["username"] is not None and p["username"] != me_name
+        ]
+
+    def opponents(self, me: dict) -> list[dict]:
+        """Participants with a known team other than `me`'s in `me`'s match."""
+        team_id = me.get("team_id")
+        if team_id is None:
+            return []
+        return [
+            p
+            for p in self.participants.get(me["match_id"], ())
+            if p["team_id"] is not None and p["team_id"] != team_id
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        """Rough in-memory size of the row dicts, for the cache's byte budget."""
+        size = 0
+        for row in self.rounds:
+            size += sys.getsizeof(row)
+        for row in self.matches:
+            size += sys.getsizeof(row)
+        for rows in self.participants.values():
+            size += sum(sys.getsizeof(row) for row in rows)
+        size += sum(sys.getsizeof(row) for row in self.cards.values())
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "rounds": len(self.rounds),
+            "matches": len(self.matches),
+            "participant_rows": sum(len(rows) for rows in self.participants.values()),
+            "cards": len(self.cards),
+        }
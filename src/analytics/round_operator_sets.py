@@ -0,0 +1,264 @@
+"""
+Heatmap and evidence queries over the persisted round_operator_sets table.
+
+round_operator_sets keeps one row per round with the operators each side fielded
+as bitmasks over operator_codes (see `Database.refresh_round_operator_sets`).
+The ATK/DEF heatmap reads one row per round and turns the masks into attacker
+and defender incidence matrices; pair counts are then a matrix product instead
+of Python sets rebuilt from every player-round row on each request.
+
+NumPy is optional. Without it the masks are decoded per round with plain loops,
+with identical results.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.analytics.heatmap_engine import scatter_pair_counts
+
+_CHUNK = 800
+
+# One row per scored round: first outcome (lowest id) joined to the round's masks.
+_ROUND_MASKS_SQL = """
+    SELECT s.atk_mask, s.def_mask,
+           CASE WHEN LOWER(COALESCE(ro.winner_side, '')) = 'attacker' THEN 1 ELSE 0 END AS atk_win
+    FROM round_outcomes ro
+    JOIN round_operator_sets s
+      ON s.player_id = ro.player_id AND s.match_id = ro.match_id AND s.round_id = ro.round_id
+    WHERE ro.id IN (
+        SELECT MIN(id) FROM round_outcomes
+        WHERE player_id = :pid AND match_id IN ({placeholders})
+        GROUP BY match_id, round_id
+    )
+"""
+
+
+def _chunks(match_ids: Iterable[str]) -> Iterable[tuple[str, dict]]:
+    """(placeholder list, named params) per chunk of distinct match ids."""
+    ordered = sorted({str(m) for m in match_ids if str(m or "").strip()})
+    for start in range(0, len(ordered), _CHUNK):
+        chunk = ordered[start:start + _CHUNK]
+        names = [f"m{i}" for i in range(len(chunk))]
+        yield ",".join(f":{n}" for n in names), dict(zip(names, chunk))
+
+
+def _mask_codes(blob: bytes) -> list[int]:
+    mask = int.from_bytes(blob or b"", "little")
+    codes = []
+    while mask:
+        low = mask & -mask
+        codes.append(low.bit_length() - 1)
+        mask ^= low
+    return codes
+
+
+def operator_names(cur: Any) -> dict[int, str]:
+    cur.execute("SELECT code, operator FROM operator_codes")
+    return {int(code): str(name) for code, name in cur.fetchall()}
+
+
+def window_matches(cur: Any, player_id: int, days: int) -> list[dict]:
+    """
+    The player's matches with scored operator rounds whose latest card falls in the window.
+
+    Returns one {"match_id", "map_name", "mode"} dict per match, ordered by match_id.
+    """
+    cur.execute(
+        """
+        SELECT lc.match_id, lc.map_name, lc.mode
+        FROM match_latest_card lc
+        WHERE lc.match_id IN (
+            SELECT ro.match_id
+            FROM round_outcomes ro
+            WHERE ro.player_id = ?
+              AND EXISTS (
+                SELECT 1 FROM round_operator_sets s
+                WHERE s.player_id = ro.player_id AND s.match_id = ro.match_id AND s.round_id = ro.round_id
+              )
+        )
+          AND DATETIME(COALESCE(lc.scraped_at, '1970-01-01 00:00:00')) >= DATETIME('now', ?)
+        ORDER BY lc.match_id
+        """,
+        (player_id, f"-{max(1, int(days))} days"),
+    )
+    return [{"match_id": str(r[0]), "map_name": r[1], "mode": r[2]} for r in cur.fetchall()]
+
+
+def match_usernames(cur: Any, player_id: int, match_ids: Iterable[str]) -> dict[str, set[str]]:
+    """match_id -> lower-cased usernames with a scored operator row in that match."""
+    out: dict[str, set[str]] = {}
+    for placeholders, params in _chunks(match_ids):
+        cur.execute(
+            f"""
+            SELECT DISTINCT pr.match_id, pr.username
+            FROM player_rounds pr
+            WHERE pr.player_id = :pid
+              AND pr.match_id IN ({placeholders})
+              AND pr.operator IS NOT NULL
+              AND TRIM(pr.operator) != ''
+              AND EXISTS (
+                SELECT 1 FROM round_outcomes ro
+                WHERE ro.player_id = pr.player_id AND ro.match_id = pr.match_id AND ro.round_id = pr.round_id
+              )
+            """,
+            {"pid": player_id, **params},
+        )
+        for match_id, username in cur.fetchall():
+            out.setdefault(str(match_id), set()).add(str(username or "").strip().lower())
+    return out
+
+
+def player_row_counts(cur: Any, player_id: int, match_ids: Iterable[str]) -> dict[str, int]:
+    """match_id -> scored player-round rows (operator set, outcome joined); for diagnostics."""
+    out: dict[str, int] = {}
+    for placeholders, params in _chunks(match_ids):
+        cur.execute(
+            f"""
+            SELECT pr.match_id, COUNT(*)
+            FROM player_rounds pr
+            JOIN round_outcomes ro
+              ON ro.player_id = pr.player_id AND ro.match_id = pr.match_id AND ro.round_id = pr.round_id
+            WHERE pr.player_id = :pid
+              AND pr.match_id IN ({placeholders})
+              AND pr.operator IS NOT NULL
+              AND TRIM(pr.operator) != ''
+            GROUP BY pr.match_id
+            """,
+            {"pid": player_id, **params},
+        )
+        out.update((str(m), int(n)) for m, n in cur.fetchall())
+    return out
+
+
+def _pair_counts_numpy(rows: list[tuple], names: dict[int, str], out: dict) -> None:
+    width = max(1, max(max(len(a or b""), len(d or b"")) for a, d, _w in rows))
+
+    def incidence(blobs: list[bytes]) -> Any:
+        buf = np.frombuffer(b"".join((b or b"").ljust(width, b"\0") for b in blobs), dtype=np.uint8)
+        return np.unpackbits(buf.reshape(len(blobs), width), axis=1, bitorder="little")
+
+    atk = incidence([r[0] for r in rows])
+    dfn = incidence([r[1] for r in rows])
+    win = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+    counts = scatter_pair_counts(atk, dfn, win)
+    out["total_rounds"] = counts["units"]
+    out["atk_round_wins"] = counts["atk_unit_wins"]
+
+    atk_n, atk_w, def_n = counts["atk_n"], counts["atk_w"], counts["def_n"]
+    pair_n, pair_w = counts["pair_n"], counts["pair_w"]
+    for code in np.flatnonzero(atk_n):
+        out["atk_counts"][names[code]] = int(atk_n[code])
+        out["atk_wins_by_op"][names[code]] = int(atk_w[code])
+    for code in np.flatnonzero(def_n):
+        out["def_counts"][names[code]] = int(def_n[code])
+    for a, d in zip(*np.nonzero(pair_n)):
+        out["pair_stats"][(names[a], names[d])] = {"n": int(pair_n[a, d]), "atk_wins": int(pair_w[a, d])}
+    out["exposures_total"] = int(pair_n.sum())
+    out["exposures_atk_wins"] = int(pair_w.sum())
+
+
+def _pair_counts_python(rows: list[tuple], names: dict[int, str], out: dict) -> None:
+    atk_counts, atk_wins_by_op, def_counts, pair_stats = (
+        out["atk_counts"], out["atk_wins_by_op"], out["def_counts"], out["pair_stats"]
+    )
+    for atk_blob, def_blob, atk_win in rows:
+        atk_ops = [names[c] for c in _mask_codes(atk_blob)]
+        def_ops = [names[c] for c in _mask_codes(def_blob)]
+        if not atk_ops or not def_ops:
+            continue
+        out["total_rounds"] += 1
+        out["atk_round_wins"] += atk_win
+        for a in atk_ops:
+            atk_counts[a] = atk_counts.get(a, 0) + 1
+            atk_wins_by_op[a] = atk_wins_by_op.get(a, 0) + atk_win
+            for d in def_ops:
+                cell = pair_stats.setdefault((a, d), {"n": 0, "atk_wins": 0})
+                cell["n"] += 1
+                cell["atk_wins"] += atk_win
+        for d in def_ops:
+            def_counts[d] = def_counts.get(d, 0) + 1
+        exposures = len(atk_ops) * len(def_ops)
+        out["exposures_total"] += exposures
+        out["exposures_atk_wins"] += exposures * atk_win
+
+
+def count_operator_pairs(cur: Any, player_id: int, match_ids: Iterable[str]) -> dict:
+    """
+    Heatmap counters over the rounds of `match_ids` that have an outcome.
+
+    A round is valid when both sides fielded at least one operator. Returns
+    rounds_total (rounds with any operator), total_rounds / atk_round_wins over
+    valid rounds, per-operator atk_counts / atk_wins_by_op / def_counts,
+    pair_stats {(atk, def): {"n", "atk_wins"}} and the exposure totals.
+    """
+    rows: list[tuple] = []
+    for placeholders, params in _chunks(match_ids):
+        cur.execute(_ROUND_MASKS_SQL.format(placeholders=placeholders), {"pid": player_id, **params})
+        rows.extend((bytes(a or b""), bytes(d or b""), int(w)) for a, d, w in cur.fetchall())
+    out = {
+        "rounds_total": len(rows),
+        "total_rounds": 0,
+        "atk_round_wins": 0,
+        "atk_counts": {},
+        "atk_wins_by_op": {},
+        "def_counts": {},
+        "pair_stats": {},
+        "exposures_total": 0,
+        "exposures_atk_wins": 0,
+    }
+    if rows:
+        names = operator_names(cur)
+        if np is not None:
+            _pair_counts_numpy(rows, names, out)
+        else:
+            _pair_counts_python(rows, names, out)
+    return out
+
+
+def rounds_with_operators(
+    cur: Any,
+    player_id: int,
+    match_ids: Iterable[str],
+    atk_op: str | None = None,
+    def_op: str | None = None,
+) -> set[tuple[str, int]]:
+    """
+    (match_id, round_id) keys where the attackers fielded `atk_op` and the defenders `def_op`.
+
+    Operator names compare case-insensitively; None skips that side's condition.
+    """
+    if atk_op is None and def_op is None:
+        return set()
+    names = operator_names(cur)
+
+    def target_mask(op: str | None) -> int | None:
+        if op is None:
+            return None
+        key = str(op).strip().lower()
+        return sum(1 << code for code, name in names.items() if name.lower() == key)
+
+    atk_target, def_target = target_mask(atk_op), target_mask(def_op)
+    out: set[tuple[str, int]] = set()
+    for placeholders, params in _chunks(match_ids):
+        cur.execute(
+            f"""
+            SELECT match_id, round_id, atk_mask, def_mask
+            FROM round_operator_sets
+            WHERE player_id = :pid
+              AND match_id IN ({placeholders})
+            """,
+            {"pid": player_id, **params},
+        )
+        for match_id, round_id, atk_blob, def_blob in cur.fetchall():
+            if atk_target is not None and not int.from_bytes(atk_blob or b"", "little") & atk_target:
+                continue
+            if def_target is not None and not int.from_bytes(def_blob or b"", "little") & def_target:
+                continue
+            out.add((str(match_id), int(round_id)))
+    return out
@@ -0,0 +1,477 @@
+"""
+Columnar round store for the workspace analytics panels.
+
+A store holds the player-round rows of one workspace scope as parallel columns:
+int32 arrays for the numeric stats and interned category codes for match,
+operator, map, username, side and winner. The panels run group-bys over those
+codes instead of re-walking one dict per player-round.
+
+NumPy is optional. Without it the columns stay stdlib ``array`` buffers and the
+group-bys fall back to plain loops over the same codes, with identical results.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.utils import _is_unknown_operator_name, _parse_iso_datetime
+
+SIDE_ATTACKER = 0
+SIDE_DEFENDER = 1
+SIDE_OTHER = 2
+_SIDE_CODES = {"attacker": SIDE_ATTACKER, "defender": SIDE_DEFENDER}
+_SIDE_NAMES = ("attacker", "defender")
+
+NUMERIC_COLUMNS = (
+    "kills",
+    "deaths",
+    "assists",
+    "headshots",
+    "first_blood",
+    "first_death",
+    "clutch_won",
+    "clutch_lost",
+)
+_CODE_COLUMNS = ("match", "round_id", "side", "winner", "operator", "map", "username")
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def _unique_sorted(keys: Any) -> Any:
+    """Sorted distinct int64 keys; sort+diff beats np.unique's hashing on these sizes."""
+    keys = np.sort(keys)
+    if len(keys) > 1:
+        keep = np.empty(len(keys), dtype=bool)
+        keep[0] = True
+        np.not_equal(keys[1:], keys[:-1], out=keep[1:])
+        keys = keys[keep]
+    return keys
+
+
+class _Interner:
+    __slots__ = ("codes", "values")
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def code(self, value: str) -> int:
+        found = self.codes.get(value)
+        if found is None:
+            found = len(self.values)
+            self.codes[value] = found
+            self.values.append(value)
+        return found
+
+    def nbytes(self) -> int:
+        return sum(len(v) + 49 for v in self.values) + 104 * len(self.values)
+
+
+class RoundStore:
+    """
+    Player-round rows for one scope, stored column-wise.
+
+    Build with `from_rows` (dicts or sqlite3.Row objects carrying the workspace
+    row columns), then query `operator_scatter_counts`, `matchup_counts`,
+    `integrity_counters` and `overview`. The store is read-only once built.
+    """
+
+    def __init__(self) -> None:
+        self.matches = _Interner()
+        self.operators = _Interner()
+        self.maps = _Interner()
+        self.usernames = _Interner()
+        self._cols: dict[str, Any] = {name: array("i") for name in (*_CODE_COLUMNS, *NUMERIC_COLUMNS)}
+        self._order_ts = array("d")
+        self._ts_memo: dict[str, float] = {}
+        self._round_of: dict[tuple[int, int], int] = {}
+        self._round_idx = array("i")
+        self._round_match = array("i")
+        self._round_winner = array("i")
+        self._np: dict[str, Any] | None = None
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any], search: str = "") -> "RoundStore":
+        store = cls()
+        search_key = str(search or "").strip().lower()
+        for row in rows:
+            if search_key and not (
+                search_key in str(row["operator"] or "").lower() or search_key in str(row["username"] or "").lower()
+            ):
+                continue
+            store.append(row)
+        store.finalize()
+        return store
+
+    def append(self, row: Any) -> None:
+        cols = self._cols
+        match_code = self.matches.code(str(row["match_id"]))
+        round_id = int(row["round_id"] or 0)
+        winner = _SIDE_CODES.get(str(row["winner_side"] or "").lower(), SIDE_OTHER)
+        cols["match"].append(match_code)
+        cols["round_id"].append(round_id)
+        cols["side"].append(_SIDE_CODES.get(str(row["side"] or "").strip().lower(), SIDE_OTHER))
+        cols["winner"].append(winner)
+        cols["operator"].append(self.operators.code(str(row["operator"] or "").strip()))
+        cols["map"].append(self.maps.code(str(row["map_name"] or "")))
+        cols["username"].append(self.usernames.code(str(row["username"] or "")))
+        for name in NUMERIC_COLUMNS:
+            cols[name].append(int(row[name] or 0))
+        scraped_at = str(row["scraped_at"] or "")
+        ts = self._ts_memo.get(scraped_at)
+        if ts is None:
+            parsed = _parse_iso_datetime(scraped_at)
+            ts = parsed.timestamp() if parsed else 0.0
+            self._ts_memo[scraped_at] = ts
+        self._order_ts.append(ts)
+
+        key = (match_code, round_id)
+        idx = self._round_of.get(key)
+        if idx is None:
+            idx = len(self._round_match)
+            self._round_of[key] = idx
+            self._round_match.append(match_code)
+            # The first row seen for a round decides its winner, like the dict path.
+            self._round_winner.append(winner)
+        self._round_idx.append(idx)
+
+    def finalize(self) -> None:
+        self._ts_memo = {}
+        if np is None:
+            return
+        # Zero-copy views over the array buffers.
+        views = {name: np.frombuffer(col, dtype=np.intc) for name, col in self._cols.items()}
+        views["round_idx"] = np.frombuffer(self._round_idx, dtype=np.intc)
+        views["round_match"] = np.frombuffer(self._round_match, dtype=np.intc)
+        views["round_winner"] = np.frombuffer(self._round_winner, dtype=np.intc)
+        views["order_ts"] = np.frombuffer(self._order_ts, dtype=np.float64)
+        views["op_known"] = np.array(
+            [not _is_unknown_operator_name(op) for op in self.operators.values], dtype=bool
+        )
+        self._np = views
+
+    # ------------------------------------------------------------- properties
+
+    def __len__(self) -> int:
+        return len(self._round_idx)
+
+    @property
+    def n_rounds(self) -> int:
+        return len(self._round_match)
+
+    @property
+    def nbytes(self) -> int:
+        cols = sum(col.itemsize * len(col) for col in self._cols.values())
+        cols += self._order_ts.itemsize * len(self._order_ts)
+        cols += sum(a.itemsize * len(a) for a in (self._round_idx, self._round_match, self._round_winner))
+        # Round-key dict: ~100 bytes per entry including the key tuple.
+        cols += 100 * len(self._round_of)
+        return cols + sum(i.nbytes() for i in (self.matches, self.operators, self.maps, self.usernames))
+
+    def column(self, name: str) -> Any:
+        """One column as a NumPy array (or array.array without NumPy)."""
+        if self._np is not None:
+            return self._np[name]
+        if name == "order_ts":
+            return self._order_ts
+        if name == "round_idx":
+            return self._round_idx
+        return self._cols[name]
+
+    # --------------------------------------------------------------- group-by
+
+    def _presence(self) -> tuple:
+        """Distinct (round, operator) pairs per side, known operators only, sorted by round."""
+        if self._np is not None:
+            v = self._np
+            n_ops = max(1, len(self.operators.values))
+            known = v["op_known"][v["operator"]] if len(self) else np.zeros(0, dtype=bool)
+            out = []
+            for side in (SIDE_ATTACKER, SIDE_DEFENDER):
+                mask = known & (v["side"] == side)
+                keys = _unique_sorted(v["round_idx"][mask].astype(np.int64) * n_ops + v["operator"][mask])
+                out.append((keys // n_ops, keys % n_ops))
+            return tuple(out)
+        known = [not _is_unknown_operator_name(op) for op in self.operators.values]
+        seen: tuple[set, set] = (set(), set())
+        cols = self._cols
+        for i, (side, op) in enumerate(zip(cols["side"], cols["operator"])):
+            if side <= SIDE_DEFENDER and known[op]:
+                seen[side].add((self._round_idx[i], op))
+        out = []
+        for pairs in seen:
+            ordered = sorted(pairs)
+            out.append(([r for r, _ in ordered], [o for _, o in ordered]))
+        return tuple(out)
+
+    def _units(self, presence: tuple, require_winner: bool, by_match: bool) -> tuple:
+        """
+        Map rounds to analysis units.
+
+        A round qualifies when both sides have a known operator (and, with
+        require_winner, a valid winner). Round weighting makes each qualifying
+        round a unit; match weighting folds them per match, drops tied matches
+        and lets the side with more round wins decide the unit.
+        Returns (unit_of_round with -1 for excluded rounds, unit_winner, valid_rounds).
+        """
+        (atk_rounds, _), (def_rounds, _) = presence
+        n_rounds = self.n_rounds
+        if self._np is not None:
+            winner = self._np["round_winner"]
+            has_atk = np.bincount(atk_rounds, minlength=n_rounds)[:n_rounds] > 0
+            has_def = np.bincount(def_rounds, minlength=n_rounds)[:n_rounds] > 0
+            paired = has_atk & has_def
+            valid = paired & (winner <= SIDE_DEFENDER)
+            included = valid if require_winner else paired
+            unit_of_round = np.full(n_rounds, -1, dtype=np.int64)
+            if not by_match:
+                unit_of_round[included] = np.arange(int(included.sum()))
+                return unit_of_round, winner[included], int(valid.sum())
+            n_matches = len(self.matches.values)
+            match_of = self._np["round_match"][included]
+            atk_w = np.bincount(match_of, weights=winner[included] == SIDE_ATTACKER, minlength=n_matches)
+            def_w = np.bincount(match_of, weights=winner[included] == SIDE_DEFENDER, minlength=n_matches)
+            decided = atk_w != def_w
+            unit_of_match = np.full(n_matches, -1, dtype=np.int64)
+            unit_of_match[decided] = np.arange(int(decided.sum()))
+            unit_of_round[included] = unit_of_match[match_of]
+            unit_winner = np.where(atk_w[decided] > def_w[decided], SIDE_ATTACKER, SIDE_DEFENDER)
+            return unit_of_round, unit_winner, int(valid.sum())
+
+        has_atk, has_def = set(atk_rounds), set(def_rounds)
+        winner = self._round_winner
+        unit_of_round = [-1] * n_rounds
+        unit_winner: list[int] = []
+        valid_count = 0
+        if not by_match:
+            for r in range(n_rounds):
+                if r in has_atk and r in has_def:
+                    is_valid = winner[r] <= SIDE_DEFENDER
+                    valid_count += 1 if is_valid else 0
+                    if is_valid or not require_winner:
+                        unit_of_round[r] = len(unit_winner)
+                        unit_winner.append(winner[r])
+            return unit_of_round, unit_winner, valid_count
+        wins: dict[int, list[int]] = {}
+        for r in range(n_rounds):
+            if r not in has_atk or r not in has_def:
+                continue
+            is_valid = winner[r] <= SIDE_DEFENDER
+            valid_count += 1 if is_valid else 0
+            if require_winner and not is_valid:
+                continue
+            w = wins.setdefault(self._round_match[r], [0, 0])
+            if is_valid:
+                w[winner[r]] += 1
+        unit_of_match: dict[int, int] = {}
+        for match_code in sorted(wins):
+            atk_w, def_w = wins[match_code]
+            if atk_w != def_w:
+                unit_of_match[match_code] = len(unit_winner)
+                unit_winner.append(SIDE_ATTACKER if atk_w > def_w else SIDE_DEFENDER)
+        for r in range(n_rounds):
+            if r in has_atk and r in has_def and (winner[r] <= SIDE_DEFENDER or not require_winner):
+                unit_of_round[r] = unit_of_match.get(self._round_match[r], -1)
+        return unit_of_round, unit_winner, valid_count
+
+    def _unit_ops(self, rounds: Any, ops: Any, unit_of_round: Any, by_match: bool) -> tuple:
+        """Distinct (unit, operator) pairs from per-round presence."""
+        if self._np is not None:
+            units = unit_of_round[rounds] if len(rounds) else np.zeros(0, dtype=np.int64)
+            keep = units >= 0
+            if not by_match:
+                # One unit per round: per-round presence is already distinct.
+                return units[keep], ops[keep]
+            n_ops = max(1, len(self.operators.values))
+            keys = _unique_sorted(units[keep] * n_ops + ops[keep])
+            return keys // n_ops, keys % n_ops
+        pairs = sorted({(unit_of_round[r], o) for r, o in zip(rounds, ops) if unit_of_round[r] >= 0})
+        return [u for u, _ in pairs], [o for _, o in pairs]
+
+    def _counts_by_op(self, units: Any, ops: Any, unit_winner: Any, side: int) -> list[tuple[str, int, int]]:
+        """
+        (operator, units present, units won by `side`) for every operator present,
+        in first-seen order: by the first unit the operator appears in, then by name.
+        """
+        names = self.operators.values
+        if self._np is not None:
+            n_ops = len(names)
+            won = (unit_winner[units] == side) if len(units) else np.zeros(0, dtype=bool)
+            n = np.bincount(ops, minlength=n_ops)
+            wins = np.bincount(ops, weights=won, minlength=n_ops)
+            first = np.full(n_ops, np.iinfo(np.int64).max, dtype=np.int64)
+            np.minimum.at(first, ops, units)
+            present = sorted(np.flatnonzero(n), key=lambda i: (first[i], names[i]))
+            return [(names[i], int(n[i]), int(wins[i])) for i in present]
+        n_by: dict[int, list[int]] = {}
+        for u, o in zip(units, ops):
+            rec = n_by.setdefault(o, [0, 0, u])
+            rec[0] += 1
+            rec[1] += 1 if unit_winner[u] == side else 0
+            rec[2] = min(rec[2], u)
+        present = sorted(n_by.items(), key=lambda item: (item[1][2], names[item[0]]))
+        return [(names[o], rec[0], rec[1]) for o, rec in present]
+
+    def _unit_totals(self, unit_winner: Any) -> tuple[int, int]:
+        total = len(unit_winner)
+        if self._np is not None:
+            return total, int(np.count_nonzero(unit_winner == SIDE_ATTACKER))
+        return total, sum(1 for w in unit_winner if w == SIDE_ATTACKER)
+
+    def operator_scatter_counts(self, weighting: str = "rounds") -> dict:
+        """
+        Per-side operator presence and wins over valid rounds (or decided matches).
+
+        Returns {"total_units", "atk_unit_wins", "sides": {side: [(op, n, wins)]}}.
+        """
+        presence = self._presence()
+        by_match = weighting == "matches"
+        unit_of_round, unit_winner, _valid = self._units(presence, require_winner=True, by_match=by_match)
+        total, atk_wins = self._unit_totals(unit_winner)
+        sides = {}
+        for side, (rounds, ops) in zip((SIDE_ATTACKER, SIDE_DEFENDER), presence):
+            units, unit_ops = self._unit_ops(rounds, ops, unit_of_round, by_match)
+            sides[_SIDE_NAMES[side]] = self._counts_by_op(units, unit_ops, unit_winner, side)
+        return {"total_units": total, "atk_unit_wins": atk_wins, "sides": sides}
+
+    def _unit_pairs(self, presence: tuple, unit_of_round: Any, by_match: bool) -> Any:
+        """Distinct (unit, attacker op, defender op) keys from per-round cross products."""
+        (atk_rounds, atk_ops), (def_rounds, def_ops) = presence
+        n_ops = max(1, len(self.operators.values))
+        if self._np is not None:
+            if not len(atk_rounds) or not len(def_rounds):
+                return np.zeros(0, dtype=np.int64)
+            n_rounds = self.n_rounds
+            d_count = np.bincount(def_rounds, minlength=n_rounds)
+            d_start = np.cumsum(d_count) - d_count
+            reps = d_count[atk_rounds]
+            a_idx = np.repeat(np.arange(len(atk_rounds)), reps)
+            within = np.arange(int(reps.sum())) - np.repeat(np.cumsum(reps) - reps, reps)
+            d_idx = d_start[atk_rounds[a_idx]] + within
+            units = unit_of_round[atk_rounds[a_idx]]
+            keep = units >= 0
+            keys = (units[keep] * n_ops + atk_ops[a_idx][keep]) * n_ops + def_ops[d_idx][keep]
+            return _unique_sorted(keys) if by_match else keys
+        def_by_round: dict[int, list[int]] = {}
+        for r, o in zip(def_rounds, def_ops):
+            def_by_round.setdefault(r, []).append(o)
+        keys = set()
+        for r, a in zip(atk_rounds, atk_ops):
+            unit = unit_of_round[r]
+            if unit < 0:
+                continue
+            for d in def_by_round.get(r, ()):
+                keys.add((unit * n_ops + a) * n_ops + d)
+        return sorted(keys)
+
+    def matchup_counts(self, weighting: str = "rounds") -> dict:
+        """
+        Attacker x defender co-occurrence counts for the matchup matrix.
+
+        Round weighting uses rounds with both sides present and a valid winner;
+        match weighting folds every round with both sides present per match.
+        Returns the counters `_compute_matchup_block` renders, plus valid_rounds.
+        """
+        by_match = weighting == "matches"
+        presence = self._presence()
+        unit_of_round, unit_winner, valid_rounds = self._units(presence, require_winner=not by_match, by_match=by_match)
+        total, atk_unit_wins = self._unit_totals(unit_winner)
+        names = self.operators.values
+        counts: dict[str, dict] = {}
+        for side, (rounds, ops) in zip((SIDE_ATTACKER, SIDE_DEFENDER), presence):
+            units, unit_ops = self._unit_ops(rounds, ops, unit_of_round, by_match)
+            counts[_SIDE_NAMES[side]] = {op: (n, wins) for op, n, wins in self._counts_by_op(units, unit_ops, unit_winner, SIDE_ATTACKER)}
+
+        n_ops = max(1, len(names))
+        keys = self._unit_pairs(presence, unit_of_round, by_match)
+        pair_stats: dict[tuple[str, str], dict[str, int]] = {}
+        if self._np is not None:
+            if len(keys):
+                units = keys // (n_ops * n_ops)
+                pair = keys % (n_ops * n_ops)
+                won = unit_winner[units] == SIDE_ATTACKER
+                n = np.bincount(pair, minlength=n_ops * n_ops)
+                wins = np.bincount(pair, weights=won, minlength=n_ops * n_ops)
+                for p in np.flatnonzero(n):
+                    pair_stats[(names[p // n_ops], names[p % n_ops])] = {"n": int(n[p]), "atk_wins": int(wins[p])}
+        else:
+            for key in keys:
+                unit, pair = divmod(key, n_ops * n_ops)
+                cell = pair_stats.setdefault((names[pair // n_ops], names[pair % n_ops]), {"n": 0, "atk_wins": 0})
+                cell["n"] += 1
+                cell["atk_wins"] += 1 if unit_winner[unit] == SIDE_ATTACKER else 0
+        return {
+            "valid_rounds": valid_rounds,
+            "total_units": total,
+            "atk_unit_wins": atk_unit_wins,
+            "atk_counts": {op: n for op, (n, _w) in counts["attacker"].items()},
+            "atk_wins_by_op": {op: w for op, (_n, w) in counts["attacker"].items()},
+            "def_counts": {op: n for op, (n, _w) in counts["defender"].items()},
+            "pair_stats": pair_stats,
+        }
+
+    def integrity_counters(self) -> dict:
+        n_rounds = self.n_rounds
+        missing_op = [not op for op in self.operators.values]
+        if self._np is not None:
+            v = self._np
+            players = np.bincount(v["round_idx"], minlength=n_rounds)
+            atk = np.bincount(v["round_idx"][v["side"] == SIDE_ATTACKER], minlength=n_rounds)
+            dfn = np.bincount(v["round_idx"][v["side"] == SIDE_DEFENDER], minlength=n_rounds)
+            op_missing = np.array(missing_op, dtype=bool)[v["operator"]] if len(self) else np.zeros(0, dtype=bool)
+            missing = np.bincount(v["round_idx"][op_missing], minlength=n_rounds)
+            return {
+                "rounds_total": n_rounds,
+                "rounds_missing_players": int(np.count_nonzero(players < 10)),
+                "rounds_not_5v5": int(np.count_nonzero((atk != 5) | (dfn != 5))),
+                "rounds_missing_operator_entries": int(np.count_nonzero(missing > 0)),
+                "rounds_invalid_winner_side": int(np.count_nonzero(v["round_winner"] > SIDE_DEFENDER)),
+            }
+        players = [0] * n_rounds
+        atk = [0] * n_rounds
+        dfn = [0] * n_rounds
+        missing = [0] * n_rounds
+        for r, side, op in zip(self._round_idx, self._cols["side"], self._cols["operator"]):
+            players[r] += 1
+            if side == SIDE_ATTACKER:
+                atk[r] += 1
+            elif side == SIDE_DEFENDER:
+                dfn[r] += 1
+            if missing_op[op]:
+                missing[r] += 1
+        return {
+            "rounds_total": n_rounds,
+            "rounds_missing_players": sum(1 for p in players if p < 10),
+            "rounds_not_5v5": sum(1 for a, d in zip(atk, dfn) if a != 5 or d != 5),
+            "rounds_missing_operator_entries": sum(1 for m in missing if m > 0),
+            "rounds_invalid_winner_side": sum(1 for w in self._round_winner if w > SIDE_DEFENDER),
+        }
+
+    def overview(self) -> dict:
+        if self._np is not None:
+            side = self._np["side"]
+            side_rows = {
+                "attacker": int(np.count_nonzero(side == SIDE_ATTACKER)),
+                "defender": int(np.count_nonzero(side == SIDE_DEFENDER)),
+            }
+        else:
+            side_rows = {"attacker": 0, "defender": 0}
+            for s in self._cols["side"]:
+                if s <= SIDE_DEFENDER:
+                    side_rows[_SIDE_NAMES[s]] += 1
+        return {
+            "rows_after_filters": len(self),
+            "distinct_matches": len(self.matches.values),
+            "distinct_rounds": self.n_rounds,
+            "side_rows": side_rows,
+        }
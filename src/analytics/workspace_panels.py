@@ -0,0 +1,323 @@
+"""
+Operator scatter, matchup matrix and integrity panels of the dashboard workspace.
+
+Each panel accepts either the workspace row dicts or a `RoundStore` built from
+the same rows. Counting differs per input; rendering the counts into the JSON
+payload is shared, so both paths return identical responses.
+"""
+
+from __future__ import annotations
+
+from src.analytics.heatmap_engine import PairGrid, cell_options, compute_cells
+from src.analytics.round_store import RoundStore
+from src.utils import _is_unknown_operator_name, _wilson_ci
+
+
+def _round_ops_from_rows(rows: list[dict]) -> dict[tuple[str, int], dict]:
+    rounds: dict[tuple[str, int], dict] = {}
+    for r in rows:
+        key = (str(r["match_id"]), int(r["round_id"]))
+        b = rounds.setdefault(key, {"winner_side": str(r.get("winner_side") or "").lower(), "atk_ops": set(), "def_ops": set()})
+        op = str(r.get("operator") or "").strip()
+        if _is_unknown_operator_name(op):
+            continue
+        side = str(r.get("side") or "").strip().lower()
+        if side == "attacker":
+            b["atk_ops"].add(op)
+        elif side == "defender":
+            b["def_ops"].add(op)
+    return rounds
+
+
+def _matchup_counts_from_rows(rows: list[dict], weight_key: str) -> dict:
+    rounds = _round_ops_from_rows(rows)
+    valid_rounds = [v for v in rounds.values() if v["atk_ops"] and v["def_ops"] and v["winner_side"] in {"attacker", "defender"}]
+    if weight_key == "matches":
+        by_match: dict[str, dict] = {}
+        for (mid, _rid), v in rounds.items():
+            if not v["atk_ops"] or not v["def_ops"]:
+                continue
+            m = by_match.setdefault(mid, {"atk_wins": 0, "def_wins": 0, "pairs": set(), "atk_ops": set(), "def_ops": set()})
+            if v["winner_side"] == "attacker":
+                m["atk_wins"] += 1
+            elif v["winner_side"] == "defender":
+                m["def_wins"] += 1
+            m["atk_ops"].update(v["atk_ops"])
+            m["def_ops"].update(v["def_ops"])
+            for a in v["atk_ops"]:
+                for d in v["def_ops"]:
+                    m["pairs"].add((a, d))
+        match_units = []
+        for m in by_match.values():
+            if m["atk_wins"] == m["def_wins"]:
+                continue
+            winner = "attacker" if m["atk_wins"] > m["def_wins"] else "defender"
+            match_units.append({"winner": winner, "atk_ops": sorted(m["atk_ops"]), "def_ops": sorted(m["def_ops"]), "pairs": m["pairs"]})
+        units = match_units
+    else:
+        units = [{"winner": v["winner_side"], "atk_ops": sorted(v["atk_ops"]), "def_ops": sorted(v["def_ops"])} for v in valid_rounds]
+
+    total_units = len(units)
+    atk_unit_wins = sum(1 for u in units if u["winner"] == "attacker")
+    pair_stats: dict[tuple[str, str], dict[str, int]] = {}
+    atk_counts: dict[str, int] = {}
+    def_counts: dict[str, int] = {}
+    atk_wins_by_op: dict[str, int] = {}
+    for u in units:
+        atk_win = 1 if u["winner"] == "attacker" else 0
+        atk_ops = u["atk_ops"]
+        def_ops = u["def_ops"]
+        for a in atk_ops:
+            atk_counts[a] = atk_counts.get(a, 0) + 1
+            atk_wins_by_op[a] = atk_wins_by_op.get(a, 0) + atk_win
+        for d in def_ops:
+            def_counts[d] = def_counts.get(d, 0) + 1
+        pairs = u.get("pairs")
+        if pairs is None:
+            for a in atk_ops:
+                for d in def_ops:
+                    p = (a, d)
+                    cell = pair_stats.setdefault(p, {"n": 0, "atk_wins": 0})
+                    cell["n"] += 1
+                    cell["atk_wins"] += atk_win
+        else:
+            for p in pairs:
+                cell = pair_stats.setdefault(p, {"n": 0, "atk_wins": 0})
+                cell["n"] += 1
+                cell["atk_wins"] += atk_win
+    return {
+        "valid_rounds": len(valid_rounds),
+        "total_units": total_units,
+        "atk_unit_wins": atk_unit_wins,
+        "atk_counts": atk_counts,
+        "atk_wins_by_op": atk_wins_by_op,
+        "def_counts": def_counts,
+        "pair_stats": pair_stats,
+    }
+
+
+def _compute_matchup_block(
+    rows: list[dict] | RoundStore,
+    *,
+    normalization: str = "global",
+    lift_mode: str = "percent_delta",
+    interval_method: str = "wilson",
+    min_n: int = 0,
+    weighting: str = "rounds",
+) -> dict:
+    min_n_safe = max(0, min(int(min_n), 5000))
+    norm_key, lift_key, interval_key = cell_options(normalization, lift_mode, interval_method)
+    weight_key = "matches" if str(weighting or "").strip().lower() == "matches" else "rounds"
+
+    counts = rows.matchup_counts(weight_key) if isinstance(rows, RoundStore) else _matchup_counts_from_rows(rows, weight_key)
+    if not counts["valid_rounds"]:
+        return {"error": "No valid rounds for matchup analysis.", "cells": [], "attackers": [], "defenders": []}
+    total_units = counts["total_units"]
+    atk_unit_wins = counts["atk_unit_wins"]
+    atk_counts = counts["atk_counts"]
+    def_counts = counts["def_counts"]
+    grid = PairGrid(
+        pair_stats=counts["pair_stats"],
+        atk_counts=atk_counts,
+        atk_wins_by_op=counts["atk_wins_by_op"],
+        def_counts=def_counts,
+        total_units=total_units,
+        atk_unit_wins=atk_unit_wins,
+    )
+    attackers, defenders = grid.attackers, grid.defenders
+    cells, _pathology = compute_cells(
+        grid,
+        norm_key=norm_key,
+        lift_key=lift_key,
+        interval_key=interval_key,
+        pct_digits=3,
+        lift_digits=4 if lift_key != "percent_delta" else 3,
+    )
+
+    by_def, by_atk = {}, {}
+    for c in cells:
+        d, a = str(c["defender"]), str(c["attacker"])
+        n = int(c["n_rounds"])
+        lift = float(c["lift"])
+        def_rec = by_def.setdefault(d, {"neg_sum_raw": 0.0, "w_raw": 0, "neg_sum_vis": 0.0, "w_vis": 0, "cells_vis": 0})
+        atk_rec = by_atk.setdefault(a, {"neg_sum_raw": 0.0, "w_raw": 0, "neg_sum_vis": 0.0, "w_vis": 0, "cells_vis": 0})
+        penalty = max(0.0, -lift)
+        def_rec["neg_sum_raw"] += penalty * n
+        def_rec["w_raw"] += n
+        atk_rec["neg_sum_raw"] += penalty * n
+        atk_rec["w_raw"] += n
+        if n >= min_n_safe:
+            def_rec["neg_sum_vis"] += penalty * n
+            def_rec["w_vis"] += n
+            def_rec["cells_vis"] += 1
+            atk_rec["neg_sum_vis"] += penalty * n
+            atk_rec["w_vis"] += n
+            atk_rec["cells_vis"] += 1
+    total_side_units = max(1, total_units)
+    defender_threat = []
+    for d in defenders:
+        rec = by_def.get(d, {})
+        has_visible = int(rec.get("cells_vis", 0)) > 0
+        covered_visible = int(def_counts.get(d, 0)) if has_visible else 0
+        defender_threat.append(
+            {
+                "operator": d,
+                "index": round((float(rec.get("neg_sum_vis", 0.0)) / float(rec.get("w_vis", 1))) if rec.get("w_vis", 0) else 0.0, 4),
+                "n_rounds_total": total_side_units,
+                "n_rounds_covered_raw": int(def_counts.get(d, 0)),
+                "n_rounds_covered_visible": covered_visible,
+                "n_cells_visible": int(rec.get("cells_vis", 0)),
+                "coverage_pct_visible": round((covered_visible / total_side_units) * 100.0, 3),
+            }
+        )
+    attacker_vulnerability = []
+    for a in attackers:
+        rec = by_atk.get(a, {})
+        has_visible = int(rec.get("cells_vis", 0)) > 0
+        covered_visible = int(atk_counts.get(a, 0)) if has_visible else 0
+        attacker_vulnerability.append(
+            {
+                "operator": a,
+                "index": round((float(rec.get("neg_sum_vis", 0.0)) / float(rec.get("w_vis", 1))) if rec.get("w_vis", 0) else 0.0, 4),
+                "n_rounds_total": total_side_units,
+                "n_rounds_covered_raw": int(atk_counts.get(a, 0)),
+                "n_rounds_covered_visible": covered_visible,
+                "n_cells_visible": int(rec.get("cells_vis", 0)),
+                "coverage_pct_visible": round((covered_visible / total_side_units) * 100.0, 3),
+            }
+        )
+
+    defender_threat.sort(key=lambda x: (-float(x["index"]), -int(x["n_rounds_covered_visible"]), x["operator"]))
+    attacker_vulnerability.sort(key=lambda x: (-float(x["index"]), -int(x["n_rounds_covered_visible"]), x["operator"]))
+    return {
+        "baseline_atk_win_rate": round(grid.global_baseline, 4),
+        "total_rounds": total_units,
+        "attackers": attackers,
+        "defenders": defenders,
+        "cells": cells,
+        "normalization": norm_key,
+        "lift_mode": lift_key,
+        "interval_method": interval_key,
+        "weighting": weight_key,
+        "filters": {"min_n": min_n_safe},
+        "threat_index": {
+            "defender_threat": defender_threat,
+            "attacker_vulnerability": attacker_vulnerability,
+        },
+        "clamp_defaults": {"clamp_mode": "percentile", "clamp_p_low": 5, "clamp_p_high": 95, "clamp_abs": 15},
+    }
+
+
+def _scatter_counts_from_rows(rows: list[dict], weight_key: str) -> dict:
+    rounds = _round_ops_from_rows(rows)
+    valid_rounds = [(mid, rid, v) for (mid, rid), v in rounds.items() if v["atk_ops"] and v["def_ops"] and v["winner_side"] in {"attacker", "defender"}]
+    if weight_key == "matches":
+        by_match: dict[str, dict] = {}
+        for mid, _rid, v in valid_rounds:
+            m = by_match.setdefault(mid, {"atk_wins": 0, "def_wins": 0, "atk_ops": set(), "def_ops": set()})
+            if v["winner_side"] == "attacker":
+                m["atk_wins"] += 1
+            else:
+                m["def_wins"] += 1
+            m["atk_ops"].update(v["atk_ops"])
+            m["def_ops"].update(v["def_ops"])
+        # Units follow each match's first row, as RoundStore numbers them.
+        match_rank: dict[str, int] = {}
+        for mid, _rid in rounds:
+            match_rank.setdefault(mid, len(match_rank))
+        units = []
+        for mid in sorted(by_match, key=match_rank.__getitem__):
+            m = by_match[mid]
+            if m["atk_wins"] == m["def_wins"]:
+                continue
+            units.append({"winner_side": "attacker" if m["atk_wins"] > m["def_wins"] else "defender", "atk_ops": m["atk_ops"], "def_ops": m["def_ops"]})
+    else:
+        units = [v for _mid, _rid, v in valid_rounds]
+    sides: dict[str, list[tuple[str, int, int]]] = {}
+    for side in ("attacker", "defender"):
+        # First-seen order (first unit, then name) rather than set iteration order.
+        side_ops: dict[str, dict[str, int]] = {}
+        for u in units:
+            ops = u["atk_ops"] if side == "attacker" else u["def_ops"]
+            side_win = 1 if u["winner_side"] == side else 0
+            for op in sorted(ops):
+                rec = side_ops.setdefault(op, {"n": 0, "wins": 0})
+                rec["n"] += 1
+                rec["wins"] += side_win
+        sides[side] = [(op, rec["n"], rec["wins"]) for op, rec in side_ops.items()]
+    return {
+        "total_units": len(units),
+        "atk_unit_wins": sum(1 for u in units if u["winner_side"] == "attacker"),
+        "sides": sides,
+    }
+
+
+def _compute_operator_scatter(
+    rows: list[dict] | RoundStore,
+    *,
+    weighting: str = "rounds",
+) -> dict:
+    weight_key = "matches" if str(weighting or "").strip().lower() == "matches" else "rounds"
+    if isinstance(rows, RoundStore):
+        counts = rows.operator_scatter_counts(weight_key)
+    else:
+        counts = _scatter_counts_from_rows(rows, weight_key)
+    total_units = int(counts["total_units"])
+    if total_units <= 0:
+        return {"points": [], "baselines": {"attacker": 0.0, "defender": 0.0}, "total_units": 0}
+    baseline_atk = (counts["atk_unit_wins"] / total_units) * 100.0
+    baseline_def = 100.0 - baseline_atk
+    points = []
+    for side in ("attacker", "defender"):
+        baseline = baseline_atk if side == "attacker" else baseline_def
+        for op, n, wins in counts["sides"][side]:
+            win_pct = (wins / n) * 100.0 if n else 0.0
+            lo, hi = _wilson_ci(wins, n)
+            points.append(
+                {
+                    "operator": op,
+                    "side": side,
+                    "n_rounds": n,
+                    "presence_pct": round((n / total_units) * 100.0, 4),
+                    "win_pct": round(win_pct, 4),
+                    "baseline_win_pct": round(baseline, 4),
+                    "win_delta": round(win_pct - baseline, 4),
+                    "ci_low": round((lo * 100.0), 4),
+                    "ci_high": round((hi * 100.0), 4),
+                }
+            )
+    return {"points": points, "baselines": {"attacker": round(baseline_atk, 4), "defender": round(baseline_def, 4)}, "total_units": total_units}
+
+
+def _integrity_counters(rows: list[dict] | RoundStore) -> dict:
+    if isinstance(rows, RoundStore):
+        return rows.integrity_counters()
+    rounds: dict[tuple[str, int], dict] = {}
+    for r in rows:
+        key = (str(r.get("match_id")), int(r.get("round_id") or 0))
+        b = rounds.setdefault(key, {"players": 0, "atk": 0, "def": 0, "ops_missing": 0, "winner_side": str(r.get("winner_side") or "").lower()})
+        b["players"] += 1
+        side = str(r.get("side") or "").lower()
+        if side == "attacker":
+            b["atk"] += 1
+        elif side == "defender":
+            b["def"] += 1
+        if not str(r.get("operator") or "").strip():
+            b["ops_missing"] += 1
+    counters = {
+        "rounds_total": len(rounds),
+        "rounds_missing_players": 0,
+        "rounds_not_5v5": 0,
+        "rounds_missing_operator_entries": 0,
+        "rounds_invalid_winner_side": 0,
+    }
+    for b in rounds.values():
+        if b["players"] < 10:
+            counters["rounds_missing_players"] += 1
+        if b["atk"] != 5 or b["def"] != 5:
+            counters["rounds_not_5v5"] += 1
+        if b["ops_missing"] > 0:
+            counters["rounds_missing_operator_entries"] += 1
+        if b["winner_side"] not in {"attacker", "defender"}:
+            counters["rounds_invalid_winner_side"] += 1
+    return counters
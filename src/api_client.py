@@ -106,6 +106,10 @@ class TrackerAPIClient:
         self.min_request_interval_seconds = max(0.0, float(min_request_interval_seconds))
         self.max_429_wait_seconds = max(1.0, float(max_429_wait_seconds))
         self._next_request_not_before = 0.0
+        # Optional match_id -> raw payload store (Database implements it). When set,
+        # match details are served from it and every network fetch is written back.
+        self.payload_store: Optional[Any] = None
+        self.payload_store_hits = 0
 
     @staticmethod
     def _progress_print(message: str, end: str = "\n") -> None:
@@ -344,13 +348,14 @@ class TrackerAPIClient:
             "esr": self._safe_float(self._stat(stats, "esr")),
         }
 
-    def get_match_list(self, username: str, next_token: Optional[int] = None) -> Dict[str, Any]:
+    def _match_list_url(self, username: str, next_token: Optional[int] = None) -> str:
         base = f"{self.BASE}/matches/ubi/{username}"
         if next_token is None:
-            url = base
-        else:
-            url = f"{base}?{urlencode({'next': next_token})}"
-        payload = self._get_json(url)
+            return base
+        return f"{base}?{urlencode({'next': next_token})}"
+
+    def get_match_list(self, username: str, next_token: Optional[int] = None) -> Dict[str, Any]:
+        payload = self._get_json(self._match_list_url(username, next_token))
         return self.parse_match_list(payload)
 
     @classmethod
@@ -423,8 +428,11 @@ class TrackerAPIClient:
             "career_stats": overview_stats_raw,
         }
 
+    def _profile_url(self, username: str) -> str:
+        return f"{self.BASE}/profile/ubi/{username}"
+
     def get_profile(self, username: str) -> Dict[str, Any]:
-        payload = self._get_json(f"{self.BASE}/profile/ubi/{username}")
+        payload = self._get_json(self._profile_url(username))
         return self.parse_profile(payload)
 
     def _parse_encounters_payload(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -457,17 +465,25 @@ class TrackerAPIClient:
         if not match_list:
             return []
 
-        by_name: Dict[str, Dict[str, Any]] = {}
-        owner = username.lower()
+        fetched: List[tuple[Dict[str, Any], Dict[str, Any]]] = []
         for match in match_list:
             match_id = match.get("match_id")
             if not match_id:
                 continue
             try:
-                detail = self.get_match_detail(match_id)
+                fetched.append((match, self.get_match_detail(match_id)))
             except Exception:
                 continue
+        return self._tally_encounters(username, fetched)
 
+    @staticmethod
+    def _tally_encounters(
+        username: str,
+        fetched: List[tuple[Dict[str, Any], Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        by_name: Dict[str, Dict[str, Any]] = {}
+        owner = username.lower()
+        for match, detail in fetched:
             timestamp = (match.get("timestamp") or "")
             for player in detail.get("players", []):
                 if not isinstance(player, dict):
@@ -490,15 +506,17 @@ class TrackerAPIClient:
                     row["latestMatch"] = timestamp
         return sorted(by_name.values(), key=lambda r: int(r.get("count", 0)), reverse=True)
 
-    def get_encounters(self, uuid: Optional[str] = None, username: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get players encountered by a user, with fallback if endpoint is unavailable."""
+    def _encounter_urls(self, uuid: Optional[str] = None, username: Optional[str] = None) -> List[str]:
         candidates: List[str] = []
         if uuid:
             candidates.append(f"{self.BASE}/stats/played-with/ubi/{quote(str(uuid), safe='')}")
         if username:
             candidates.append(f"{self.BASE}/stats/played-with/ubi/{quote(str(username), safe='')}")
+        return candidates
 
-        for url in candidates:
+    def get_encounters(self, uuid: Optional[str] = None, username: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get players encountered by a user, with fallback if endpoint is unavailable."""
+        for url in self._encounter_urls(uuid=uuid, username=username):
             try:
                 encounters = self._parse_encounters_payload(self._get_json(url))
                 if encounters:
@@ -560,12 +578,14 @@ class TrackerAPIClient:
             )
         return out
 
-    def get_operator_stats(self, username: str) -> List[Dict[str, Any]]:
-        url = (
+    def _operator_stats_url(self, username: str) -> str:
+        return (
             f"{self.BASE}/profile/ubi/{username}/segments/operator?"
             f"{urlencode({'sessionType': 'ranked', 'season': 'all'})}"
         )
-        return self.parse_operator_segments(self._get_json(url))
+
+    def get_operator_stats(self, username: str) -> List[Dict[str, Any]]:
+        return self.parse_operator_segments(self._get_json(self._operator_stats_url(username)))
 
     def parse_map_segments(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
@@ -604,24 +624,33 @@ class TrackerAPIClient:
             )
         return out
 
-    def get_map_stats(self, username: str) -> List[Dict[str, Any]]:
+    def _map_stats_urls(self, username: str) -> List[str]:
+        """Return the base, attacker and defender map segment URLs (in that order)."""
         base_url = f"{self.BASE}/profile/ubi/{username}/segments/map"
-        base_rows = self._parse_map_segments_with_side(
-            self._get_json(
-                f"{base_url}?{urlencode({'sessionType': 'ranked', 'season': 'all'})}"
-            )
-        )
-        atk_rows = self._parse_map_segments_with_side(
-            self._get_json(
-                f"{base_url}?{urlencode({'sessionType': 'ranked', 'season': 'all', 'side': 'attacker'})}"
-            )
-        )
-        def_rows = self._parse_map_segments_with_side(
-            self._get_json(
-                f"{base_url}?{urlencode({'sessionType': 'ranked', 'season': 'all', 'side': 'defender'})}"
-            )
+        return [
+            f"{base_url}?{urlencode({'sessionType': 'ranked', 'season': 'all'})}",
+            f"{base_url}?{urlencode({'sessionType': 'ranked', 'season': 'all', 'side': 'attacker'})}",
+            f"{base_url}?{urlencode({'sessionType': 'ranked', 'season': 'all', 'side': 'defender'})}",
+        ]
+
+    def get_map_stats(self, username: str) -> List[Dict[str, Any]]:
+        base_url, atk_url, def_url = self._map_stats_urls(username)
+        return self.merge_map_stats_payloads(
+            self._get_json(base_url),
+            self._get_json(atk_url),
+            self._get_json(def_url),
         )
 
+    def merge_map_stats_payloads(
+        self,
+        base_payload: Dict[str, Any],
+        atk_payload: Dict[str, Any],
+        def_payload: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        base_rows = self._parse_map_segments_with_side(base_payload)
+        atk_rows = self._parse_map_segments_with_side(atk_payload)
+        def_rows = self._parse_map_segments_with_side(def_payload)
+
         merged: Dict[str, Dict[str, Any]] = {}
 
         def _ensure(slug: str, row: Dict[str, Any]) -> Dict[str, Any]:
@@ -771,8 +800,37 @@ class TrackerAPIClient:
             },
         }
 
+    def _match_detail_url(self, match_id: str) -> str:
+        return f"{self.BASE}/matches/{match_id}"
+
+    def _load_stored_payload(self, match_id: str) -> Optional[Dict[str, Any]]:
+        if self.payload_store is None:
+            return None
+        try:
+            payload = self.payload_store.get_match_detail_payload(match_id)
+        except Exception as exc:
+            print(f"[API] Warning: payload store read failed for {match_id}: {exc}")
+            return None
+        if payload is not None:
+            self.payload_store_hits += 1
+        return payload
+
+    def _store_payload(self, match_id: str, payload: Dict[str, Any]) -> None:
+        if self.payload_store is None:
+            return
+        try:
+            self.payload_store.save_match_detail_payload(match_id, payload)
+        except Exception as exc:
+            print(f"[API] Warning: payload store write failed for {match_id}: {exc}")
+
     def get_match_detail(self, match_id: str) -> Dict[str, Any]:
-        payload = self._get_json(f"{self.BASE}/matches/{match_id}")
+        payload = self._load_stored_payload(match_id)
+        if payload is None:
+            payload = self._get_json(self._match_detail_url(match_id))
+            self._store_payload(match_id, payload)
+        return self.parse_match_detail(match_id, payload)
+
+    def parse_match_detail(self, match_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         grouped = self.parse_match_detail_segments(payload)
         player_rounds = [self.parse_player_round(s) for s in grouped["player-round"]]
         rounds_by_id: Dict[int, Dict[str, str]] = {}
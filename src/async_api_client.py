@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from src.api_client import TrackerAPIClient
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket shared by every request an async client makes.
+
+    The bucket refills at `rate_per_second` up to `burst` tokens. A 429 (or any
+    Retry-After hint) halves the current rate and blocks all callers until the
+    server's window has passed; each success then recovers the rate additively
+    toward the configured target. State is guarded by a thread lock rather than
+    an asyncio primitive so one limiter can be shared across event loops and
+    threads in a process (e.g. the CLI's per-command `asyncio.run`). The budget
+    is per process: main.py and the web server each pace themselves.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = 1.0,
+        burst: int = 2,
+        min_rate_per_second: float = 0.05,
+        recovery_per_success: float = 0.05,
+    ):
+        self.target_rate = max(0.01, float(rate_per_second))
+        self.rate = self.target_rate
+        self.burst = max(1, int(burst))
+        self.min_rate = max(0.001, min(float(min_rate_per_second), self.target_rate))
+        self.recovery_per_success = max(0.0, float(recovery_per_success))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def _try_take(self) -> float:
+        """Take a token if available; otherwise record and return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                wait = self._blocked_until - now
+            elif self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.acquired += 1
+                return 0.0
+            else:
+                wait = (1.0 - self._tokens) / self.rate
+            self.waited_seconds += wait
+            return wait
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after_seconds: float) -> None:
+        """Back off after a 429: halve the rate and pause every caller."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, now + max(0.0, float(retry_after_seconds)))
+            self.throttled += 1
+
+    def reward(self) -> None:
+        """Recover toward the configured rate after a successful request."""
+        with self._lock:
+            if self.rate < self.target_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.target_rate, self.rate + self.recovery_per_success)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "rate_per_second": round(self.rate, 4),
+                "target_rate_per_second": round(self.target_rate, 4),
+                "burst": self.burst,
+                "tokens": round(self._tokens, 3),
+                "blocked_seconds": round(max(0.0, self._blocked_until - now), 3),
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+
+class AsyncTrackerAPIClient(TrackerAPIClient):
+    """
+    Async variant of TrackerAPIClient.
+
+    Parsing is inherited unchanged; only the network layer differs. Requests run
+    on worker threads (stdlib urlopen), at most `max_in_flight` at a time, and
+    every request first takes a token from the shared limiter instead of the
+    fixed per-detail sleeps the sync client uses.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds: int = 20,
+        max_in_flight: int = 4,
+        rate_per_second: float = 1.0,
+        burst: int = 2,
+        max_429_wait_seconds: float = 120.0,
+        max_429_retries: int = 3,
+        limiter: Optional[TokenBucketLimiter] = None,
+    ):
+        super().__init__(
+            timeout_seconds=timeout_seconds,
+            sleep_seconds=0.0,
+            min_request_interval_seconds=0.0,
+            max_429_wait_seconds=max_429_wait_seconds,
+        )
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_429_retries = max(0, int(max_429_retries))
+        self.limiter = limiter or TokenBucketLimiter(rate_per_second=rate_per_second, burst=burst)
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _in_flight_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_in_flight)
+            self._semaphores[loop] = sem
+        return sem
+
+    def _fetch_json_blocking(self, url: str) -> Dict[str, Any]:
+        req = Request(url, headers=self.HEADERS, method="GET")
+        with urlopen(req, timeout=self.timeout_seconds) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    async def _get_json(self, url: str, retry_429: bool = True) -> Dict[str, Any]:
+        attempts = 0
+        while True:
+            await self.limiter.acquire()
+            try:
+                async with self._in_flight_semaphore():
+                    payload = await asyncio.to_thread(self._fetch_json_blocking, url)
+            except HTTPError as exc:
+                if exc.code == 429 and retry_429 and attempts < self.max_429_retries:
+                    retry_after_header = exc.headers.get("Retry-After") if exc.headers else None
+                    wait_seconds = self._retry_after_seconds(retry_after_header)
+                    if wait_seconds is None:
+                        wait_seconds = 10.0
+                    self.limiter.penalize(min(wait_seconds, self.max_429_wait_seconds))
+                    attempts += 1
+                    continue
+                raise
+            self.limiter.reward()
+            return payload
+
+    async def get_match_list(self, username: str, next_token: Optional[int] = None) -> Dict[str, Any]:
+        return self.parse_match_list(await self._get_json(self._match_list_url(username, next_token)))
+
+    async def get_profile(self, username: str) -> Dict[str, Any]:
+        return self.parse_profile(await self._get_json(self._profile_url(username)))
+
+    async def get_operator_stats(self, username: str) -> List[Dict[str, Any]]:
+        return self.parse_operator_segments(await self._get_json(self._operator_stats_url(username)))
+
+    async def get_map_stats(self, username: str) -> List[Dict[str, Any]]:
+        base_payload, atk_payload, def_payload = await asyncio.gather(
+            *(self._get_json(url) for url in self._map_stats_urls(username))
+        )
+        return self.merge_map_stats_payloads(base_payload, atk_payload, def_payload)
+
+    async def _payload_store_call(self, method: str, *args: Any) -> Any:
+        # Keep SQLite off the event loop: an awaitable store (DatabaseAccess.database)
+        # runs on its own threads, a plain one on a worker thread, so it must not be
+        # bound to the thread that created it.
+        fn = getattr(self.payload_store, method)
+        if inspect.iscoroutinefunction(fn):
+            return await fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def _load_stored_payload_async(self, match_id: str) -> Optional[Dict[str, Any]]:
+        if self.payload_store is None:
+            return None
+        try:
+            payload = await self._payload_store_call("get_match_detail_payload", match_id)
+        except Exception as exc:
+            print(f"[API] Warning: payload store read failed for {match_id}: {exc}")
+            return None
+        if payload is not None:
+            self.payload_store_hits += 1
+        return payload
+
+    async def _store_payload_async(self, match_id: str, payload: Dict[str, Any]) -> None:
+        if self.payload_store is None:
+            return
+        try:
+            await self._payload_store_call("save_match_detail_payload", match_id, payload)
+        except Exception as exc:
+            print(f"[API] Warning: payload store write failed for {match_id}: {exc}")
+
+    async def get_match_detail(self, match_id: str) -> Dict[str, Any]:
+        payload = await self._load_stored_payload_async(match_id)
+        if payload is None:
+            payload = await self._get_json(self._match_detail_url(match_id))
+            await self._store_payload_async(match_id, payload)
+        return self.parse_match_detail(match_id, payload)
+
+    async def get_all_matches(
+        self,
+        username: str,
+        max_pages: Optional[int] = None,
+        since_date: Optional[Any] = None,
+        show_progress: bool = False,
+    ) -> List[Dict[str, Any]]:
+        # Pages chain through `next`, so they stay sequential; pacing comes from the limiter.
+        matches: List[Dict[str, Any]] = []
+        next_token: Optional[int] = None
+        pages_fetched = 0
+        cutoff = self._normalize_since_date(since_date)
+
+        while True:
+            if max_pages is not None and pages_fetched >= max_pages:
+                break
+            page = await self.get_match_list(username, next_token=next_token)
+            page_matches = page.get("matches", [])
+            stop_for_cutoff = False
+            if cutoff is not None:
+                filtered: List[Dict[str, Any]] = []
+                for item in page_matches:
+                    ts = self._parse_timestamp(item.get("timestamp"))
+                    if ts is None or ts >= cutoff:
+                        filtered.append(item)
+                    else:
+                        stop_for_cutoff = True
+                page_matches = filtered
+
+            matches.extend(page_matches)
+            next_token = page.get("next")
+            pages_fetched += 1
+            if show_progress:
+                self._progress_print(f"  📄 Page {pages_fetched} ({len(matches)} matches)")
+
+            if stop_for_cutoff or next_token is None:
+                break
+
+        return matches
+
+    async def fetch_match_details(
+        self,
+        matches: List[Dict[str, Any]],
+        skip_match_ids: Optional[set[str]] = None,
+        show_progress: bool = False,
+        progress_label: str = "⚔️  Match",
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch details for match-list rows concurrently, preserving input order.
+
+        404s, network errors and retries exhausted on 429 drop the match, matching
+        the sync client's best-effort behaviour. Anything else (a payload the parser
+        cannot handle, a failing payload store) propagates instead of reading as
+        "no detail".
+        """
+        skip_match_ids = skip_match_ids or set()
+        wanted = [m for m in matches if m.get("match_id") and m.get("match_id") not in skip_match_ids]
+        total = len(matches)
+        done = 0
+
+        async def _one(match: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            nonlocal done
+            try:
+                detail = await self.get_match_detail(match["match_id"])
+            except (URLError, TimeoutError, ConnectionError):
+                # HTTPError is a URLError; read timeouts and resets surface as the other two.
+                return None
+            finally:
+                done += 1
+                if show_progress:
+                    map_name = match.get("map") or "Unknown Map"
+                    self._progress_print(f"\r  {progress_label} {done}/{total}  {map_name:<20}", end="")
+            detail["match_meta"] = match
+            return detail
+
+        results = await asyncio.gather(*(_one(m) for m in wanted))
+        if show_progress and total > 0:
+            self._progress_print("")
+        return [r for r in results if r is not None]
+
+    async def scrape_full_match_history(
+        self,
+        username: str,
+        max_matches: Optional[int] = None,
+        since_date: Optional[Any] = None,
+        skip_match_ids: Optional[set[str]] = None,
+        show_progress: bool = False,
+    ) -> List[Dict[str, Any]]:
+        pages = None
+        if max_matches is not None:
+            pages = max(1, (max_matches + 19) // 20)
+        all_matches = await self.get_all_matches(
+            username,
+            max_pages=pages,
+            since_date=since_date,
+            show_progress=show_progress,
+        )
+        selected = all_matches[:max_matches] if max_matches is not None else all_matches
+        if show_progress:
+            self._progress_print(f"✅ Match history ({len(selected)} matches found)")
+        return await self.fetch_match_details(selected, skip_match_ids=skip_match_ids, show_progress=show_progress)
+
+    async def scrape_backfill_page(
+        self,
+        username: str,
+        next_page: Optional[int],
+        skip_match_ids: Optional[set[str]] = None,
+        show_progress: bool = False,
+    ) -> Dict[str, Any]:
+        page = await self.get_match_list(username, next_token=next_page)
+        matches = page.get("matches", []) or []
+        following_page = page.get("next")
+
+        oldest_dt = None
+        oldest_ts: Optional[str] = None
+        for match in matches:
+            ts_raw = match.get("timestamp")
+            dt = self._parse_timestamp(ts_raw)
+            if dt is None:
+                continue
+            if oldest_dt is None or dt < oldest_dt:
+                oldest_dt = dt
+                oldest_ts = ts_raw
+
+        details = await self.fetch_match_details(
+            matches,
+            skip_match_ids=skip_match_ids,
+            show_progress=show_progress,
+            progress_label="⏪ Backfill",
+        )
+        return {
+            "details": details,
+            "next_page": following_page,
+            "oldest_ts": oldest_ts,
+            "complete": (following_page is None) or (len(matches) == 0),
+        }
+
+    async def get_encounters(self, uuid: Optional[str] = None, username: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get players encountered by a user, with fallback if endpoint is unavailable."""
+        for url in self._encounter_urls(uuid=uuid, username=username):
+            try:
+                encounters = self._parse_encounters_payload(await self._get_json(url))
+                if encounters:
+                    return encounters
+            except HTTPError as exc:
+                if exc.code not in (403, 404):
+                    raise
+
+        if username:
+            match_list = (await self.get_all_matches(username, max_pages=1))[:8]
+            details = await self.fetch_match_details(match_list)
+            return self._tally_encounters(username, [(d["match_meta"], d) for d in details])
+        return []
+
+
+_shared_client: Optional[AsyncTrackerAPIClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_async_client() -> AsyncTrackerAPIClient:
+    """Process-wide client, so every caller in this process draws from one rate budget."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = AsyncTrackerAPIClient()
+        return _shared_client
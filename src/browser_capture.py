@@ -0,0 +1,235 @@
+"""
+Capture mode for Playwright pages that load tracker pages only to read their API traffic.
+
+A `CaptureMode` names the capture targets a page serves (v2 match detail, v1
+ow-ingest, match list, profile DOM scraping). Each target allows a set of resource
+types; requests outside the union of those types, or to hosts other than the
+tracker's own, are aborted in a page route before they hit the network. Images,
+fonts, media, ads and analytics never load. Cloudflare challenge traffic
+(challenges.cloudflare.com, /cdn-cgi/ on tracker hosts) always goes through so a
+challenge can render and be solved, and `PageCapture.suspend()` lets everything
+through while a caller waits out a challenge page.
+
+Modes:
+- "block":   abort what the targets do not need (default).
+- "observe": let everything through but measure what would have been blocked;
+             the measured sizes and page times calibrate the savings estimates.
+- "off":     no routing at all.
+
+`PageCapture` keeps per-page counters; `begin()` / `end()` bracket one page load and
+`end()` returns that load's report, including bytes and time saved.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+CAPTURE_MODES = ("block", "observe", "off")
+DEFAULT_CAPTURE_MODE = os.environ.get("JAKAL_CAPTURE_MODE", "block").strip().lower()
+
+# Tracker pages, their API and their static CDN; everything else is third party.
+FIRST_PARTY_HOSTS = ("tracker.network", "tracker.gg", "trackercdn.com")
+# Turnstile's iframe and scripts, and Cloudflare's own endpoints on the site's hosts.
+CHALLENGE_HOSTS = ("challenges.cloudflare.com",)
+CHALLENGE_PATH_PREFIX = "/cdn-cgi/"
+
+_XHR_ONLY = frozenset({"document", "script", "xhr", "fetch"})
+_RENDERED = _XHR_ONLY | {"stylesheet"}
+CAPTURE_TARGETS: Dict[str, frozenset] = {
+    # Match page: the app's scripts fire the v2 XHR without any rendering.
+    "v2_match": _XHR_ONLY,
+    # Overwolf round detail is requested by the same scripts after the v2 call.
+    "v1_ingest": _XHR_ONLY,
+    # The match list paginates on scroll, which needs real layout.
+    "match_list": _RENDERED,
+    # Network scan and the websocket scrape read and click the rendered DOM.
+    "profile_dom": _RENDERED,
+}
+
+# Fallback per-type sizes until an observe-mode page has measured real ones.
+TYPICAL_BYTES: Dict[str, int] = {
+    "image": 40_000,
+    "media": 250_000,
+    "font": 50_000,
+    "stylesheet": 30_000,
+    "script": 80_000,
+    "xhr": 4_000,
+    "fetch": 4_000,
+    "document": 60_000,
+    "other": 8_000,
+}
+
+
+def _host_matches(host: str, hosts: Tuple[str, ...]) -> bool:
+    return any(host == h or host.endswith("." + h) for h in hosts)
+
+
+def _host_allowed(url: str, hosts: Tuple[str, ...]) -> bool:
+    host = (urlsplit(url).hostname or "").lower()
+    if not host:
+        # data:, blob: and about: URLs never leave the browser.
+        return True
+    return _host_matches(host, hosts)
+
+
+def is_challenge_request(url: str, hosts: Tuple[str, ...] = FIRST_PARTY_HOSTS) -> bool:
+    """True for Cloudflare challenge traffic, which must load for a challenge to clear."""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if _host_matches(host, CHALLENGE_HOSTS):
+        return True
+    return parts.path.startswith(CHALLENGE_PATH_PREFIX) and _host_matches(host, hosts)
+
+
+@dataclass
+class _Window:
+    started: float
+    allowed_requests: int = 0
+    allowed_bytes: int = 0
+    blocked_requests: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+    blocked_by_reason: Dict[str, int] = field(default_factory=dict)
+    would_block_bytes: int = 0
+
+
+class CaptureMode:
+    def __init__(
+        self,
+        targets: Iterable[str],
+        *,
+        mode: Optional[str] = None,
+        extra_hosts: Iterable[str] = (),
+    ) -> None:
+        self.targets = tuple(targets)
+        unknown = [t for t in self.targets if t not in CAPTURE_TARGETS]
+        if unknown or not self.targets:
+            raise ValueError(f"Unknown capture targets: {unknown or 'none given'}")
+        mode_key = str(mode or DEFAULT_CAPTURE_MODE).strip().lower()
+        self.mode = mode_key if mode_key in CAPTURE_MODES else "block"
+        self.resource_types = frozenset().union(*(CAPTURE_TARGETS[t] for t in self.targets))
+        self.hosts = FIRST_PARTY_HOSTS + tuple(h.lower() for h in extra_hosts)
+        # Calibration shared by every page of this mode: type -> [bytes, requests]
+        # measured in observe mode, and observe-mode page load times.
+        self._observed_bytes: Dict[str, List[int]] = {}
+        self._observed_load_s: List[float] = []
+
+    def check(self, resource_type: str, url: str) -> Optional[str]:
+        """None when the request is allowed, else the block reason ("type" or "host")."""
+        if is_challenge_request(url, self.hosts):
+            return None
+        if resource_type not in self.resource_types:
+            return "type"
+        if not _host_allowed(url, self.hosts):
+            return "host"
+        return None
+
+    def estimated_bytes(self, resource_type: str) -> int:
+        measured = self._observed_bytes.get(resource_type)
+        if measured and measured[1]:
+            return int(measured[0] / measured[1])
+        return TYPICAL_BYTES.get(resource_type, TYPICAL_BYTES["other"])
+
+    async def attach(self, page: Any) -> "PageCapture":
+        capture = PageCapture(self, page)
+        if self.mode != "off":
+            await page.route("**/*", capture._on_route)
+            page.on("requestfinished", capture._on_request_finished)
+        return capture
+
+
+class PageCapture:
+    """Counters for one page under a `CaptureMode`: page totals plus the current load."""
+
+    def __init__(self, mode: CaptureMode, page: Any) -> None:
+        self.mode = mode
+        self.page = page
+        self.totals = _Window(started=time.perf_counter())
+        self.loads = 0
+        self.suspended = False
+        self._window: Optional[_Window] = None
+
+    def suspend(self) -> None:
+        """Let every request through (e.g. while a challenge page is solved) until `resume()`."""
+        self.suspended = True
+
+    def resume(self) -> None:
+        self.suspended = False
+
+    def _windows(self) -> List[_Window]:
+        return [self.totals] if self._window is None else [self.totals, self._window]
+
+    async def _on_route(self, route: Any) -> None:
+        request = route.request
+        reason = self.mode.check(request.resource_type, request.url)
+        if reason is None or self.mode.mode == "observe" or self.suspended:
+            await route.continue_()
+            return
+        for w in self._windows():
+            w.blocked_requests += 1
+            w.blocked_by_type[request.resource_type] = w.blocked_by_type.get(request.resource_type, 0) + 1
+            w.blocked_by_reason[reason] = w.blocked_by_reason.get(reason, 0) + 1
+        await route.abort()
+
+    async def _on_request_finished(self, request: Any) -> None:
+        try:
+            sizes = await request.sizes()
+            size = int(sizes.get("responseBodySize", 0)) + int(sizes.get("responseHeadersSize", 0))
+        except Exception:
+            size = 0
+        if self.mode.mode == "observe" and self.mode.check(request.resource_type, request.url) is not None:
+            measured = self.mode._observed_bytes.setdefault(request.resource_type, [0, 0])
+            measured[0] += size
+            measured[1] += 1
+            for w in self._windows():
+                w.would_block_bytes += size
+            return
+        for w in self._windows():
+            w.allowed_requests += 1
+            w.allowed_bytes += size
+
+    def begin(self) -> None:
+        """Start a page load window; the next `end()` reports on it."""
+        self._window = _Window(started=time.perf_counter())
+
+    def end(self) -> Dict[str, Any]:
+        window = self._window or self.totals
+        self._window = None
+        elapsed = time.perf_counter() - window.started
+        if window is not self.totals:
+            self.loads += 1
+            if self.mode.mode == "observe":
+                self.mode._observed_load_s.append(elapsed)
+        return self._report(window, elapsed)
+
+    def report(self) -> Dict[str, Any]:
+        """Totals since the page was attached."""
+        return self._report(self.totals, time.perf_counter() - self.totals.started, loads=self.loads)
+
+    def _report(self, window: _Window, elapsed: float, loads: int = 1) -> Dict[str, Any]:
+        observed = self.mode._observed_load_s
+        if self.mode.mode == "block" and observed and loads:
+            baseline = (sum(observed) / len(observed)) * loads
+            time_saved = round(max(0.0, baseline - elapsed), 3)
+        else:
+            time_saved = None
+        return {
+            "mode": self.mode.mode,
+            "targets": list(self.mode.targets),
+            "elapsed_s": round(elapsed, 3),
+            "allowed_requests": window.allowed_requests,
+            "allowed_bytes": window.allowed_bytes,
+            "blocked_requests": window.blocked_requests,
+            "blocked_by_type": dict(window.blocked_by_type),
+            "blocked_by_reason": dict(window.blocked_by_reason),
+            "bytes_saved": (
+                window.would_block_bytes
+                if self.mode.mode == "observe"
+                else sum(self.mode.estimated_bytes(t) * n for t, n in window.blocked_by_type.items())
+            ),
+            "bytes_saved_measured": self.mode.mode == "observe",
+            "time_saved_s": time_saved,
+        }
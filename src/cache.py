@@ -1,205 +1,412 @@
 import json
+import os
+import sqlite3
+import threading
 import time
-from typing import Callable
+from collections import OrderedDict
+from typing import Any, Callable
 
 
 _db = None
-_get_db_cursor: Callable[[], object] | None = None
 
-workspace_scope_cache_mem: dict[str, tuple[float, dict]] = {}
-workspace_team_cache_mem: dict[str, tuple[float, dict]] = {}
-workspace_insights_cache_mem: dict[str, tuple[float, dict]] = {}
+WORKSPACE_CACHE_TTL_SECONDS = 90
 WORKSPACE_SCOPE_CACHE_TTL_SECONDS = 180
 WORKSPACE_TEAM_CACHE_TTL_SECONDS = 300
 WORKSPACE_INSIGHTS_CACHE_TTL_SECONDS = 300
+WORKSPACE_ROUNDS_CACHE_TTL_SECONDS = 180
+PLAYER_DATASET_CACHE_TTL_SECONDS = 300
 
+CACHE_MAX_ENTRIES = int(os.environ.get("JAKAL_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.environ.get("JAKAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_L2_EXPIRY_INTERVAL_SECONDS = 60
 
-def configure_workspace_cache(db, get_db_cursor: Callable[[], object]) -> None:
-    global _db, _get_db_cursor
-    _db = db
-    _get_db_cursor = get_db_cursor
+# Tables used by the per-namespace SQL caches this module replaced.
+_LEGACY_CACHE_TABLES = ("workspace_scope_cache", "workspace_team_cache", "workspace_insights_cache")
 
 
-def _ensure_workspace_cache_tables() -> None:
-    cur = _get_db_cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS workspace_scope_cache (
-            scope_key    TEXT PRIMARY KEY,
-            payload_json TEXT NOT NULL,
-            created_at   REAL NOT NULL,
-            expires_at   REAL NOT NULL,
-            db_rev       TEXT
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS workspace_team_cache (
-            team_key     TEXT PRIMARY KEY,
-            payload_json TEXT NOT NULL,
-            created_at   REAL NOT NULL,
-            expires_at   REAL NOT NULL,
-            db_rev       TEXT
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS workspace_insights_cache (
-            insights_key  TEXT PRIMARY KEY,
-            payload_json  TEXT NOT NULL,
-            created_at    REAL NOT NULL,
-            expires_at    REAL NOT NULL,
-            db_rev        TEXT
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_workspace_scope_cache_expires
-        ON workspace_scope_cache (expires_at)
-        """
-    )
-    cur.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_workspace_team_cache_expires
-        ON workspace_team_cache (expires_at)
-        """
-    )
-    cur.execute(
+def _encode(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _encoded_bytes(encoded: str) -> int:
+    """UTF-8 size of an encoded payload; the byte budget counts bytes, not characters."""
+    # ASCII (json.dumps' default escaping) is one byte per character; skip the copy then.
+    return len(encoded) if encoded.isascii() else len(encoded.encode("utf-8"))
+
+
+class _NamespaceStats:
+    __slots__ = ("hits", "misses", "l2_hits", "stale", "expired", "evictions", "sets", "invalidations")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SQLiteL2Cache:
+    """
+    Shared second-level cache in one SQLite table.
+
+    Uses its own connection (WAL, busy timeout) so the background expiry thread never
+    touches the request-path connection. Reads ignore expired rows instead of deleting
+    them; `purge_expired` does the cleanup off the request path.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self.conn.execute("PRAGMA busy_timeout = 30000")
+        try:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace    TEXT NOT NULL,
+                    cache_key    TEXT NOT NULL,
+                    payload_json TEXT NOT NULL,
+                    db_rev       TEXT,
+                    created_at   REAL NOT NULL,
+                    expires_at   REAL NOT NULL,
+                    PRIMARY KEY (namespace, cache_key)
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at)"
+            )
+            for table in _LEGACY_CACHE_TABLES:
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.commit()
+
+    def get(self, namespace: str, key: str) -> tuple[str, str] | None:
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT payload_json, db_rev FROM cache_entries
+                WHERE namespace = ? AND cache_key = ? AND expires_at > ?
+                """,
+                (namespace, key, time.time()),
+            ).fetchone()
+        if not row:
+            return None
+        return row[0], str(row[1] or "")
+
+    def set(self, namespace: str, key: str, encoded: str, db_rev: str, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO cache_entries (namespace, cache_key, payload_json, db_rev, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(namespace, cache_key) DO UPDATE SET
+                    payload_json = excluded.payload_json,
+                    db_rev = excluded.db_rev,
+                    created_at = excluded.created_at,
+                    expires_at = excluded.expires_at
+                """,
+                (namespace, key, encoded, db_rev, now, now + max(1.0, float(ttl_seconds))),
+            )
+            self.conn.commit()
+
+    def delete(self, namespace: str, key: str | None = None) -> int:
+        with self._lock:
+            if key is None:
+                cur = self.conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+            else:
+                cur = self.conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND cache_key = ?", (namespace, key)
+                )
+            self.conn.commit()
+            return max(0, cur.rowcount)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self.conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+            self.conn.commit()
+            return max(0, cur.rowcount)
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self.conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+class CacheManager:
+    """
+    One cache for every workspace payload: a bounded in-memory LRU (entry count and
+    encoded byte size) in front of an optional SQLite L2.
+
+    Entries live in namespaces with their own TTL. Each entry records the db revision
+    it was computed against; a lookup with a different revision is a miss and drops
+    the entry, so callers never have to fold the revision into their keys.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.RLock()
+        # (namespace, key) -> (expires_at, db_rev, size_bytes, value)
+        self._entries: "OrderedDict[tuple[str, str], tuple[float, str, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._namespaces: dict[str, dict] = {}
+        self._stats: dict[str, _NamespaceStats] = {}
+        self.l2: SQLiteL2Cache | None = None
+        self._expiry_thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        # Called as observer(namespace, hit) after every lookup (src.perf tags requests with it).
+        self.observer: Callable[[str, bool], None] | None = None
+
+    def register_namespace(self, namespace: str, ttl_seconds: float, use_l2: bool = False) -> None:
+        with self._lock:
+            self._namespaces[namespace] = {"ttl": float(ttl_seconds), "l2": bool(use_l2)}
+            self._stats.setdefault(namespace, _NamespaceStats())
+
+    def attach_l2(self, l2: SQLiteL2Cache | None) -> None:
+        self.l2 = l2
+
+    def _ns(self, namespace: str) -> dict:
+        if namespace not in self._namespaces:
+            raise KeyError(f"Unknown cache namespace '{namespace}'")
+        return self._namespaces[namespace]
+
+    def _drop(self, entry_key: tuple[str, str]) -> None:
+        item = self._entries.pop(entry_key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def _insert(self, entry_key: tuple[str, str], expires_at: float, db_rev: str, size: int, value: Any) -> None:
+        self._drop(entry_key)
+        if size > self.max_bytes:
+            return
+        self._entries[entry_key] = (expires_at, db_rev, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            evicted_key, item = self._entries.popitem(last=False)
+            self._bytes -= item[2]
+            self._stats[evicted_key[0]].evictions += 1
+
+    def get(self, namespace: str, key: str, db_rev: str = "") -> Any | None:
+        cfg = self._ns(namespace)
+        db_rev = str(db_rev or "")
+        entry_key = (namespace, key)
+        now = time.time()
+        with self._lock:
+            stats = self._stats[namespace]
+            item = self._entries.get(entry_key)
+            if item is not None:
+                expires_at, entry_rev, _size, value = item
+                if expires_at <= now:
+                    self._drop(entry_key)
+                    stats.expired += 1
+                elif entry_rev != db_rev:
+                    self._drop(entry_key)
+                    stats.stale += 1
+                else:
+                    self._entries.move_to_end(entry_key)
+                    stats.hits += 1
+                    self._observe(namespace, True)
+                    return value
+        if cfg["l2"] and self.l2 is not None:
+            found = self.l2.get(namespace, key)
+            if found is not None and found[1] == db_rev:
+                encoded = found[0]
+                try:
+                    value = json.loads(encoded)
+                except ValueError:
+                    value = None
+                if value is not None:
+                    with self._lock:
+                        self._insert(entry_key, now + cfg["ttl"], db_rev, _encoded_bytes(encoded), value)
+                        stats.l2_hits += 1
+                        stats.hits += 1
+                    self._observe(namespace, True)
+                    return value
+        with self._lock:
+            stats.misses += 1
+        self._observe(namespace, False)
+        return None
+
+    def _observe(self, namespace: str, hit: bool) -> None:
+        if self.observer is not None:
+            try:
+                self.observer(namespace, hit)
+            except Exception:
+                pass
+
+    def set(self, namespace: str, key: str, value: Any, db_rev: str = "", size_bytes: int | None = None) -> None:
         """
-        CREATE INDEX IF NOT EXISTS idx_workspace_insights_cache_expires
-        ON workspace_insights_cache (expires_at)
+        Store a value. `size_bytes` lets L1-only namespaces hold non-JSON objects
+        (e.g. a RoundStore) with their own size estimate instead of an encoded copy.
         """
-    )
-    _db.conn.commit()
-
-
-def _workspace_sql_cache_get(table: str, key_col: str, key: str, db_rev: str) -> dict | None:
-    cur = _get_db_cursor()
-    now = time.time()
-    cur.execute(f"DELETE FROM {table} WHERE expires_at <= ?", (now,))
-    cur.execute(
-        f"SELECT payload_json, db_rev FROM {table} WHERE {key_col} = ? AND expires_at > ? LIMIT 1",
-        (key, now),
-    )
-    row = cur.fetchone()
-    if not row:
-        return None
-    if str(row["db_rev"] or "") != str(db_rev or ""):
-        return None
-    try:
-        payload = json.loads(row["payload_json"] or "{}")
-        return payload if isinstance(payload, dict) else None
-    except Exception:
-        return None
+        cfg = self._ns(namespace)
+        db_rev = str(db_rev or "")
+        encoded = _encode(value) if size_bytes is None or cfg["l2"] else None
+        size = int(size_bytes) if size_bytes is not None else _encoded_bytes(encoded)
+        with self._lock:
+            self._insert((namespace, key), time.time() + cfg["ttl"], db_rev, size, value)
+            self._stats[namespace].sets += 1
+        if cfg["l2"] and self.l2 is not None:
+            self.l2.set(namespace, key, encoded, db_rev, cfg["ttl"])
+
+    def invalidate(self, namespace: str | None = None, key: str | None = None) -> int:
+        """Drop one key, one namespace, or (namespace=None) everything."""
+        namespaces = [namespace] if namespace else list(self._namespaces)
+        removed = 0
+        with self._lock:
+            for ns in namespaces:
+                self._ns(ns)
+                doomed = [k for k in self._entries if k[0] == ns and (key is None or k[1] == key)]
+                for entry_key in doomed:
+                    self._drop(entry_key)
+                removed += len(doomed)
+                self._stats[ns].invalidations += len(doomed)
+        if self.l2 is not None:
+            for ns in namespaces:
+                if self._namespaces[ns]["l2"]:
+                    removed += self.l2.delete(ns, key)
+        return removed
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            doomed = [k for k, item in self._entries.items() if item[0] <= now]
+            for entry_key in doomed:
+                self._drop(entry_key)
+                self._stats[entry_key[0]].expired += 1
+        purged = len(doomed)
+        if self.l2 is not None:
+            purged += self.l2.purge_expired()
+        return purged
+
+    def start_background_expiry(self, interval_seconds: float = CACHE_L2_EXPIRY_INTERVAL_SECONDS) -> None:
+        if self._expiry_thread is not None and self._expiry_thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _loop() -> None:
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.purge_expired()
+                except Exception as e:
+                    print(f"[CACHE] Warning: background expiry failed: {e}")
+
+        self._expiry_thread = threading.Thread(target=_loop, name="cache-expiry", daemon=True)
+        self._expiry_thread.start()
+
+    def stop_background_expiry(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_ns = {}
+            for ns, cfg in self._namespaces.items():
+                entries = [item for k, item in self._entries.items() if k[0] == ns]
+                per_ns[ns] = {
+                    "ttl_seconds": cfg["ttl"],
+                    "l2": cfg["l2"],
+                    "entries": len(entries),
+                    "bytes": sum(item[2] for item in entries),
+                    **self._stats[ns].as_dict(),
+                }
+            totals = {name: sum(ns[name] for ns in per_ns.values()) for name in _NamespaceStats.__slots__}
+            lookups = totals["hits"] + totals["misses"]
+            out = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(totals["hits"] / lookups, 4) if lookups else 0.0,
+                **totals,
+                "namespaces": per_ns,
+            }
+        if self.l2 is not None:
+            try:
+                out["l2_entries"] = self.l2.count()
+            except sqlite3.Error as e:
+                out["l2_error"] = str(e)
+        return out
+
 
+cache = CacheManager()
+cache.register_namespace("workspace", WORKSPACE_CACHE_TTL_SECONDS)
+cache.register_namespace("workspace_scope", WORKSPACE_SCOPE_CACHE_TTL_SECONDS, use_l2=True)
+cache.register_namespace("workspace_team", WORKSPACE_TEAM_CACHE_TTL_SECONDS, use_l2=True)
+cache.register_namespace("workspace_insights", WORKSPACE_INSIGHTS_CACHE_TTL_SECONDS, use_l2=True)
+# Columnar round stores are process-local objects; L1 only.
+cache.register_namespace("workspace_rounds", WORKSPACE_ROUNDS_CACHE_TTL_SECONDS)
+cache.register_namespace("player_dataset", PLAYER_DATASET_CACHE_TTL_SECONDS)
 
-def _workspace_sql_cache_set(table: str, key_col: str, key: str, payload: dict, ttl_seconds: int, db_rev: str) -> None:
-    now = time.time()
-    expires = now + max(1, int(ttl_seconds))
-    cur = _get_db_cursor()
-    cur.execute(
-        f"""
-        INSERT INTO {table} ({key_col}, payload_json, created_at, expires_at, db_rev)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT({key_col}) DO UPDATE SET
-            payload_json = excluded.payload_json,
-            created_at = excluded.created_at,
-            expires_at = excluded.expires_at,
-            db_rev = excluded.db_rev
-        """,
-        (key, json.dumps(payload, separators=(",", ":"), sort_keys=True), now, expires, str(db_rev or "")),
-    )
-    _db.conn.commit()
+
+def configure_workspace_cache(db) -> None:
+    global _db
+    _db = db
+
+
+def _ensure_workspace_cache_tables() -> None:
+    """Attach the SQLite L2 next to the app database and start background expiry."""
+    if cache.l2 is None:
+        cache.attach_l2(SQLiteL2Cache(_db.db_path))
+    cache.start_background_expiry()
+
+
+def _workspace_cache_get(key: str, db_rev: str = "") -> dict | None:
+    return cache.get("workspace", key, db_rev)
+
+
+def _workspace_cache_set(key: str, payload: dict, db_rev: str = "") -> None:
+    cache.set("workspace", key, payload, db_rev)
 
 
 def _workspace_scope_cache_get(scope_key: str, db_rev: str) -> dict | None:
-    now = time.time()
-    item = workspace_scope_cache_mem.get(scope_key)
-    if item:
-        ts, payload = item
-        if now - ts <= WORKSPACE_SCOPE_CACHE_TTL_SECONDS:
-            if str(payload.get("db_rev") or "") == str(db_rev or ""):
-                return payload
-        else:
-            workspace_scope_cache_mem.pop(scope_key, None)
-    payload = _workspace_sql_cache_get("workspace_scope_cache", "scope_key", scope_key, db_rev)
-    if payload is not None:
-        workspace_scope_cache_mem[scope_key] = (now, payload)
-    return payload
+    return cache.get("workspace_scope", scope_key, db_rev)
 
 
 def _workspace_scope_cache_set(scope_key: str, payload: dict, db_rev: str) -> None:
     cache_payload = dict(payload or {})
     cache_payload["db_rev"] = str(db_rev or "")
-    workspace_scope_cache_mem[scope_key] = (time.time(), cache_payload)
-    _workspace_sql_cache_set(
-        "workspace_scope_cache",
-        "scope_key",
-        scope_key,
-        cache_payload,
-        WORKSPACE_SCOPE_CACHE_TTL_SECONDS,
-        db_rev,
-    )
+    cache.set("workspace_scope", scope_key, cache_payload, db_rev)
 
 
 def _workspace_team_cache_get(team_key: str, db_rev: str) -> dict | None:
-    now = time.time()
-    item = workspace_team_cache_mem.get(team_key)
-    if item:
-        ts, payload = item
-        if now - ts <= WORKSPACE_TEAM_CACHE_TTL_SECONDS:
-            if str(payload.get("db_rev") or "") == str(db_rev or ""):
-                return payload
-        else:
-            workspace_team_cache_mem.pop(team_key, None)
-    payload = _workspace_sql_cache_get("workspace_team_cache", "team_key", team_key, db_rev)
-    if payload is not None:
-        workspace_team_cache_mem[team_key] = (now, payload)
-    return payload
+    return cache.get("workspace_team", team_key, db_rev)
 
 
 def _workspace_team_cache_set(team_key: str, payload: dict, db_rev: str) -> None:
     cache_payload = dict(payload or {})
     cache_payload["db_rev"] = str(db_rev or "")
-    workspace_team_cache_mem[team_key] = (time.time(), cache_payload)
-    _workspace_sql_cache_set(
-        "workspace_team_cache",
-        "team_key",
-        team_key,
-        cache_payload,
-        WORKSPACE_TEAM_CACHE_TTL_SECONDS,
-        db_rev,
-    )
+    cache.set("workspace_team", team_key, cache_payload, db_rev)
 
 
 def _workspace_insights_cache_get(insights_key: str, db_rev: str) -> dict | None:
-    now = time.time()
-    item = workspace_insights_cache_mem.get(insights_key)
-    if item:
-        ts, payload = item
-        if now - ts <= WORKSPACE_INSIGHTS_CACHE_TTL_SECONDS:
-            if str(payload.get("db_rev") or "") == str(db_rev or ""):
-                return payload
-        else:
-            workspace_insights_cache_mem.pop(insights_key, None)
-    payload = _workspace_sql_cache_get("workspace_insights_cache", "insights_key", insights_key, db_rev)
-    if payload is not None:
-        workspace_insights_cache_mem[insights_key] = (now, payload)
-    return payload
+    return cache.get("workspace_insights", insights_key, db_rev)
 
 
 def _workspace_insights_cache_set(insights_key: str, payload: dict, db_rev: str) -> None:
     cache_payload = dict(payload or {})
     cache_payload["db_rev"] = str(db_rev or "")
-    workspace_insights_cache_mem[insights_key] = (time.time(), cache_payload)
-    _workspace_sql_cache_set(
-        "workspace_insights_cache",
-        "insights_key",
-        insights_key,
-        cache_payload,
-        WORKSPACE_INSIGHTS_CACHE_TTL_SECONDS,
-        db_rev,
-    )
+    cache.set("workspace_insights", insights_key, cache_payload, db_rev)
+
+
+def _workspace_rounds_cache_get(store_key: str, db_rev: str):
+    return cache.get("workspace_rounds", store_key, db_rev)
+
+
+def _workspace_rounds_cache_set(store_key: str, store, db_rev: str) -> None:
+    cache.set("workspace_rounds", store_key, store, db_rev, size_bytes=store.nbytes)
+
+
+def _player_dataset_cache_get(username: str, db_rev: str):
+    return cache.get("player_dataset", username, db_rev)
+
+
+def _player_dataset_cache_set(username: str, dataset, db_rev: str) -> None:
+    cache.set("player_dataset", username, dataset, db_rev, size_bytes=dataset.nbytes)
@@ -0,0 +1,309 @@
+"""
+Compressed storage for the JSON blobs attached to scraped match cards.
+
+`scraped_match_cards` used to carry players_json, rounds_json, summary_json and
+round_data_json inline as text. They now live in `scraped_card_payloads`, one row
+per (card_id, kind), compressed with zstd when `zstandard` is installed and zlib
+otherwise. Both codecs prime the compressor with the same shared dictionary of
+Tracker/scraper JSON fragments, which is what makes the small blobs (players,
+rounds) shrink as well as the large summaries.
+
+Reads return `CardPayload` handles holding the compressed bytes; nothing is
+decompressed or parsed until a consumer calls `.text()` / `.json()`. Card rows
+are listed and filtered with `present_sql()` without touching the blobs at all.
+
+A legacy inline column that is not NULL wins over the side table: new writers
+always NULL it, so a value there came from an older writer (or raw SQL) and is
+the newest copy. `Database.migrate_scraped_card_payloads()` moves legacy text
+into the side table.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib with the same dictionary otherwise
+    zstandard = None
+
+PAYLOAD_KINDS = ("players", "rounds", "summary", "round_data")
+LEGACY_COLUMNS: Dict[str, str] = {
+    "players": "players_json",
+    "rounds": "rounds_json",
+    "summary": "summary_json",
+    "round_data": "round_data_json",
+}
+# Texts that mean "no payload"; they are never stored.
+EMPTY_TEXTS = ("", "{}", "[]", "null")
+
+_STAT_NAMES = (
+    ("kills", "Kills"), ("deaths", "Deaths"), ("assists", "Assists"), ("headshots", "Headshots"),
+    ("kdRatio", "K/D"), ("headshotPct", "Headshot %"), ("roundsPlayed", "Rounds Played"),
+    ("roundsWon", "Wins"), ("roundsLost", "Losses"), ("firstBloods", "First Bloods"),
+    ("firstDeaths", "First Deaths"), ("clutches", "Clutches"), ("timePlayed", "Time Played"),
+)
+# Shared dictionary, least common fragments first: deflate and zstd reach the end
+# of the window with the shortest distances. Never edit a shipped version; data
+# written with it must stay readable. Add a new version and bump DICTIONARY_VERSION.
+_DICTIONARIES: Dict[int, bytes] = {
+    1: "".join(
+        (
+            '{"data":{"attributes":{"id":"","sessionType":"ranked","sessionGameMode":"bomb",'
+            '"sessionMode":"bomb","sessionMap":"","datacenter":"","gamemode":"pvp_ranked"},'
+            '"metadata":{"timestamp":"","duration":,"sessionTypeName":"Ranked","sessionMapName":"",'
+            '"sessionMapImageUrl":"https://trackercdn.com/cdn/r6.tracker.network/images/maps/",'
+            '"isSurrender":false,"isForfeit":false,"isRollback":false,"isCancelledByAC":false,'
+            '"hasOverwolfRoster":false,"fullMatchAvailable":true,"extendedDataAvailable":true},"segments":[',
+            '{"type":"overview","attributes":{"playerId":"","teamId":0},"metadata":{"platformFamily":"pc",'
+            '"platformSlug":"ubi","result":"win","hasWon":true,"status":"connected","hasExtraStats":false,'
+            '"platformUserId":"","platformUserHandle":"","platformUserIdentifier":"","avatarUrl":"",',
+            '{"type":"round-overview","attributes":{"roundId":1,"roundEndReasonId":"attackers_eliminated",'
+            '"winnerSideId":"defender"},"metadata":{"roundEndReasonName":"Attackers Eliminated","killfeed":[',
+            '{"type":"player-operator","attributes":{"playerId":"","operatorId":"","sideId":"attacker"},',
+            '{"players":[{"id":"","nickname":"","pseudonym":"","teamId":"blue","partyId":null,"scoreboard":'
+            '{"trades":0,"clutches":0,"aces":0,"openingKills":0,"openingDeaths":0,"plants":0,"score":0,"mvps":0},'
+            '"rounds":[{"id":1,"sideId":"attacker","operatorId":"","isTraded":null,"stats":',
+            '{"id":1,"winnerTeamId":"blue","winCondition":"elimination","bombSiteId":"","attackingTeamId":"red"}',
+            '"killfeed":[{"roundId":1,"attackerId":"","victimId":"","attackerOperatorName":"","victimOperatorName":""}',
+            '"winner":"attacker","roundOutcome":"","players":[],"killEvents":[{"timestamp":null,"killerId":"",'
+            '"victimId":"","killerName":"","victimName":"","killerOperator":"","victimOperator":""}]}',
+            '{"team":"A","username":"","rank_points":0,"kd":0.0,"kills":0,"deaths":0,"assists":0,'
+            '"hs_percent":0.0,"operators":[]},{"team":"B","username":"",',
+            "".join(
+                f'"{key}":{{"displayName":"{name}","metadata":{{}},"value":0,"displayValue":"0","displayType":"Number"}},'
+                for key, name in _STAT_NAMES
+            ),
+            '{"type":"player-round","attributes":{"roundId":1,"resultId":"victory","playerId":"","teamId":1,'
+            '"sideId":"defender","operatorId":"","isDisconnected":false},"metadata":{"sideName":"Defender",'
+            '"operatorName":"","operatorImageUrl":"https://trackercdn.com/cdn/r6.tracker.network/operators/badges/'
+            '.png","killedPlayersIds":[],"killedByPlayerId":null},"expiryDate":"0001-01-01T00:00:00+00:00","stats":{',
+            '{"killerId":"","victimId":""},',
+            '"displayValue":"","displayType":"Number"},"metadata":{},"value":0,"displayName":"',
+        )
+    ).encode("utf-8"),
+}
+DICTIONARY_VERSION = 1
+DEFAULT_CODEC = f"zstd-d{DICTIONARY_VERSION}" if zstandard is not None else f"zlib-d{DICTIONARY_VERSION}"
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+_zstd_dicts: Dict[int, Any] = {}
+
+
+def _split_codec(codec: str) -> Tuple[str, Optional[int]]:
+    name, _, version = codec.partition("-d")
+    if version:
+        return name, int(version)
+    return name, None
+
+
+def _zstd_dict(version: int) -> Any:
+    zdict = _zstd_dicts.get(version)
+    if zdict is None:
+        zdict = zstandard.ZstdCompressionDict(_DICTIONARIES[version], dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        _zstd_dicts[version] = zdict
+    return zdict
+
+
+def encode(text: str, codec: str = DEFAULT_CODEC) -> bytes:
+    """Compress payload text with `codec` ("zlib", "zlib-d<N>" or "zstd-d<N>")."""
+    raw = text.encode("utf-8")
+    name, version = _split_codec(codec)
+    if name == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd payload codec requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=_zstd_dict(version)).compress(raw)
+    if name == "zlib":
+        if version is None:
+            return zlib.compress(raw, ZLIB_LEVEL)
+        compressor = zlib.compressobj(ZLIB_LEVEL, zdict=_DICTIONARIES[version])
+        return compressor.compress(raw) + compressor.flush()
+    raise ValueError(f"Unknown payload codec: {codec}")
+
+
+def decode(codec: str, blob: Any) -> str:
+    """Inverse of `encode`; codec "text" passes legacy inline text through."""
+    if codec == "text":
+        return blob if isinstance(blob, str) else bytes(blob).decode("utf-8")
+    data = bytes(blob)
+    name, version = _split_codec(codec)
+    if name == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd payload codec requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor(dict_data=_zstd_dict(version)).decompress(data).decode("utf-8")
+    if name == "zlib":
+        if version is None:
+            return zlib.decompress(data).decode("utf-8")
+        decompressor = zlib.decompressobj(zdict=_DICTIONARIES[version])
+        return (decompressor.decompress(data) + decompressor.flush()).decode("utf-8")
+    raise ValueError(f"Unknown payload codec: {codec}")
+
+
+def is_empty(text: Optional[str]) -> bool:
+    return text is None or text.strip().lower() in EMPTY_TEXTS
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON for a payload value; text is stored as given."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"))
+
+
+class CardPayload:
+    """One stored payload, decompressed on first `text()` and then kept."""
+
+    __slots__ = ("codec", "blob", "_text")
+
+    def __init__(self, codec: str, blob: Any) -> None:
+        self.codec = codec
+        self.blob = blob
+        self._text: Optional[str] = blob if codec == "text" else None
+
+    @classmethod
+    def from_text(cls, text: str) -> "CardPayload":
+        return cls("text", text)
+
+    @property
+    def stored_bytes(self) -> int:
+        return len(self.blob.encode("utf-8")) if self.codec == "text" else len(self.blob)
+
+    @property
+    def decoded(self) -> bool:
+        return self._text is not None
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = decode(self.codec, self.blob)
+        return self._text
+
+    def json(self, fallback: Any = None) -> Any:
+        try:
+            return json.loads(self.text())
+        except Exception:
+            return fallback
+
+    def __getstate__(self) -> Tuple[str, Any]:
+        # Ship the compressed bytes to process-pool workers, not the decoded text.
+        return self.codec, self.blob
+
+    def __setstate__(self, state: Tuple[str, Any]) -> None:
+        self.__init__(*state)
+
+    def __repr__(self) -> str:
+        return f"CardPayload({self.codec!r}, {self.stored_bytes} bytes)"
+
+
+def payload_text(value: Any) -> Optional[str]:
+    """Text of a `CardPayload`, a plain string or None, for code that accepts either."""
+    if isinstance(value, CardPayload):
+        return value.text()
+    return value
+
+
+def present_sql(kind: str, alias: str = "scraped_match_cards") -> str:
+    """SQL predicate: the card aliased `alias` has a non-empty `kind` payload."""
+    column = f"{alias}.{LEGACY_COLUMNS[kind]}"
+    empties = ", ".join(f"'{t}'" for t in EMPTY_TEXTS)
+    return (
+        f"(({column} IS NOT NULL AND LOWER(TRIM({column})) NOT IN ({empties})) "
+        f"OR ({column} IS NULL AND EXISTS (SELECT 1 FROM scraped_card_payloads scp "
+        f"WHERE scp.card_id = {alias}.id AND scp.kind = '{kind}')))"
+    )
+
+
+def _chunks(ids: Sequence[int], size: int = 500) -> Iterable[Sequence[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+def load(
+    conn: sqlite3.Connection,
+    card_ids: Iterable[int],
+    kinds: Sequence[str] = PAYLOAD_KINDS,
+) -> Dict[int, Dict[str, CardPayload]]:
+    """
+    card_id -> {kind: CardPayload} for the non-empty payloads of `kinds`.
+
+    Only compressed bytes are read; cards without a payload of a kind simply
+    lack that key.
+    """
+    ids = sorted({int(cid) for cid in card_ids if cid is not None})
+    out: Dict[int, Dict[str, CardPayload]] = {}
+    if not ids or not kinds:
+        return out
+    kinds = tuple(kinds)
+    columns = ", ".join(LEGACY_COLUMNS[k] for k in kinds)
+    kind_marks = ",".join("?" * len(kinds))
+    cursor = conn.cursor()
+    for chunk in _chunks(ids):
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(
+            f"SELECT card_id, kind, codec, payload FROM scraped_card_payloads "
+            f"WHERE card_id IN ({marks}) AND kind IN ({kind_marks})",
+            (*chunk, *kinds),
+        )
+        for card_id, kind, codec, blob in cursor.fetchall():
+            out.setdefault(int(card_id), {})[kind] = CardPayload(codec, blob)
+        cursor.execute(f"SELECT id, {columns} FROM scraped_match_cards WHERE id IN ({marks})", tuple(chunk))
+        for row in cursor.fetchall():
+            for kind, legacy in zip(kinds, tuple(row)[1:]):
+                if legacy is None:
+                    continue
+                slot = out.setdefault(int(row[0]), {})
+                if is_empty(legacy):
+                    slot.pop(kind, None)
+                else:
+                    slot[kind] = CardPayload.from_text(legacy)
+    return out
+
+
+def store(
+    cursor: sqlite3.Cursor,
+    card_id: int,
+    values: Mapping[str, Any],
+    codec: str = DEFAULT_CODEC,
+    *,
+    clear_legacy: bool = True,
+) -> Dict[str, int]:
+    """
+    Write payloads for one card (JSON-able values or text) and clear the legacy
+    inline columns for those kinds. Empty values delete the stored payload.
+    `clear_legacy=False` skips the column reset for freshly inserted cards.
+
+    Returns {"raw_bytes", "stored_bytes"} for what was written.
+    """
+    totals = {"raw_bytes": 0, "stored_bytes": 0}
+    if not values:
+        return totals
+    rows: List[tuple] = []
+    empty: List[tuple] = []
+    for kind, value in values.items():
+        text = dumps(value)
+        if is_empty(text):
+            empty.append((card_id, kind))
+            continue
+        blob = encode(text, codec)
+        raw_bytes = len(text.encode("utf-8"))
+        totals["raw_bytes"] += raw_bytes
+        totals["stored_bytes"] += len(blob)
+        rows.append((card_id, kind, codec, blob, raw_bytes, len(blob)))
+    if empty:
+        cursor.executemany("DELETE FROM scraped_card_payloads WHERE card_id = ? AND kind = ?", empty)
+    if rows:
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO scraped_card_payloads
+                (card_id, kind, codec, payload, raw_bytes, stored_bytes)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    if clear_legacy:
+        assignments = ", ".join(f"{LEGACY_COLUMNS[k]} = NULL" for k in values)
+        cursor.execute(f"UPDATE scraped_match_cards SET {assignments} WHERE id = ?", (card_id,))
+    return totals
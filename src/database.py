@@ -4,14 +4,39 @@ import sqlite3
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import json
 import time
 import unicodedata
 import re
+import zlib
+
+from src import card_payloads
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+USERNAME_KEY_TABLES = ("players", "match_detail_players", "player_rounds", "scraped_match_cards")
+
+
+@lru_cache(maxsize=2048)
+def _normalize_operator_text(raw: str) -> str:
+    # Memoized: unpacking calls this once per player-round, over a few dozen distinct names.
+    text = raw.strip().lower()
+    if not text:
+        return ""
+    # Strip accents/diacritics and normalize to alnum+space key.
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = "".join(ch if ch.isalnum() else " " for ch in text)
+    return " ".join(text.split())
+
 
 class Database:
     """Handle all database operations."""
+    # Class of every connection Database opens; src.perf.install() swaps in a profiling one.
+    CONNECTION_FACTORY = sqlite3.Connection
     OPERATOR_DISPLAY_BY_KEY: Dict[str, str] = {
         "ace": "Ace",
         "alibi": "Alibi",
@@ -110,6 +135,16 @@ class Database:
         project_root = Path(__file__).resolve().parents[1]
         return str(project_root / path)
 
+    @staticmethod
+    def _username_key(raw_username: Any) -> Optional[str]:
+        """
+        Match SQLite's LOWER(TRIM(username)) so stored keys and SQL-side
+        LOWER(TRIM(?)) lookups always agree (ASCII-only lowercasing).
+        """
+        if raw_username is None:
+            return None
+        return str(raw_username).strip(" ").translate(_ASCII_LOWER)
+
     @staticmethod
     def _canonicalize_match_type(raw_match_type: Any) -> str:
         """Normalize match type to canonical values used by query filters."""
@@ -148,14 +183,7 @@ class Database:
 
     @staticmethod
     def _normalize_operator_key(raw_operator: Any) -> str:
-        text = str(raw_operator or "").strip().lower()
-        if not text:
-            return ""
-        # Strip accents/diacritics and normalize to alnum+space key.
-        text = unicodedata.normalize("NFKD", text)
-        text = "".join(ch for ch in text if not unicodedata.combining(ch))
-        text = "".join(ch if ch.isalnum() else " " for ch in text)
-        return " ".join(text.split())
+        return _normalize_operator_text(str(raw_operator or ""))
 
     @classmethod
     def _canonicalize_operator_key(cls, raw_operator: Any) -> str:
@@ -187,7 +215,7 @@ class Database:
                 except OSError as e:
                     raise RuntimeError(f"Failed to create database directory '{db_dir}': {e}")
 
-            self.conn = sqlite3.connect(self.db_path, timeout=30.0)
+            self.conn = sqlite3.connect(self.db_path, timeout=30.0, factory=self.CONNECTION_FACTORY)
             self.conn.row_factory = sqlite3.Row  # Access columns by name
             self.conn.execute("PRAGMA busy_timeout = 30000")
             self.conn.execute("PRAGMA foreign_keys = ON")
@@ -202,6 +230,7 @@ class Database:
                 CREATE TABLE IF NOT EXISTS players (
                     player_id INTEGER PRIMARY KEY AUTOINCREMENT,
                     username TEXT UNIQUE NOT NULL,
+                    username_key TEXT,
                     tracker_uuid TEXT,
                     device_tag TEXT DEFAULT 'pc',
                     tag TEXT DEFAULT 'untagged',
@@ -523,6 +552,7 @@ class Database:
                     match_type_key      TEXT,
                     player_id_tracker   TEXT,
                     username            TEXT,
+                    username_key        TEXT,
                     team_id             INTEGER,
                     result              TEXT,
                     kills               INTEGER,
@@ -588,6 +618,7 @@ class Database:
                     player_id_tracker   TEXT,
                     killed_by_player_id TEXT,
                     username            TEXT,
+                    username_key        TEXT,
                     team_id             INTEGER,
                     side                TEXT,
                     operator_raw        TEXT,
@@ -616,6 +647,7 @@ class Database:
                 CREATE TABLE IF NOT EXISTS scraped_match_cards (
                     id              INTEGER PRIMARY KEY AUTOINCREMENT,
                     username        TEXT NOT NULL,
+                    username_key    TEXT,
                     match_id        TEXT,
                     map_name        TEXT,
                     mode            TEXT,
@@ -774,10 +806,23 @@ class Database:
             self._migrate_players_table()
             self._migrate_stats_snapshots_table()
             self._migrate_computed_metrics_table()
+            self._ensure_scraped_card_payload_table()
             self._migrate_match_analysis_tables()
+            self._migrate_username_keys()
             self._ensure_player_tags_table()
             self._ensure_aggregate_tables()
+            self._ensure_match_latest_card_table()
+            self._ensure_round_operator_sets_table()
+            self._ensure_sync_tables()
+            self._ensure_jobs_table()
+            self._ensure_encounter_graph_tables()
+            self._ensure_network_scan_tables()
+            self._ensure_match_detail_payload_table()
+            self._ensure_db_revision_table()
             self._ensure_performance_indexes()
+            self._bootstrap_match_latest_cards()
+            self._bootstrap_round_operator_sets()
+            self._bootstrap_aggregate_ledger()
             self._commit_with_retry(context="migrate schema commit")
         except sqlite3.Error as e:
             self.conn.rollback()
@@ -837,6 +882,39 @@ class Database:
             CREATE INDEX IF NOT EXISTS idx_scraped_match_cards_mode_key
             ON scraped_match_cards (mode_key, match_date DESC)
         """)
+        # Keyset pages of one user's cards (id is the rowid, so this orders by it).
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_scraped_match_cards_username_id
+            ON scraped_match_cards (username)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_match_detail_players_username_key_match
+            ON match_detail_players (username_key, match_id, team_id, result)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_match_detail_players_match_team_username_key
+            ON match_detail_players (match_id, team_id, username_key)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_player_rounds_username_key_match_round
+            ON player_rounds (username_key, match_id, round_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_players_username_key
+            ON players (username_key, player_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_scraped_match_cards_username_key_match
+            ON scraped_match_cards (username_key, match_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_match_latest_card_scraped_at
+            ON match_latest_card (scraped_at DESC)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_match_latest_card_card_id
+            ON match_latest_card (card_id)
+        """)
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_match_detail_players_username_match_type
             ON match_detail_players (username, match_type)
@@ -939,6 +1017,485 @@ class Database:
                 PRIMARY KEY (tracker_player_id, session_id)
             )
         """)
+        # Per-(tracker, match) contributions already folded into the agg_* tables.
+        # Incremental refreshes diff against these so a re-saved match (or the same
+        # match saved for another owner) is never counted twice.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS agg_match_contrib (
+                tracker_player_id   TEXT NOT NULL,
+                match_id            TEXT NOT NULL,
+                match_type          TEXT NOT NULL,
+                map_name            TEXT NOT NULL,
+                match_ts            INTEGER NOT NULL DEFAULT 0,
+                is_win              INTEGER NOT NULL DEFAULT 0,
+                kills               INTEGER NOT NULL DEFAULT 0,
+                deaths              INTEGER NOT NULL DEFAULT 0,
+                atk_wins            INTEGER NOT NULL DEFAULT 0,
+                def_wins            INTEGER NOT NULL DEFAULT 0,
+                rp_delta            INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (tracker_player_id, match_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS agg_operator_contrib (
+                tracker_player_id   TEXT NOT NULL,
+                match_id            TEXT NOT NULL,
+                match_type          TEXT NOT NULL,
+                operator            TEXT NOT NULL,
+                match_ts            INTEGER NOT NULL DEFAULT 0,
+                rounds              INTEGER NOT NULL DEFAULT 0,
+                wins                INTEGER NOT NULL DEFAULT 0,
+                kills               INTEGER NOT NULL DEFAULT 0,
+                deaths              INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (tracker_player_id, match_id, match_type, operator)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agg_match_contrib_match
+            ON agg_match_contrib (match_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agg_match_contrib_tracker_ts
+            ON agg_match_contrib (tracker_player_id, match_ts)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agg_operator_contrib_match
+            ON agg_operator_contrib (match_id)
+        """)
+
+    def _bootstrap_aggregate_ledger(self) -> None:
+        """One-time full rebuild for databases whose aggregates predate the contribution ledger."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM agg_match_contrib LIMIT 1")
+        if cursor.fetchone() is not None:
+            return
+        cursor.execute("SELECT 1 FROM match_detail_players LIMIT 1")
+        if cursor.fetchone() is None:
+            return
+        print("[DB] Building aggregate contribution ledger (one-time full rebuild)...")
+        trackers = self.rebuild_all_aggregates(commit=False)
+        print(f"[DB] Aggregate ledger ready for {trackers} trackers")
+
+    def _ensure_match_latest_card_table(self) -> None:
+        """
+        One row per match_id pointing at the newest scraped card (highest id).
+
+        Read paths join this instead of re-deriving MAX(id)/MAX(scraped_at) over
+        scraped_match_cards on every query. WITHOUT ROWID keeps the rows in the
+        match_id b-tree, so per-match lookups are index-only.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'match_latest_card'")
+        row = cursor.fetchone()
+        if row and "WITHOUT ROWID" not in str(row[0] or "").upper():
+            # Derived data: _migrate_schema repopulates it right after.
+            cursor.execute("DROP TABLE match_latest_card")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS match_latest_card (
+                match_id    TEXT PRIMARY KEY,
+                card_id     INTEGER NOT NULL,
+                map_name    TEXT,
+                mode        TEXT,
+                mode_key    TEXT,
+                match_date  TEXT,
+                scraped_at  TIMESTAMP,
+                match_ts    INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+
+    def _ensure_round_operator_sets_table(self) -> None:
+        """
+        Per-round operator sets, derived from player_rounds.
+
+        One row per (player_id, match_id, round_id) holding which operators each side
+        fielded as bitmasks over operator_codes: bit `code` of the little-endian
+        atk_mask/def_mask blob is set when that operator appeared on the side. Rounds
+        whose operators all sit on another side keep a row with empty masks. The heatmap
+        and evidence queries decode these instead of regrouping ten player-round rows
+        per round on every request.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS operator_codes (
+                code        INTEGER PRIMARY KEY,
+                operator    TEXT NOT NULL UNIQUE
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS round_operator_sets (
+                player_id   INTEGER NOT NULL,
+                match_id    TEXT NOT NULL,
+                round_id    INTEGER NOT NULL,
+                atk_mask    BLOB NOT NULL,
+                def_mask    BLOB NOT NULL,
+                PRIMARY KEY (player_id, match_id, round_id)
+            ) WITHOUT ROWID
+        """)
+
+    def _bootstrap_match_latest_cards(self) -> None:
+        """Full rebuild when match_latest_card is new, or misses cards written without refreshing it."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(card_id), 0) FROM match_latest_card")
+        newest_indexed = cursor.fetchone()[0]
+        # Rowid range scan: only cards newer than the newest indexed one are read.
+        cursor.execute(
+            """
+            SELECT 1 FROM scraped_match_cards
+            WHERE id > ? AND match_id IS NOT NULL AND TRIM(match_id) != ''
+            LIMIT 1
+            """,
+            (newest_indexed,),
+        )
+        if cursor.fetchone() is None:
+            return
+        written = self.refresh_match_latest_cards(commit=False)
+        print(f"[DB] Latest match cards rebuilt ({written} matches)")
+
+    def _bootstrap_round_operator_sets(self) -> None:
+        """Full rebuild when the table is new or operator canonicalization rewrote rows."""
+        cursor = self.conn.cursor()
+        if not getattr(self, "_operator_sets_stale", False):
+            cursor.execute("SELECT 1 FROM round_operator_sets LIMIT 1")
+            if cursor.fetchone() is not None:
+                return
+            cursor.execute("SELECT 1 FROM player_rounds LIMIT 1")
+            if cursor.fetchone() is None:
+                return
+        written = self.refresh_round_operator_sets(commit=False)
+        self._operator_sets_stale = False
+        print(f"[DB] Round operator sets rebuilt ({written} rounds)")
+
+    def _ensure_sync_tables(self) -> None:
+        """Persistent job queue for multi-player syncs so interrupted runs can resume."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_runs (
+                run_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                status          TEXT NOT NULL DEFAULT 'running',
+                usernames_json  TEXT NOT NULL DEFAULT '[]',
+                created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at     TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_jobs (
+                run_id          INTEGER NOT NULL,
+                job_key         TEXT NOT NULL,
+                kind            TEXT NOT NULL,
+                username        TEXT,
+                match_id        TEXT,
+                status          TEXT NOT NULL DEFAULT 'pending',
+                attempts        INTEGER NOT NULL DEFAULT 0,
+                owners_json     TEXT NOT NULL DEFAULT '[]',
+                meta_json       TEXT,
+                result_json     TEXT,
+                error           TEXT,
+                updated_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_id, job_key),
+                FOREIGN KEY (run_id) REFERENCES sync_runs(run_id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sync_jobs_run_status
+            ON sync_jobs (run_id, status, kind)
+        """)
+
+    def _ensure_jobs_table(self) -> None:
+        """Background maintenance jobs run by src/job_manager.py; rows outlive the process."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind            TEXT NOT NULL,
+                subject         TEXT,
+                params_json     TEXT NOT NULL DEFAULT '{}',
+                status          TEXT NOT NULL DEFAULT 'queued',
+                progress_done   INTEGER NOT NULL DEFAULT 0,
+                progress_total  INTEGER,
+                message         TEXT,
+                result_json     TEXT,
+                error           TEXT,
+                created_at      REAL NOT NULL,
+                started_at      REAL,
+                finished_at     REAL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_status
+            ON jobs (status, job_id)
+        """)
+
+    def _ensure_encounter_graph_tables(self) -> None:
+        """
+        Co-play graph derived from match_detail_players by refresh_encounter_graph().
+
+        encounter_edges holds one row per direction, (username_key, other_key, queue,
+        relation), with relation 'with' (same team) or 'against'; encounter_nodes keeps
+        per-player totals for node labels. encounter_graph_matches records folded
+        matches (with the {username_key: team_id} roster they were folded with) so
+        refreshes only add new ones; saves flag a folded match stale to refold it.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS encounter_edges (
+                username_key    TEXT NOT NULL,
+                other_key       TEXT NOT NULL,
+                queue           TEXT NOT NULL,
+                relation        TEXT NOT NULL,
+                matches         INTEGER NOT NULL DEFAULT 0,
+                last_ts         INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (username_key, other_key, queue, relation)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS encounter_nodes (
+                username_key    TEXT PRIMARY KEY,
+                username        TEXT NOT NULL,
+                matches         INTEGER NOT NULL DEFAULT 0,
+                kills           INTEGER NOT NULL DEFAULT 0,
+                deaths          INTEGER NOT NULL DEFAULT 0,
+                wins            INTEGER NOT NULL DEFAULT 0,
+                losses          INTEGER NOT NULL DEFAULT 0,
+                rank_points     INTEGER,
+                last_ts         INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS encounter_graph_matches (
+                match_id        TEXT PRIMARY KEY,
+                players         TEXT,
+                stale           INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        self._add_column_if_missing("encounter_graph_matches", "players TEXT", "players")
+        self._add_column_if_missing(
+            "encounter_graph_matches", "stale INTEGER NOT NULL DEFAULT 0", "stale"
+        )
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_encounter_graph_matches_stale
+            ON encounter_graph_matches (match_id) WHERE stale = 1
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS encounter_graph_state (
+                key             TEXT PRIMARY KEY,
+                value           INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _ensure_network_scan_tables(self) -> None:
+        """
+        Browser network scans, persisted so they can resume and share work.
+
+        network_profile_cache keeps the last scraped Encounters page per player
+        (plus overview stats for scan roots), reused while younger than the scan's
+        TTL. network_scan_runs/network_scan_frontier record each scan's BFS frontier
+        with a pending/done/failed status per player.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS network_profile_cache (
+                username_key    TEXT PRIMARY KEY,
+                username        TEXT NOT NULL,
+                status          TEXT NOT NULL DEFAULT 'ok',
+                stats_json      TEXT,
+                encounters_json TEXT NOT NULL DEFAULT '[]',
+                fetched_at      REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS network_scan_runs (
+                run_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                root_key        TEXT NOT NULL,
+                root            TEXT NOT NULL,
+                max_depth       INTEGER NOT NULL,
+                options_json    TEXT NOT NULL,
+                status          TEXT NOT NULL DEFAULT 'running',
+                created_at      REAL NOT NULL,
+                updated_at      REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_network_scan_runs_root
+            ON network_scan_runs (root_key, status, updated_at)
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS network_scan_frontier (
+                run_id          INTEGER NOT NULL,
+                username_key    TEXT NOT NULL,
+                username        TEXT NOT NULL,
+                depth           INTEGER NOT NULL,
+                status          TEXT NOT NULL DEFAULT 'pending',
+                PRIMARY KEY (run_id, username_key)
+            ) WITHOUT ROWID
+        """)
+
+    def _ensure_match_detail_payload_table(self) -> None:
+        """Raw Tracker match-detail payloads, shared by every tracked player in the lobby."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS match_detail_payloads (
+                match_id        TEXT PRIMARY KEY,
+                encoding        TEXT NOT NULL DEFAULT 'zlib-json',
+                payload         BLOB NOT NULL,
+                raw_bytes       INTEGER NOT NULL DEFAULT 0,
+                stored_bytes    INTEGER NOT NULL DEFAULT 0,
+                fetched_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def _ensure_scraped_card_payload_table(self) -> None:
+        """Compressed scraped-card JSON payloads (see src/card_payloads.py), one row per card and kind."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scraped_card_payloads (
+                card_id         INTEGER NOT NULL,
+                kind            TEXT NOT NULL,
+                codec           TEXT NOT NULL,
+                payload         BLOB NOT NULL,
+                raw_bytes       INTEGER NOT NULL DEFAULT 0,
+                stored_bytes    INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (card_id, kind)
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_scraped_card_payloads_delete
+            AFTER DELETE ON scraped_match_cards
+            BEGIN
+                DELETE FROM scraped_card_payloads WHERE card_id = OLD.id;
+            END
+        """)
+
+    # Scopes folded into every per-player token: tags and stacks change how any
+    # player's teammates are classified, and players:all is bumped by repairs
+    # that rewrite rows for everyone.
+    DB_REVISION_SHARED_SCOPES = ("players:all", "table:player_tags", "table:stacks", "table:stack_members")
+    DB_REVISION_TRIGGER_TABLES = ("players", "player_tags", "stacks", "stack_members")
+    DB_REVISION_BUMP_SQL = """
+        INSERT INTO db_revision (scope, rev) VALUES (?, 1)
+        ON CONFLICT(scope) DO UPDATE SET rev = rev + 1, updated_at = CURRENT_TIMESTAMP
+    """
+
+    def _ensure_db_revision_table(self) -> None:
+        """
+        Monotonic revision counters ('global', 'table:<name>', 'player:<username_key>')
+        that cache keys are derived from.
+
+        Low-volume tables are covered by triggers so raw SQL writes are caught too.
+        The bulk match tables are bumped once per Database write call instead; a
+        row-level trigger there roughly triples insert cost during unpack.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS db_revision (
+                scope       TEXT PRIMARY KEY,
+                rev         INTEGER NOT NULL DEFAULT 0,
+                updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO db_revision (scope, rev) VALUES ('global', 0)")
+        for table in self.DB_REVISION_TRIGGER_TABLES:
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_db_revision_{table}_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO db_revision (scope, rev) VALUES ('global', 1), ('table:{table}', 1)
+                        ON CONFLICT(scope) DO UPDATE SET rev = rev + 1, updated_at = CURRENT_TIMESTAMP;
+                    END
+                """)
+
+    @classmethod
+    def bump_db_revisions(
+        cls,
+        cursor: sqlite3.Cursor,
+        tables: tuple = (),
+        player_keys: Optional[set] = None,
+        all_players: bool = False,
+    ) -> None:
+        """Bump global, per-table and per-player revisions on an open cursor (caller commits)."""
+        scopes = ["global"]
+        scopes.extend(f"table:{t}" for t in tables)
+        scopes.extend(f"player:{k}" for k in sorted(player_keys or ()) if k)
+        if all_players:
+            scopes.append("players:all")
+        cursor.executemany(cls.DB_REVISION_BUMP_SQL, [(s,) for s in dict.fromkeys(scopes)])
+
+    def _bump_revisions(
+        self,
+        tables: tuple,
+        usernames: Optional[List[str]] = None,
+        player_ids: Optional[List[int]] = None,
+        match_ids: Optional[List[str]] = None,
+        player_keys: Optional[set] = None,
+        all_players: bool = False,
+    ) -> None:
+        """
+        Resolve the players a write touched and bump their revisions.
+
+        match_ids expands to every owner and participant of those matches, since a
+        newer card or a removed match changes what their workspaces show.
+        """
+        keys = set(player_keys or ())
+        keys.update(k for k in (self._username_key(u) for u in (usernames or [])) if k)
+        cursor = self.conn.cursor()
+        ids = sorted({int(pid) for pid in (player_ids or []) if pid is not None})
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            cursor.execute(
+                f"SELECT username_key FROM players WHERE player_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            keys.update(r["username_key"] for r in cursor.fetchall() if r["username_key"])
+        mids = sorted({str(m) for m in (match_ids or []) if m})
+        for i in range(0, len(mids), 500):
+            chunk = mids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"""
+                SELECT username_key FROM scraped_match_cards WHERE match_id IN ({placeholders})
+                UNION
+                SELECT username_key FROM match_detail_players WHERE match_id IN ({placeholders})
+                UNION
+                SELECT p.username_key
+                FROM match_detail_players mdp
+                JOIN players p ON p.player_id = mdp.player_id
+                WHERE mdp.match_id IN ({placeholders})
+                """,
+                chunk * 3,
+            )
+            keys.update(r["username_key"] for r in cursor.fetchall() if r["username_key"])
+        self.bump_db_revisions(cursor, tables, keys, all_players=all_players)
+
+    def get_db_revision(self, scope: str = "global") -> int:
+        """Current revision number for one scope (0 if it was never bumped)."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT rev FROM db_revision WHERE scope = ?", (scope,))
+        row = cursor.fetchone()
+        return int(row["rev"]) if row else 0
+
+    def get_player_revision(self, username: str) -> int:
+        return self.get_db_revision(f"player:{self._username_key(username)}")
+
+    def get_revision_token(self, username: Optional[str] = None) -> str:
+        """
+        Cache-key revision token.
+
+        Without a username this is the global revision. With one it combines the
+        player's own revision with the shared scopes, so writes for other players
+        leave this player's cached views valid.
+        """
+        key = self._username_key(username)
+        if not key:
+            return f"g{self.get_db_revision()}"
+        scopes = (f"player:{key}",) + self.DB_REVISION_SHARED_SCOPES
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT scope, rev FROM db_revision WHERE scope IN ({','.join('?' * len(scopes))})",
+            scopes,
+        )
+        revs = {r["scope"]: int(r["rev"]) for r in cursor.fetchall()}
+        return "p" + ".".join(str(revs.get(s, 0)) for s in scopes)
 
     def _commit_with_retry(self, retries: int = 8, delay_seconds: float = 0.25, context: str = "commit") -> None:
         """
@@ -1030,6 +1587,20 @@ class Database:
             WHERE player_id IS NULL
         """)
 
+    def _migrate_username_keys(self) -> None:
+        """Add and backfill the normalized username_key lookup column."""
+        cursor = self.conn.cursor()
+        for table_name in USERNAME_KEY_TABLES:
+            self._add_column_if_missing(table_name, "username_key TEXT", "username_key")
+            cursor.execute(
+                f"""
+                UPDATE {table_name}
+                SET username_key = LOWER(TRIM(username))
+                WHERE username_key IS NULL
+                  AND username IS NOT NULL
+                """
+            )
+
     def _migrate_match_analysis_tables(self) -> None:
         self._add_column_if_missing("match_detail_players", "match_type TEXT", "match_type")
         self._add_column_if_missing("match_detail_players", "match_type_key TEXT", "match_type_key")
@@ -1048,12 +1619,11 @@ class Database:
 
         cursor = self.conn.cursor()
         cursor.execute(
-            """
+            f"""
             UPDATE scraped_match_cards
             SET round_data_source = 'ow-ingest'
             WHERE (round_data_source IS NULL OR TRIM(round_data_source) = '')
-              AND round_data_json IS NOT NULL
-              AND TRIM(round_data_json) NOT IN ('', '{}', 'null')
+              AND {card_payloads.present_sql("round_data")}
             """
         )
         cursor.execute(
@@ -1202,6 +1772,7 @@ class Database:
         )
         cursor.execute("SELECT id, operator, operator_key FROM player_rounds WHERE operator IS NOT NULL")
         unknown_before = 0
+        self._operator_sets_stale = False
         for row in cursor.fetchall():
             raw = str(row["operator"] or "").strip()
             if not raw:
@@ -1215,264 +1786,531 @@ class Database:
                     "UPDATE player_rounds SET operator = ?, operator_key = ? WHERE id = ?",
                     (canonical, operator_key, row["id"]),
                 )
+                if canonical != raw:
+                    self._operator_sets_stale = True
         if unknown_before > 0:
             print(f"[DB] Operator canonicalization: {unknown_before} distinct raw values mapped to UNKNOWN.")
 
-    def refresh_aggregates_for_matches(self, match_ids: List[str]) -> int:
-        """Incrementally refresh aggregate tables for trackers present in these matches."""
-        clean_match_ids = sorted({str(mid or "").strip() for mid in match_ids if str(mid or "").strip()})
-        if not clean_match_ids:
-            return 0
-        placeholders = ",".join("?" * len(clean_match_ids))
+    def refresh_match_latest_cards(self, match_ids: Optional[List[str]] = None, commit: bool = True) -> int:
+        """
+        Re-point match_latest_card at the newest card for these matches.
+
+        Passing None rebuilds the whole table (used by schema migration).
+        Returns the number of latest-card rows written.
+        """
+        select_sql = """
+            SELECT
+                smc.match_id,
+                smc.id,
+                smc.map_name,
+                smc.mode,
+                smc.mode_key,
+                smc.match_date,
+                smc.scraped_at,
+                COALESCE(
+                    CAST(strftime('%s', REPLACE(REPLACE(TRIM(COALESCE(smc.match_date, '')), 'T', ' '), 'Z', '')) AS INTEGER),
+                    CAST(strftime('%s', smc.scraped_at) AS INTEGER),
+                    0
+                ) AS match_ts
+            FROM scraped_match_cards smc
+            JOIN (
+                SELECT match_id, MAX(id) AS max_id
+                FROM scraped_match_cards
+                WHERE match_id IS NOT NULL AND TRIM(match_id) != ''
+                  {match_filter}
+                GROUP BY match_id
+            ) x ON x.match_id = smc.match_id AND x.max_id = smc.id
+        """
+        insert_sql = """
+            INSERT OR REPLACE INTO match_latest_card (
+                match_id, card_id, map_name, mode, mode_key, match_date, scraped_at, match_ts
+            )
+        """
+        cursor = self.conn.cursor()
+        written = 0
+        if match_ids is None:
+            cursor.execute("DELETE FROM match_latest_card")
+            cursor.execute(insert_sql + select_sql.format(match_filter=""))
+            written = cursor.rowcount if cursor.rowcount >= 0 else 0
+            self._mark_encounter_matches_stale(cursor)
+        else:
+            clean_match_ids = sorted({str(mid) for mid in match_ids if str(mid or "").strip()})
+            for start in range(0, len(clean_match_ids), 500):
+                chunk = clean_match_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"DELETE FROM match_latest_card WHERE match_id IN ({placeholders})", chunk)
+                cursor.execute(
+                    insert_sql + select_sql.format(match_filter=f"AND match_id IN ({placeholders})"),
+                    chunk,
+                )
+                written += cursor.rowcount if cursor.rowcount >= 0 else 0
+            self._mark_encounter_matches_stale(cursor, clean_match_ids)
+        if commit:
+            self._commit_with_retry(context="match_latest_card commit")
+        return written
+
+    ROUND_OPERATOR_SETS_SELECT_SQL = """
+        SELECT DISTINCT match_id, round_id, LOWER(TRIM(COALESCE(side, ''))), TRIM(operator)
+        FROM player_rounds
+        WHERE player_id = ?
+          AND operator IS NOT NULL
+          AND TRIM(operator) != ''
+    """
+
+    @staticmethod
+    def _operator_mask_blob(mask: int) -> bytes:
+        return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+    def _write_round_operator_sets(self, cursor: sqlite3.Cursor, player_id: int, rows: List[tuple]) -> int:
+        names = sorted({row[3] for row in rows})
+        if names:
+            cursor.executemany("INSERT OR IGNORE INTO operator_codes (operator) VALUES (?)", [(n,) for n in names])
+        cursor.execute("SELECT code, operator FROM operator_codes")
+        codes = {row[1]: int(row[0]) for row in cursor.fetchall()}
+        masks: Dict[tuple, List[int]] = {}
+        for match_id, round_id, side, operator in rows:
+            mask = masks.setdefault((match_id, int(round_id)), [0, 0])
+            if side == "attacker":
+                mask[0] |= 1 << codes[operator]
+            elif side == "defender":
+                mask[1] |= 1 << codes[operator]
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO round_operator_sets (player_id, match_id, round_id, atk_mask, def_mask)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (player_id, match_id, round_id, self._operator_mask_blob(atk), self._operator_mask_blob(dfn))
+                for (match_id, round_id), (atk, dfn) in masks.items()
+            ],
+        )
+        return len(masks)
+
+    def refresh_round_operator_sets(self, pairs: Optional[List[tuple]] = None, commit: bool = True) -> int:
+        """
+        Rebuild round_operator_sets for these (player_id, match_id) pairs from player_rounds.
+
+        Passing None rebuilds the whole table. Returns the number of round rows written.
+        """
+        cursor = self.conn.cursor()
+        written = 0
+        if pairs is None:
+            cursor.execute("DELETE FROM round_operator_sets")
+            cursor.execute("SELECT DISTINCT player_id FROM player_rounds")
+            for player_id in [int(row[0]) for row in cursor.fetchall()]:
+                cursor.execute(self.ROUND_OPERATOR_SETS_SELECT_SQL, (player_id,))
+                written += self._write_round_operator_sets(cursor, player_id, cursor.fetchall())
+        else:
+            for player_id, match_id in sorted({(int(p), str(m)) for p, m in pairs if m}):
+                cursor.execute(
+                    "DELETE FROM round_operator_sets WHERE player_id = ? AND match_id = ?",
+                    (player_id, match_id),
+                )
+                cursor.execute(self.ROUND_OPERATOR_SETS_SELECT_SQL + " AND match_id = ?", (player_id, match_id))
+                written += self._write_round_operator_sets(cursor, player_id, cursor.fetchall())
+        if commit:
+            self._commit_with_retry(context="round_operator_sets commit")
+        return written
+
+    AGG_SESSION_GAP_SECONDS = 90 * 60
+
+    def _aggregate_contributions(self, where_sql: str, params: List[Any]) -> tuple:
+        """
+        Compute per-(tracker, match) aggregate contributions from the normalized tables.
+
+        `where_sql` filters match_detail_players / player_rounds (e.g. a match_id IN list
+        or a single tracker). Rows from several owners of the same match collapse to one
+        contribution, matching how the full rebuild always counted them.
+        """
         cursor = self.conn.cursor()
         cursor.execute(
             f"""
-            SELECT DISTINCT player_id_tracker
-            FROM match_detail_players
-            WHERE match_id IN ({placeholders})
-              AND player_id_tracker IS NOT NULL
-              AND TRIM(player_id_tracker) != ''
+            WITH mdp_match AS (
+                SELECT
+                    player_id_tracker,
+                    match_id,
+                    MAX(COALESCE(NULLIF(TRIM(match_type), ''), 'Other')) AS match_type,
+                    MAX(COALESCE(NULLIF(TRIM(result), ''), '')) AS result,
+                    MAX(COALESCE(kills, 0)) AS kills,
+                    MAX(COALESCE(deaths, 0)) AS deaths,
+                    MAX(COALESCE(rank_points_delta, 0)) AS rank_points_delta
+                FROM match_detail_players
+                WHERE player_id_tracker IS NOT NULL
+                  AND TRIM(player_id_tracker) != ''
+                  AND {where_sql}
+                GROUP BY player_id_tracker, match_id
+            ),
+            side_by_match AS (
+                SELECT
+                    player_id_tracker,
+                    match_id,
+                    SUM(CASE WHEN LOWER(COALESCE(side, '')) = 'attacker' AND LOWER(COALESCE(result, '')) IN ('victory', 'win') THEN 1 ELSE 0 END) AS atk_wins,
+                    SUM(CASE WHEN LOWER(COALESCE(side, '')) = 'defender' AND LOWER(COALESCE(result, '')) IN ('victory', 'win') THEN 1 ELSE 0 END) AS def_wins
+                FROM player_rounds
+                WHERE player_id_tracker IS NOT NULL
+                  AND TRIM(player_id_tracker) != ''
+                  AND {where_sql}
+                GROUP BY player_id_tracker, match_id
+            )
+            SELECT
+                m.player_id_tracker,
+                m.match_id,
+                m.match_type,
+                COALESCE(NULLIF(TRIM(lc.map_name), ''), 'Unknown') AS map_name,
+                COALESCE(lc.match_ts, 0) AS match_ts,
+                CASE WHEN LOWER(COALESCE(m.result, '')) IN ('win', 'victory') THEN 1 ELSE 0 END AS is_win,
+                COALESCE(m.kills, 0) AS kills,
+                COALESCE(m.deaths, 0) AS deaths,
+                COALESCE(s.atk_wins, 0) AS atk_wins,
+                COALESCE(s.def_wins, 0) AS def_wins,
+                COALESCE(m.rank_points_delta, 0) AS rp_delta
+            FROM mdp_match m
+            LEFT JOIN side_by_match s
+                ON s.player_id_tracker = m.player_id_tracker
+               AND s.match_id = m.match_id
+            LEFT JOIN match_latest_card lc
+                ON lc.match_id = m.match_id
             """,
-            clean_match_ids,
+            list(params) * 2,
         )
-        tracker_ids = {str(row["player_id_tracker"]).strip() for row in cursor.fetchall() if row["player_id_tracker"]}
+        match_rows = [tuple(row) for row in cursor.fetchall()]
         cursor.execute(
             f"""
-            SELECT DISTINCT player_id_tracker
-            FROM player_rounds
-            WHERE match_id IN ({placeholders})
-              AND player_id_tracker IS NOT NULL
-              AND TRIM(player_id_tracker) != ''
+            WITH pr_round AS (
+                SELECT
+                    player_id_tracker,
+                    match_id,
+                    round_id,
+                    MAX(COALESCE(NULLIF(TRIM(match_type), ''), 'Other')) AS match_type,
+                    MAX(COALESCE(NULLIF(TRIM(operator), ''), 'Unknown')) AS operator,
+                    MAX(COALESCE(NULLIF(TRIM(result), ''), '')) AS result,
+                    MAX(COALESCE(kills, 0)) AS kills,
+                    MAX(COALESCE(deaths, 0)) AS deaths
+                FROM player_rounds
+                WHERE player_id_tracker IS NOT NULL
+                  AND TRIM(player_id_tracker) != ''
+                  AND {where_sql}
+                GROUP BY player_id_tracker, match_id, round_id
+            )
+            SELECT
+                pr.player_id_tracker,
+                pr.match_id,
+                pr.match_type,
+                pr.operator,
+                COALESCE(lc.match_ts, 0) AS match_ts,
+                COUNT(*) AS rounds,
+                SUM(CASE WHEN LOWER(COALESCE(pr.result, '')) IN ('victory', 'win') THEN 1 ELSE 0 END) AS wins,
+                SUM(COALESCE(pr.kills, 0)) AS kills,
+                SUM(COALESCE(pr.deaths, 0)) AS deaths
+            FROM pr_round pr
+            LEFT JOIN match_latest_card lc
+                ON lc.match_id = pr.match_id
+            GROUP BY pr.player_id_tracker, pr.match_id, pr.match_type, pr.operator
             """,
-            clean_match_ids,
+            list(params),
         )
-        tracker_ids.update({str(row["player_id_tracker"]).strip() for row in cursor.fetchall() if row["player_id_tracker"]})
-        self.refresh_aggregates_for_tracker_ids(sorted(tid for tid in tracker_ids if tid))
-        return len(tracker_ids)
+        operator_rows = [tuple(row) for row in cursor.fetchall()]
+        return match_rows, operator_rows
 
-    def refresh_aggregates_for_tracker_ids(self, tracker_ids: List[str]) -> None:
-        """Rebuild aggregate rows for specific tracker IDs."""
-        clean_tracker_ids = sorted({str(tid or "").strip() for tid in tracker_ids if str(tid or "").strip()})
-        if not clean_tracker_ids:
-            return
-        session_gap_seconds = 90 * 60
-        with self.conn:
-            cursor = self.conn.cursor()
-            for tracker_id in clean_tracker_ids:
-                cursor.execute("DELETE FROM agg_player_map WHERE tracker_player_id = ?", (tracker_id,))
-                cursor.execute("DELETE FROM agg_player_operator WHERE tracker_player_id = ?", (tracker_id,))
-                cursor.execute("DELETE FROM agg_sessions WHERE tracker_player_id = ?", (tracker_id,))
+    def _upsert_aggregate_deltas(self, match_rows: List[tuple], operator_rows: List[tuple], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) ledger contributions from the agg_* tables."""
+        cursor = self.conn.cursor()
+        if match_rows:
+            cursor.executemany(
+                """
+                INSERT INTO agg_player_map (
+                    tracker_player_id, match_type, map_name, matches, wins, kills, deaths, atk_wins, def_wins, last_played_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(tracker_player_id, match_type, map_name) DO UPDATE SET
+                    matches = matches + excluded.matches,
+                    wins = wins + excluded.wins,
+                    kills = kills + excluded.kills,
+                    deaths = deaths + excluded.deaths,
+                    atk_wins = atk_wins + excluded.atk_wins,
+                    def_wins = def_wins + excluded.def_wins,
+                    last_played_at = MAX(COALESCE(last_played_at, 0), COALESCE(excluded.last_played_at, 0))
+                """,
+                [
+                    (r[0], r[2], r[3], sign, sign * r[5], sign * r[6], sign * r[7], sign * r[8], sign * r[9], r[4] if sign > 0 else 0)
+                    for r in match_rows
+                ],
+            )
+        if operator_rows:
+            cursor.executemany(
+                """
+                INSERT INTO agg_player_operator (
+                    tracker_player_id, match_type, operator, rounds, wins, kills, deaths, last_played_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(tracker_player_id, match_type, operator) DO UPDATE SET
+                    rounds = rounds + excluded.rounds,
+                    wins = wins + excluded.wins,
+                    kills = kills + excluded.kills,
+                    deaths = deaths + excluded.deaths,
+                    last_played_at = MAX(COALESCE(last_played_at, 0), COALESCE(excluded.last_played_at, 0))
+                """,
+                [
+                    (r[0], r[2], r[3], sign * r[5], sign * r[6], sign * r[7], sign * r[8], r[4] if sign > 0 else 0)
+                    for r in operator_rows
+                ],
+            )
 
-                cursor.execute(
-                    """
-                    WITH latest_cards AS (
-                        SELECT
-                            smc.match_id,
-                            smc.map_name,
-                            COALESCE(
-                                CAST(strftime('%s', REPLACE(REPLACE(TRIM(COALESCE(smc.match_date, '')), 'T', ' '), 'Z', '')) AS INTEGER),
-                                CAST(strftime('%s', smc.scraped_at) AS INTEGER),
-                                0
-                            ) AS match_ts
-                        FROM scraped_match_cards smc
-                        JOIN (
-                            SELECT match_id, MAX(id) AS max_id
-                            FROM scraped_match_cards
-                            WHERE match_id IS NOT NULL AND TRIM(match_id) != ''
-                            GROUP BY match_id
-                        ) x ON x.match_id = smc.match_id AND x.max_id = smc.id
-                    ),
-                    mdp_match AS (
-                        SELECT
-                            player_id_tracker,
-                            match_id,
-                            MAX(COALESCE(NULLIF(TRIM(match_type), ''), 'Other')) AS match_type,
-                            MAX(COALESCE(NULLIF(TRIM(result), ''), '')) AS result,
-                            MAX(COALESCE(kills, 0)) AS kills,
-                            MAX(COALESCE(deaths, 0)) AS deaths
-                        FROM match_detail_players
-                        WHERE player_id_tracker = ?
-                          AND TRIM(player_id_tracker) != ''
-                        GROUP BY player_id_tracker, match_id
-                    ),
-                    side_by_match AS (
-                        SELECT
-                            player_id_tracker,
-                            match_id,
-                            SUM(CASE WHEN LOWER(COALESCE(side, '')) = 'attacker' AND LOWER(COALESCE(result, '')) IN ('victory', 'win') THEN 1 ELSE 0 END) AS atk_wins,
-                            SUM(CASE WHEN LOWER(COALESCE(side, '')) = 'defender' AND LOWER(COALESCE(result, '')) IN ('victory', 'win') THEN 1 ELSE 0 END) AS def_wins
-                        FROM player_rounds
-                        WHERE player_id_tracker = ?
-                          AND TRIM(player_id_tracker) != ''
-                        GROUP BY player_id_tracker, match_id
-                    )
-                    INSERT INTO agg_player_map (
-                        tracker_player_id, match_type, map_name, matches, wins, kills, deaths, atk_wins, def_wins, last_played_at
-                    )
-                    SELECT
-                        m.player_id_tracker AS tracker_player_id,
-                        m.match_type,
-                        COALESCE(NULLIF(TRIM(lc.map_name), ''), 'Unknown') AS map_name,
-                        COUNT(*) AS matches,
-                        SUM(CASE WHEN LOWER(COALESCE(m.result, '')) IN ('win', 'victory') THEN 1 ELSE 0 END) AS wins,
-                        SUM(COALESCE(m.kills, 0)) AS kills,
-                        SUM(COALESCE(m.deaths, 0)) AS deaths,
-                        SUM(COALESCE(s.atk_wins, 0)) AS atk_wins,
-                        SUM(COALESCE(s.def_wins, 0)) AS def_wins,
-                        MAX(COALESCE(lc.match_ts, 0)) AS last_played_at
-                    FROM mdp_match m
-                    LEFT JOIN side_by_match s
-                        ON s.player_id_tracker = m.player_id_tracker
-                       AND s.match_id = m.match_id
-                    LEFT JOIN latest_cards lc
-                        ON lc.match_id = m.match_id
-                    GROUP BY m.player_id_tracker, m.match_type, COALESCE(NULLIF(TRIM(lc.map_name), ''), 'Unknown')
-                    """,
-                    (tracker_id, tracker_id),
+    def _repair_aggregate_keys_after_removal(self, match_rows: List[tuple], operator_rows: List[tuple]) -> None:
+        """Drop emptied agg rows and recompute last_played_at where a contribution was removed."""
+        cursor = self.conn.cursor()
+        map_keys = sorted({(r[0], r[2], r[3]) for r in match_rows})
+        op_keys = sorted({(r[0], r[2], r[3]) for r in operator_rows})
+        if map_keys:
+            cursor.executemany(
+                "DELETE FROM agg_player_map WHERE tracker_player_id = ? AND match_type = ? AND map_name = ? AND matches <= 0",
+                map_keys,
+            )
+            cursor.executemany(
+                """
+                UPDATE agg_player_map
+                SET last_played_at = (
+                    SELECT MAX(c.match_ts) FROM agg_match_contrib c
+                    WHERE c.tracker_player_id = agg_player_map.tracker_player_id
+                      AND c.match_type = agg_player_map.match_type
+                      AND c.map_name = agg_player_map.map_name
+                )
+                WHERE tracker_player_id = ? AND match_type = ? AND map_name = ?
+                """,
+                map_keys,
+            )
+        if op_keys:
+            cursor.executemany(
+                "DELETE FROM agg_player_operator WHERE tracker_player_id = ? AND match_type = ? AND operator = ? AND rounds <= 0",
+                op_keys,
+            )
+            cursor.executemany(
+                """
+                UPDATE agg_player_operator
+                SET last_played_at = (
+                    SELECT MAX(c.match_ts) FROM agg_operator_contrib c
+                    WHERE c.tracker_player_id = agg_player_operator.tracker_player_id
+                      AND c.match_type = agg_player_operator.match_type
+                      AND c.operator = agg_player_operator.operator
                 )
+                WHERE tracker_player_id = ? AND match_type = ? AND operator = ?
+                """,
+                op_keys,
+            )
+
+    def _rebuild_sessions_window(self, tracker_id: str, lo_ts: Optional[int] = None, hi_ts: Optional[int] = None) -> None:
+        """
+        Recompute agg_sessions for one tracker around [lo_ts, hi_ts] (whole history if None).
+
+        The window is widened to every existing session within the session gap of it, so
+        sessions merged or split by the change are rebuilt whole; sessions outside it are
+        untouched because no affected match is within the gap of them.
+        """
+        gap = self.AGG_SESSION_GAP_SECONDS
+        cursor = self.conn.cursor()
+        if lo_ts is None or hi_ts is None:
+            cursor.execute("DELETE FROM agg_sessions WHERE tracker_player_id = ?", (tracker_id,))
+            lo_ts, hi_ts = -(2 ** 62), 2 ** 62
+        else:
+            cursor.execute(
+                """
+                SELECT MIN(started_at) AS lo, MAX(ended_at) AS hi
+                FROM agg_sessions
+                WHERE tracker_player_id = ? AND ended_at >= ? AND started_at <= ?
+                """,
+                (tracker_id, lo_ts - gap, hi_ts + gap),
+            )
+            row = cursor.fetchone()
+            if row and row["lo"] is not None:
+                lo_ts = min(lo_ts, int(row["lo"]))
+                hi_ts = max(hi_ts, int(row["hi"]))
+            cursor.execute(
+                "DELETE FROM agg_sessions WHERE tracker_player_id = ? AND started_at >= ? AND ended_at <= ?",
+                (tracker_id, lo_ts, hi_ts),
+            )
+        cursor.execute(
+            """
+            WITH match_base AS (
+                SELECT tracker_player_id, match_id, match_ts, is_win, kills, deaths, rp_delta
+                FROM agg_match_contrib
+                WHERE tracker_player_id = ?
+                  AND match_ts BETWEEN ? AND ?
+            ),
+            ordered AS (
+                SELECT
+                    *,
+                    LAG(match_ts) OVER (
+                        PARTITION BY tracker_player_id
+                        ORDER BY match_ts, match_id
+                    ) AS prev_ts
+                FROM match_base
+            ),
+            sessioned AS (
+                SELECT
+                    *,
+                    SUM(
+                        CASE
+                            WHEN prev_ts IS NULL OR match_ts - prev_ts > ?
+                            THEN 1 ELSE 0
+                        END
+                    ) OVER (
+                        PARTITION BY tracker_player_id
+                        ORDER BY match_ts, match_id
+                        ROWS UNBOUNDED PRECEDING
+                    ) AS session_num
+                FROM ordered
+            )
+            INSERT INTO agg_sessions (
+                tracker_player_id, session_id, started_at, ended_at, matches, wins, losses, kd, rp_delta_sum
+            )
+            SELECT
+                tracker_player_id,
+                tracker_player_id || ':' || CAST(MIN(match_ts) AS TEXT) AS session_id,
+                MIN(match_ts) AS started_at,
+                MAX(match_ts) AS ended_at,
+                COUNT(*) AS matches,
+                SUM(is_win) AS wins,
+                COUNT(*) - SUM(is_win) AS losses,
+                CASE
+                    WHEN SUM(deaths) = 0 THEN CAST(SUM(kills) AS REAL)
+                    ELSE ROUND(CAST(SUM(kills) AS REAL) / CAST(SUM(deaths) AS REAL), 3)
+                END AS kd,
+                SUM(rp_delta) AS rp_delta_sum
+            FROM sessioned
+            GROUP BY tracker_player_id, session_num
+            """,
+            (tracker_id, lo_ts, hi_ts, gap),
+        )
+
+    def refresh_aggregates_for_matches(self, match_ids: List[str]) -> int:
+        """
+        Incrementally fold these matches into the aggregate tables.
 
+        Recomputes each (tracker, match) contribution, diffs it against the ledger, and
+        applies only the difference with additive UPSERTs. Sessions are rebuilt only in
+        the time window around changed matches. Returns the number of trackers touched.
+        """
+        clean_match_ids = sorted({str(mid or "").strip() for mid in match_ids if str(mid or "").strip()})
+        if not clean_match_ids:
+            return 0
+        touched_trackers: set[str] = set()
+        session_windows: Dict[str, List[int]] = {}
+        with self.conn:
+            cursor = self.conn.cursor()
+            for start in range(0, len(clean_match_ids), 500):
+                chunk = clean_match_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                new_match_rows, new_operator_rows = self._aggregate_contributions(
+                    f"match_id IN ({placeholders})", chunk
+                )
                 cursor.execute(
-                    """
-                    WITH latest_cards AS (
-                        SELECT
-                            smc.match_id,
-                            COALESCE(
-                                CAST(strftime('%s', REPLACE(REPLACE(TRIM(COALESCE(smc.match_date, '')), 'T', ' '), 'Z', '')) AS INTEGER),
-                                CAST(strftime('%s', smc.scraped_at) AS INTEGER),
-                                0
-                            ) AS match_ts
-                        FROM scraped_match_cards smc
-                        JOIN (
-                            SELECT match_id, MAX(id) AS max_id
-                            FROM scraped_match_cards
-                            WHERE match_id IS NOT NULL AND TRIM(match_id) != ''
-                            GROUP BY match_id
-                        ) x ON x.match_id = smc.match_id AND x.max_id = smc.id
-                    ),
-                    pr_round AS (
-                        SELECT
-                            player_id_tracker,
-                            match_id,
-                            round_id,
-                            MAX(COALESCE(NULLIF(TRIM(match_type), ''), 'Other')) AS match_type,
-                            MAX(COALESCE(NULLIF(TRIM(operator), ''), 'Unknown')) AS operator,
-                            MAX(COALESCE(NULLIF(TRIM(result), ''), '')) AS result,
-                            MAX(COALESCE(kills, 0)) AS kills,
-                            MAX(COALESCE(deaths, 0)) AS deaths
-                        FROM player_rounds
-                        WHERE player_id_tracker = ?
-                          AND TRIM(player_id_tracker) != ''
-                        GROUP BY player_id_tracker, match_id, round_id
-                    )
-                    INSERT INTO agg_player_operator (
-                        tracker_player_id, match_type, operator, rounds, wins, kills, deaths, last_played_at
-                    )
-                    SELECT
-                        pr.player_id_tracker AS tracker_player_id,
-                        pr.match_type,
-                        pr.operator,
-                        COUNT(*) AS rounds,
-                        SUM(CASE WHEN LOWER(COALESCE(pr.result, '')) IN ('victory', 'win') THEN 1 ELSE 0 END) AS wins,
-                        SUM(COALESCE(pr.kills, 0)) AS kills,
-                        SUM(COALESCE(pr.deaths, 0)) AS deaths,
-                        MAX(COALESCE(lc.match_ts, 0)) AS last_played_at
-                    FROM pr_round pr
-                    LEFT JOIN latest_cards lc
-                        ON lc.match_id = pr.match_id
-                    GROUP BY pr.player_id_tracker, pr.match_type, pr.operator
+                    f"""
+                    SELECT tracker_player_id, match_id, match_type, map_name, match_ts,
+                           is_win, kills, deaths, atk_wins, def_wins, rp_delta
+                    FROM agg_match_contrib WHERE match_id IN ({placeholders})
                     """,
-                    (tracker_id,),
+                    chunk,
                 )
-
+                old_match_rows = [tuple(row) for row in cursor.fetchall()]
                 cursor.execute(
-                    """
-                    WITH latest_cards AS (
-                        SELECT
-                            smc.match_id,
-                            COALESCE(
-                                CAST(strftime('%s', REPLACE(REPLACE(TRIM(COALESCE(smc.match_date, '')), 'T', ' '), 'Z', '')) AS INTEGER),
-                                CAST(strftime('%s', smc.scraped_at) AS INTEGER),
-                                0
-                            ) AS match_ts
-                        FROM scraped_match_cards smc
-                        JOIN (
-                            SELECT match_id, MAX(id) AS max_id
-                            FROM scraped_match_cards
-                            WHERE match_id IS NOT NULL AND TRIM(match_id) != ''
-                            GROUP BY match_id
-                        ) x ON x.match_id = smc.match_id AND x.max_id = smc.id
-                    ),
-                    mdp_match AS (
-                        SELECT
-                            player_id_tracker,
-                            match_id,
-                            MAX(COALESCE(NULLIF(TRIM(result), ''), '')) AS result,
-                            MAX(COALESCE(kills, 0)) AS kills,
-                            MAX(COALESCE(deaths, 0)) AS deaths,
-                            MAX(COALESCE(rank_points_delta, 0)) AS rank_points_delta
-                        FROM match_detail_players
-                        WHERE player_id_tracker = ?
-                          AND TRIM(player_id_tracker) != ''
-                        GROUP BY player_id_tracker, match_id
-                    ),
-                    match_base AS (
-                        SELECT
-                            m.player_id_tracker,
-                            m.match_id,
-                            COALESCE(lc.match_ts, 0) AS match_ts,
-                            CASE WHEN LOWER(COALESCE(m.result, '')) IN ('win', 'victory') THEN 1 ELSE 0 END AS is_win,
-                            COALESCE(m.kills, 0) AS kills,
-                            COALESCE(m.deaths, 0) AS deaths,
-                            COALESCE(m.rank_points_delta, 0) AS rp_delta
-                        FROM mdp_match m
-                        LEFT JOIN latest_cards lc
-                            ON lc.match_id = m.match_id
-                    ),
-                    ordered AS (
-                        SELECT
-                            *,
-                            LAG(match_ts) OVER (
-                                PARTITION BY player_id_tracker
-                                ORDER BY match_ts, match_id
-                            ) AS prev_ts
-                        FROM match_base
-                    ),
-                    sessioned AS (
-                        SELECT
-                            *,
-                            SUM(
-                                CASE
-                                    WHEN prev_ts IS NULL OR match_ts - prev_ts > ?
-                                    THEN 1 ELSE 0
-                                END
-                            ) OVER (
-                                PARTITION BY player_id_tracker
-                                ORDER BY match_ts, match_id
-                                ROWS UNBOUNDED PRECEDING
-                            ) AS session_num
-                        FROM ordered
-                    )
-                    INSERT INTO agg_sessions (
-                        tracker_player_id, session_id, started_at, ended_at, matches, wins, losses, kd, rp_delta_sum
-                    )
-                    SELECT
-                        player_id_tracker AS tracker_player_id,
-                        player_id_tracker || ':' || CAST(MIN(match_ts) AS TEXT) || ':' || CAST(session_num AS TEXT) AS session_id,
-                        MIN(match_ts) AS started_at,
-                        MAX(match_ts) AS ended_at,
-                        COUNT(*) AS matches,
-                        SUM(is_win) AS wins,
-                        COUNT(*) - SUM(is_win) AS losses,
-                        CASE
-                            WHEN SUM(deaths) = 0 THEN CAST(SUM(kills) AS REAL)
-                            ELSE ROUND(CAST(SUM(kills) AS REAL) / CAST(SUM(deaths) AS REAL), 3)
-                        END AS kd,
-                        SUM(rp_delta) AS rp_delta_sum
-                    FROM sessioned
-                    GROUP BY player_id_tracker, session_num
+                    f"""
+                    SELECT tracker_player_id, match_id, match_type, operator, match_ts,
+                           rounds, wins, kills, deaths
+                    FROM agg_operator_contrib WHERE match_id IN ({placeholders})
                     """,
-                    (tracker_id, session_gap_seconds),
+                    chunk,
+                )
+                old_operator_rows = [tuple(row) for row in cursor.fetchall()]
+
+                removed_matches = sorted(set(old_match_rows) - set(new_match_rows))
+                added_matches = sorted(set(new_match_rows) - set(old_match_rows))
+                removed_ops = sorted(set(old_operator_rows) - set(new_operator_rows))
+                added_ops = sorted(set(new_operator_rows) - set(old_operator_rows))
+                if not (removed_matches or added_matches or removed_ops or added_ops):
+                    continue
+
+                self._upsert_aggregate_deltas(removed_matches, removed_ops, sign=-1)
+                cursor.executemany(
+                    "DELETE FROM agg_match_contrib WHERE tracker_player_id = ? AND match_id = ?",
+                    [(r[0], r[1]) for r in removed_matches],
+                )
+                cursor.executemany(
+                    "DELETE FROM agg_operator_contrib WHERE tracker_player_id = ? AND match_id = ? AND match_type = ? AND operator = ?",
+                    [(r[0], r[1], r[2], r[3]) for r in removed_ops],
+                )
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO agg_match_contrib VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    added_matches,
+                )
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO agg_operator_contrib VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    added_ops,
                 )
+                self._upsert_aggregate_deltas(added_matches, added_ops, sign=1)
+                self._repair_aggregate_keys_after_removal(removed_matches, removed_ops)
+
+                for row in removed_matches + added_matches:
+                    session_windows.setdefault(row[0], []).append(int(row[4]))
+                touched_trackers.update(r[0] for r in removed_matches + added_matches + removed_ops + added_ops)
+
+            for tracker_id, stamps in session_windows.items():
+                self._rebuild_sessions_window(tracker_id, min(stamps), max(stamps))
+        return len(touched_trackers)
+
+    def refresh_aggregates_for_tracker_ids(self, tracker_ids: List[str], commit: bool = True) -> None:
+        """Rebuild aggregate rows (and their ledger) for specific tracker IDs from full history."""
+        clean_tracker_ids = sorted({str(tid or "").strip() for tid in tracker_ids if str(tid or "").strip()})
+        if not clean_tracker_ids:
+            return
+        cursor = self.conn.cursor()
+        for tracker_id in clean_tracker_ids:
+            for table in ("agg_player_map", "agg_player_operator", "agg_sessions", "agg_match_contrib", "agg_operator_contrib"):
+                cursor.execute(f"DELETE FROM {table} WHERE tracker_player_id = ?", (tracker_id,))
+            match_rows, operator_rows = self._aggregate_contributions("player_id_tracker = ?", [tracker_id])
+            cursor.executemany(
+                "INSERT OR REPLACE INTO agg_match_contrib VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                match_rows,
+            )
+            cursor.executemany(
+                "INSERT OR REPLACE INTO agg_operator_contrib VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                operator_rows,
+            )
+            self._upsert_aggregate_deltas(match_rows, operator_rows, sign=1)
+            self._rebuild_sessions_window(tracker_id)
+        if commit:
+            self.conn.commit()
+
+    def rebuild_all_aggregates(
+        self,
+        commit: bool = True,
+        progress: Optional[Callable[[int, int], None]] = None,
+        chunk_size: int = 200,
+    ) -> int:
+        """
+        Full repair: drop every aggregate and ledger row and rebuild from normalized tables.
+
+        `progress(done, total)` is called after each chunk of tracker IDs; an exception
+        raised from it leaves the rebuild uncommitted.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT player_id_tracker FROM match_detail_players
+            WHERE player_id_tracker IS NOT NULL AND TRIM(player_id_tracker) != ''
+            UNION
+            SELECT player_id_tracker FROM player_rounds
+            WHERE player_id_tracker IS NOT NULL AND TRIM(player_id_tracker) != ''
+            """
+        )
+        tracker_ids = [row["player_id_tracker"] for row in cursor.fetchall()]
+        for table in ("agg_player_map", "agg_player_operator", "agg_sessions", "agg_match_contrib", "agg_operator_contrib"):
+            cursor.execute(f"DELETE FROM {table}")
+        chunk_size = max(1, int(chunk_size))
+        for start in range(0, len(tracker_ids), chunk_size):
+            self.refresh_aggregates_for_tracker_ids(tracker_ids[start : start + chunk_size], commit=False)
+            if progress is not None:
+                progress(min(len(tracker_ids), start + chunk_size), len(tracker_ids))
+        if commit:
+            self.conn.commit()
+        return len(tracker_ids)
     
     def add_player(self, username: str, device_tag: str = "pc") -> int:
         """Add a player or return existing player_id."""
@@ -1494,8 +2332,8 @@ class Database:
 
             # Insert new player
             cursor.execute(
-                "INSERT INTO players (username, device_tag) VALUES (?, ?)",
-                (username, device_tag),
+                "INSERT INTO players (username, username_key, device_tag) VALUES (?, ?, ?)",
+                (username, self._username_key(username), device_tag),
             )
             self.conn.commit()
             return cursor.lastrowid
@@ -1710,6 +2548,7 @@ class Database:
                 WITH teammate_rows AS (
                     SELECT
                         tm.username AS teammate_username,
+                        tm.username_key AS teammate_key,
                         me.match_id AS match_id,
                         LOWER(TRIM(me.result)) AS player_result,
                         COALESCE(me.scraped_at, tm.scraped_at) AS seen_at
@@ -1717,13 +2556,14 @@ class Database:
                     JOIN match_detail_players tm
                       ON me.match_id = tm.match_id
                      AND me.team_id = tm.team_id
-                     AND LOWER(TRIM(tm.username)) != LOWER(TRIM(me.username))
-                    WHERE LOWER(TRIM(me.username)) = LOWER(TRIM(?))
+                     AND tm.username_key != me.username_key
+                    WHERE me.username_key = LOWER(TRIM(?))
                       AND LOWER(TRIM(COALESCE(me.match_type, ''))) = LOWER(TRIM(?))
                 ),
                 dedup AS (
                     SELECT
                         teammate_username,
+                        MAX(teammate_key) AS teammate_key,
                         match_id,
                         MAX(CASE WHEN player_result IN ('win', 'victory') THEN 1 ELSE 0 END) AS did_win,
                         MAX(seen_at) AS last_seen
@@ -1740,7 +2580,7 @@ class Database:
                     MAX(CASE WHEN LOWER(TRIM(pt.tag)) = 'friend' THEN 1 ELSE 0 END) AS is_friend
                 FROM dedup d
                 LEFT JOIN players p
-                  ON LOWER(TRIM(p.username)) = LOWER(TRIM(d.teammate_username))
+                  ON p.username_key = d.teammate_key
                 LEFT JOIN player_tags pt
                   ON p.player_id = pt.player_id
                 GROUP BY d.teammate_username, p.player_id
@@ -1794,13 +2634,13 @@ class Database:
             cursor.execute(
                 f"""
                 SELECT
-                    LOWER(TRIM(username)) AS uname,
+                    username_key AS uname,
                     username,
                     match_id,
                     team_id,
                     LOWER(TRIM(COALESCE(result, ''))) AS result
                 FROM match_detail_players
-                WHERE LOWER(TRIM(username)) IN ({username_placeholders})
+                WHERE username_key IN ({username_placeholders})
                   AND LOWER(TRIM(COALESCE(match_type, ''))) IN ({match_type_placeholders})
                 """,
                 params,
@@ -1932,7 +2772,7 @@ class Database:
                         match_id,
                         MAX(CASE WHEN LOWER(TRIM(COALESCE(result, ''))) IN ('win', 'victory') THEN 1 ELSE 0 END) AS did_win
                     FROM match_detail_players
-                    WHERE LOWER(TRIM(username)) = LOWER(TRIM(?))
+                    WHERE username_key = LOWER(TRIM(?))
                       AND LOWER(TRIM(COALESCE(match_type, ''))) = LOWER(TRIM(?))
                     GROUP BY match_id
                     """,
@@ -1960,7 +2800,7 @@ class Database:
                             COALESCE(side, 'unknown') AS side,
                             COUNT(*) AS rounds
                         FROM player_rounds
-                        WHERE LOWER(TRIM(username)) = LOWER(TRIM(?))
+                        WHERE username_key = LOWER(TRIM(?))
                           AND match_id IN ({mid_placeholders})
                         GROUP BY operator, side
                         ORDER BY rounds DESC
@@ -2039,13 +2879,13 @@ class Database:
             cursor.execute(
                 f"""
                 SELECT
-                    LOWER(TRIM(username)) AS uname,
+                    username_key AS uname,
                     username,
                     match_id,
                     team_id,
                     COALESCE(match_type, '') AS match_type
                 FROM match_detail_players
-                WHERE LOWER(TRIM(username)) IN ({placeholders})
+                WHERE username_key IN ({placeholders})
                 """,
                 username_keys,
             )
@@ -2314,6 +3154,7 @@ class Database:
 
             # Delete player
             cursor.execute("DELETE FROM players WHERE player_id = ?", (player_id,))
+            self._bump_revisions(("players",), usernames=[username])
 
             self.conn.commit()
         except sqlite3.Error as e:
@@ -2615,7 +3456,8 @@ class Database:
         rounds = value.get("rounds") or data.get("rounds")
         return isinstance(rounds, list) and len(rounds) > 0
 
-    def _parse_rounds_from_summary(self, summary_json: Any) -> Dict[str, Any]:
+    @classmethod
+    def _parse_rounds_from_summary(cls, summary_json: Any) -> Dict[str, Any]:
         """
         Build an ow-ingest-like round payload directly from summary segments.
 
@@ -2739,7 +3581,8 @@ class Database:
 
         return {"players": players, "killfeed": killfeed_rows, "rounds": rounds}
 
-    def _unpack_summary_segments(self, match_id: str, summary_payload: Dict[str, Any]) -> Dict[str, Any]:
+    @classmethod
+    def _unpack_summary_segments(cls, match_id: str, summary_payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Convert a scraped summary payload into normalized row payloads for:
         - match_detail_players
@@ -2792,36 +3635,36 @@ class Database:
                         "username": username,
                         "team_id": attrs.get("teamId", -1),
                         "result": meta.get("result", ""),
-                        "kills": self._summary_stat_int(stats.get("kills")),
-                        "deaths": self._summary_stat_int(stats.get("deaths")),
-                        "assists": self._summary_stat_int(stats.get("assists")),
-                        "headshots": self._summary_stat_int(stats.get("headshots")),
-                        "first_bloods": self._summary_stat_int(stats.get("firstBloods")),
-                        "first_deaths": self._summary_stat_int(stats.get("firstDeaths")),
-                        "clutches_won": self._summary_stat_int(stats.get("clutches")),
-                        "clutches_lost": self._summary_stat_int(stats.get("clutchesLost")),
-                        "clutches_1v1": self._summary_stat_int(stats.get("clutches1v1")),
-                        "clutches_1v2": self._summary_stat_int(stats.get("clutches1v2")),
-                        "clutches_1v3": self._summary_stat_int(stats.get("clutches1v3")),
-                        "clutches_1v4": self._summary_stat_int(stats.get("clutches1v4")),
-                        "clutches_1v5": self._summary_stat_int(stats.get("clutches1v5")),
-                        "kills_1k": self._summary_stat_int(stats.get("kills1K")),
-                        "kills_2k": self._summary_stat_int(stats.get("kills2K")),
-                        "kills_3k": self._summary_stat_int(stats.get("kills3K")),
-                        "kills_4k": self._summary_stat_int(stats.get("kills4K")),
-                        "kills_5k": self._summary_stat_int(stats.get("kills5K")),
-                        "rounds_won": self._summary_stat_int(stats.get("roundsWon")),
-                        "rounds_lost": self._summary_stat_int(stats.get("roundsLost")),
-                        "rank_points": self._summary_stat_int(stats.get("rankPoints")),
-                        "rank_points_delta": self._summary_stat_int(stats.get("rankPointsDelta")),
-                        "rank_points_previous": self._summary_stat_int(stats.get("rankPointsPrevious")),
-                        "kd_ratio": self._summary_stat_float(stats.get("kdRatio")),
-                        "hs_pct": self._summary_stat_float(stats.get("headshotPct")),
-                        "esr": self._summary_stat_float(stats.get("esr")),
-                        "kills_per_round": self._summary_stat_float(stats.get("killsPerRound")),
-                        "time_played_ms": self._summary_stat_int(stats.get("timePlayed")),
-                        "elo": self._summary_stat_int(stats.get("elo")),
-                        "elo_delta": self._summary_stat_int(stats.get("eloDelta")),
+                        "kills": cls._summary_stat_int(stats.get("kills")),
+                        "deaths": cls._summary_stat_int(stats.get("deaths")),
+                        "assists": cls._summary_stat_int(stats.get("assists")),
+                        "headshots": cls._summary_stat_int(stats.get("headshots")),
+                        "first_bloods": cls._summary_stat_int(stats.get("firstBloods")),
+                        "first_deaths": cls._summary_stat_int(stats.get("firstDeaths")),
+                        "clutches_won": cls._summary_stat_int(stats.get("clutches")),
+                        "clutches_lost": cls._summary_stat_int(stats.get("clutchesLost")),
+                        "clutches_1v1": cls._summary_stat_int(stats.get("clutches1v1")),
+                        "clutches_1v2": cls._summary_stat_int(stats.get("clutches1v2")),
+                        "clutches_1v3": cls._summary_stat_int(stats.get("clutches1v3")),
+                        "clutches_1v4": cls._summary_stat_int(stats.get("clutches1v4")),
+                        "clutches_1v5": cls._summary_stat_int(stats.get("clutches1v5")),
+                        "kills_1k": cls._summary_stat_int(stats.get("kills1K")),
+                        "kills_2k": cls._summary_stat_int(stats.get("kills2K")),
+                        "kills_3k": cls._summary_stat_int(stats.get("kills3K")),
+                        "kills_4k": cls._summary_stat_int(stats.get("kills4K")),
+                        "kills_5k": cls._summary_stat_int(stats.get("kills5K")),
+                        "rounds_won": cls._summary_stat_int(stats.get("roundsWon")),
+                        "rounds_lost": cls._summary_stat_int(stats.get("roundsLost")),
+                        "rank_points": cls._summary_stat_int(stats.get("rankPoints")),
+                        "rank_points_delta": cls._summary_stat_int(stats.get("rankPointsDelta")),
+                        "rank_points_previous": cls._summary_stat_int(stats.get("rankPointsPrevious")),
+                        "kd_ratio": cls._summary_stat_float(stats.get("kdRatio")),
+                        "hs_pct": cls._summary_stat_float(stats.get("headshotPct")),
+                        "esr": cls._summary_stat_float(stats.get("esr")),
+                        "kills_per_round": cls._summary_stat_float(stats.get("killsPerRound")),
+                        "time_played_ms": cls._summary_stat_int(stats.get("timePlayed")),
+                        "elo": cls._summary_stat_int(stats.get("elo")),
+                        "elo_delta": cls._summary_stat_int(stats.get("eloDelta")),
                     }
                 )
             elif seg_type == "round-overview":
@@ -2839,8 +3682,8 @@ class Database:
                 if tracker_id and meta.get("platformUserHandle"):
                     usernames_by_tracker_id[tracker_id] = str(meta.get("platformUserHandle")).strip()
 
-                first_blood = self._summary_stat_int(stats.get("firstBloods"))
-                first_death = self._summary_stat_int(stats.get("firstDeaths"))
+                first_blood = cls._summary_stat_int(stats.get("firstBloods"))
+                first_death = cls._summary_stat_int(stats.get("firstDeaths"))
                 try:
                     round_id_int = int(round_id)
                 except (TypeError, ValueError):
@@ -2865,16 +3708,16 @@ class Database:
                         "operator": meta.get("operatorName", "") or attrs.get("operatorId", ""),
                         "result": attrs.get("resultId", ""),
                         "is_disconnected": 1 if attrs.get("isDisconnected", False) else 0,
-                        "kills": self._summary_stat_int(stats.get("kills")),
-                        "deaths": self._summary_stat_int(stats.get("deaths")),
-                        "assists": self._summary_stat_int(stats.get("assists")),
-                        "headshots": self._summary_stat_int(stats.get("headshots")),
+                        "kills": cls._summary_stat_int(stats.get("kills")),
+                        "deaths": cls._summary_stat_int(stats.get("deaths")),
+                        "assists": cls._summary_stat_int(stats.get("assists")),
+                        "headshots": cls._summary_stat_int(stats.get("headshots")),
                         "first_blood": first_blood,
                         "first_death": first_death,
-                        "clutch_won": self._summary_stat_int(stats.get("clutches")),
-                        "clutch_lost": self._summary_stat_int(stats.get("clutchesLost")),
-                        "hs_pct": self._summary_stat_float(stats.get("headshotPct")),
-                        "esr": self._summary_stat_float(stats.get("esr")),
+                        "clutch_won": cls._summary_stat_int(stats.get("clutches")),
+                        "clutch_lost": cls._summary_stat_int(stats.get("clutchesLost")),
+                        "hs_pct": cls._summary_stat_float(stats.get("headshotPct")),
+                        "esr": cls._summary_stat_float(stats.get("esr")),
                     }
                 )
 
@@ -2891,22 +3734,31 @@ class Database:
         limit: Optional[int] = None,
         queue_key: Optional[str] = None,
         since_date: Optional[str] = None,
-    ) -> Dict[str, int]:
+        batch_size: int = 250,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
         """
-        Unpack scraped match cards with summary_json that have not yet been normalized.
+        Unpack scraped match cards with a summary payload that have not yet been normalized.
 
         A card is considered unpacked when all three normalized match tables have at least
         one row for (player_id, match_id).
+
+        Cards are handled in batches: completeness is checked with one set query per table,
+        summaries are parsed in a process pool once the backlog is large enough (`workers`
+        caps the pool; 0 or 1 parses inline), and each batch is written in a single
+        transaction with executemany. `progress`, if given, receives the running stats
+        after every batch; an exception it raises stops the run there, after the batches
+        already written have had their latest-card and aggregate rows refreshed, and is
+        then re-raised. Summary payloads are loaded per batch and handed to the
+        parser still compressed; decoding happens in the worker.
         """
         cursor = self.conn.cursor()
         params: List[Any] = []
-        query = """
-            SELECT id, username, match_id, mode, summary_json, round_data_json, round_data_source
+        query = f"""
+            SELECT id, username, match_id, mode, round_data_source
             FROM scraped_match_cards
-            WHERE summary_json IS NOT NULL
-              AND TRIM(summary_json) != ''
-              AND TRIM(summary_json) != '{}'
-              AND LOWER(TRIM(summary_json)) != 'null'
+            WHERE {card_payloads.present_sql("summary")}
               AND match_id IS NOT NULL
               AND TRIM(match_id) != ''
               AND (
@@ -2939,138 +3791,247 @@ class Database:
             params.append(limit)
 
         cursor.execute(query, tuple(params))
-        cards = cursor.fetchall()
+        cards = [
+            (
+                row["id"],
+                str(row["username"] or "").strip(),
+                str(row["match_id"] or "").strip(),
+                row["mode"],
+                row["round_data_source"],
+            )
+            for row in cursor.fetchall()
+        ]
 
-        stats = {
+        started = time.perf_counter()
+        stats: Dict[str, Any] = {
             "scanned": len(cards),
+            "processed": 0,
             "unpacked_matches": 0,
             "inserted_detail_rows": 0,
             "inserted_round_rows": 0,
             "inserted_player_round_rows": 0,
             "aggregates_refreshed_trackers": 0,
+            "repaired_players": 0,
             "skipped": 0,
             "errors": 0,
+            "elapsed_seconds": 0.0,
+            "cards_per_second": 0.0,
         }
         touched_match_ids: set[str] = set()
-
-        for row in cards:
-            owner_username = str(row["username"] or "").strip()
-            match_id = str(row["match_id"] or "").strip()
-            match_type = self._canonicalize_match_type(row["mode"])
-            summary_raw = row["summary_json"]
-            if not owner_username or not match_id or not summary_raw:
-                stats["skipped"] += 1
-                continue
-
+        owner_ids: Dict[str, int] = {}
+        seen_pairs: set[tuple] = set()
+        batch_size = max(1, int(batch_size))
+        stopped: Optional[BaseException] = None
+        unpacked_card_ids: List[int] = []
+
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1) if len(cards) >= 2 * batch_size else 0
+        pool = None
+        if workers and workers > 1:
             try:
-                owner_player_id = self.get_player_id(owner_username)
-                if owner_player_id is None:
-                    owner_player_id = self.add_player(owner_username)
-
-                cursor.execute(
-                    "SELECT 1 FROM match_detail_players WHERE player_id = ? AND match_id = ? LIMIT 1",
-                    (owner_player_id, match_id),
-                )
-                has_detail = cursor.fetchone() is not None
-                cursor.execute(
-                    "SELECT 1 FROM round_outcomes WHERE player_id = ? AND match_id = ? LIMIT 1",
-                    (owner_player_id, match_id),
-                )
-                has_round_outcomes = cursor.fetchone() is not None
-                cursor.execute(
-                    "SELECT 1 FROM player_rounds WHERE player_id = ? AND match_id = ? LIMIT 1",
-                    (owner_player_id, match_id),
-                )
-                has_player_rounds = cursor.fetchone() is not None
-                if has_detail and has_round_outcomes and has_player_rounds:
-                    stats["skipped"] += 1
-                    continue
+                pool = ProcessPoolExecutor(max_workers=workers)
+            except (OSError, NotImplementedError) as pool_err:
+                print(f"[DB] Unpack process pool unavailable, parsing inline: {pool_err}")
 
-                summary_payload = json.loads(summary_raw)
-                round_data_payload = {}
-                try:
-                    round_data_payload = json.loads(row["round_data_json"] or "{}")
-                except Exception:
-                    round_data_payload = {}
-                parsed_summary_round_payload = self._parse_rounds_from_summary(summary_payload)
-                round_data_source = None
-                if self._round_payload_has_rounds(parsed_summary_round_payload):
-                    round_data_source = "summary"
-                elif self._round_payload_has_rounds(round_data_payload):
-                    round_data_source = "ow-ingest"
+        try:
+            for start in range(0, len(cards), batch_size):
+                batch = cards[start : start + batch_size]
+                payloads = card_payloads.load(self.conn, [c[0] for c in batch], ("summary", "round_data"))
+                pending = []
+                for card_id, owner_username, match_id, mode, source in batch:
+                    summary_raw = payloads.get(card_id, {}).get("summary")
+                    round_data_raw = payloads.get(card_id, {}).get("round_data")
+                    card = (card_id, owner_username, match_id, mode, summary_raw, round_data_raw, source)
+                    if not owner_username or not match_id or not summary_raw:
+                        stats["skipped"] += 1
+                        continue
+                    owner_id = owner_ids.get(owner_username)
+                    if owner_id is None:
+                        owner_id = self.get_player_id(owner_username)
+                        if owner_id is None:
+                            owner_id = self.add_player(owner_username)
+                        owner_ids[owner_username] = owner_id
+                    if (owner_id, match_id) in seen_pairs:
+                        # Older duplicate card for a pair already handled in this run.
+                        stats["skipped"] += 1
+                        continue
+                    seen_pairs.add((owner_id, match_id))
+                    pending.append((owner_id, card))
+
+                complete = self._complete_unpack_pairs({match_id for _, (_, _, match_id, *_rest) in pending})
+                work = []
+                for owner_id, card in pending:
+                    if (owner_id, card[2]) in complete:
+                        stats["skipped"] += 1
+                    else:
+                        work.append((owner_id, card))
+
+                parse_inputs = [(card[2], card[4], card[5], card[6]) for _, card in work]
+                if pool is not None and len(parse_inputs) > 1:
+                    chunk = max(1, len(parse_inputs) // (workers * 4))
+                    parsed = list(pool.map(_parse_scraped_card_summary, parse_inputs, chunksize=chunk))
                 else:
-                    existing_source = str(row["round_data_source"] or "").strip()
-                    if existing_source:
-                        round_data_source = existing_source
-
-                unpacked = self._unpack_summary_segments(match_id, summary_payload)
-                detail_rows = unpacked["detail_rows"]
-                round_rows = unpacked["round_rows"]
-                player_round_rows = unpacked["player_round_rows"]
-                usernames_by_tracker_id = unpacked["usernames_by_tracker_id"]
-
-                if not detail_rows and not round_rows and not player_round_rows:
-                    stats["skipped"] += 1
-                    continue
-                if len(player_round_rows) == 0 or len(round_rows) == 0:
-                    print(
-                        "[DB] Ingest completeness warning: "
-                        f"match_id={match_id} user={owner_username} "
-                        f"player_rounds={len(player_round_rows)} round_outcomes={len(round_rows)}"
-                    )
-
-                # Replace per-match normalized rows for this owner to keep data consistent.
-                self.save_match_detail_players(owner_player_id, match_id, detail_rows, match_type=match_type)
-                self.save_round_outcomes(owner_player_id, match_id, round_rows, match_type=match_type)
-                self.save_player_rounds(
-                    owner_player_id,
-                    match_id,
-                    player_round_rows,
-                    match_type=match_type,
-                    usernames_by_tracker_id=usernames_by_tracker_id,
-                )
-                update_round_data_json = row["round_data_json"]
-                if round_data_source == "summary":
-                    update_round_data_json = json.dumps(parsed_summary_round_payload)
-                cursor.execute(
-                    "UPDATE scraped_match_cards SET round_data_source = ?, round_data_json = ?, has_rounds = ?, has_outcomes = ? WHERE id = ?",
-                    (
-                        round_data_source,
-                        update_round_data_json,
-                        1 if len(player_round_rows) > 0 else 0,
-                        1 if len(round_rows) > 0 else 0,
-                        row["id"],
-                    ),
-                )
-                self.conn.commit()
-
-                stats["unpacked_matches"] += 1
-                stats["inserted_detail_rows"] += len(detail_rows)
-                stats["inserted_round_rows"] += len(round_rows)
-                stats["inserted_player_round_rows"] += len(player_round_rows)
-                touched_match_ids.add(match_id)
-            except Exception:
-                stats["errors"] += 1
-
+                    parsed = [_parse_scraped_card_summary(item) for item in parse_inputs]
+
+                ready = []
+                for (owner_id, card), result in zip(work, parsed):
+                    if result.get("error"):
+                        stats["errors"] += 1
+                        continue
+                    if not result["detail_rows"] and not result["round_rows"] and not result["player_round_rows"]:
+                        stats["skipped"] += 1
+                        continue
+                    if len(result["player_round_rows"]) == 0 or len(result["round_rows"]) == 0:
+                        print(
+                            "[DB] Ingest completeness warning: "
+                            f"match_id={card[2]} user={card[1]} "
+                            f"player_rounds={len(result['player_round_rows'])} round_outcomes={len(result['round_rows'])}"
+                        )
+                    ready.append((owner_id, card, result))
+
+                if ready:
+                    try:
+                        self._write_unpacked_cards(ready)
+                    except sqlite3.Error as batch_err:
+                        # Isolate the bad card(s): retry the batch one card per transaction.
+                        print(f"[DB] Unpack batch write failed, retrying per card: {batch_err}")
+                        written = []
+                        for item in ready:
+                            try:
+                                self._write_unpacked_cards([item])
+                                written.append(item)
+                            except sqlite3.Error:
+                                stats["errors"] += 1
+                        ready = written
+
+                for _owner_id, card, result in ready:
+                    unpacked_card_ids.append(card[0])
+                    stats["unpacked_matches"] += 1
+                    stats["inserted_detail_rows"] += len(result["detail_rows"])
+                    stats["inserted_round_rows"] += len(result["round_rows"])
+                    stats["inserted_player_round_rows"] += len(result["player_round_rows"])
+                    touched_match_ids.add(card[2])
+
+                stats["processed"] = min(len(cards), start + len(batch))
+                elapsed = time.perf_counter() - started
+                stats["elapsed_seconds"] = round(elapsed, 3)
+                stats["cards_per_second"] = round(stats["processed"] / elapsed, 1) if elapsed > 0 else 0.0
+                if progress is not None:
+                    try:
+                        progress(dict(stats))
+                    except BaseException as stop:
+                        stopped = stop
+                        break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if unpacked_card_ids:
+            stats["repaired_players"] = self.repair_scraped_card_players(card_ids=unpacked_card_ids)
         if touched_match_ids:
+            self.refresh_match_latest_cards(sorted(touched_match_ids))
             try:
                 stats["aggregates_refreshed_trackers"] = self.refresh_aggregates_for_matches(list(touched_match_ids))
             except Exception as agg_err:
                 print(f"[DB] Warning: failed to refresh aggregates after unpack: {agg_err}")
+        if stopped is not None:
+            raise stopped
 
+        elapsed = time.perf_counter() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["cards_per_second"] = round(stats["processed"] / elapsed, 1) if elapsed > 0 else 0.0
         return stats
 
-    def save_scraped_match_cards(self, username: str, matches: List[Dict]) -> None:
-        """Persist scraped match cards for one username without wiping prior rows."""
+    def _complete_unpack_pairs(self, match_ids: set[str]) -> set[tuple]:
+        """(player_id, match_id) pairs that already have rows in all three normalized tables."""
+        if not match_ids:
+            return set()
         cursor = self.conn.cursor()
+        complete: Optional[set[tuple]] = None
+        ids = sorted(match_ids)
+        placeholders = ",".join("?" * len(ids))
+        for table in ("match_detail_players", "round_outcomes", "player_rounds"):
+            cursor.execute(
+                f"SELECT DISTINCT player_id, match_id FROM {table} WHERE match_id IN ({placeholders})",
+                ids,
+            )
+            pairs = {(row["player_id"], row["match_id"]) for row in cursor.fetchall()}
+            complete = pairs if complete is None else (complete & pairs)
+            if not complete:
+                return set()
+        return complete or set()
+
+    def _write_unpacked_cards(self, ready: List[tuple]) -> None:
+        """Replace normalized rows for a batch of parsed cards in one transaction."""
+        pairs = []
+        detail_rows: List[tuple] = []
+        round_rows: List[tuple] = []
+        player_round_rows: List[tuple] = []
+        card_updates: List[tuple] = []
+        round_data_updates: List[tuple] = []
+        for owner_id, card, result in ready:
+            card_id, _owner, match_id, mode, _summary, _round_data, _src = card
+            match_type = self._canonicalize_match_type(mode)
+            match_type_key = self._canonicalize_queue_key(match_type)
+            pairs.append((owner_id, match_id))
+            detail_rows.extend(
+                self._match_detail_player_rows(owner_id, match_id, result["detail_rows"], match_type, match_type_key)
+            )
+            round_rows.extend(
+                self._round_outcome_rows(owner_id, match_id, result["round_rows"], match_type, match_type_key)
+            )
+            player_round_rows.extend(
+                self._player_round_rows(
+                    owner_id,
+                    match_id,
+                    result["player_round_rows"],
+                    match_type,
+                    match_type_key,
+                    result["usernames_by_tracker_id"],
+                )
+            )
+            card_updates.append(
+                (
+                    result["round_data_source"],
+                    1 if result["player_round_rows"] else 0,
+                    1 if result["round_rows"] else 0,
+                    card_id,
+                )
+            )
+            if result["round_data_json"] is not None:
+                round_data_updates.append((card_id, result["round_data_json"]))
 
-        def _safe_json_load(raw: Any, fallback: Any) -> Any:
-            try:
-                if raw is None:
-                    return fallback
-                return json.loads(raw)
-            except Exception:
-                return fallback
+        with self.conn:
+            cursor = self.conn.cursor()
+            for table in ("match_detail_players", "round_outcomes", "player_rounds"):
+                cursor.executemany(f"DELETE FROM {table} WHERE player_id = ? AND match_id = ?", pairs)
+            if detail_rows:
+                cursor.executemany(self.MATCH_DETAIL_PLAYERS_INSERT_SQL, detail_rows)
+            if round_rows:
+                cursor.executemany(self.ROUND_OUTCOMES_INSERT_SQL, round_rows)
+            if player_round_rows:
+                cursor.executemany(self.PLAYER_ROUNDS_INSERT_SQL, player_round_rows)
+            self.refresh_round_operator_sets(pairs, commit=False)
+            cursor.executemany(
+                "UPDATE scraped_match_cards SET round_data_source = ?, has_rounds = ?, has_outcomes = ? WHERE id = ?",
+                card_updates,
+            )
+            for card_id, round_data_json in round_data_updates:
+                card_payloads.store(cursor, card_id, {"round_data": round_data_json})
+            self._bump_revisions(
+                ("match_detail_players", "round_outcomes", "player_rounds", "scraped_match_cards"),
+                player_ids=[owner_id for owner_id, _mid in pairs],
+                player_keys={row[6] for row in detail_rows},
+            )
+
+    def save_scraped_match_cards(self, username: str, matches: List[Dict]) -> None:
+        """
+        Persist scraped match cards for one username without wiping prior rows.
+
+        An existing card only takes payloads it lacks; its stored payloads are
+        decoded just when the new card offers a replacement for that kind.
+        """
+        cursor = self.conn.cursor()
 
         def _has_round_list(value: Any) -> bool:
             return isinstance(value, list) and len(value) > 0
@@ -3081,13 +4042,14 @@ class Database:
             rounds = value.get("rounds") or value.get("data", {}).get("rounds")
             return isinstance(rounds, list) and len(rounds) > 0
 
+        written_match_ids: set[str] = set()
         for item in matches:
             match_id = (item.get("match_id") or "").strip()
             if match_id:
                 cursor.execute(
                     """
                     SELECT id, map_name, mode, score_team_a, score_team_b, duration, match_date,
-                           players_json, rounds_json, summary_json, round_data_json, round_data_source, mode_key
+                           round_data_source, mode_key
                     FROM scraped_match_cards
                     WHERE username = ? AND match_id = ?
                     ORDER BY id DESC
@@ -3097,11 +4059,11 @@ class Database:
                 )
                 existing = cursor.fetchone()
                 if existing is not None:
-                    existing_players = _safe_json_load(existing["players_json"], [])
-                    existing_rounds = _safe_json_load(existing["rounds_json"], [])
-                    existing_summary = _safe_json_load(existing["summary_json"], {})
-                    existing_round_data = _safe_json_load(existing["round_data_json"], {})
-                    existing_round_data_source = str(existing["round_data_source"] or "").strip()
+                    stored = card_payloads.load(self.conn, [existing["id"]]).get(existing["id"], {})
+
+                    def _existing(kind: str, fallback: Any) -> Any:
+                        payload = stored.get(kind)
+                        return fallback if payload is None else payload.json(fallback)
 
                     new_players = item.get("players", [])
                     new_rounds = item.get("rounds", [])
@@ -3109,25 +4071,23 @@ class Database:
                     new_round_data = item.get("round_data", {})
 
                     updated = False
-
-                    players_json = json.dumps(existing_players)
-                    rounds_json = json.dumps(existing_rounds)
-                    summary_json = json.dumps(existing_summary)
-                    round_data_json = json.dumps(existing_round_data)
-                    round_data_source = existing_round_data_source or None
-
-                    if (not isinstance(existing_players, list) or not existing_players) and isinstance(new_players, list) and new_players:
-                        players_json = json.dumps(new_players)
-                        updated = True
-                    if (not _has_round_list(existing_rounds)) and _has_round_list(new_rounds):
-                        rounds_json = json.dumps(new_rounds)
-                        updated = True
-                    if (not isinstance(existing_summary, dict) or not existing_summary) and isinstance(new_summary, dict) and new_summary:
-                        summary_json = json.dumps(new_summary)
-                        updated = True
-                    if (not _has_round_payload(existing_round_data)) and _has_round_payload(new_round_data):
-                        round_data_json = json.dumps(new_round_data)
+                    payload_updates: Dict[str, Any] = {}
+                    round_data_source = str(existing["round_data_source"] or "").strip() or None
+
+                    if isinstance(new_players, list) and new_players:
+                        existing_players = _existing("players", [])
+                        if not isinstance(existing_players, list) or not existing_players:
+                            payload_updates["players"] = new_players
+                    if _has_round_list(new_rounds) and not _has_round_list(_existing("rounds", [])):
+                        payload_updates["rounds"] = new_rounds
+                    if isinstance(new_summary, dict) and new_summary:
+                        existing_summary = _existing("summary", {})
+                        if not isinstance(existing_summary, dict) or not existing_summary:
+                            payload_updates["summary"] = new_summary
+                    if _has_round_payload(new_round_data) and not _has_round_payload(_existing("round_data", {})):
+                        payload_updates["round_data"] = new_round_data
                         round_data_source = "ow-ingest"
+                    if payload_updates:
                         updated = True
 
                     map_name = existing["map_name"]
@@ -3168,8 +4128,7 @@ class Database:
                             """
                             UPDATE scraped_match_cards
                             SET map_name = ?, mode = ?, score_team_a = ?, score_team_b = ?,
-                                duration = ?, match_date = ?, players_json = ?, rounds_json = ?,
-                                summary_json = ?, round_data_json = ?, round_data_source = ?, mode_key = ?
+                                duration = ?, match_date = ?, round_data_source = ?, mode_key = ?
                             WHERE id = ?
                             """,
                             (
@@ -3179,24 +4138,23 @@ class Database:
                                 score_team_b,
                                 duration,
                                 match_date,
-                                players_json,
-                                rounds_json,
-                                summary_json,
-                                round_data_json,
                                 round_data_source,
                                 mode_key,
                                 existing["id"],
                             ),
                         )
+                        card_payloads.store(cursor, existing["id"], payload_updates)
+                        written_match_ids.add(match_id)
                     continue
             cursor.execute("""
                 INSERT INTO scraped_match_cards (
-                    username, match_id, map_name, mode, mode_key, score_team_a, score_team_b,
-                    duration, match_date, players_json, rounds_json, summary_json, round_data_json, round_data_source
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    username, username_key, match_id, map_name, mode, mode_key, score_team_a, score_team_b,
+                    duration, match_date, round_data_source
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 username,
-                item.get("match_id"),
+                self._username_key(username),
+                match_id or item.get("match_id"),
                 item.get("map"),
                 self._canonicalize_match_type(item.get("mode")),
                 self._canonicalize_queue_key(item.get("mode")),
@@ -3204,16 +4162,37 @@ class Database:
                 item.get("score_team_b"),
                 item.get("duration"),
                 item.get("date"),
-                json.dumps(item.get("players", [])),
-                json.dumps(item.get("rounds", [])),
-                json.dumps(item.get("match_summary", {})),
-                json.dumps(item.get("round_data", {})),
                 "ow-ingest" if _has_round_payload(item.get("round_data", {})) else None,
             ))
+            card_payloads.store(
+                cursor,
+                cursor.lastrowid,
+                {
+                    "players": item.get("players", []),
+                    "rounds": item.get("rounds", []),
+                    "summary": item.get("match_summary", {}),
+                    "round_data": item.get("round_data", {}),
+                },
+                clear_legacy=False,
+            )
+            if match_id:
+                written_match_ids.add(match_id)
 
+        self.refresh_match_latest_cards(sorted(written_match_ids), commit=False)
+        self._bump_revisions(
+            ("scraped_match_cards", "match_latest_card"),
+            usernames=[username],
+            match_ids=sorted(written_match_ids),
+        )
         self.conn.commit()
         # Automatically normalize any new/legacy cards that still need unpacking.
         self.unpack_pending_scraped_match_cards(username=username)
+        self.repair_scraped_card_players(username, match_ids=written_match_ids)
+        # A newer card can change a match's map/timestamp; fold that into the aggregates.
+        try:
+            self.refresh_aggregates_for_matches(sorted(written_match_ids))
+        except Exception as agg_err:
+            print(f"[DB] Warning: failed to refresh aggregates after card save: {agg_err}")
 
     @staticmethod
     def _normalize_team_label(raw_team: Any) -> str:
@@ -3255,93 +4234,179 @@ class Database:
             )
         return out
 
-    def get_scraped_match_cards(self, username: str, limit: int = 50) -> List[Dict]:
-        """Fetch persisted scraped match cards for one username."""
-        # Keep normalized tables current whenever stored cards are accessed.
-        self.unpack_pending_scraped_match_cards(username=username)
+    # Payload fields of a scraped card as returned by get_scraped_match_cards -> payload kind.
+    SCRAPED_CARD_PAYLOAD_FIELDS: Dict[str, str] = {
+        "players": "players",
+        "rounds": "rounds",
+        "match_summary": "summary",
+        "round_data": "round_data",
+    }
+
+    def get_scraped_match_cards(
+        self,
+        username: str,
+        limit: int = 50,
+        *,
+        before_id: Optional[int] = None,
+        fields: Optional[Iterable[str]] = None,
+        match_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Fetch persisted scraped match cards for one username, newest first. Read-only.
+
+        Pages by keyset: pass the last card's `card_id` as `before_id` for the next page.
+        `fields` limits which payloads (see SCRAPED_CARD_PAYLOAD_FIELDS) are loaded and
+        decoded; None loads all of them. Cards always carry the owner's rounds won/lost and
+        RP delta from match_detail_players. `round_data_missing` is exact when `rounds` and
+        `round_data` are loaded and otherwise reflects whether either payload is stored.
+        """
+        if fields is None:
+            wanted = list(self.SCRAPED_CARD_PAYLOAD_FIELDS)
+        else:
+            wanted = [f for f in self.SCRAPED_CARD_PAYLOAD_FIELDS if f in set(fields)]
+            unknown = set(fields) - set(self.SCRAPED_CARD_PAYLOAD_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown scraped card fields: {sorted(unknown)}")
+        kinds = tuple(self.SCRAPED_CARD_PAYLOAD_FIELDS[f] for f in wanted)
+        exact_rounds = "rounds" in wanted and "round_data" in wanted
+
         owner_player_id = self.get_player_id(username)
+        query = f"""
+            SELECT smc.id, smc.username, smc.match_id, smc.map_name, smc.mode, smc.score_team_a,
+                   smc.score_team_b, smc.duration, smc.match_date, smc.round_data_source, smc.scraped_at,
+                   mdp.rounds_won AS owner_rounds_won, mdp.rounds_lost AS owner_rounds_lost,
+                   mdp.rank_points_delta AS rank_points_delta,
+                   ({card_payloads.present_sql("rounds", "smc")} OR {card_payloads.present_sql("round_data", "smc")})
+                       AS has_round_payload
+            FROM scraped_match_cards smc
+            LEFT JOIN match_detail_players mdp
+              ON mdp.id = (
+                    SELECT d.id FROM match_detail_players d
+                    WHERE d.player_id = ? AND d.match_id = smc.match_id AND d.username_key = ?
+                    LIMIT 1
+                 )
+            WHERE smc.username = ?
+        """
+        params: List[Any] = [owner_player_id, self._username_key(username), username]
+        if before_id is not None:
+            query += " AND smc.id < ?"
+            params.append(int(before_id))
+        if match_id:
+            query += " AND smc.match_id = ?"
+            params.append(str(match_id).strip())
+        query += " ORDER BY smc.id DESC LIMIT ?"
+        params.append(limit)
+
         cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT *
-            FROM scraped_match_cards
-            WHERE username = ?
-            ORDER BY id DESC
-            LIMIT ?
-            """,
-            (username, limit),
-        )
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        payloads = card_payloads.load(self.conn, [row["id"] for row in rows], kinds) if kinds else {}
 
+        defaults = {"players": [], "rounds": [], "match_summary": {}, "round_data": {}}
         out = []
-        repaired_players_json = False
-        for row in cursor.fetchall():
+        for row in rows:
             item = dict(row)
-            try:
-                players = json.loads(item.get("players_json") or "[]")
-            except json.JSONDecodeError:
-                players = []
-            if not isinstance(players, list):
-                players = []
-            try:
-                rounds = json.loads(item.get("rounds_json") or "[]")
-            except json.JSONDecodeError:
-                rounds = []
-            try:
-                summary = json.loads(item.get("summary_json") or "{}")
-            except json.JSONDecodeError:
-                summary = {}
-            try:
-                round_data = json.loads(item.get("round_data_json") or "{}")
-            except json.JSONDecodeError:
-                round_data = {}
-            has_round_list = isinstance(rounds, list) and len(rounds) > 0
-            has_round_payload = self._round_payload_has_rounds(round_data)
+            stored = payloads.get(item["id"], {})
+            card = {
+                "card_id": item["id"],
+                "username": item.get("username"),
+                "match_id": item.get("match_id") or "",
+                "map": item.get("map_name") or "",
+                "mode": item.get("mode") or "",
+                "score_team_a": item.get("score_team_a") or 0,
+                "score_team_b": item.get("score_team_b") or 0,
+                "duration": item.get("duration") or "",
+                "date": item.get("match_date") or "",
+                "owner_rounds_won": item.get("owner_rounds_won"),
+                "owner_rounds_lost": item.get("owner_rounds_lost"),
+                "rank_points_delta": item.get("rank_points_delta"),
+            }
+            for field in wanted:
+                kind = self.SCRAPED_CARD_PAYLOAD_FIELDS[field]
+                default = defaults[field]
+                value = stored[kind].json(default) if kind in stored else default
+                card[field] = value if isinstance(value, type(default)) else default
+            if exact_rounds:
+                has_rounds = len(card["rounds"]) > 0 or self._round_payload_has_rounds(card["round_data"])
+            else:
+                has_rounds = bool(item.get("has_round_payload"))
+            card["round_data_source"] = item.get("round_data_source")
+            card["round_data_missing"] = not has_rounds
+            card["scraped_at"] = item.get("scraped_at")
+            out.append(card)
+        return out
 
-            # Repair stale scraped players payloads from normalized rows so UI insights stay current.
-            has_named_players = any(
-                isinstance(p, dict) and str(p.get("username") or p.get("name") or "").strip()
-                for p in players
-            )
-            has_team_labels = any(
-                isinstance(p, dict) and str(p.get("team") or "").strip().upper() in {"A", "B"}
-                for p in players
-            )
-            needs_player_rebuild = (not has_named_players) or (has_named_players and not has_team_labels)
-            if needs_player_rebuild and owner_player_id and item.get("match_id"):
-                detail_rows = self.get_match_detail_players(owner_player_id, str(item.get("match_id")))
+    def repair_scraped_card_players(
+        self,
+        username: Optional[str] = None,
+        *,
+        card_ids: Optional[Iterable[int]] = None,
+        match_ids: Optional[Iterable[str]] = None,
+    ) -> int:
+        """
+        Rebuild stale players payloads (no named players, or no A/B team labels) from the
+        normalized match_detail_players rows. Returns the number of cards rewritten.
+
+        Runs on the write side: after unpacking, after saving cards and in the unpack job.
+        """
+        query = "SELECT id, username, match_id FROM scraped_match_cards WHERE match_id IS NOT NULL AND TRIM(match_id) != ''"
+        params: List[Any] = []
+        if username:
+            query += " AND username = ?"
+            params.append(username)
+        id_list = sorted({int(cid) for cid in card_ids}) if card_ids is not None else None
+        match_list = sorted({str(mid) for mid in match_ids}) if match_ids is not None else None
+        if id_list is not None:
+            if not id_list:
+                return 0
+            query += f" AND id IN ({','.join('?' * len(id_list))})"
+            params.extend(id_list)
+        if match_list is not None:
+            if not match_list:
+                return 0
+            query += f" AND match_id IN ({','.join('?' * len(match_list))})"
+            params.extend(match_list)
+
+        cursor = self.conn.cursor()
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        owner_ids: Dict[str, Optional[int]] = {}
+        repaired_usernames: set[str] = set()
+        repaired = 0
+        for start in range(0, len(rows), 500):
+            batch = rows[start : start + 500]
+            payloads = card_payloads.load(self.conn, [row["id"] for row in batch], ("players",))
+            for row in batch:
+                stored = payloads.get(row["id"], {})
+                players = stored["players"].json([]) if "players" in stored else []
+                if not isinstance(players, list):
+                    players = []
+                has_named_players = any(
+                    isinstance(p, dict) and str(p.get("username") or p.get("name") or "").strip()
+                    for p in players
+                )
+                has_team_labels = any(
+                    isinstance(p, dict) and str(p.get("team") or "").strip().upper() in {"A", "B"}
+                    for p in players
+                )
+                if has_named_players and has_team_labels:
+                    continue
+                owner = str(row["username"] or "").strip()
+                if owner not in owner_ids:
+                    owner_ids[owner] = self.get_player_id(owner)
+                if not owner_ids[owner]:
+                    continue
+                detail_rows = self.get_match_detail_players(owner_ids[owner], str(row["match_id"]))
                 rebuilt_players = self._build_players_from_detail_rows(detail_rows)
                 if rebuilt_players:
-                    players = rebuilt_players
-                    cursor.execute(
-                        "UPDATE scraped_match_cards SET players_json = ? WHERE id = ?",
-                        (json.dumps(players), item.get("id")),
-                    )
-                    repaired_players_json = True
-
-            out.append(
-                {
-                    "username": item.get("username"),
-                    "match_id": item.get("match_id") or "",
-                    "map": item.get("map_name") or "",
-                    "mode": item.get("mode") or "",
-                    "score_team_a": item.get("score_team_a") or 0,
-                    "score_team_b": item.get("score_team_b") or 0,
-                    "duration": item.get("duration") or "",
-                    "date": item.get("match_date") or "",
-                    "players": players,
-                    "rounds": rounds,
-                    "match_summary": summary,
-                    "round_data": round_data,
-                    "round_data_source": item.get("round_data_source"),
-                    "round_data_missing": not (has_round_list or has_round_payload),
-                    "scraped_at": item.get("scraped_at"),
-                }
-            )
+                    card_payloads.store(cursor, row["id"], {"players": rebuilt_players})
+                    repaired_usernames.add(owner)
+                    repaired += 1
 
-        if repaired_players_json:
+        if repaired:
+            self._bump_revisions(("scraped_match_cards",), usernames=sorted(repaired_usernames))
             self.conn.commit()
-
-        return out
+        return repaired
 
     def delete_bad_scraped_matches(self, username: str) -> Dict[str, int]:
         """
@@ -3361,25 +4426,21 @@ class Database:
         cursor = self.conn.cursor()
         cursor.execute(
             """
-            SELECT id, match_id, rounds_json, round_data_json
+            SELECT id, match_id
             FROM scraped_match_cards
             WHERE username = ?
             """,
             (owner_username,),
         )
         rows = cursor.fetchall()
+        payloads = card_payloads.load(self.conn, [row["id"] for row in rows], ("rounds", "round_data"))
 
         bad_card_ids: List[int] = []
         bad_match_ids: List[str] = []
         for row in rows:
-            try:
-                rounds = json.loads(row["rounds_json"] or "[]")
-            except Exception:
-                rounds = []
-            try:
-                round_data = json.loads(row["round_data_json"] or "{}")
-            except Exception:
-                round_data = {}
+            stored = payloads.get(row["id"], {})
+            rounds = stored["rounds"].json([]) if "rounds" in stored else []
+            round_data = stored["round_data"].json({}) if "round_data" in stored else {}
             has_round_list = isinstance(rounds, list) and len(rounds) > 0
             has_round_payload = self._round_payload_has_rounds(round_data)
             if has_round_list or has_round_payload:
@@ -3405,6 +4466,13 @@ class Database:
         deleted_round_rows = 0
         deleted_player_round_rows = 0
 
+        # Resolve affected players while their rows still exist; commits with the deletes.
+        self._bump_revisions(
+            ("scraped_match_cards", "match_latest_card", "match_detail_players", "round_outcomes", "player_rounds"),
+            usernames=[owner_username],
+            match_ids=unique_match_ids,
+        )
+
         if owner_player_id and unique_match_ids:
             placeholders = ",".join(["?"] * len(unique_match_ids))
             params = [owner_player_id, *unique_match_ids]
@@ -3423,6 +4491,10 @@ class Database:
                 tuple(params),
             )
             deleted_player_round_rows = cursor.rowcount if cursor.rowcount >= 0 else 0
+            cursor.execute(
+                f"DELETE FROM round_operator_sets WHERE player_id = ? AND match_id IN ({placeholders})",
+                tuple(params),
+            )
 
         placeholders = ",".join(["?"] * len(bad_card_ids))
         cursor.execute(
@@ -3430,7 +4502,12 @@ class Database:
             tuple(bad_card_ids),
         )
         deleted_cards = cursor.rowcount if cursor.rowcount >= 0 else len(bad_card_ids)
+        self.refresh_match_latest_cards(unique_match_ids, commit=False)
         self.conn.commit()
+        try:
+            self.refresh_aggregates_for_matches(unique_match_ids)
+        except Exception as agg_err:
+            print(f"[DB] Warning: failed to refresh aggregates after delete: {agg_err}")
 
         return {
             "deleted_cards": int(deleted_cards),
@@ -3459,16 +4536,15 @@ class Database:
         """Return match IDs with summary data and either ow-ingest or summary-derived round data."""
         cursor = self.conn.cursor()
         cursor.execute(
-            """
+            f"""
             SELECT DISTINCT match_id
             FROM scraped_match_cards
             WHERE username = ?
               AND match_id IS NOT NULL
               AND TRIM(match_id) != ''
-              AND summary_json IS NOT NULL
-              AND TRIM(summary_json) NOT IN ('', '{}', 'null')
+              AND {card_payloads.present_sql("summary")}
               AND (
-                    (round_data_json IS NOT NULL AND TRIM(round_data_json) NOT IN ('', '{}', 'null'))
+                    {card_payloads.present_sql("round_data")}
                     OR LOWER(TRIM(COALESCE(round_data_source, ''))) = 'summary'
                   )
             """,
@@ -3488,16 +4564,15 @@ class Database:
         allowed = {str(m or "").strip().lower() for m in (allowed_mode_keys or set()) if str(m or "").strip()}
         cursor = self.conn.cursor()
         cursor.execute(
-            """
+            f"""
             SELECT DISTINCT match_id, mode
             FROM scraped_match_cards
             WHERE username = ?
               AND match_id IS NOT NULL
               AND TRIM(match_id) != ''
-              AND summary_json IS NOT NULL
-              AND TRIM(summary_json) NOT IN ('', '{}', 'null')
+              AND {card_payloads.present_sql("summary")}
               AND (
-                    (round_data_json IS NOT NULL AND TRIM(round_data_json) NOT IN ('', '{}', 'null'))
+                    {card_payloads.present_sql("round_data")}
                     OR LOWER(TRIM(COALESCE(round_data_source, ''))) = 'summary'
                   )
             """,
@@ -3559,6 +4634,221 @@ class Database:
         )
         self.conn.commit()
 
+    def create_sync_run(self, usernames: List[str]) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "INSERT INTO sync_runs (status, usernames_json) VALUES ('running', ?)",
+            (json.dumps([str(u) for u in usernames]),),
+        )
+        self.conn.commit()
+        return int(cursor.lastrowid)
+
+    def get_open_sync_run(self) -> Optional[Dict[str, Any]]:
+        """Return the newest sync run that never finished, if any."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT run_id, status, usernames_json, created_at, updated_at
+            FROM sync_runs
+            WHERE status = 'running'
+            ORDER BY run_id DESC
+            LIMIT 1
+            """
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        out = dict(row)
+        out["usernames"] = json.loads(out.pop("usernames_json") or "[]")
+        return out
+
+    def finish_sync_run(self, run_id: int, status: str = "completed") -> None:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            UPDATE sync_runs
+            SET status = ?, updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+            WHERE run_id = ?
+            """,
+            (status, run_id),
+        )
+        self.conn.commit()
+
+    def add_sync_job(
+        self,
+        run_id: int,
+        job_key: str,
+        kind: str,
+        username: Optional[str] = None,
+        match_id: Optional[str] = None,
+        owners: Optional[List[str]] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Insert a job, or merge `owners` into the existing one.
+
+        Returns True when the job was newly created.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT owners_json FROM sync_jobs WHERE run_id = ? AND job_key = ?",
+            (run_id, job_key),
+        )
+        existing = cursor.fetchone()
+        if existing is None:
+            cursor.execute(
+                """
+                INSERT INTO sync_jobs (run_id, job_key, kind, username, match_id, owners_json, meta_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    run_id,
+                    job_key,
+                    kind,
+                    username,
+                    match_id,
+                    json.dumps(sorted(set(owners or []))),
+                    json.dumps(meta) if meta is not None else None,
+                ),
+            )
+            self.conn.commit()
+            return True
+        if owners:
+            merged = sorted(set(json.loads(existing["owners_json"] or "[]")) | set(owners))
+            cursor.execute(
+                "UPDATE sync_jobs SET owners_json = ?, updated_at = CURRENT_TIMESTAMP WHERE run_id = ? AND job_key = ?",
+                (json.dumps(merged), run_id, job_key),
+            )
+            self.conn.commit()
+        return False
+
+    def update_sync_job(
+        self,
+        run_id: int,
+        job_key: str,
+        status: str,
+        result: Any = None,
+        error: Optional[str] = None,
+        count_attempt: bool = False,
+    ) -> None:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            UPDATE sync_jobs
+            SET status = ?,
+                result_json = COALESCE(?, result_json),
+                error = ?,
+                attempts = attempts + ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE run_id = ? AND job_key = ?
+            """,
+            (
+                status,
+                json.dumps(result) if result is not None else None,
+                error,
+                1 if count_attempt else 0,
+                run_id,
+                job_key,
+            ),
+        )
+        cursor.execute("UPDATE sync_runs SET updated_at = CURRENT_TIMESTAMP WHERE run_id = ?", (run_id,))
+        self.conn.commit()
+
+    def get_sync_jobs(self, run_id: int, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        cursor = self.conn.cursor()
+        query = "SELECT * FROM sync_jobs WHERE run_id = ?"
+        params: List[Any] = [run_id]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        cursor.execute(query + " ORDER BY rowid", tuple(params))
+        out = []
+        for row in cursor.fetchall():
+            item = dict(row)
+            item["owners"] = json.loads(item.pop("owners_json") or "[]")
+            item["meta"] = json.loads(item.pop("meta_json") or "null")
+            item["result"] = json.loads(item.pop("result_json") or "null")
+            out.append(item)
+        return out
+
+    JOB_COLUMNS = frozenset(
+        {"status", "progress_done", "progress_total", "message", "result", "error", "started_at", "finished_at"}
+    )
+
+    def create_job(self, kind: str, subject: Optional[str], params: Dict[str, Any], created_at: float) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "INSERT INTO jobs (kind, subject, params_json, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (kind, subject, json.dumps(params or {}), created_at),
+        )
+        self.conn.commit()
+        return int(cursor.lastrowid)
+
+    def update_job(self, job_id: int, **fields: Any) -> None:
+        unknown = set(fields) - self.JOB_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        if not fields:
+            return
+        if "result" in fields:
+            fields["result_json"] = json.dumps(fields.pop("result"))
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        cursor = self.conn.cursor()
+        cursor.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+        self.conn.commit()
+
+    @staticmethod
+    def _job_row(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item["params"] = json.loads(item.pop("params_json") or "{}")
+        item["result"] = json.loads(item.pop("result_json") or "null")
+        return item
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        row = cursor.fetchone()
+        return self._job_row(row) if row else None
+
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Newest jobs first, optionally filtered by status and kind."""
+        query = "SELECT * FROM jobs WHERE 1 = 1"
+        params: List[Any] = []
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY job_id DESC LIMIT ?"
+        params.append(max(1, int(limit)))
+        cursor = self.conn.cursor()
+        cursor.execute(query, tuple(params))
+        return [self._job_row(row) for row in cursor.fetchall()]
+
+    def recover_jobs(self, finished_at: float) -> List[Dict[str, Any]]:
+        """
+        After a restart: fail jobs that were running when the process died and
+        return the still-queued ones, oldest first, so they can be re-enqueued.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            UPDATE jobs
+            SET status = 'failed', error = 'interrupted by restart', finished_at = ?
+            WHERE status = 'running'
+            """,
+            (finished_at,),
+        )
+        self.conn.commit()
+        cursor.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY job_id")
+        return [self._job_row(row) for row in cursor.fetchall()]
+
     def save_map_stats(self, player_id: int, maps: List[Dict], snapshot_id: int = None, season: str = 'Y10S4') -> None:
         """Persist scraped map stats for a player and season."""
         cursor = self.conn.cursor()
@@ -3744,23 +5034,27 @@ class Database:
                 out['team_b'].append(row)
         return out
 
-    def save_match_detail_players(
+    MATCH_DETAIL_PLAYERS_INSERT_SQL = """
+        INSERT INTO match_detail_players (
+            player_id, match_id, match_type, match_type_key, player_id_tracker, username, username_key, team_id, result,
+            kills, deaths, assists, headshots, first_bloods, first_deaths,
+            clutches_won, clutches_lost, clutches_1v1, clutches_1v2, clutches_1v3,
+            clutches_1v4, clutches_1v5, kills_1k, kills_2k, kills_3k, kills_4k,
+            kills_5k, rounds_won, rounds_lost, rank_points, rank_points_delta,
+            rank_points_previous, kd_ratio, hs_pct, esr, kills_per_round,
+            time_played_ms, elo, elo_delta
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _match_detail_player_rows(
         self,
         player_id: int,
         match_id: str,
         players: List[Dict],
-        match_type: Optional[str] = None,
-        commit: bool = True,
-    ) -> None:
-        """Persist parsed API player overviews for one match."""
-        match_type = self._canonicalize_match_type(match_type)
-        match_type_key = self._canonicalize_queue_key(match_type)
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "DELETE FROM match_detail_players WHERE player_id = ? AND match_id = ?",
-            (player_id, match_id),
-        )
-        rows = [
+        match_type: Optional[str],
+        match_type_key: Optional[str],
+    ) -> List[tuple]:
+        return [
             (
                 player_id,
                 match_id,
@@ -3768,6 +5062,7 @@ class Database:
                 match_type_key,
                 p.get("player_id_tracker"),
                 p.get("username"),
+                self._username_key(p.get("username")),
                 p.get("team_id"),
                 p.get("result"),
                 p.get("kills"),
@@ -3803,21 +5098,32 @@ class Database:
             )
             for p in players
         ]
+
+    def save_match_detail_players(
+        self,
+        player_id: int,
+        match_id: str,
+        players: List[Dict],
+        match_type: Optional[str] = None,
+        commit: bool = True,
+    ) -> None:
+        """Persist parsed API player overviews for one match."""
+        match_type = self._canonicalize_match_type(match_type)
+        match_type_key = self._canonicalize_queue_key(match_type)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "DELETE FROM match_detail_players WHERE player_id = ? AND match_id = ?",
+            (player_id, match_id),
+        )
+        rows = self._match_detail_player_rows(player_id, match_id, players, match_type, match_type_key)
         if rows:
-            cursor.executemany(
-                """
-                INSERT INTO match_detail_players (
-                    player_id, match_id, match_type, match_type_key, player_id_tracker, username, team_id, result,
-                    kills, deaths, assists, headshots, first_bloods, first_deaths,
-                    clutches_won, clutches_lost, clutches_1v1, clutches_1v2, clutches_1v3,
-                    clutches_1v4, clutches_1v5, kills_1k, kills_2k, kills_3k, kills_4k,
-                    kills_5k, rounds_won, rounds_lost, rank_points, rank_points_delta,
-                    rank_points_previous, kd_ratio, hs_pct, esr, kills_per_round,
-                    time_played_ms, elo, elo_delta
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                rows,
-            )
+            cursor.executemany(self.MATCH_DETAIL_PLAYERS_INSERT_SQL, rows)
+        self._mark_encounter_matches_stale(cursor, [match_id])
+        self._bump_revisions(
+            ("match_detail_players",),
+            player_ids=[player_id],
+            player_keys={row[6] for row in rows},
+        )
         if commit:
             self.conn.commit()
 
@@ -3836,6 +5142,673 @@ class Database:
             )
         return [dict(row) for row in cursor.fetchall()]
 
+    ENCOUNTER_RELATIONS = ("with", "against")
+
+    @staticmethod
+    def _mark_encounter_matches_stale(cursor: sqlite3.Cursor, match_ids: Optional[List[str]] = None) -> None:
+        """Flag folded matches whose lobby or card changed so the next graph refresh refolds them."""
+        if match_ids is None:
+            cursor.execute("UPDATE encounter_graph_matches SET stale = 1")
+            return
+        ids = sorted({str(mid) for mid in match_ids if mid})
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            cursor.execute(
+                f"UPDATE encounter_graph_matches SET stale = 1 WHERE match_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+
+    def refresh_encounter_graph(self, full: bool = False, batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Fold matches from match_detail_players into the encounter graph tables.
+
+        Incremental: a no-op while the match_detail_players revision is unchanged and
+        no folded match is stale, then only matches not folded yet (found through the
+        row-id watermark) are added. Stale matches are refolded: players missing from
+        their folded roster are counted and the card's match_ts is applied. A folded
+        match that has since disappeared or lost a player, or `full`, triggers a rebuild.
+        """
+        started = time.perf_counter()
+        cursor = self.conn.cursor()
+
+        def load_rosters(match_ids: List[str]) -> Dict[str, Dict[str, sqlite3.Row]]:
+            cursor.execute(
+                f"""
+                SELECT d.match_id, d.username, d.username_key, d.team_id, d.match_type_key,
+                       d.kills, d.deaths, d.result, d.rank_points, COALESCE(l.match_ts, 0) AS match_ts
+                FROM match_detail_players d
+                LEFT JOIN match_latest_card l ON l.match_id = d.match_id
+                WHERE d.match_id IN ({','.join('?' * len(match_ids))})
+                ORDER BY d.match_id, d.id
+                """,
+                match_ids,
+            )
+            rosters: Dict[str, Dict[str, sqlite3.Row]] = defaultdict(dict)
+            for row in cursor.fetchall():
+                key = row["username_key"] or self._username_key(row["username"])
+                if key:
+                    # Each owner stores the whole lobby; the first row per player wins.
+                    rosters[row["match_id"]].setdefault(key, row)
+            return rosters
+
+        def fold(
+            match_ids: List[str],
+            rosters: Dict[str, Dict[str, sqlite3.Row]],
+            folded: Dict[str, Dict[str, Any]],
+        ) -> int:
+            # Players (and pairs) already in a match's folded roster only move timestamps.
+            edges: Dict[tuple, List[int]] = {}
+            nodes: Dict[str, List[Any]] = {}
+            for match_id, roster in rosters.items():
+                seen = folded.get(match_id, {})
+                players = list(roster.items())
+                for key, row in players:
+                    ts = int(row["match_ts"] or 0)
+                    new = 0 if key in seen else 1
+                    result = str(row["result"] or "").strip().lower()
+                    node = nodes.setdefault(key, [row["username"], 0, 0, 0, 0, 0, None, -1])
+                    node[1] += new
+                    node[2] += new * int(row["kills"] or 0)
+                    node[3] += new * int(row["deaths"] or 0)
+                    node[4] += new if result in ("win", "victory") else 0
+                    node[5] += new if result in ("loss", "defeat") else 0
+                    if ts >= node[7]:
+                        node[0] = row["username"] or node[0]
+                        node[6] = row["rank_points"] if row["rank_points"] is not None else node[6]
+                        node[7] = ts
+                for i, (key, row) in enumerate(players):
+                    for other_key, other in players[i + 1 :]:
+                        if row["team_id"] is None or other["team_id"] is None:
+                            continue
+                        relation = "with" if row["team_id"] == other["team_id"] else "against"
+                        queue = row["match_type_key"] or other["match_type_key"] or "other"
+                        ts = int(row["match_ts"] or 0)
+                        new = 0 if key in seen and other_key in seen else 1
+                        for a, b in ((key, other_key), (other_key, key)):
+                            edge = edges.setdefault((a, b, queue, relation), [0, 0])
+                            edge[0] += new
+                            edge[1] = max(edge[1], ts)
+
+            cursor.executemany(
+                """
+                INSERT INTO encounter_edges (username_key, other_key, queue, relation, matches, last_ts)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(username_key, other_key, queue, relation) DO UPDATE SET
+                    matches = matches + excluded.matches,
+                    last_ts = MAX(last_ts, excluded.last_ts)
+                """,
+                [(*k, v[0], v[1]) for k, v in edges.items()],
+            )
+            cursor.executemany(
+                """
+                INSERT INTO encounter_nodes
+                    (username_key, username, matches, kills, deaths, wins, losses, rank_points, last_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(username_key) DO UPDATE SET
+                    matches = matches + excluded.matches,
+                    kills = kills + excluded.kills,
+                    deaths = deaths + excluded.deaths,
+                    wins = wins + excluded.wins,
+                    losses = losses + excluded.losses,
+                    username = CASE WHEN excluded.last_ts >= last_ts THEN excluded.username ELSE username END,
+                    rank_points = CASE WHEN excluded.last_ts >= last_ts AND excluded.rank_points IS NOT NULL
+                                       THEN excluded.rank_points ELSE rank_points END,
+                    last_ts = MAX(last_ts, excluded.last_ts)
+                """,
+                [(k, *v[:7], max(0, v[7])) for k, v in nodes.items()],
+            )
+            cursor.executemany(
+                "INSERT OR REPLACE INTO encounter_graph_matches (match_id, players, stale) VALUES (?, ?, 0)",
+                [
+                    (mid, json.dumps({k: row["team_id"] for k, row in rosters.get(mid, {}).items()}))
+                    for mid in match_ids
+                ],
+            )
+            return len(edges)
+
+        try:
+            rev = self.get_db_revision("table:match_detail_players")
+            cursor.execute("SELECT key, value FROM encounter_graph_state")
+            state = {row["key"]: int(row["value"]) for row in cursor.fetchall()}
+            stats: Dict[str, Any] = {
+                "matches": 0,
+                "refolded": 0,
+                "edges": 0,
+                "rebuilt": False,
+                "elapsed_seconds": 0.0,
+            }
+            cursor.execute("SELECT match_id, players FROM encounter_graph_matches WHERE stale = 1")
+            stale = {row["match_id"]: row["players"] for row in cursor.fetchall()}
+            if not full and state.get("rev") == rev and not stale:
+                return stats
+            if not full and state:
+                cursor.execute(
+                    """
+                    SELECT 1 FROM encounter_graph_matches g
+                    WHERE NOT EXISTS (SELECT 1 FROM match_detail_players d WHERE d.match_id = g.match_id)
+                    LIMIT 1
+                    """
+                )
+                full = cursor.fetchone() is not None
+
+            stale_ids = sorted(stale)
+            stale_rosters: Dict[str, Dict[str, sqlite3.Row]] = {}
+            folded: Dict[str, Dict[str, Any]] = {}
+            if not full:
+                for start in range(0, len(stale_ids), max(1, int(batch_size))):
+                    stale_rosters.update(load_rosters(stale_ids[start : start + batch_size]))
+            for match_id in stale_ids:
+                if full:
+                    break
+                # Folded before rosters were recorded, its contribution is unknown; a
+                # player who left or switched teams cannot be subtracted either.
+                previous = json.loads(stale[match_id]) if stale[match_id] is not None else None
+                roster = stale_rosters.get(match_id, {})
+                full = previous is None or any(
+                    key not in roster or roster[key]["team_id"] != team for key, team in previous.items()
+                )
+                folded[match_id] = previous
+
+            watermark = 0 if full else state.get("watermark", 0)
+            if full:
+                for table in ("encounter_edges", "encounter_nodes", "encounter_graph_matches"):
+                    cursor.execute(f"DELETE FROM {table}")
+                stats["rebuilt"] = True
+            elif stale_ids:
+                stats["edges"] += fold(stale_ids, stale_rosters, folded)
+                stats["refolded"] = len(stale_ids)
+
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM match_detail_players")
+            max_id = int(cursor.fetchone()["max_id"])
+            cursor.execute(
+                """
+                SELECT DISTINCT d.match_id
+                FROM match_detail_players d
+                WHERE d.id > ? AND d.id <= ?
+                  AND NOT EXISTS (SELECT 1 FROM encounter_graph_matches g WHERE g.match_id = d.match_id)
+                """,
+                (watermark, max_id),
+            )
+            match_ids = [row["match_id"] for row in cursor.fetchall() if row["match_id"]]
+
+            for start in range(0, len(match_ids), max(1, int(batch_size))):
+                chunk = match_ids[start : start + batch_size]
+                stats["edges"] += fold(chunk, load_rosters(chunk), {})
+                stats["matches"] += len(chunk)
+
+            cursor.executemany(
+                "INSERT OR REPLACE INTO encounter_graph_state (key, value) VALUES (?, ?)",
+                [("rev", rev), ("watermark", max_id)],
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise RuntimeError(f"Failed to refresh encounter graph: {e}")
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    def get_encounter_covered_keys(self) -> set[str]:
+        """username_keys whose own match history is synced, so their encounters are local."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT p.username_key
+            FROM players p
+            WHERE p.username_key IS NOT NULL
+              AND EXISTS (SELECT 1 FROM match_detail_players d WHERE d.player_id = p.player_id)
+            """
+        )
+        return {row["username_key"] for row in cursor.fetchall()}
+
+    def get_encounter_neighbors(
+        self,
+        username: str,
+        min_matches: int = 1,
+        limit: int = 50,
+        queue: Optional[str] = None,
+        relation: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Players `username` shared a lobby with, most shared matches first, each with
+        totals split by relation and queue. Reads the graph as of the last refresh.
+        """
+        key = self._username_key(username)
+        if not key:
+            return []
+        filters = ""
+        params: List[Any] = [key]
+        if queue:
+            filters += " AND e.queue = ?"
+            params.append(self._canonicalize_queue_key(queue))
+        if relation:
+            if relation not in self.ENCOUNTER_RELATIONS:
+                raise ValueError(f"Unknown encounter relation: {relation}")
+            filters += " AND e.relation = ?"
+            params.append(relation)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT e.other_key, n.username, SUM(e.matches) AS matches, MAX(e.last_ts) AS last_ts
+            FROM encounter_edges e
+            JOIN encounter_nodes n ON n.username_key = e.other_key
+            WHERE e.username_key = ?{filters}
+            GROUP BY e.other_key
+            HAVING SUM(e.matches) >= ?
+            ORDER BY matches DESC, e.other_key
+            LIMIT ?
+            """,
+            (*params, max(1, int(min_matches)), max(1, int(limit))),
+        )
+        out = [
+            {
+                "username_key": row["other_key"],
+                "username": row["username"],
+                "matches": int(row["matches"]),
+                "with": 0,
+                "against": 0,
+                "queues": {},
+                "last_ts": int(row["last_ts"] or 0),
+            }
+            for row in cursor.fetchall()
+        ]
+        by_key = {item["username_key"]: item for item in out}
+        keys = list(by_key)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            cursor.execute(
+                f"""
+                SELECT e.other_key, e.queue, e.relation, e.matches
+                FROM encounter_edges e
+                WHERE e.username_key = ? AND e.other_key IN ({','.join('?' * len(chunk))}){filters}
+                """,
+                (key, *chunk, *params[1:]),
+            )
+            for row in cursor.fetchall():
+                item = by_key[row["other_key"]]
+                item[row["relation"]] += int(row["matches"])
+                item["queues"][row["queue"]] = item["queues"].get(row["queue"], 0) + int(row["matches"])
+        return out
+
+    def get_encounter_nodes(self, usernames: List[str]) -> Dict[str, Dict[str, Any]]:
+        """username_key -> totals (name, matches, K/D, win %, latest RP) for graph node labels."""
+        keys = sorted({k for k in (self._username_key(u) for u in usernames) if k})
+        out: Dict[str, Dict[str, Any]] = {}
+        cursor = self.conn.cursor()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            cursor.execute(
+                f"SELECT * FROM encounter_nodes WHERE username_key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                decided = int(row["wins"]) + int(row["losses"])
+                out[row["username_key"]] = {
+                    "username": row["username"],
+                    "matches": int(row["matches"]),
+                    "rank_points": int(row["rank_points"] or 0),
+                    "kd": round(int(row["kills"]) / max(1, int(row["deaths"])), 2),
+                    "win_pct": round(100.0 * int(row["wins"]) / decided, 1) if decided else 0.0,
+                    "last_ts": int(row["last_ts"] or 0),
+                }
+        return out
+
+    NETWORK_SCAN_NODE_STATUSES = ("pending", "done", "failed")
+    NETWORK_SCAN_RETENTION_S = 7 * 24 * 3600
+
+    def open_network_scan_run(
+        self,
+        root: str,
+        max_depth: int,
+        options: Dict[str, Any],
+        resume_within_s: float,
+        now: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Resume the newest unfinished scan of `root` with the same depth and options
+        touched within `resume_within_s`, or start a new one. Returns the run id,
+        whether it resumed, and its frontier counts by status.
+
+        Runs and cached profiles older than NETWORK_SCAN_RETENTION_S are pruned here.
+        """
+        now = time.time() if now is None else float(now)
+        root_key = self._username_key(root)
+        if not root_key:
+            raise ValueError("Network scan needs a username")
+        options_json = json.dumps(options or {}, sort_keys=True)
+        try:
+            cursor = self.conn.cursor()
+            expired = now - self.NETWORK_SCAN_RETENTION_S
+            cursor.execute(
+                "DELETE FROM network_scan_frontier WHERE run_id IN "
+                "(SELECT run_id FROM network_scan_runs WHERE updated_at < ?)",
+                (expired,),
+            )
+            cursor.execute("DELETE FROM network_scan_runs WHERE updated_at < ?", (expired,))
+            cursor.execute("DELETE FROM network_profile_cache WHERE fetched_at < ?", (expired,))
+
+            row = None
+            if resume_within_s > 0:
+                cursor.execute(
+                    """
+                    SELECT run_id FROM network_scan_runs
+                    WHERE root_key = ? AND status = 'running' AND max_depth = ?
+                      AND options_json = ? AND updated_at >= ?
+                    ORDER BY run_id DESC LIMIT 1
+                    """,
+                    (root_key, int(max_depth), options_json, now - resume_within_s),
+                )
+                row = cursor.fetchone()
+            if row:
+                run_id = int(row["run_id"])
+                cursor.execute("UPDATE network_scan_runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            else:
+                cursor.execute(
+                    """
+                    INSERT INTO network_scan_runs (root_key, root, max_depth, options_json, status, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, 'running', ?, ?)
+                    """,
+                    (root_key, root, int(max_depth), options_json, now, now),
+                )
+                run_id = int(cursor.lastrowid)
+            cursor.execute(
+                "SELECT status, COUNT(*) AS n FROM network_scan_frontier WHERE run_id = ? GROUP BY status",
+                (run_id,),
+            )
+            frontier = {status: 0 for status in self.NETWORK_SCAN_NODE_STATUSES}
+            frontier.update({r["status"]: int(r["n"]) for r in cursor.fetchall()})
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise RuntimeError(f"Failed to open network scan run: {e}")
+        return {"run_id": run_id, "resumed": row is not None, "frontier": frontier}
+
+    def finish_network_scan_run(self, run_id: int, status: str = "done", now: Optional[float] = None) -> None:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "UPDATE network_scan_runs SET status = ?, updated_at = ? WHERE run_id = ?",
+            (status, time.time() if now is None else float(now), int(run_id)),
+        )
+        self.conn.commit()
+
+    def queue_network_scan_nodes(self, run_id: int, nodes: Iterable[Tuple[str, int]]) -> None:
+        """Add (username, depth) to a run's frontier as pending, keeping the shallowest depth seen."""
+        rows = [(int(run_id), self._username_key(name), name, int(depth)) for name, depth in nodes]
+        rows = [row for row in rows if row[1]]
+        if not rows:
+            return
+        try:
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO network_scan_frontier (run_id, username_key, username, depth, status)
+                VALUES (?, ?, ?, ?, 'pending')
+                ON CONFLICT(run_id, username_key) DO UPDATE SET depth = MIN(depth, excluded.depth)
+                """,
+                rows,
+            )
+            cursor.execute("UPDATE network_scan_runs SET updated_at = ? WHERE run_id = ?", (time.time(), int(run_id)))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise RuntimeError(f"Failed to queue network scan nodes: {e}")
+
+    def mark_network_scan_nodes(self, run_id: int, usernames: Iterable[str], status: str) -> None:
+        if status not in self.NETWORK_SCAN_NODE_STATUSES:
+            raise ValueError(f"Unknown network scan node status: {status}")
+        keys = [(status, int(run_id), key) for key in {self._username_key(u) for u in usernames} if key]
+        if not keys:
+            return
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            "UPDATE network_scan_frontier SET status = ? WHERE run_id = ? AND username_key = ?",
+            keys,
+        )
+        self.conn.commit()
+
+    def get_network_scan_frontier(self, run_id: int, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A run's frontier in BFS order (depth, then name)."""
+        query = "SELECT username_key, username, depth, status FROM network_scan_frontier WHERE run_id = ?"
+        params: List[Any] = [int(run_id)]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        cursor = self.conn.cursor()
+        cursor.execute(query + " ORDER BY depth, username_key", tuple(params))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def save_network_profile(
+        self,
+        username: str,
+        encounters: List[Dict[str, Any]],
+        stats: Optional[Dict[str, Any]] = None,
+        status: str = "ok",
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        """
+        Cache one scraped Encounters page. Overview `stats` are only scraped for scan
+        roots, so a later scrape without them keeps the ones already cached.
+        """
+        key = self._username_key(username)
+        if not key:
+            return
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO network_profile_cache (username_key, username, status, stats_json, encounters_json, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(username_key) DO UPDATE SET
+                    username = excluded.username,
+                    status = excluded.status,
+                    stats_json = COALESCE(excluded.stats_json, network_profile_cache.stats_json),
+                    encounters_json = excluded.encounters_json,
+                    fetched_at = excluded.fetched_at
+                """,
+                (
+                    key,
+                    username,
+                    status,
+                    json.dumps(stats) if stats is not None else None,
+                    json.dumps(encounters or []),
+                    time.time() if fetched_at is None else float(fetched_at),
+                ),
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to cache network profile {username}: {e}")
+
+    def get_network_profiles(
+        self,
+        usernames: Iterable[str],
+        max_age_s: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """username_key -> cached profile, skipping ones older than `max_age_s` when given."""
+        keys = sorted({k for k in (self._username_key(u) for u in usernames) if k})
+        min_fetched = -1.0
+        if max_age_s is not None:
+            min_fetched = (time.time() if now is None else float(now)) - float(max_age_s)
+        out: Dict[str, Dict[str, Any]] = {}
+        cursor = self.conn.cursor()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            cursor.execute(
+                f"""
+                SELECT * FROM network_profile_cache
+                WHERE username_key IN ({','.join('?' * len(chunk))}) AND fetched_at >= ?
+                """,
+                (*chunk, min_fetched),
+            )
+            for row in cursor.fetchall():
+                out[row["username_key"]] = {
+                    "username": row["username"],
+                    "status": row["status"],
+                    "stats": json.loads(row["stats_json"]) if row["stats_json"] else None,
+                    "encounters": json.loads(row["encounters_json"] or "[]"),
+                    "fetched_at": float(row["fetched_at"]),
+                }
+        return out
+
+    def save_match_detail_payload(self, match_id: str, payload: Dict[str, Any]) -> None:
+        """Store the raw match-detail API payload, zlib-compressed, keyed by match_id."""
+        match_id = str(match_id or "").strip()
+        if not match_id:
+            return
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        packed = zlib.compress(raw, 6)
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                INSERT OR REPLACE INTO match_detail_payloads
+                    (match_id, encoding, payload, raw_bytes, stored_bytes, fetched_at)
+                VALUES (?, 'zlib-json', ?, ?, ?, CURRENT_TIMESTAMP)
+                """,
+                (match_id, sqlite3.Binary(packed), len(raw), len(packed)),
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to store match payload {match_id}: {e}")
+
+    def get_match_detail_payload(self, match_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored raw payload for a match, or None if it was never fetched."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT encoding, payload FROM match_detail_payloads WHERE match_id = ?",
+            (str(match_id or "").strip(),),
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        data = bytes(row["payload"])
+        if row["encoding"] == "zlib-json":
+            data = zlib.decompress(data)
+        return json.loads(data.decode("utf-8"))
+
+    def get_match_detail_payload_ids(self) -> set[str]:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT match_id FROM match_detail_payloads")
+        return {row["match_id"] for row in cursor.fetchall()}
+
+    def get_match_detail_payload_stats(self) -> Dict[str, int]:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS payloads,
+                   COALESCE(SUM(raw_bytes), 0) AS raw_bytes,
+                   COALESCE(SUM(stored_bytes), 0) AS stored_bytes
+            FROM match_detail_payloads
+            """
+        )
+        return dict(cursor.fetchone())
+
+    def get_scraped_card_payload_stats(self) -> Dict[str, int]:
+        """Compressed card payload totals, plus what is still stored inline in legacy columns."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS payloads,
+                   COALESCE(SUM(raw_bytes), 0) AS raw_bytes,
+                   COALESCE(SUM(stored_bytes), 0) AS stored_bytes
+            FROM scraped_card_payloads
+            """
+        )
+        stats = dict(cursor.fetchone())
+        columns = [card_payloads.LEGACY_COLUMNS[k] for k in card_payloads.PAYLOAD_KINDS]
+        cursor.execute(
+            f"""
+            SELECT COUNT(*) AS legacy_cards,
+                   COALESCE(SUM({" + ".join(f"COALESCE(LENGTH(CAST({c} AS BLOB)), 0)" for c in columns)}), 0) AS legacy_bytes
+            FROM scraped_match_cards
+            WHERE {" OR ".join(f"{c} IS NOT NULL" for c in columns)}
+            """
+        )
+        stats.update(dict(cursor.fetchone()))
+        return stats
+
+    def migrate_scraped_card_payloads(
+        self,
+        *,
+        batch_size: int = 500,
+        codec: str = card_payloads.DEFAULT_CODEC,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Move legacy inline card JSON (players_json, rounds_json, summary_json,
+        round_data_json) into compressed scraped_card_payloads rows.
+
+        Cards are walked by id in batches of `batch_size`, one transaction per
+        batch, so an interrupted run resumes where it stopped. Parseable text is
+        re-serialized as compact JSON before compression; anything else is kept
+        verbatim. Returns byte totals before and after; the file itself only
+        shrinks after a VACUUM.
+        """
+        columns = [card_payloads.LEGACY_COLUMNS[k] for k in card_payloads.PAYLOAD_KINDS]
+        stats: Dict[str, Any] = {
+            "cards": 0,
+            "payloads": 0,
+            "emptied": 0,
+            "legacy_bytes": 0,
+            "raw_bytes": 0,
+            "stored_bytes": 0,
+            "elapsed_seconds": 0.0,
+        }
+        started = time.perf_counter()
+        last_id = 0
+        cursor = self.conn.cursor()
+        try:
+            while True:
+                cursor.execute(
+                    f"""
+                    SELECT id, {", ".join(columns)}
+                    FROM scraped_match_cards
+                    WHERE id > ? AND ({" OR ".join(f"{c} IS NOT NULL" for c in columns)})
+                    ORDER BY id
+                    LIMIT ?
+                    """,
+                    (last_id, max(1, int(batch_size))),
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                with self.conn:
+                    for row in rows:
+                        values: Dict[str, Any] = {}
+                        for kind, column in zip(card_payloads.PAYLOAD_KINDS, columns):
+                            text = row[column]
+                            if text is None:
+                                continue
+                            stats["legacy_bytes"] += len(text.encode("utf-8"))
+                            try:
+                                values[kind] = json.loads(text)
+                            except ValueError:
+                                values[kind] = text
+                            if card_payloads.is_empty(card_payloads.dumps(values[kind])):
+                                stats["emptied"] += 1
+                            else:
+                                stats["payloads"] += 1
+                        written = card_payloads.store(cursor, row["id"], values, codec)
+                        stats["raw_bytes"] += written["raw_bytes"]
+                        stats["stored_bytes"] += written["stored_bytes"]
+                        stats["cards"] += 1
+                last_id = int(rows[-1]["id"])
+                stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+                if progress is not None:
+                    progress(dict(stats))
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to migrate scraped card payloads: {e}")
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    def get_match_detail_owner_ids(self, match_id: str) -> List[int]:
+        """Tracked players that already have this match saved under their player_id."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT DISTINCT player_id FROM match_detail_players WHERE match_id = ? ORDER BY player_id",
+            (match_id,),
+        )
+        return [int(row["player_id"]) for row in cursor.fetchall()]
+
     def get_existing_match_detail_ids(self, player_id: int) -> set[str]:
         """Return match IDs already stored in match_detail_players for a player."""
         cursor = self.conn.cursor()
@@ -3845,6 +5818,32 @@ class Database:
         )
         return {row["match_id"] for row in cursor.fetchall() if row["match_id"]}
 
+    ROUND_OUTCOMES_INSERT_SQL = """
+        INSERT INTO round_outcomes (player_id, match_id, match_type, match_type_key, round_id, end_reason, winner_side)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    @staticmethod
+    def _round_outcome_rows(
+        player_id: int,
+        match_id: str,
+        rounds: List[Dict],
+        match_type: Optional[str],
+        match_type_key: Optional[str],
+    ) -> List[tuple]:
+        return [
+            (
+                player_id,
+                match_id,
+                match_type,
+                match_type_key,
+                r.get("round_id"),
+                r.get("end_reason"),
+                r.get("winner_side"),
+            )
+            for r in rounds
+        ]
+
     def save_round_outcomes(
         self,
         player_id: int,
@@ -3861,26 +5860,10 @@ class Database:
             "DELETE FROM round_outcomes WHERE player_id = ? AND match_id = ?",
             (player_id, match_id),
         )
-        rows = [
-            (
-                player_id,
-                match_id,
-                match_type,
-                match_type_key,
-                r.get("round_id"),
-                r.get("end_reason"),
-                r.get("winner_side"),
-            )
-            for r in rounds
-        ]
+        rows = self._round_outcome_rows(player_id, match_id, rounds, match_type, match_type_key)
         if rows:
-            cursor.executemany(
-                """
-                INSERT INTO round_outcomes (player_id, match_id, match_type, match_type_key, round_id, end_reason, winner_side)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                rows,
-            )
+            cursor.executemany(self.ROUND_OUTCOMES_INSERT_SQL, rows)
+        self._bump_revisions(("round_outcomes",), player_ids=[player_id])
         if commit:
             self.conn.commit()
 
@@ -3899,28 +5882,28 @@ class Database:
             )
         return [dict(row) for row in cursor.fetchall()]
 
-    def save_player_rounds(
+    PLAYER_ROUNDS_INSERT_SQL = """
+        INSERT INTO player_rounds (
+            player_id, match_id, match_type, match_type_key, round_id, player_id_tracker, username, username_key, team_id, side,
+            operator_raw, operator_key, operator, killed_by_player_id, killed_by_operator, result, is_disconnected, kills, deaths, assists, headshots,
+            first_blood, first_death, clutch_won, clutch_lost, hs_pct, esr
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _player_round_rows(
         self,
         player_id: int,
         match_id: str,
         player_rounds: List[Dict],
-        match_type: Optional[str] = None,
+        match_type: Optional[str],
+        match_type_key: Optional[str],
         usernames_by_tracker_id: Optional[Dict[str, str]] = None,
-        commit: bool = True,
-    ) -> None:
-        """Persist parsed API player-round rows for one match."""
-        match_type = self._canonicalize_match_type(match_type)
-        match_type_key = self._canonicalize_queue_key(match_type)
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "DELETE FROM player_rounds WHERE player_id = ? AND match_id = ?",
-            (player_id, match_id),
-        )
+    ) -> List[tuple]:
         usernames_by_tracker_id = usernames_by_tracker_id or {}
-
         rows = []
         for pr in player_rounds:
             tracker_id = pr.get("player_id_tracker")
+            round_username = usernames_by_tracker_id.get(tracker_id)
             rows.append(
                 (
                     player_id,
@@ -3929,7 +5912,8 @@ class Database:
                     match_type_key,
                     pr.get("round_id"),
                     tracker_id,
-                    usernames_by_tracker_id.get(tracker_id),
+                    round_username,
+                    self._username_key(round_username),
                     pr.get("team_id"),
                     pr.get("side"),
                     pr.get("operator"),
@@ -3951,17 +5935,32 @@ class Database:
                     pr.get("esr"),
                 )
             )
+        return rows
+
+    def save_player_rounds(
+        self,
+        player_id: int,
+        match_id: str,
+        player_rounds: List[Dict],
+        match_type: Optional[str] = None,
+        usernames_by_tracker_id: Optional[Dict[str, str]] = None,
+        commit: bool = True,
+    ) -> None:
+        """Persist parsed API player-round rows for one match."""
+        match_type = self._canonicalize_match_type(match_type)
+        match_type_key = self._canonicalize_queue_key(match_type)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "DELETE FROM player_rounds WHERE player_id = ? AND match_id = ?",
+            (player_id, match_id),
+        )
+        rows = self._player_round_rows(
+            player_id, match_id, player_rounds, match_type, match_type_key, usernames_by_tracker_id
+        )
         if rows:
-            cursor.executemany(
-                """
-                INSERT INTO player_rounds (
-                    player_id, match_id, match_type, match_type_key, round_id, player_id_tracker, username, team_id, side,
-                    operator_raw, operator_key, operator, killed_by_player_id, killed_by_operator, result, is_disconnected, kills, deaths, assists, headshots,
-                    first_blood, first_death, clutch_won, clutch_lost, hs_pct, esr
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                rows,
-            )
+            cursor.executemany(self.PLAYER_ROUNDS_INSERT_SQL, rows)
+        self.refresh_round_operator_sets([(player_id, match_id)], commit=False)
+        self._bump_revisions(("player_rounds",), player_ids=[player_id])
         if commit:
             self.conn.commit()
 
@@ -4053,7 +6052,86 @@ class Database:
         cursor.execute("SELECT 1 FROM match_history WHERE player_id = ? LIMIT 1", (player_id,))
         return cursor.fetchone() is not None
 
+    @classmethod
+    def open_writer(cls, db_path: str = 'data/jakal.db') -> "Database":
+        """
+        Open a read-write Database on an existing, already-migrated file.
+
+        Skips schema setup, so extra connections (the web writer thread, job
+        workers) do not each re-run migrations and contend for the write lock at
+        startup. The connection stays bound to the thread that opens it.
+        """
+        writer = cls.__new__(cls)
+        writer.db_path = cls._resolve_db_path(db_path)
+        if not os.path.exists(writer.db_path):
+            raise RuntimeError(f"Database '{writer.db_path}' does not exist; open it with Database() first")
+        try:
+            writer.conn = sqlite3.connect(writer.db_path, timeout=30.0, factory=cls.CONNECTION_FACTORY)
+            writer.conn.row_factory = sqlite3.Row
+            writer.conn.execute("PRAGMA busy_timeout = 30000")
+            writer.conn.execute("PRAGMA foreign_keys = ON")
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to open database '{writer.db_path}': {e}")
+        return writer
+
+    @classmethod
+    def open_reader(cls, db_path: str = 'data/jakal.db') -> "Database":
+        """
+        Open a read-only Database on an existing, already-migrated file.
+
+        Skips schema setup; with WAL enabled by the writer, readers never block it.
+        Any write attempted through this instance raises sqlite3.OperationalError.
+        """
+        reader = cls.__new__(cls)
+        reader.db_path = cls._resolve_db_path(db_path)
+        try:
+            uri = f"{Path(reader.db_path).as_uri()}?mode=ro"
+            reader.conn = sqlite3.connect(
+                uri, uri=True, timeout=30.0, check_same_thread=False, factory=cls.CONNECTION_FACTORY
+            )
+            reader.conn.row_factory = sqlite3.Row
+            reader.conn.execute("PRAGMA busy_timeout = 30000")
+            reader.conn.execute("PRAGMA query_only = ON")
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to open read-only database '{reader.db_path}': {e}")
+        return reader
+
     def close(self):
         """Close database connection."""
         if self.conn:
             self.conn.close()
+
+
+def _parse_scraped_card_summary(item: tuple) -> Dict[str, Any]:
+    """
+    Parse one scraped card into normalized row payloads.
+
+    Module-level and DB-free so unpack_pending_scraped_match_cards can run it in a
+    process pool. `item` is (match_id, summary, round_data, round_data_source); the
+    payloads are JSON text or still-compressed `CardPayload`s.
+    """
+    match_id, summary_raw, round_data_raw, existing_source = item
+    try:
+        summary_payload = json.loads(card_payloads.payload_text(summary_raw))
+        try:
+            round_data_payload = json.loads(card_payloads.payload_text(round_data_raw) or "{}")
+        except Exception:
+            round_data_payload = {}
+        parsed_summary_round_payload = Database._parse_rounds_from_summary(summary_payload)
+        round_data_source = None
+        round_data_json = None
+        if Database._round_payload_has_rounds(parsed_summary_round_payload):
+            round_data_source = "summary"
+            round_data_json = card_payloads.dumps(parsed_summary_round_payload)
+        elif Database._round_payload_has_rounds(round_data_payload):
+            round_data_source = "ow-ingest"
+        else:
+            existing_source = str(existing_source or "").strip()
+            if existing_source:
+                round_data_source = existing_source
+        unpacked = Database._unpack_summary_segments(match_id, summary_payload)
+    except Exception as e:
+        return {"error": str(e)}
+    unpacked["round_data_source"] = round_data_source
+    unpacked["round_data_json"] = round_data_json
+    return unpacked
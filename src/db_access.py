@@ -0,0 +1,184 @@
+"""
+Non-blocking database access for the async web app.
+
+SQLite calls are synchronous, so running them on the event loop stalls every other
+request and websocket stream. `DatabaseAccess` moves them onto threads:
+
+- a pool of read-only WAL connections, one per reader thread, for queries;
+- one writer thread owning the only read-write connection, so writes are
+  serialized in submission order without fighting over SQLite's write lock.
+
+Code running on a pool thread finds its connection through `current()`, so
+module helpers that take a cursor from "the" database keep working unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from src.database import Database
+
+# Database methods that only read.
+READ_METHOD_PREFIXES = ("get_", "count_", "compute_", "debug_", "player_has_", "player_exists", "snapshot_count")
+WRITE_METHODS = frozenset({"get_or_create_player_id"})
+
+
+class DatabaseAccess:
+    def __init__(self, db_path: str, readers: int = 4):
+        self.db_path = Database._resolve_db_path(db_path)
+        self.readers = max(1, int(readers))
+        self._local = threading.local()
+        self._opened: list[Database] = []
+        self._opened_lock = threading.Lock()
+        self._read_pool = ThreadPoolExecutor(
+            max_workers=self.readers,
+            thread_name_prefix="jakal-db-read",
+            initializer=self._open_thread_db,
+            initargs=(True,),
+        )
+        self._write_pool = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="jakal-db-write",
+            initializer=self._open_thread_db,
+            initargs=(False,),
+        )
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "read": {"calls": 0, "errors": 0, "pending": 0, "busy_seconds": 0.0},
+            "write": {"calls": 0, "errors": 0, "pending": 0, "busy_seconds": 0.0},
+        }
+        self.database = AsyncDatabase(self)
+
+    def _open_thread_db(self, read_only: bool) -> None:
+        # Schema/migrations were applied by the app's primary Database; pool threads skip them.
+        thread_db = Database.open_reader(self.db_path) if read_only else Database.open_writer(self.db_path)
+        self._local.db = thread_db
+        with self._opened_lock:
+            self._opened.append(thread_db)
+
+    def _close_thread_db(self) -> None:
+        thread_db = self.current()
+        if thread_db is None:
+            return
+        thread_db.close()
+        self._local.db = None
+        with self._opened_lock:
+            self._opened = [opened for opened in self._opened if opened is not thread_db]
+
+    def _write_pool_started(self) -> bool:
+        return bool(getattr(self._write_pool, "_threads", None))
+
+    def current(self) -> Database | None:
+        """The connection bound to the calling pool thread, or None off-pool."""
+        return getattr(self._local, "db", None)
+
+    def _invoke(self, kind: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self._stats[kind]["errors"] += 1
+            raise
+        finally:
+            with self._stats_lock:
+                stats = self._stats[kind]
+                stats["calls"] += 1
+                stats["pending"] -= 1
+                stats["busy_seconds"] += time.perf_counter() - t0
+
+    async def _submit(self, kind: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        pool = self._read_pool if kind == "read" else self._write_pool
+        with self._stats_lock:
+            self._stats[kind]["pending"] += 1
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (e.g. the request src.perf attributes SQL to) onto the pool thread.
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(pool, functools.partial(ctx.run, self._invoke, kind, fn, args, kwargs))
+
+    async def run_read(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run fn on a reader thread; inside it, `current()` is a read-only Database."""
+        return await self._submit("read", fn, args, kwargs)
+
+    async def run_write(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Queue fn on the single writer thread; inside it, `current()` is the read-write Database."""
+        return await self._submit("write", fn, args, kwargs)
+
+    def reads(self, fn: Callable) -> Callable:
+        """Decorate a synchronous route handler so it runs on the reader pool."""
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await self.run_read(fn, *args, **kwargs)
+
+        return wrapper
+
+    def writes(self, fn: Callable) -> Callable:
+        """Decorate a synchronous route handler so it runs on the writer thread."""
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await self.run_write(fn, *args, **kwargs)
+
+        return wrapper
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            out = {kind: dict(values) for kind, values in self._stats.items()}
+        out["readers"] = self.readers
+        for values in (out["read"], out["write"]):
+            values["busy_seconds"] = round(values["busy_seconds"], 3)
+        return out
+
+    def close(self) -> None:
+        # The writer connection is thread-bound, so close it on its own thread.
+        if self._write_pool_started():
+            self._write_pool.submit(self._close_thread_db).result()
+        self._read_pool.shutdown(wait=True)
+        self._write_pool.shutdown(wait=True)
+        with self._opened_lock:
+            for thread_db in self._opened:
+                try:
+                    thread_db.close()
+                except sqlite3.Error:
+                    pass
+            self._opened.clear()
+
+
+def is_read_method(name: str) -> bool:
+    return name not in WRITE_METHODS and name.startswith(READ_METHOD_PREFIXES)
+
+
+class AsyncDatabase:
+    """
+    Awaitable facade over `Database`: `await adb.get_player("x")` runs on a reader,
+    `await adb.save_scraped_match_cards(...)` is queued on the writer.
+    """
+
+    def __init__(self, access: DatabaseAccess):
+        self._access = access
+
+    def __getattr__(self, name: str) -> Callable:
+        if name.startswith("_") or not callable(getattr(Database, name, None)):
+            raise AttributeError(name)
+        read = is_read_method(name)
+        access = self._access
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            thread_db = access.current()
+            return getattr(thread_db, name)(*args, **kwargs)
+
+        async def method(*args: Any, **kwargs: Any) -> Any:
+            if read:
+                return await access.run_read(call, *args, **kwargs)
+            return await access.run_write(call, *args, **kwargs)
+
+        method.__name__ = name
+        return method
@@ -27,13 +27,16 @@ Run as a script:
 from __future__ import annotations
 
 import argparse
-import json
 import logging
 import sqlite3
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Optional
+
+from src import card_payloads
+from src.database import Database
 
 logger = logging.getLogger(__name__)
 
@@ -123,26 +126,56 @@ class DatabaseStandardizer:
 
         logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO)
 
-    def run(self) -> AuditReport:
-        logger.info("Starting database standardization...")
-
-        self._gather_baseline_counts()
-        self._repair_match_types()
-        self._repair_null_usernames()
-        self._repair_summary_kills()
-        self._repair_owingest_all_player_stats()
-        self._repair_killed_by_operator()
-        self._flag_data_quality_issues()
+    def run(self, progress: Optional[Callable[[int, int, str], None]] = None) -> AuditReport:
+        """
+        Run every repair step in one transaction.
 
-        if not self.dry_run:
-            self.conn.commit()
-            logger.info("Changes committed.")
-        else:
-            logger.info("DRY RUN - no changes written.")
+        `progress(done, total, step)` is called before each step; an exception raised
+        from it rolls the whole run back.
+        """
+        logger.info("Starting database standardization...")
 
-        self.conn.close()
+        steps = (
+            self._gather_baseline_counts,
+            self._repair_match_types,
+            self._repair_null_usernames,
+            self._repair_summary_kills,
+            self._repair_owingest_all_player_stats,
+            self._repair_killed_by_operator,
+            self._sync_username_keys,
+            self._flag_data_quality_issues,
+        )
+        try:
+            for done, step in enumerate(steps):
+                if progress is not None:
+                    progress(done, len(steps), step.__name__.lstrip("_"))
+                step()
+
+            if not self.dry_run:
+                self._bump_db_revisions()
+                self.conn.commit()
+                logger.info("Changes committed.")
+            else:
+                logger.info("DRY RUN - no changes written.")
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.close()
         return self.report
 
+    def _bump_db_revisions(self) -> None:
+        """Repairs rewrite rows for every player, so invalidate all revision-keyed caches."""
+        try:
+            Database.bump_db_revisions(
+                self.conn.cursor(),
+                ("scraped_match_cards", "match_detail_players", "player_rounds", "match_latest_card"),
+                all_players=True,
+            )
+        except sqlite3.OperationalError as e:
+            # Database never opened by the app yet; there is no cache to invalidate.
+            logger.debug("Skipping db_revision bump: %s", e)
+
     def _gather_baseline_counts(self) -> None:
         cur = self.conn.cursor()
         cur.execute("SELECT COUNT(*) FROM scraped_match_cards")
@@ -173,6 +206,15 @@ class DatabaseStandardizer:
                             f"UPDATE {table} SET {col} = ? WHERE {col} = ?",
                             (canonical, val),
                         )
+                        if table == "scraped_match_cards":
+                            # Keep the materialized latest-card row in step with the card.
+                            try:
+                                cur.execute(
+                                    "UPDATE match_latest_card SET mode = ? WHERE mode = ?",
+                                    (canonical, val),
+                                )
+                            except sqlite3.OperationalError:
+                                pass
                         self.report.bad_match_types_fixed += 1
 
     def _repair_null_usernames(self) -> None:
@@ -225,18 +267,18 @@ class DatabaseStandardizer:
         logger.info("R1: Reconstructing kills/deaths from summary killfeed...")
         cur = self.conn.cursor()
         cur.execute(
-            "SELECT match_id, round_data_json FROM scraped_match_cards "
-            "WHERE round_data_source = 'summary' AND round_data_json IS NOT NULL "
-            "AND TRIM(round_data_json) NOT IN ('', '{}', 'null')"
+            "SELECT id, match_id FROM scraped_match_cards "
+            f"WHERE round_data_source = 'summary' AND {card_payloads.present_sql('round_data')}"
         )
         rows = cur.fetchall()
         logger.info("  Processing %s summary matches...", len(rows))
+        payloads = card_payloads.load(self.conn, [row["id"] for row in rows], ("round_data",))
 
         for row in rows:
             match_id = row["match_id"]
-            try:
-                payload = json.loads(row["round_data_json"])
-            except (json.JSONDecodeError, TypeError):
+            stored = payloads.get(row["id"], {}).get("round_data")
+            payload = stored.json() if stored is not None else None
+            if not isinstance(payload, dict):
                 logger.warning("  Bad JSON for match %s, skipping", match_id)
                 continue
 
@@ -289,18 +331,18 @@ class DatabaseStandardizer:
         logger.info("R2: Backfilling ow-ingest all-player round stats...")
         cur = self.conn.cursor()
         cur.execute(
-            "SELECT match_id, round_data_json FROM scraped_match_cards "
-            "WHERE round_data_source = 'ow-ingest' AND round_data_json IS NOT NULL "
-            "AND TRIM(round_data_json) NOT IN ('', '{}', 'null')"
+            "SELECT id, match_id FROM scraped_match_cards "
+            f"WHERE round_data_source = 'ow-ingest' AND {card_payloads.present_sql('round_data')}"
         )
         rows = cur.fetchall()
         logger.info("  Processing %s ow-ingest matches...", len(rows))
+        payloads = card_payloads.load(self.conn, [row["id"] for row in rows], ("round_data",))
 
         for row in rows:
             match_id = row["match_id"]
-            try:
-                payload = json.loads(row["round_data_json"])
-            except (json.JSONDecodeError, TypeError):
+            stored = payloads.get(row["id"], {}).get("round_data")
+            payload = stored.json() if stored is not None else None
+            if not isinstance(payload, dict):
                 continue
 
             players = payload.get("players", [])
@@ -385,15 +427,15 @@ class DatabaseStandardizer:
 
         for match_id, rows in by_match.items():
             cur.execute(
-                "SELECT round_data_json, round_data_source FROM scraped_match_cards WHERE match_id = ?",
+                "SELECT id, round_data_source FROM scraped_match_cards WHERE match_id = ?",
                 (match_id,),
             )
             card = cur.fetchone()
-            if not card or not card["round_data_json"]:
+            if not card:
                 continue
-            try:
-                payload = json.loads(card["round_data_json"])
-            except (json.JSONDecodeError, TypeError):
+            stored = card_payloads.load(self.conn, [card["id"]], ("round_data",)).get(card["id"], {}).get("round_data")
+            payload = stored.json() if stored is not None else None
+            if not isinstance(payload, dict):
                 continue
 
             source = card["round_data_source"]
@@ -453,6 +495,22 @@ class DatabaseStandardizer:
                         )
                     self.report.killed_by_op_fixed += 1
 
+    def _sync_username_keys(self) -> None:
+        """Re-derive username_key for rows whose username was repaired above."""
+        if self.dry_run:
+            return
+        cur = self.conn.cursor()
+        for table in ("player_rounds", "match_detail_players"):
+            try:
+                cur.execute(
+                    f"UPDATE {table} SET username_key = LOWER(TRIM(username)) "
+                    "WHERE username IS NOT NULL "
+                    "AND (username_key IS NULL OR username_key != LOWER(TRIM(username)))"
+                )
+            except sqlite3.OperationalError:
+                # Older databases without the column are migrated by Database on open.
+                continue
+
     def _flag_data_quality_issues(self) -> None:
         logger.info("R5: Flagging data quality issues...")
         cur = self.conn.cursor()
@@ -6,5 +6,6 @@ from .scraper.listing import fetch_match_list_page
 from .scraper.merge import merge_v1_v2
 from .scraper.parse_v1 import parse_v1_ingest
 from .scraper.parse_v2 import parse_v2_match
-from .runner import ScrapeRunner
-from .session import BrowserSession
+from .scraper.pool import PagePool
+from .scraper.runner import ScrapeRunner
+from .scraper.session import BrowserSession
@@ -23,4 +23,11 @@ class ScrapeConfig:
     poison_cooldown_days: int = 7
     max_session_restarts: int = 3
     restart_backoff_s: float = 5.0
+    tabs: int = 1
+    max_match_rate_per_s: float = 1.0
+    tab_max_consecutive_errors: int = 3
+    tab_max_restarts: int = 5
+    capture_mode: str = "block"
+    write_batch_size: int = 25
+    write_batch_max_age_s: float = 5.0
     user_agent: Optional[str] = None
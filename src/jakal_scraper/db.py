@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import sqlite3
-from dataclasses import dataclass
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import datetime as _dt
 import json
 
@@ -14,6 +16,9 @@ def utc_now_iso() -> str:
 class SQLiteStore:
     path: Path
     conn: sqlite3.Connection
+    commits: int = 0
+    _tx_depth: int = 0
+    _batch: Optional[Dict[str, Any]] = field(default=None, repr=False)
 
     @classmethod
     def open(cls, path: Path) -> "SQLiteStore":
@@ -24,8 +29,112 @@ class SQLiteStore:
         return cls(path=path, conn=conn)
 
     def close(self) -> None:
+        self.flush()
         self.conn.close()
 
+    # -----------------------
+    # Unit of work
+    # -----------------------
+    def _commit(self) -> None:
+        """Commit a write unless a transaction or write-behind batch owns it."""
+        if self._tx_depth:
+            return
+        if self._batch is not None:
+            self._unit_done()
+            return
+        self.conn.commit()
+        self.commits += 1
+
+    @contextmanager
+    def transaction(self) -> Iterator["SQLiteStore"]:
+        """
+        All writes inside commit together or not at all.
+
+        The outermost scope is a BEGIN/COMMIT of its own; nested scopes (and scopes
+        inside a write-behind batch) are savepoints, so a failing match rolls back
+        only its own writes. Inside a batch the unit commits with the batch.
+        """
+        depth = self._tx_depth
+        savepoint = f"store_tx_{depth}" if depth or self._batch is not None else None
+        if not self.conn.in_transaction:
+            # A SAVEPOINT opened outside a transaction would commit on RELEASE.
+            self.conn.execute("BEGIN")
+        if savepoint is not None:
+            self.conn.execute(f"SAVEPOINT {savepoint}")
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._tx_depth -= 1
+            if savepoint is not None:
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+            else:
+                self.conn.rollback()
+            raise
+        self._tx_depth -= 1
+        if savepoint is not None:
+            self.conn.execute(f"RELEASE {savepoint}")
+            if depth == 0:
+                self._unit_done()
+        else:
+            self.conn.commit()
+            self.commits += 1
+
+    def begin_write_behind(self, max_units: int = 25, max_age_s: float = 5.0) -> None:
+        """
+        Buffer completed units (transactions or bare upserts) into one commit.
+
+        The batch commits once `max_units` units are pending or the oldest is
+        `max_age_s` old, on `flush()`, and on `end_write_behind()` / `close()`. A
+        crash loses at most the pending units, each of which carries its own
+        scrape_match_status change, so the status table never runs ahead of the data.
+        """
+        if self._batch is None:
+            self._batch = {"max_units": max(1, int(max_units)), "max_age_s": float(max_age_s), "units": 0, "since": None}
+
+    def end_write_behind(self) -> None:
+        self.flush()
+        self._batch = None
+
+    @contextmanager
+    def write_behind(self, max_units: int = 25, max_age_s: float = 5.0) -> Iterator["SQLiteStore"]:
+        if self._batch is not None:
+            yield self
+            return
+        self.begin_write_behind(max_units, max_age_s)
+        try:
+            yield self
+        finally:
+            self.end_write_behind()
+
+    def _unit_done(self) -> None:
+        batch = self._batch
+        if batch is None:
+            return
+        batch["units"] += 1
+        if batch["since"] is None:
+            batch["since"] = time.monotonic()
+        self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        batch = self._batch
+        if batch is None or not batch["units"]:
+            return
+        if batch["units"] >= batch["max_units"] or time.monotonic() - batch["since"] >= batch["max_age_s"]:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit pending write-behind units (no-op inside a transaction)."""
+        if self._tx_depth:
+            return
+        if self.conn.in_transaction:
+            self.conn.commit()
+            self.commits += 1
+        if self._batch is not None:
+            self._batch["units"] = 0
+            self._batch["since"] = None
+
     # -----------------------
     # Migration runner
     # -----------------------
@@ -57,7 +166,7 @@ class SQLiteStore:
             (platform, handle, now, now),
         )
         row = cur.fetchone()
-        self.conn.commit()
+        self._commit()
         return int(row["player_id"])
 
     def upsert_player_match_index(self, handle: str, match_rows: List[Dict[str, Any]], platform: str = "ubi") -> None:
@@ -77,7 +186,7 @@ class SQLiteStore:
                 int(bool(r.get("full_match_available"))) if r.get("full_match_available") is not None else None,
             ))
         self.conn.executemany(sql, vals)
-        self.conn.commit()
+        self._commit()
 
     def page_matches_all_v2_done(self, match_ids: List[str]) -> bool:
         if not match_ids:
@@ -126,7 +235,7 @@ class SQLiteStore:
             now,
             now,
         ))
-        self.conn.commit()
+        self._commit()
 
     def upsert_match_players(self, match_id: str, rows: List[Dict[str, Any]]) -> None:
         sql = (
@@ -154,7 +263,7 @@ class SQLiteStore:
                 json.dumps(r.get("raw_stats", {}), separators=(",", ":"), ensure_ascii=False),
             ))
         self.conn.executemany(sql, vals)
-        self.conn.commit()
+        self._commit()
 
     def upsert_rounds(self, match_id: str, rows: List[Dict[str, Any]]) -> None:
         sql = (
@@ -175,7 +284,7 @@ class SQLiteStore:
                 r.get("v2_round_end_reason_id"), r.get("v2_round_end_reason_name"), r.get("v2_winner_side_id"),
             ))
         self.conn.executemany(sql, vals)
-        self.conn.commit()
+        self._commit()
 
     def upsert_player_rounds(self, match_id: str, rows: List[Dict[str, Any]]) -> None:
         sql = (
@@ -203,7 +312,7 @@ class SQLiteStore:
                 r.get("killed_by_player_uuid"),
             ))
         self.conn.executemany(sql, vals)
-        self.conn.commit()
+        self._commit()
 
     def upsert_kill_events(self, match_id: str, rows: List[Dict[str, Any]]) -> None:
         sql = (
@@ -213,7 +322,7 @@ class SQLiteStore:
         for r in rows:
             vals.append((match_id, r["round_id"], r["timestamp_ms"], r.get("attacker_uuid"), r["victim_uuid"]))
         self.conn.executemany(sql, vals)
-        self.conn.commit()
+        self._commit()
 
     def upsert_raw_payload(self, match_id: str, source: str, payload: Dict[str, Any]) -> None:
         self.conn.execute(
@@ -221,7 +330,7 @@ class SQLiteStore:
             "ON CONFLICT(match_id, source) DO UPDATE SET fetched_at=excluded.fetched_at, payload_json=excluded.payload_json",
             (match_id, source, utc_now_iso(), json.dumps(payload, ensure_ascii=False)),
         )
-        self.conn.commit()
+        self._commit()
 
     # -----------------------
     # Poison-match status
@@ -238,7 +347,7 @@ class SQLiteStore:
             "v2_done=excluded.v2_done, v1_done=excluded.v1_done, attempts=0, last_error=NULL, next_retry_after=NULL, updated_at=excluded.updated_at",
             (match_id, int(v2_done), int(v1_done), 0, None, None, now),
         )
-        self.conn.commit()
+        self._commit()
 
     def mark_match_failure(self, match_id: str, error: str, max_attempts: int, cooldown_days: int) -> sqlite3.Row:
         now = utc_now_iso()
@@ -255,7 +364,7 @@ class SQLiteStore:
             "attempts=excluded.attempts, last_error=excluded.last_error, next_retry_after=excluded.next_retry_after, updated_at=excluded.updated_at",
             (match_id, 0, 0, attempts, error[:4000], next_retry_after, now),
         )
-        self.conn.commit()
+        self._commit()
         return self.get_match_status(match_id)
 
     def should_skip_poison(self, match_id: str, max_attempts: int, force_retry: bool) -> bool:
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.async_api_client import TokenBucketLimiter
+from src.browser_capture import CaptureMode, PageCapture
+
+from ..log import Logger
+
+
+@dataclass
+class TabHealth:
+    tab: int
+    processed: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    consecutive_errors: int = 0
+    restarts: int = 0
+    blocked_requests: int = 0
+    bytes_saved: int = 0
+    last_error: Optional[str] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class PoolRunResult:
+    processed: int = 0
+    failed: List[str] = field(default_factory=list)
+    timed_out: List[str] = field(default_factory=list)
+    unfinished: List[str] = field(default_factory=list)
+
+
+class PagePool:
+    """
+    N tabs in one browser context fed from a shared work queue.
+
+    Each tab runs one item at a time. A tab that times out or raises
+    `max_consecutive_errors` times in a row, or whose page closed under it, is
+    replaced in place with a fresh page from the same context. Only when a tab has
+    used up `max_tab_restarts` does the pool report itself exhausted, which is the
+    caller's cue for a full browser session restart.
+
+    Every navigation first takes a token from the shared `governor`; timeouts halve
+    its rate and completed items let it recover. With a `capture` mode each tab
+    (including replacements) routes its requests through it and every item is
+    reported as one page load.
+    """
+
+    def __init__(
+        self,
+        context: Any,
+        size: int,
+        *,
+        governor: Optional[TokenBucketLimiter] = None,
+        capture: Optional[CaptureMode] = None,
+        log: Optional[Logger] = None,
+        max_consecutive_errors: int = 3,
+        max_tab_restarts: int = 5,
+        close_timeout_s: float = 10.0,
+    ) -> None:
+        self.context = context
+        self.size = max(1, int(size))
+        self.governor = governor
+        self.capture = capture
+        self.log = log
+        self.max_consecutive_errors = max(1, int(max_consecutive_errors))
+        self.max_tab_restarts = max(0, int(max_tab_restarts))
+        self.close_timeout_s = close_timeout_s
+        self.pages: List[Any] = []
+        self.captures: List[Optional[PageCapture]] = []
+        self.health = [TabHealth(tab=i) for i in range(self.size)]
+        self.exhausted = False
+
+    async def _new_page(self) -> Tuple[Any, Optional[PageCapture]]:
+        page = await self.context.new_page()
+        capture = await self.capture.attach(page) if self.capture is not None else None
+        return page, capture
+
+    async def start(self) -> "PagePool":
+        while len(self.pages) < self.size:
+            page, capture = await self._new_page()
+            self.pages.append(page)
+            self.captures.append(capture)
+        return self
+
+    async def close(self) -> None:
+        for page in self.pages:
+            try:
+                await asyncio.wait_for(page.close(), timeout=self.close_timeout_s)
+            except Exception:
+                pass
+        self.pages = []
+        self.captures = []
+
+    def capture_for(self, page: Any) -> Optional[PageCapture]:
+        """The capture attached to `page` if it is one of this pool's tabs."""
+        for tab_page, capture in zip(self.pages, self.captures):
+            if tab_page is page:
+                return capture
+        return None
+
+    def health_snapshot(self) -> List[Dict[str, Any]]:
+        return [h.snapshot() for h in self.health]
+
+    async def _restart_tab(self, tab: int, reason: str) -> bool:
+        health = self.health[tab]
+        if health.restarts >= self.max_tab_restarts:
+            self.exhausted = True
+            if self.log:
+                self.log.warn("Scraper tab restart budget exhausted", tab=tab, restarts=health.restarts, reason=reason)
+            return False
+        health.restarts += 1
+        health.consecutive_errors = 0
+        try:
+            await asyncio.wait_for(self.pages[tab].close(), timeout=self.close_timeout_s)
+        except Exception:
+            pass
+        try:
+            self.pages[tab], self.captures[tab] = await self._new_page()
+        except Exception as e:
+            self.exhausted = True
+            if self.log:
+                self.log.warn("Scraper tab could not be reopened", tab=tab, error=f"{type(e).__name__}: {e}")
+            return False
+        if self.log:
+            self.log.warn("Restarted scraper tab", tab=tab, restarts=health.restarts, reason=reason)
+        return True
+
+    async def run(
+        self,
+        items: Iterable[str],
+        handle: Callable[[Any, str], Awaitable[bool]],
+        *,
+        timeout_s: float,
+        sleep_between_s: float = 0.0,
+        on_timeout: Optional[Callable[[str], None]] = None,
+        stop: Optional[Callable[[], bool]] = None,
+    ) -> PoolRunResult:
+        """
+        Feed `items` to the tabs until the queue drains or the pool is exhausted.
+
+        `handle(page, item)` returns True when the item was stored and False when it
+        recorded a failure itself. Items cut off after `timeout_s` or raising count
+        against the tab's health; `on_timeout(item)` is called for timeouts. Tabs stop
+        taking items once `stop()` returns True. Items still queued when the pool
+        gives up or is stopped are returned as `unfinished`.
+        """
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+        result = PoolRunResult()
+
+        async def worker(tab: int) -> None:
+            health = self.health[tab]
+            while not self.exhausted:
+                if stop is not None and stop():
+                    return
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if self.governor is not None:
+                    await self.governor.acquire()
+                page = self.pages[tab]
+                capture = self.captures[tab]
+                error: Optional[str] = None
+                if capture is not None:
+                    capture.begin()
+                try:
+                    ok = await asyncio.wait_for(handle(page, item), timeout=timeout_s)
+                except asyncio.TimeoutError:
+                    health.timeouts += 1
+                    result.timed_out.append(item)
+                    if self.governor is not None:
+                        self.governor.penalize(0.0)
+                    error = f"TimeoutError: exceeded {timeout_s}s"
+                    if self.log:
+                        self.log.warn("Pool item timed out", item=item, tab=tab, timeout_s=timeout_s)
+                    if on_timeout is not None:
+                        on_timeout(item)
+                except Exception as e:
+                    health.failures += 1
+                    result.failed.append(item)
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    # A handled failure is usually the match, not the tab; only the
+                    # page closing under it says otherwise.
+                    if ok is False:
+                        health.failures += 1
+                        result.failed.append(item)
+                    else:
+                        health.processed += 1
+                        result.processed += 1
+                        if self.governor is not None:
+                            self.governor.reward()
+                    health.consecutive_errors = 0
+                if capture is not None:
+                    load = capture.end()
+                    health.blocked_requests += load["blocked_requests"]
+                    health.bytes_saved += load["bytes_saved"]
+                    if self.log:
+                        self.log.info("Page capture", item=item, tab=tab, **load)
+                if error is not None:
+                    health.consecutive_errors += 1
+                    health.last_error = error
+                page_closed = bool(getattr(page, "is_closed", lambda: False)())
+                if page_closed or health.consecutive_errors >= self.max_consecutive_errors:
+                    reason = "page closed" if page_closed else f"{health.consecutive_errors} consecutive errors"
+                    if not await self._restart_tab(tab, reason):
+                        return
+                if sleep_between_s > 0:
+                    await asyncio.sleep(sleep_between_s)
+
+        await asyncio.gather(*(worker(tab) for tab in range(self.size)))
+        while not queue.empty():
+            result.unfinished.append(queue.get_nowait())
+        return result
@@ -11,6 +11,8 @@ from ..config import ScrapeConfig
 from ..db import SQLiteStore
 from ..log import Logger
 
+from src.async_api_client import TokenBucketLimiter
+
 from .session import BrowserSession
 from .listing import fetch_match_list_page
 from .detail import fetch_match_detail
@@ -30,13 +32,20 @@ class ScrapeRunner:
         migrations_dir = Path(__file__).resolve().parents[1] / "migrations"
         store.apply_migrations(migrations_dir)
         store.ensure_player(self.cfg.player)
+        if self.cfg.write_batch_size > 1:
+            store.begin_write_behind(self.cfg.write_batch_size, self.cfg.write_batch_max_age_s)
 
         try:
             cursor: Optional[int] = 0
             pages = 0
             restart_attempts = 0
             force_headless_fresh = False
-            consecutive_match_detail_timeouts = 0
+            # One governor for the whole sync so restarts don't reset the pacing.
+            governor = (
+                TokenBucketLimiter(self.cfg.max_match_rate_per_s, burst=max(1, self.cfg.tabs))
+                if self.cfg.max_match_rate_per_s > 0
+                else None
+            )
 
             while True:
                 restart_reason: Optional[str] = None
@@ -51,11 +60,18 @@ class ScrapeRunner:
                     storage_state_path=None if force_headless_fresh else self.cfg.storage_state_path,
                     save_storage_state_path=self.cfg.save_storage_state_path,
                     user_agent=self.cfg.user_agent,
+                    capture_mode=self.cfg.capture_mode,
                 )
                 force_headless_fresh = False
                 session.log = self.log
 
                 try:
+                    pool = await session.open_pool(
+                        self.cfg.tabs,
+                        governor=governor,
+                        max_consecutive_errors=self.cfg.tab_max_consecutive_errors,
+                        max_tab_restarts=self.cfg.tab_max_restarts,
+                    )
                     while True:
                         if self.cfg.max_pages is not None and pages >= self.cfg.max_pages:
                             self.log.info("Reached max_pages", max_pages=self.cfg.max_pages)
@@ -66,6 +82,8 @@ class ScrapeRunner:
                             player=self.cfg.player,
                             cursor=cursor,
                         )
+                        if session.capture is not None:
+                            session.capture.begin()
                         try:
                             page_result = await asyncio.wait_for(
                                 fetch_match_list_page(
@@ -82,6 +100,7 @@ class ScrapeRunner:
                                 cursor=cursor,
                                 items=len(page_result.items),
                                 next_cursor=page_result.next_cursor,
+                                capture=session.capture.end() if session.capture is not None else None,
                             )
                         except asyncio.TimeoutError:
                             self.log.warn(
@@ -130,37 +149,40 @@ class ScrapeRunner:
                             if self.cfg.force_retry or not store.v2_done(mid):
                                 queue.append(mid)
 
-                        for mid in queue:
-                            try:
-                                await asyncio.wait_for(
-                                    self._process_match(store, session.page, mid),
-                                    timeout=self.cfg.match_detail_timeout_s,
-                                )
-                                consecutive_match_detail_timeouts = 0
-                            except asyncio.TimeoutError:
-                                err = f"TimeoutError: match processing exceeded {self.cfg.match_detail_timeout_s}s"
-                                consecutive_match_detail_timeouts += 1
-                                self.log.warn(
-                                    "Match timed out",
-                                    match_id=mid,
-                                    timeout_s=self.cfg.match_detail_timeout_s,
-                                    consecutive_match_detail_timeouts=consecutive_match_detail_timeouts,
-                                )
-                                store.mark_match_failure(
-                                    mid,
-                                    error=err,
-                                    max_attempts=self.cfg.max_attempts,
-                                    cooldown_days=self.cfg.poison_cooldown_days,
-                                )
-                                if consecutive_match_detail_timeouts > 5:
-                                    self.log.warn(
-                                        "Too many consecutive match detail timeouts - restarting session",
-                                        player=self.cfg.player,
-                                        cursor=cursor,
-                                    )
-                                    restart_reason = "too many consecutive match detail timeouts"
-                                    break
-                            await asyncio.sleep(self.cfg.sleep_between_matches_s)
+                        def _on_timeout(mid: str) -> None:
+                            store.mark_match_failure(
+                                mid,
+                                error=f"TimeoutError: match processing exceeded {self.cfg.match_detail_timeout_s}s",
+                                max_attempts=self.cfg.max_attempts,
+                                cooldown_days=self.cfg.poison_cooldown_days,
+                            )
+
+                        run = await pool.run(
+                            queue,
+                            lambda page, mid: self._process_match(store, page, mid),
+                            timeout_s=self.cfg.match_detail_timeout_s,
+                            sleep_between_s=self.cfg.sleep_between_matches_s,
+                            on_timeout=_on_timeout,
+                        )
+                        self.log.info(
+                            "Match queue drained",
+                            player=self.cfg.player,
+                            cursor=cursor,
+                            queued=len(queue),
+                            committed=run.processed,
+                            failed=len(run.failed),
+                            timed_out=len(run.timed_out),
+                            unfinished=len(run.unfinished),
+                            governor=governor.snapshot() if governor is not None else None,
+                            tabs=pool.health_snapshot(),
+                        )
+                        if pool.exhausted:
+                            self.log.warn(
+                                "Scraper tabs exhausted their restart budget - restarting session",
+                                player=self.cfg.player,
+                                cursor=cursor,
+                            )
+                            restart_reason = "scraper tabs exhausted their restart budget"
 
                         if restart_reason is not None:
                             break
@@ -184,6 +206,8 @@ class ScrapeRunner:
                             )
                             break
 
+                        # Page boundaries are durable: the incremental stop check relies on them.
+                        store.flush()
                         cursor = page_result.next_cursor
                         if cursor is not None and self.cfg.page_sleep_s > 0:
                             await asyncio.sleep(self.cfg.page_sleep_s)
@@ -235,7 +259,7 @@ class ScrapeRunner:
         finally:
             store.close()
 
-    async def _process_match(self, store: SQLiteStore, page: Page, match_id: str) -> None:
+    async def _process_match(self, store: SQLiteStore, page: Page, match_id: str) -> bool:
         self.log.info("Processing match", match_id=match_id)
         try:
             payloads = await fetch_match_detail(
@@ -250,16 +274,17 @@ class ScrapeRunner:
             v1_parsed = parse_v1_ingest(payloads.v1) if payloads.v1 else None
             merged = merge_v1_v2(v2_parsed, v1_parsed)
 
-            store.upsert_match(merged.match)
-            store.upsert_match_players(merged.match["match_id"], merged.match_players)
-            if merged.rounds:
-                store.upsert_rounds(merged.match["match_id"], merged.rounds)
-            if merged.player_rounds:
-                store.upsert_player_rounds(merged.match["match_id"], merged.player_rounds)
-            if merged.kill_events:
-                store.upsert_kill_events(merged.match["match_id"], merged.kill_events)
-
-            store.mark_match_success(match_id, v2_done=True, v1_done=bool(merged.v1_used))
+            # One unit per match: data and its status row land together.
+            with store.transaction():
+                store.upsert_match(merged.match)
+                store.upsert_match_players(merged.match["match_id"], merged.match_players)
+                if merged.rounds:
+                    store.upsert_rounds(merged.match["match_id"], merged.rounds)
+                if merged.player_rounds:
+                    store.upsert_player_rounds(merged.match["match_id"], merged.player_rounds)
+                if merged.kill_events:
+                    store.upsert_kill_events(merged.match["match_id"], merged.kill_events)
+                store.mark_match_success(match_id, v2_done=True, v1_done=bool(merged.v1_used))
             self.log.info(
                 "Match committed",
                 match_id=match_id,
@@ -267,6 +292,7 @@ class ScrapeRunner:
                 pr=len(merged.player_rounds),
                 rounds=len(merged.rounds),
             )
+            return True
 
         except Exception as e:
             err = f"{type(e).__name__}: {e}"
@@ -284,3 +310,4 @@ class ScrapeRunner:
                 attempts=int(row["attempts"]),
                 next_retry_after=row["next_retry_after"],
             )
+            return False
@@ -7,7 +7,11 @@ from typing import Optional
 
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from playwright_stealth import Stealth
+from src.async_api_client import TokenBucketLimiter
+from src.browser_capture import CaptureMode, PageCapture
+
 from ..log import Logger
+from .pool import PagePool
 
 @dataclass
 class BrowserSession:
@@ -16,6 +20,9 @@ class BrowserSession:
     page: Page
     _close_timeout_s: float = 10.0
     log: Optional[Logger] = None
+    pool: Optional[PagePool] = None
+    capture: Optional[PageCapture] = None
+    capture_mode: Optional[str] = None
 
     @classmethod
     async def start(
@@ -24,6 +31,7 @@ class BrowserSession:
         storage_state_path: Optional[Path] = None,
         save_storage_state_path: Optional[Path] = None,
         user_agent: Optional[str] = None,
+        capture_mode: Optional[str] = None,
     ) -> "BrowserSession":
         pw = await async_playwright().start()
         stealth = Stealth()
@@ -40,13 +48,38 @@ class BrowserSession:
         context = await browser.new_context(**context_kwargs)
         await stealth.apply_stealth_async(context)
         page = await context.new_page()
+        # The session's own page serves the match list; pool tabs get their own mode.
+        capture = await CaptureMode(("match_list",), mode=capture_mode).attach(page)
 
         # Wire into close to also close playwright driver.
-        session = cls(browser=browser, context=context, page=page)
+        session = cls(browser=browser, context=context, page=page, capture=capture, capture_mode=capture_mode)
         session._pw = pw  # type: ignore[attr-defined]
         session._save_storage_state_path = save_storage_state_path  # type: ignore[attr-defined]
         return session
 
+    async def open_pool(
+        self,
+        size: int,
+        *,
+        governor: Optional[TokenBucketLimiter] = None,
+        max_consecutive_errors: int = 3,
+        max_tab_restarts: int = 5,
+    ) -> PagePool:
+        """Open `size` extra tabs in this session's context for concurrent match-detail capture."""
+        if self.pool is not None:
+            await self.pool.close()
+        self.pool = PagePool(
+            self.context,
+            size,
+            governor=governor,
+            capture=CaptureMode(("v2_match", "v1_ingest"), mode=self.capture_mode),
+            log=self.log,
+            max_consecutive_errors=max_consecutive_errors,
+            max_tab_restarts=max_tab_restarts,
+            close_timeout_s=self._close_timeout_s,
+        )
+        return await self.pool.start()
+
     async def close(self, *, skip_state_save: bool = False) -> None:
         # Save cookies/state if requested
         save_path = getattr(self, "_save_storage_state_path", None)
@@ -76,6 +109,8 @@ class BrowserSession:
                         "Saved browser storage state",
                         path=str(Path(save_path).resolve()),
                     )
+        if self.pool is not None:
+            await self.pool.close()
         try:
             await asyncio.wait_for(self.context.close(), timeout=self._close_timeout_s)
         except Exception:
@@ -0,0 +1,442 @@
+"""
+In-process background jobs for long-running maintenance work.
+
+Jobs are rows in the `jobs` table (see Database._ensure_jobs_table) and run on a
+small pool of worker threads, each with its own Database connection. The file must
+already be migrated (open it with `Database()` first); the manager's connections
+skip schema setup. A job's
+subject is the username_key it touches: jobs for the same player run one at a
+time in submit order, jobs for different players run in parallel, and jobs with
+no subject (whole-database work) run alone and hold back everything queued
+behind them.
+
+Handlers are plain functions `handler(ctx, **params) -> dict`. `ctx.progress()`
+reports progress and is also the cancellation point: once a cancel is
+requested, the next call raises `JobCancelled` and the worker rolls back the
+job's open transaction. Live progress, rate and ETA are kept in memory and
+pushed to listeners; the table records state transitions and final results.
+Queued jobs survive a restart; jobs that were running are marked failed.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.database import Database
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised from `JobContext.progress()` once the job has been asked to stop."""
+
+
+class JobContext:
+    def __init__(self, manager: "JobManager", job: Dict[str, Any], db: Database) -> None:
+        self._manager = manager
+        self._job = job
+        self.job_id: int = job["job_id"]
+        self.kind: str = job["kind"]
+        self.subject: Optional[str] = job["subject"]
+        self.params: Dict[str, Any] = dict(job["params"])
+        self.db = db
+        self.db_path = db.db_path
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"job {self.job_id} cancelled")
+
+    def progress(
+        self,
+        done: int,
+        total: Optional[int] = None,
+        message: Optional[str] = None,
+        detail: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Record progress, then raise `JobCancelled` if a cancel is pending."""
+        self._manager._progress(self._job, done, total, message, detail)
+        self.check_cancelled()
+
+
+class JobManager:
+    """
+    Worker pool plus scheduler for `jobs` rows.
+
+    All bookkeeping writes go through one dedicated thread with its own
+    connection, the same split DatabaseAccess uses for its writer. Only
+    `submit` waits for its write (it needs the job id); state transitions are
+    queued behind it in order.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        workers: int = 2,
+        progress_interval_s: float = 0.5,
+        keep_finished: int = 200,
+    ) -> None:
+        self.db_path = db_path
+        self.workers = max(1, int(workers))
+        self.progress_interval_s = float(progress_interval_s)
+        self.keep_finished = max(1, int(keep_finished))
+        self._handlers: Dict[str, Callable[..., Dict[str, Any]]] = {}
+        self._cv = threading.Condition()
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        self._pending: List[int] = []
+        self._running: Dict[int, JobContext] = {}
+        self._busy_subjects: set = set()
+        self._global_running = False
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self._store_local = threading.local()
+        self._store_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="jakal-jobs-store", initializer=self._open_store
+        )
+
+    # ------------------------------------------------------------------
+    # Registration and lifecycle
+    # ------------------------------------------------------------------
+    def register(self, kind: str, handler: Callable[..., Dict[str, Any]]) -> None:
+        self._handlers[kind] = handler
+
+    def start(self) -> "JobManager":
+        """Re-enqueue jobs left queued by a previous process and start the workers."""
+        recovered = self._store(lambda db: db.recover_jobs(time.time()))
+        with self._cv:
+            for row in recovered:
+                if row["kind"] not in self._handlers:
+                    continue
+                self._jobs[row["job_id"]] = self._live(row)
+                self._pending.append(row["job_id"])
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"jakal-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._cv.notify_all()
+        if recovered:
+            print(f"[JOBS] Re-queued {len(self._pending)} job(s) from the previous run")
+        return self
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Cancel running jobs, stop the workers and close the bookkeeping connection."""
+        with self._cv:
+            self._closed = True
+            for ctx in self._running.values():
+                ctx.cancel_event.set()
+            self._cv.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._store_pool.submit(self._close_store).result()
+        self._store_pool.shutdown()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Persist and enqueue a job; `params["username"]` decides its subject."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        params = dict(params or {})
+        subject = Database._username_key(params.get("username")) or None
+        created_at = time.time()
+        job_id = self._store(lambda db: db.create_job(kind, subject, params, created_at))
+        job = self._live(
+            {"job_id": job_id, "kind": kind, "subject": subject, "params": params, "created_at": created_at}
+        )
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("Job manager is closed")
+            self._jobs[job_id] = job
+            self._pending.append(job_id)
+            self._cv.notify_all()
+            snapshot = self._snapshot(job)
+        self._publish(snapshot)
+        return snapshot
+
+    def cancel(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Drop a queued job, or ask a running one to stop at its next progress call."""
+        with self._cv:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return self.get(job_id)
+            job["cancel_requested"] = True
+            if job["status"] == "queued":
+                self._pending.remove(job_id)
+                self._finish_locked(job, "cancelled")
+            else:
+                self._running[job_id].cancel_event.set()
+            snapshot = self._snapshot(job)
+        if snapshot["status"] == "cancelled":
+            self._persist_final(snapshot)
+        self._publish(snapshot)
+        return snapshot
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._cv:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._snapshot(job)
+        row = self._store(lambda db: db.get_job(job_id))
+        return self._snapshot(self._live(row)) if row else None
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest first; live jobs carry in-memory progress, older ones come from the table."""
+        rows = self._store(lambda db: db.list_jobs(status=status, kind=kind, limit=limit))
+        out = []
+        with self._cv:
+            for row in rows:
+                job = self._jobs.get(row["job_id"])
+                out.append(self._snapshot(job if job is not None else self._live(row)))
+        return out
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job finishes (or `timeout` passes) and return its snapshot."""
+        with self._cv:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._cv.wait_for(lambda: job["status"] in FINISHED_STATUSES, timeout)
+                return self._snapshot(job)
+        return self.get(job_id)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """`listener(snapshot)` is called from worker threads on every state change and progress tick."""
+        with self._cv:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        with self._cv:
+            self._listeners = [fn for fn in self._listeners if fn is not listener]
+
+    # ------------------------------------------------------------------
+    # Bookkeeping thread
+    # ------------------------------------------------------------------
+    def _open_store(self) -> None:
+        self._store_local.db = Database.open_writer(self.db_path)
+
+    def _close_store(self) -> None:
+        db = getattr(self._store_local, "db", None)
+        if db is not None:
+            db.close()
+            self._store_local.db = None
+
+    def _store(self, fn: Callable[[Database], Any]) -> Any:
+        return self._store_pool.submit(lambda: fn(self._store_local.db)).result()
+
+    def _store_later(self, what: str, fn: Callable[[Database], Any]) -> None:
+        """Queue a bookkeeping write without waiting, so a job holding the write lock cannot stall callers."""
+
+        def report(future) -> None:
+            error = future.exception()
+            if error is not None:
+                print(f"[JOBS] Warning: failed to record {what}: {error}")
+
+        self._store_pool.submit(lambda: fn(self._store_local.db)).add_done_callback(report)
+
+    def _persist_final(self, snapshot: Dict[str, Any]) -> None:
+        self._store_later(
+            f"job {snapshot['job_id']} as {snapshot['status']}",
+            lambda db: db.update_job(
+                snapshot["job_id"],
+                status=snapshot["status"],
+                progress_done=snapshot["progress"]["done"],
+                progress_total=snapshot["progress"]["total"],
+                message=snapshot["progress"]["message"],
+                result=snapshot["result"],
+                error=snapshot["error"],
+                finished_at=snapshot["finished_at"],
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    def _next_runnable(self) -> Optional[int]:
+        if self._global_running:
+            return None
+        blocked = set(self._busy_subjects)
+        for job_id in self._pending:
+            subject = self._jobs[job_id]["subject"]
+            if subject is None:
+                # Whole-database job: wait for the pool to drain, start nothing newer meanwhile.
+                return job_id if not self._running else None
+            if subject not in blocked:
+                return job_id
+        return None
+
+    def _worker(self) -> None:
+        db = Database.open_writer(self.db_path)
+        try:
+            while True:
+                with self._cv:
+                    while True:
+                        if self._closed:
+                            return
+                        job_id = self._next_runnable()
+                        if job_id is not None:
+                            break
+                        self._cv.wait()
+                    self._pending.remove(job_id)
+                    job = self._jobs[job_id]
+                    ctx = JobContext(self, job, db)
+                    self._running[job_id] = ctx
+                    if job["subject"] is None:
+                        self._global_running = True
+                    else:
+                        self._busy_subjects.add(job["subject"])
+                    job["status"] = "running"
+                    job["started_at"] = time.time()
+                    snapshot = self._snapshot(job)
+                self._store_later(
+                    f"job {job_id} as running",
+                    lambda store: store.update_job(job_id, status="running", started_at=snapshot["started_at"]),
+                )
+                self._publish(snapshot)
+                self._run(ctx, job)
+        finally:
+            db.close()
+
+    def _run(self, ctx: JobContext, job: Dict[str, Any]) -> None:
+        status, result, error = "done", None, None
+        try:
+            ctx.check_cancelled()
+            result = self._handlers[job["kind"]](ctx, **ctx.params)
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", str(e) or e.__class__.__name__
+            print(f"[JOBS] Job {job['job_id']} ({job['kind']}) failed: {error}")
+            traceback.print_exc()
+        if status != "done":
+            try:
+                ctx.db.conn.rollback()
+            except Exception:
+                pass
+        with self._cv:
+            self._running.pop(job["job_id"], None)
+            if job["subject"] is None:
+                self._global_running = False
+            else:
+                self._busy_subjects.discard(job["subject"])
+            job["result"] = result if isinstance(result, dict) else ({"value": result} if result is not None else None)
+            job["error"] = error
+            self._finish_locked(job, status)
+            snapshot = self._snapshot(job)
+        self._persist_final(snapshot)
+        self._publish(snapshot)
+        print(
+            f"[JOBS] Job {job['job_id']} ({job['kind']}"
+            f"{' ' + job['subject'] if job['subject'] else ''}) {status} in {snapshot['elapsed_seconds']}s"
+        )
+
+    def _finish_locked(self, job: Dict[str, Any], status: str) -> None:
+        job["status"] = status
+        job["finished_at"] = time.time()
+        if status == "done" and job["progress_total"] is not None:
+            job["progress_done"] = job["progress_total"]
+        finished = [jid for jid, j in self._jobs.items() if j["status"] in FINISHED_STATUSES]
+        for jid in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[jid]
+        self._cv.notify_all()
+
+    # ------------------------------------------------------------------
+    # Progress and snapshots
+    # ------------------------------------------------------------------
+    def _progress(
+        self,
+        job: Dict[str, Any],
+        done: int,
+        total: Optional[int],
+        message: Optional[str],
+        detail: Optional[Dict[str, Any]],
+    ) -> None:
+        now = time.time()
+        with self._cv:
+            job["progress_done"] = max(0, int(done))
+            if total is not None:
+                job["progress_total"] = max(0, int(total))
+            if message is not None:
+                job["message"] = message
+            if detail is not None:
+                job["detail"] = detail
+            finished = job["progress_total"] is not None and job["progress_done"] >= job["progress_total"]
+            if now - job["_published_at"] < self.progress_interval_s and not finished:
+                return
+            job["_published_at"] = now
+            snapshot = self._snapshot(job)
+        self._publish(snapshot)
+
+    def _publish(self, snapshot: Dict[str, Any]) -> None:
+        with self._cv:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"[JOBS] Warning: job listener failed: {e}")
+
+    @staticmethod
+    def _live(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "job_id": int(row["job_id"]),
+            "kind": row["kind"],
+            "subject": row.get("subject"),
+            "params": row.get("params") or {},
+            "status": row.get("status") or "queued",
+            "progress_done": int(row.get("progress_done") or 0),
+            "progress_total": row.get("progress_total"),
+            "message": row.get("message"),
+            "detail": None,
+            "result": row.get("result"),
+            "error": row.get("error"),
+            "cancel_requested": False,
+            "created_at": row.get("created_at"),
+            "started_at": row.get("started_at"),
+            "finished_at": row.get("finished_at"),
+            "_published_at": 0.0,
+        }
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+        done = job["progress_done"]
+        total = job["progress_total"]
+        started = job["started_at"]
+        end = job["finished_at"] or time.time()
+        elapsed = max(0.0, end - started) if started else 0.0
+        rate = done / elapsed if elapsed > 0 and done else None
+        eta = None
+        if job["status"] == "running" and rate and total is not None:
+            eta = round(max(0, total - done) / rate, 1)
+        return {
+            "job_id": job["job_id"],
+            "kind": job["kind"],
+            "subject": job["subject"],
+            "params": dict(job["params"]),
+            "status": job["status"],
+            "progress": {
+                "done": done,
+                "total": total,
+                "percent": round(100.0 * done / total, 1) if total else None,
+                "message": job["message"],
+                "detail": job["detail"],
+            },
+            "rate_per_s": round(rate, 2) if rate else None,
+            "eta_seconds": eta,
+            "elapsed_seconds": round(elapsed, 3),
+            "result": job["result"],
+            "error": job["error"],
+            "cancel_requested": job["cancel_requested"],
+            "created_at": job["created_at"],
+            "started_at": started,
+            "finished_at": job["finished_at"],
+        }
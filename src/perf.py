@@ -0,0 +1,492 @@
+"""
+Request latency and SQL profiling for the web app, exposed at /api/perf.
+
+`PerfMiddleware` is a plain ASGI middleware. It times every HTTP request into a
+latency histogram keyed by method and route template. For a StreamingResponse the
+time runs until the last body chunk. Requests run inside a context that collects
+their SQL and cache activity, so each route also reports queries per request,
+SQL time, and cache hits/misses per namespace.
+
+SQL timings come from `PerfConnection`/`PerfCursor`, the connection factory that
+`install()` gives every `Database` opened afterwards. Python's sqlite3 trace
+callback only reports statement text, so a statement is timed from execute()
+through the fetches that drain it, and the rows fetched are counted. Statements
+are grouped by their text with whitespace collapsed and `IN (?, ?, ...)` lists
+folded, and each group keeps its own histogram.
+
+Database calls made from the db_access pools carry the request context with them.
+Queries from background jobs and the sync scheduler are reported under the route
+"-".
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; the last bucket is +Inf.
+LATENCY_BUCKETS_S: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SQL_BUCKETS_S: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+MAX_QUERY_GROUPS = 500
+OTHER_QUERY = "(other statements)"
+NO_ROUTE = "-"
+
+_request: contextvars.ContextVar[Optional["_RequestStats"]] = contextvars.ContextVar("jakal_perf_request", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as Prometheus exposes them."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets, interpolating inside the bucket that holds q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.bounds[i] if i < len(self.bounds) else self.max
+            if n and seen + n >= rank:
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+            lower = upper
+        return self.max
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out = []
+        running = 0
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+            running += n
+            out.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return out
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class _RequestStats:
+    """SQL and cache activity of one request, merged into its route when it ends."""
+
+    __slots__ = ("sql_calls", "sql_seconds", "sql_rows", "queries", "cache")
+
+    def __init__(self) -> None:
+        self.sql_calls = 0
+        self.sql_seconds = 0.0
+        self.sql_rows = 0
+        self.queries: Dict[str, int] = {}
+        self.cache: Dict[str, List[int]] = {}
+
+
+class _RouteStats:
+    __slots__ = ("latency", "status", "sql_calls", "sql_seconds", "sql_rows", "cache")
+
+    def __init__(self) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS_S)
+        self.status: Dict[str, int] = {}
+        self.sql_calls = 0
+        self.sql_seconds = 0.0
+        self.sql_rows = 0
+        self.cache: Dict[str, List[int]] = {}
+
+
+class _QueryStats:
+    __slots__ = ("qid", "sql", "latency", "rows", "routes")
+
+    def __init__(self, sql: str) -> None:
+        self.qid = hashlib.sha1(sql.encode("utf-8")).hexdigest()[:10]
+        self.sql = sql
+        self.latency = Histogram(SQL_BUCKETS_S)
+        self.rows = 0
+        self.routes: Dict[str, int] = {}
+
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_sql(sql: str) -> str:
+    text = _SPACES.sub(" ", str(sql)).strip()
+    return _IN_LIST.sub("(?, ...)", text)[:500]
+
+
+class PerfRecorder:
+    def __init__(self) -> None:
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._routes: Dict[Tuple[str, str], _RouteStats] = {}
+            self._queries: Dict[str, _QueryStats] = {}
+            self._cache: Dict[Tuple[str, str], List[int]] = {}
+
+    def begin_request(self) -> Tuple[_RequestStats, contextvars.Token]:
+        stats = _RequestStats()
+        return stats, _request.set(stats)
+
+    def end_request(self, token: contextvars.Token, stats: _RequestStats, method: str, route: str, status: int, seconds: float) -> None:
+        _request.reset(token)
+        status_class = f"{int(status) // 100}xx" if status else "error"
+        with self._lock:
+            item = self._routes.get((method, route))
+            if item is None:
+                item = self._routes[(method, route)] = _RouteStats()
+            item.latency.observe(seconds)
+            item.status[status_class] = item.status.get(status_class, 0) + 1
+            item.sql_calls += stats.sql_calls
+            item.sql_seconds += stats.sql_seconds
+            item.sql_rows += stats.sql_rows
+            for namespace, (hits, misses) in stats.cache.items():
+                counts = item.cache.setdefault(namespace, [0, 0])
+                counts[0] += hits
+                counts[1] += misses
+            for key, calls in stats.queries.items():
+                query = self._queries.get(key)
+                if query is not None:
+                    query.routes[route] = query.routes.get(route, 0) + calls
+
+    def record_query(self, sql: str, seconds: float, rows: int) -> None:
+        if not self.enabled:
+            return
+        key = normalize_sql(sql)
+        request = _request.get()
+        with self._lock:
+            query = self._queries.get(key)
+            if query is None:
+                if len(self._queries) >= MAX_QUERY_GROUPS:
+                    key = OTHER_QUERY
+                    query = self._queries.get(key)
+                if query is None:
+                    query = self._queries[key] = _QueryStats(key)
+            query.latency.observe(seconds)
+            query.rows += rows
+            if request is not None:
+                request.sql_calls += 1
+                request.sql_seconds += seconds
+                request.sql_rows += rows
+                request.queries[key] = request.queries.get(key, 0) + 1
+            else:
+                query.routes[NO_ROUTE] = query.routes.get(NO_ROUTE, 0) + 1
+
+    def record_cache(self, namespace: str, hit: bool) -> None:
+        """Observer for src.cache.CacheManager lookups."""
+        if not self.enabled:
+            return
+        request = _request.get()
+        idx = 0 if hit else 1
+        with self._lock:
+            counts = self._cache.setdefault((namespace, NO_ROUTE if request is None else "request"), [0, 0])
+            counts[idx] += 1
+            if request is not None:
+                request.cache.setdefault(namespace, [0, 0])[idx] += 1
+
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            routes = []
+            for (method, route), item in self._routes.items():
+                routes.append(
+                    {
+                        "method": method,
+                        "route": route,
+                        **item.latency.summary(),
+                        "status": dict(item.status),
+                        "sql_calls": item.sql_calls,
+                        "sql_ms": round(item.sql_seconds * 1000, 3),
+                        "sql_rows": item.sql_rows,
+                        "sql_calls_per_request": round(item.sql_calls / item.latency.count, 2) if item.latency.count else 0.0,
+                        "cache": {ns: {"hits": h, "misses": m} for ns, (h, m) in sorted(item.cache.items())},
+                    }
+                )
+            queries = []
+            for query in self._queries.values():
+                top_routes = sorted(query.routes.items(), key=lambda kv: -kv[1])[:5]
+                queries.append(
+                    {
+                        "id": query.qid,
+                        "sql": query.sql,
+                        **query.latency.summary(),
+                        "rows": query.rows,
+                        "rows_per_call": round(query.rows / query.latency.count, 2) if query.latency.count else 0.0,
+                        "routes": dict(top_routes),
+                    }
+                )
+            cache = {}
+            for (namespace, where), (hits, misses) in sorted(self._cache.items()):
+                entry = cache.setdefault(namespace, {"hits": 0, "misses": 0, "background_hits": 0, "background_misses": 0})
+                prefix = "background_" if where == NO_ROUTE else ""
+                entry[f"{prefix}hits"] += hits
+                entry[f"{prefix}misses"] += misses
+            started_at = self.started_at
+        routes.sort(key=lambda r: -r["total_ms"])
+        queries.sort(key=lambda q: -q["total_ms"])
+        return {
+            "enabled": self.enabled,
+            "since": started_at,
+            "uptime_seconds": round(time.time() - started_at, 1),
+            "routes": routes[: max(1, int(limit))],
+            "queries": queries[: max(1, int(limit))],
+            "cache": cache,
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition (format 0.0.4) of the route and query histograms."""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, series: List[Tuple[str, Histogram]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in series:
+                for le, count in hist.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.total!r}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            route_series = [
+                (f'method="{_label(method)}",route="{_label(route)}"', item.latency)
+                for (method, route), item in sorted(self._routes.items())
+            ]
+            query_series = [(f'query="{q.qid}"', q.latency) for q in self._queries.values()]
+            requests = [
+                (method, route, status_class, n)
+                for (method, route), item in sorted(self._routes.items())
+                for status_class, n in sorted(item.status.items())
+            ]
+            query_rows = [(q.qid, q.rows) for q in self._queries.values()]
+            cache = [
+                (namespace, where, hits, misses)
+                for (namespace, where), (hits, misses) in sorted(self._cache.items())
+            ]
+            # Copy the histograms so rendering happens outside the lock.
+            route_series = [(labels, _copy(h)) for labels, h in route_series]
+            query_series = [(labels, _copy(h)) for labels, h in query_series]
+
+        histogram("jakal_http_request_duration_seconds", "HTTP request latency by route.", route_series)
+        lines.append("# HELP jakal_http_requests_total HTTP requests by route and status class.")
+        lines.append("# TYPE jakal_http_requests_total counter")
+        for method, route, status_class, n in requests:
+            lines.append(
+                f'jakal_http_requests_total{{method="{_label(method)}",route="{_label(route)}",status="{status_class}"}} {n}'
+            )
+        histogram("jakal_sql_query_duration_seconds", "SQLite statement time by query id (see /api/perf).", query_series)
+        lines.append("# HELP jakal_sql_query_rows_total Rows fetched by query id.")
+        lines.append("# TYPE jakal_sql_query_rows_total counter")
+        for qid, rows in query_rows:
+            lines.append(f'jakal_sql_query_rows_total{{query="{qid}"}} {rows}')
+        lines.append("# HELP jakal_cache_lookups_total Workspace cache lookups by namespace and result.")
+        lines.append("# TYPE jakal_cache_lookups_total counter")
+        for namespace, where, hits, misses in cache:
+            source = "background" if where == NO_ROUTE else "request"
+            for result, n in (("hit", hits), ("miss", misses)):
+                lines.append(
+                    f'jakal_cache_lookups_total{{namespace="{_label(namespace)}",source="{source}",result="{result}"}} {n}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _copy(hist: Histogram) -> Histogram:
+    out = Histogram(hist.bounds)
+    out.counts = list(hist.counts)
+    out.count, out.total, out.max = hist.count, hist.total, hist.max
+    return out
+
+
+recorder = PerfRecorder()
+
+
+class PerfCursor(sqlite3.Cursor):
+    """Times each statement from execute() until its rows are drained, counting the rows."""
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self._perf_sql: Optional[str] = None
+        self._perf_seconds = 0.0
+        self._perf_rows = 0
+
+    def _perf_flush(self) -> None:
+        if self._perf_sql is not None:
+            sql, self._perf_sql = self._perf_sql, None
+            recorder.record_query(sql, self._perf_seconds, self._perf_rows)
+
+    def _perf_start(self, sql: str, seconds: float) -> None:
+        self._perf_sql = sql
+        self._perf_seconds = seconds
+        self._perf_rows = 0
+
+    def execute(self, sql, parameters=()):
+        self._perf_flush()
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._perf_start(sql, time.perf_counter() - t0)
+            if self.description is None:
+                # No result set (DDL/DML); nothing will be fetched.
+                self._perf_flush()
+
+    def executemany(self, sql, seq_of_parameters):
+        self._perf_flush()
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._perf_start(sql, time.perf_counter() - t0)
+            self._perf_rows = max(0, self.rowcount)
+            self._perf_flush()
+
+    def executescript(self, sql_script):
+        self._perf_flush()
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._perf_start(sql_script, time.perf_counter() - t0)
+            self._perf_flush()
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._perf_seconds += time.perf_counter() - t0
+        if row is None:
+            self._perf_flush()
+        else:
+            self._perf_rows += 1
+        return row
+
+    def fetchmany(self, *args: Any):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(*args)
+        self._perf_seconds += time.perf_counter() - t0
+        self._perf_rows += len(rows)
+        if not rows:
+            self._perf_flush()
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._perf_seconds += time.perf_counter() - t0
+        self._perf_rows += len(rows)
+        self._perf_flush()
+        return rows
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._perf_seconds += time.perf_counter() - t0
+            self._perf_flush()
+            raise
+        self._perf_seconds += time.perf_counter() - t0
+        self._perf_rows += 1
+        return row
+
+    def close(self) -> None:
+        self._perf_flush()
+        super().close()
+
+    def __del__(self) -> None:
+        try:
+            self._perf_flush()
+        except Exception:
+            pass
+
+
+class PerfConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (including conn.execute's) are PerfCursors."""
+
+    def cursor(self, factory=PerfCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def install() -> None:
+    """Profile every Database connection opened from now on."""
+    from src.database import Database
+
+    Database.CONNECTION_FACTORY = PerfConnection
+
+
+class PerfMiddleware:
+    """ASGI middleware timing HTTP requests into `recorder` by route template."""
+
+    def __init__(self, app, perf: PerfRecorder = recorder) -> None:
+        self.app = app
+        self.perf = perf
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http" or not self.perf.enabled:
+            await self.app(scope, receive, send)
+            return
+        status = 0
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message.get("type") == "http.response.start":
+                status = int(message.get("status") or 0)
+            await send(message)
+
+        stats, token = self.perf.begin_request()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            status = status or 500
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route is None:
+                # Static mounts have no route; the router leaves their prefix in root_path.
+                route = f"{scope['root_path']}/*" if scope.get("root_path") else "(unmatched)"
+            self.perf.end_request(token, stats, scope.get("method", "GET"), route, status, time.perf_counter() - t0)
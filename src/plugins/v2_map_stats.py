@@ -8,6 +8,8 @@ from __future__ import annotations
 
 from typing import Any
 
+from src.analytics.player_dataset import PlayerDataset
+
 MIN_MATCHES = 3
 MIN_MENTION = 2
 
@@ -20,16 +22,15 @@ SIDE_GAP_THRESHOLD = 20.0
 
 class MapStatsPlugin:
     def __init__(self, db_or_conn: Any, username: str):
-        if hasattr(db_or_conn, "conn"):
-            self._conn = db_or_conn.conn
-        else:
-            self._conn = db_or_conn
+        # A Database, a sqlite3 connection, or a preloaded PlayerDataset.
+        self._source = db_or_conn
         self.username = str(username or "").strip()
         self._result: dict | None = None
 
     def analyze(self) -> dict:
-        match_rows = self._fetch_match_results()
-        round_rows = self._fetch_round_sides()
+        data = PlayerDataset.coerce(self._source, self.username)
+        match_rows = self._fetch_match_results(data)
+        round_rows = self._fetch_round_sides(data)
 
         if not match_rows:
             return self._empty_result("No ranked match data found")
@@ -94,36 +95,22 @@ class MapStatsPlugin:
         for finding in result["findings"]:
             print(f"  [{finding['severity'].upper()}] {finding['message']}")
 
-    def _fetch_match_results(self) -> list[tuple]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT smc.map_name, mdp.result, mdp.rank_points_delta
-            FROM match_detail_players mdp
-            JOIN scraped_match_cards smc ON smc.match_id = mdp.match_id
-            WHERE mdp.username = ?
-              AND mdp.match_type = 'Ranked'
-              AND smc.map_name IS NOT NULL
-            """,
-            (self.username,),
-        )
-        return cur.fetchall()
-
-    def _fetch_round_sides(self) -> list[tuple]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT smc.map_name, pr.side, pr.result
-            FROM player_rounds pr
-            JOIN scraped_match_cards smc ON smc.match_id = pr.match_id
-            WHERE pr.username = ?
-              AND pr.match_type = 'Ranked'
-              AND smc.map_name IS NOT NULL
-              AND pr.side IS NOT NULL
-            """,
-            (self.username,),
-        )
-        return cur.fetchall()
+    @staticmethod
+    def _fetch_match_results(data: PlayerDataset) -> list[tuple]:
+        rows = []
+        for m in data.matches:
+            map_name = data.map_name(m["match_id"])
+            if map_name is not None:
+                rows.append((map_name, m["result"], m["rank_points_delta"]))
+        return rows
+
+    @staticmethod
+    def _fetch_round_sides(data: PlayerDataset) -> list[tuple]:
+        return [
+            (r["map_name"], r["side"], r["result"])
+            for r in data.rounds
+            if r["map_name"] is not None and r["side"] is not None
+        ]
 
     @staticmethod
     def _aggregate(match_rows: list[tuple], round_rows: list[tuple]) -> list[dict]:
@@ -8,6 +8,8 @@ from __future__ import annotations
 
 from typing import Any
 
+from src.analytics.player_dataset import PlayerDataset
+
 MIN_ROUNDS = 5
 MIN_MENTION_ROUNDS = 3
 CORE_WIN_PCT_FLOOR = 40.0
@@ -19,10 +21,8 @@ DEF_BASELINE = 52.0
 
 class OperatorStatsPlugin:
     def __init__(self, db_or_conn: Any, username: str):
-        if hasattr(db_or_conn, "conn"):
-            self._conn = db_or_conn.conn
-        else:
-            self._conn = db_or_conn
+        # A Database, a sqlite3 connection, or a preloaded PlayerDataset.
+        self._source = db_or_conn
         self.username = str(username or "").strip()
         self._result: dict | None = None
 
@@ -105,27 +105,21 @@ class OperatorStatsPlugin:
             print(f"  [{finding['severity'].upper()}] {finding['message']}")
 
     def _fetch_operator_rounds(self) -> list[tuple]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                pr.operator,
-                pr.side,
-                pr.result,
-                pr.kills,
-                pr.deaths,
-                pr.first_blood,
-                pr.clutch_won,
-                pr.clutch_lost
-            FROM player_rounds pr
-            WHERE pr.username = ?
-              AND pr.match_type = 'Ranked'
-              AND pr.operator IS NOT NULL
-              AND pr.operator != ''
-            """,
-            (self.username,),
-        )
-        return cur.fetchall()
+        data = PlayerDataset.coerce(self._source, self.username)
+        return [
+            (
+                r["operator"],
+                r["side"],
+                r["result"],
+                r["kills"],
+                r["deaths"],
+                r["first_blood"],
+                r["clutch_won"],
+                r["clutch_lost"],
+            )
+            for r in data.rounds
+            if r["operator"] is not None and r["operator"] != ""
+        ]
 
     @staticmethod
     def _aggregate(rows: list[tuple]) -> list[dict]:
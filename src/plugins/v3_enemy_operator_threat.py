@@ -9,24 +9,25 @@ from __future__ import annotations
 
 from typing import Any
 
+from src.analytics.player_dataset import PlayerDataset
+
 MIN_ENCOUNTERS = 2
 
 
 class EnemyOperatorThreatPlugin:
     def __init__(self, db_or_conn: Any, username: str):
-        if hasattr(db_or_conn, "conn"):
-            self._conn = db_or_conn.conn
-        else:
-            self._conn = db_or_conn
+        # A Database, a sqlite3 connection, or a preloaded PlayerDataset.
+        self._source = db_or_conn
         self.username = str(username or "").strip()
         self._result: dict | None = None
 
     def analyze(self) -> dict:
-        baseline = self._fetch_baseline()
+        data = PlayerDataset.coerce(self._source, self.username)
+        baseline = self._fetch_baseline(data)
         if not baseline["total_rounds"]:
             return self._empty("No ranked round data found for this player.")
 
-        rows = self._fetch_threat_rows()
+        rows = self._fetch_threat_rows(data)
         if not rows:
             return self._empty("No deaths with resolved enemy operators found yet.")
 
@@ -103,55 +104,30 @@ class EnemyOperatorThreatPlugin:
                 f"{row['presence_pct']:>8.1f}% {sign}{row['win_delta']:>7.1f}%"
             )
 
-    def _fetch_baseline(self) -> dict:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                COUNT(*) AS total_rounds,
-                SUM(CASE WHEN pr.deaths = 1 THEN 1 ELSE 0 END) AS total_death_rounds,
-                SUM(CASE WHEN pr.result = 'victory' THEN 1 ELSE 0 END) AS total_wins
-            FROM player_rounds pr
-            WHERE pr.username = ?
-              AND pr.match_type = 'Ranked'
-            """,
-            (self.username,),
-        )
-        row = cur.fetchone()
-        total_rounds = int(row["total_rounds"] or 0)
-        total_wins = int(row["total_wins"] or 0)
+    @staticmethod
+    def _fetch_baseline(data: PlayerDataset) -> dict:
+        total_rounds = len(data.rounds)
+        total_wins = sum(1 for r in data.rounds if r["result"] == "victory")
         return {
             "total_rounds": total_rounds,
-            "total_death_rounds": int(row["total_death_rounds"] or 0),
+            "total_death_rounds": sum(1 for r in data.rounds if r["deaths"] == 1),
             "baseline_win_rate": round((total_wins / total_rounds * 100.0), 1) if total_rounds else 0.0,
         }
 
-    def _fetch_threat_rows(self) -> list[dict]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                killed_by_operator,
-                COUNT(*) as times_killed_by,
-                SUM(CASE WHEN result='defeat' THEN 1 ELSE 0 END) as round_losses
-            FROM player_rounds
-            WHERE player_id = (
-                    SELECT player_id
-                    FROM players
-                    WHERE LOWER(TRIM(username)) = LOWER(TRIM(?))
-                    ORDER BY player_id DESC
-                    LIMIT 1
-                )
-              AND deaths = 1
-              AND killed_by_operator IS NOT NULL
-              AND TRIM(killed_by_operator) != ''
-              AND match_type = 'Ranked'
-            GROUP BY killed_by_operator
-            """,
-            (self.username,),
-        )
-        cols = [d[0] for d in cur.description]
-        return [dict(zip(cols, row)) for row in cur.fetchall()]
+    @staticmethod
+    def _fetch_threat_rows(data: PlayerDataset) -> list[dict]:
+        grouped: dict[str, dict] = {}
+        for r in data.rounds:
+            killer = r["killed_by_operator"]
+            if r["deaths"] != 1 or killer is None or not str(killer).strip(" "):
+                continue
+            row = grouped.setdefault(
+                killer, {"killed_by_operator": killer, "times_killed_by": 0, "round_losses": 0}
+            )
+            row["times_killed_by"] += 1
+            if r["result"] == "defeat":
+                row["round_losses"] += 1
+        return [grouped[killer] for killer in sorted(grouped)]
 
     @staticmethod
     def _findings(threats: list[dict]) -> list[dict]:
@@ -9,6 +9,8 @@ from __future__ import annotations
 from collections import defaultdict
 from typing import Any
 
+from src.analytics.player_dataset import PlayerDataset
+
 BRACKETS = [
     (0,    1499,  "Copper/Bronze"),
     (1500, 1999,  "Bronze/Silver"),
@@ -42,10 +44,8 @@ def _fmt_match(map_name: str, result: str, my_rp: int, enemy_avg_rp: float) -> s
 
 class LobbyQualityPlugin:
     def __init__(self, db_or_conn: Any, username: str):
-        if hasattr(db_or_conn, "conn"):
-            self._conn = db_or_conn.conn
-        else:
-            self._conn = db_or_conn
+        # A Database, a sqlite3 connection, or a preloaded PlayerDataset.
+        self._source = db_or_conn
         self.username = username
         self._result: dict | None = None
 
@@ -120,51 +120,42 @@ class LobbyQualityPlugin:
     # ------------------------------------------------------------------
 
     def _fetch_match_lobby_data(self) -> list[dict]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                mdp_me.match_id,
-                mdp_me.result,
-                mdp_me.rank_points AS my_rp,
-                COALESCE(
-                    (
-                        SELECT smc2.map_name
-                        FROM scraped_match_cards smc2
-                        WHERE smc2.match_id = mdp_me.match_id
-                        ORDER BY smc2.id DESC
-                        LIMIT 1
-                    ),
-                    '?'
-                ) AS map_name,
-                AVG(CASE WHEN mdp_enemy.rank_points > :min_rp
-                         THEN mdp_enemy.rank_points ELSE NULL END)   AS enemy_avg_rp,
-                COUNT(CASE WHEN mdp_enemy.rank_points > :min_rp
-                           THEN 1 ELSE NULL END)                     AS valid_enemy_count,
-                AVG(CASE WHEN mdp_enemy.rank_points > :min_rp
-                         THEN mdp_enemy.kd_ratio ELSE NULL END)      AS enemy_avg_kd
-            FROM match_detail_players mdp_me
-            JOIN match_detail_players mdp_enemy
-                ON  mdp_me.match_id  = mdp_enemy.match_id
-                AND mdp_me.team_id  != mdp_enemy.team_id
-                AND mdp_enemy.username != ''
-            WHERE mdp_me.username = :username
-              AND mdp_me.match_type = 'Ranked'
-            GROUP BY mdp_me.match_id
-            HAVING valid_enemy_count >= 2
-            ORDER BY (
-                SELECT smc3.match_date
-                FROM scraped_match_cards smc3
-                WHERE smc3.match_id = mdp_me.match_id
-                ORDER BY smc3.id DESC
-                LIMIT 1
-            ) DESC
-            """,
-            {"min_rp": MIN_VALID_ENEMY_RP, "username": self.username},
-        )
-        columns = [d[0] for d in cur.description]
-        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+        data = PlayerDataset.coerce(self._source, self.username)
+        # One lobby per match, aggregated over every (my row, enemy row) pairing.
+        lobbies: dict[str, dict] = {}
+        for me in data.matches:
+            lobby = lobbies.get(me["match_id"])
+            if lobby is None:
+                lobby = lobbies[me["match_id"]] = {"me": me, "rp": [], "kd": []}
+            for enemy in data.opponents(me):
+                if enemy["username"] is None or enemy["username"] == "":
+                    continue
+                rp = enemy["rank_points"]
+                if rp is None or rp <= MIN_VALID_ENEMY_RP:
+                    continue
+                lobby["rp"].append(rp)
+                if enemy["kd_ratio"] is not None:
+                    lobby["kd"].append(enemy["kd_ratio"])
+
+        rows = []
+        for match_id, lobby in lobbies.items():
+            if len(lobby["rp"]) < 2:
+                continue
+            map_name = data.map_name(match_id)
+            rows.append({
+                "match_id":          match_id,
+                "result":            lobby["me"]["result"],
+                "my_rp":             lobby["me"]["rank_points"],
+                "map_name":          map_name if map_name is not None else "?",
+                "enemy_avg_rp":      sum(lobby["rp"]) / len(lobby["rp"]),
+                "valid_enemy_count": len(lobby["rp"]),
+                "enemy_avg_kd":      sum(lobby["kd"]) / len(lobby["kd"]) if lobby["kd"] else None,
+                "_date":             data.match_date(match_id),
+            })
+        # SQLite sorts NULL dates last under DESC.
+        rows.sort(key=lambda r: (r["_date"] is not None, r["_date"] or ""), reverse=True)
         for r in rows:
+            del r["_date"]
             r["my_rp"]        = int(r["my_rp"] or 0)
             r["enemy_avg_rp"] = round(float(r["enemy_avg_rp"] or 0), 0)
             r["enemy_avg_kd"] = round(float(r["enemy_avg_kd"] or 0), 2)
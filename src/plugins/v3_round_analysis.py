@@ -4,13 +4,16 @@ src/plugins/v3_round_analysis.py
 Analyzes per-round performance with inline citations of specific rounds
 where conditions were most apparent.
 
-Requires: player_rounds + round_outcomes + scraped_match_cards tables.
+Requires: player_rounds + round_outcomes + match_latest_card tables
+(read through a PlayerDataset).
 """
 
 from __future__ import annotations
 import sqlite3
 from typing import Any
 
+from src.analytics.player_dataset import PlayerDataset
+
 MIN_ROUNDS_FOR_ANALYSIS = 20
 MIN_FB_ROUNDS           = 5
 MIN_CLUTCH_ROUNDS       = 3
@@ -34,10 +37,8 @@ def _fmt_match(map_name: str, result: str, kills: int, deaths: int) -> str:
 
 class RoundAnalysisPlugin:
     def __init__(self, db_or_conn: Any, username: str):
-        if hasattr(db_or_conn, "conn"):
-            self._conn = db_or_conn.conn
-        else:
-            self._conn = db_or_conn
+        # A Database, a sqlite3 connection, or a preloaded PlayerDataset.
+        self._source = db_or_conn
         self.username = username
         self._result: dict | None = None
 
@@ -124,39 +125,28 @@ class RoundAnalysisPlugin:
     # ------------------------------------------------------------------
 
     def _fetch_rounds(self) -> list[dict]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                pr.match_id,
-                pr.round_id,
-                pr.side,
-                pr.operator,
-                pr.result,
-                pr.kills,
-                pr.deaths,
-                pr.first_blood,
-                pr.first_death,
-                pr.clutch_won,
-                pr.clutch_lost,
-                ro.end_reason,
-                ro.winner_side,
-                COALESCE(smc.map_name, '?') AS map_name,
-                CASE WHEN pr.result = 'victory' THEN 1 ELSE 0 END AS team_won
-            FROM player_rounds pr
-            JOIN round_outcomes ro
-                ON pr.match_id = ro.match_id
-                AND pr.round_id = ro.round_id
-            LEFT JOIN scraped_match_cards smc
-                ON pr.match_id = smc.match_id
-            WHERE pr.username = ?
-              AND pr.match_type = 'Ranked'
-            ORDER BY pr.match_id, pr.round_id
-            """,
-            (self.username,),
-        )
-        columns = [d[0] for d in cur.description]
-        return [dict(zip(columns, row)) for row in cur.fetchall()]
+        data = PlayerDataset.coerce(self._source, self.username)
+        return [
+            {
+                "match_id":    r["match_id"],
+                "round_id":    r["round_id"],
+                "side":        r["side"],
+                "operator":    r["operator"],
+                "result":      r["result"],
+                "kills":       r["kills"],
+                "deaths":      r["deaths"],
+                "first_blood": r["first_blood"],
+                "first_death": r["first_death"],
+                "clutch_won":  r["clutch_won"],
+                "clutch_lost": r["clutch_lost"],
+                "end_reason":  r["end_reason"],
+                "winner_side": r["winner_side"],
+                "map_name":    r["map_name"] if r["map_name"] is not None else "?",
+                "team_won":    1 if r["result"] == "victory" else 0,
+            }
+            for r in data.rounds
+            if r["has_outcome"]
+        ]
 
     # ------------------------------------------------------------------
     # Citation helpers
@@ -9,21 +9,22 @@ from __future__ import annotations
 from itertools import combinations
 from typing import Any
 
+from src.analytics.player_dataset import PlayerDataset
+
 MIN_RELIABLE_MATCHES = 5
 MIN_MENTION_MATCHES = 3
 
 
 class TeamAnalysisPlugin:
     def __init__(self, db_or_conn: Any, username: str):
-        if hasattr(db_or_conn, "conn"):
-            self._conn = db_or_conn.conn
-        else:
-            self._conn = db_or_conn
+        # A Database, a sqlite3 connection, or a preloaded PlayerDataset.
+        self._source = db_or_conn
         self.username = str(username or "").strip()
         self._result: dict | None = None
 
     def analyze(self) -> dict:
-        player_matches = self._fetch_player_matches()
+        data = PlayerDataset.coerce(self._source, self.username)
+        player_matches = self._fetch_player_matches(data)
         if not player_matches:
             return self._empty("No match data found for this player.")
 
@@ -34,7 +35,7 @@ class TeamAnalysisPlugin:
         match_ids = [m["match_id"] for m in player_matches]
         match_lookup = {m["match_id"]: m for m in player_matches}
 
-        teammates_by_match = self._fetch_teammates(match_ids)
+        teammates_by_match = self._fetch_teammates(data, match_ids)
         partner_stats = self._calc_partner_stats(match_lookup, teammates_by_match, baseline_wr)
 
         reliable = [p for p in partner_stats if p["matches"] >= MIN_RELIABLE_MATCHES]
@@ -113,57 +114,18 @@ class TeamAnalysisPlugin:
             tag = str(f.get("severity") or "info").upper()
             print(f"  [{tag}] {f.get('message', '')}")
 
-    def _fetch_player_matches(self) -> list[dict]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT mdp.match_id, mdp.team_id, mdp.result, mdp.rank_points,
-                   mdp.rank_points_delta, mdp.kills, mdp.deaths, mdp.kd_ratio,
-                   mdp.scraped_at
-            FROM match_detail_players mdp
-            WHERE mdp.username = ?
-              AND mdp.match_type = 'Ranked'
-            ORDER BY mdp.scraped_at DESC
-            """,
-            (self.username,),
-        )
-        cols = [d[0] for d in cur.description]
-        return [dict(zip(cols, row)) for row in cur.fetchall()]
-
-    def _fetch_teammates(self, match_ids: list[str]) -> dict[str, list[dict]]:
-        if not match_ids:
-            return {}
-
-        placeholders = ",".join("?" * len(match_ids))
-        cur = self._conn.cursor()
-        cur.execute(
-            f"""
-            SELECT
-                mdp.match_id,
-                mdp.username,
-                mdp.team_id,
-                mdp.result,
-                mdp.kills,
-                mdp.deaths,
-                mdp.kd_ratio,
-                mdp.rank_points,
-                mdp.rank_points_delta
-            FROM match_detail_players mdp
-            JOIN match_detail_players me
-                ON me.match_id = mdp.match_id
-                AND me.username = ?
-            WHERE mdp.match_id IN ({placeholders})
-              AND mdp.username != ?
-              AND mdp.team_id = me.team_id
-            """,
-            [self.username] + match_ids + [self.username],
-        )
-        cols = [d[0] for d in cur.description]
-        rows = [dict(zip(cols, row)) for row in cur.fetchall()]
+    @staticmethod
+    def _fetch_player_matches(data: PlayerDataset) -> list[dict]:
+        return [dict(m) for m in data.matches]
 
+    def _fetch_teammates(self, data: PlayerDataset, match_ids: list[str]) -> dict[str, list[dict]]:
         result: dict[str, list[dict]] = {}
-        for row in rows:
-            result.setdefault(row["match_id"], []).append(row)
+        for match_id in sorted(set(match_ids)):
+            for me in data.participants.get(match_id, ()):
+                if me["username"] != self.username:
+                    continue
+                for mate in data.same_team(me):
+                    result.setdefault(match_id, []).append(dict(mate))
         return result
 
     @staticmethod
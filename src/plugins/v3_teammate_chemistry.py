@@ -8,6 +8,8 @@ where the difference was most apparent.
 from __future__ import annotations
 from typing import Any
 
+from src.analytics.player_dataset import PlayerDataset
+
 MIN_SHARED_MATCHES_RELIABLE = 5
 MIN_SHARED_MATCHES_MENTION  = 3
 MIN_TOTAL_MATCHES           = 10
@@ -22,14 +24,14 @@ def _fmt_match(map_name: str, result: str, kills: int, deaths: int) -> str:
 
 class TeammateChemistryPlugin:
     def __init__(self, db_or_conn: Any, username: str):
-        if hasattr(db_or_conn, "conn"):
-            self._conn = db_or_conn.conn
-        else:
-            self._conn = db_or_conn
+        # A Database, a sqlite3 connection, or a preloaded PlayerDataset.
+        self._source = db_or_conn
         self.username = username
+        self._data: PlayerDataset | None = None
         self._result: dict | None = None
 
     def analyze(self) -> dict:
+        self._data = PlayerDataset.coerce(self._source, self.username)
         baseline = self._fetch_baseline()
         if baseline["total_matches"] < MIN_TOTAL_MATCHES:
             return self._empty(
@@ -112,52 +114,52 @@ class TeammateChemistryPlugin:
     # ------------------------------------------------------------------
 
     def _fetch_baseline(self) -> dict:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT COUNT(*) as total,
-                   SUM(CASE WHEN result = 'win' THEN 1 ELSE 0 END) as wins
-            FROM match_detail_players
-            WHERE username = ?
-              AND match_type = 'Ranked'
-            """, (self.username,)
-        )
-        row   = cur.fetchone()
-        total = row[0] if row else 0
-        wins  = row[1] if row else 0
+        total = len(self._data.matches)
+        wins  = sum(1 for m in self._data.matches if m["result"] == "win")
         return {
             "total_matches": total,
             "wins":          wins,
             "win_rate":      round(wins / total * 100, 1) if total else 0.0,
         }
 
+    def _teammate_pairs(self):
+        """(my match row, teammate row) for every same-team pairing, like a self-join."""
+        for me in self._data.matches:
+            for mate in self._data.same_team(me):
+                if mate["username"] != "":
+                    yield me, mate
+
     def _fetch_teammates(self) -> list[dict]:
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                mdp2.username                                              AS teammate,
-                COUNT(DISTINCT mdp1.match_id)                             AS shared_matches,
-                SUM(CASE WHEN mdp1.result = 'win' THEN 1 ELSE 0 END)     AS wins,
-                AVG(mdp2.kd_ratio)                                        AS avg_teammate_kd,
-                AVG(mdp2.kills)                                           AS avg_teammate_kills,
-                AVG(mdp2.rank_points)                                     AS avg_teammate_rp
-            FROM match_detail_players mdp1
-            JOIN match_detail_players mdp2
-                ON  mdp1.match_id = mdp2.match_id
-                AND mdp1.team_id  = mdp2.team_id
-                AND mdp1.username != mdp2.username
-            WHERE mdp1.username = ?
-              AND mdp2.username != ''
-              AND mdp1.match_type = 'Ranked'
-            GROUP BY mdp2.username
-            HAVING COUNT(DISTINCT mdp1.match_id) >= ?
-            ORDER BY shared_matches DESC
-            """,
-            (self.username, MIN_SHARED_MATCHES_MENTION),
-        )
-        columns = [d[0] for d in cur.description]
-        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+        grouped: dict[str, dict] = {}
+        for me, mate in self._teammate_pairs():
+            g = grouped.setdefault(
+                mate["username"],
+                {"match_ids": set(), "wins": 0, "kd": [], "kills": [], "rp": []},
+            )
+            g["match_ids"].add(me["match_id"])
+            if me["result"] == "win":
+                g["wins"] += 1
+            for key, col in (("kd", "kd_ratio"), ("kills", "kills"), ("rp", "rank_points")):
+                if mate[col] is not None:
+                    g[key].append(mate[col])
+
+        def avg(values: list) -> float | None:
+            return sum(values) / len(values) if values else None
+
+        rows = []
+        for teammate, g in grouped.items():
+            shared = len(g["match_ids"])
+            if shared < MIN_SHARED_MATCHES_MENTION:
+                continue
+            rows.append({
+                "teammate":           teammate,
+                "shared_matches":     shared,
+                "wins":               g["wins"],
+                "avg_teammate_kd":    avg(g["kd"]),
+                "avg_teammate_kills": avg(g["kills"]),
+                "avg_teammate_rp":    avg(g["rp"]),
+            })
+        rows.sort(key=lambda r: -r["shared_matches"])
         for r in rows:
             total = r["shared_matches"]
             r["win_rate"]           = round((r["wins"] or 0) / total * 100, 1) if total else 0.0
@@ -168,48 +170,29 @@ class TeammateChemistryPlugin:
 
     def _fetch_shared_matches(self, teammate: str, result_filter: str | None = None) -> list[dict]:
         """
-        Fetch individual match rows for player+teammate pair.
+        Individual match rows for player+teammate pair, newest first.
         result_filter: 'win' | 'loss' | None for all.
         """
-        cur = self._conn.cursor()
-        if result_filter:
-            cur.execute(
-                f"""
-                SELECT mdp1.match_id, mdp1.result, mdp1.kills, mdp1.deaths,
-                       COALESCE(smc.map_name, '?') AS map_name
-                FROM match_detail_players mdp1
-                JOIN match_detail_players mdp2
-                    ON  mdp1.match_id = mdp2.match_id
-                    AND mdp1.team_id  = mdp2.team_id
-                    AND mdp2.username = ?
-                LEFT JOIN scraped_match_cards smc ON mdp1.match_id = smc.match_id
-                WHERE mdp1.username = ? AND mdp1.result = ?
-                  AND mdp1.match_type = 'Ranked'
-                ORDER BY smc.match_date DESC
-                LIMIT {MAX_CITATIONS}
-                """,
-                (teammate, self.username, result_filter),
-            )
-        else:
-            cur.execute(
-                f"""
-                SELECT mdp1.match_id, mdp1.result, mdp1.kills, mdp1.deaths,
-                       COALESCE(smc.map_name, '?') AS map_name
-                FROM match_detail_players mdp1
-                JOIN match_detail_players mdp2
-                    ON  mdp1.match_id = mdp2.match_id
-                    AND mdp1.team_id  = mdp2.team_id
-                    AND mdp2.username = ?
-                LEFT JOIN scraped_match_cards smc ON mdp1.match_id = smc.match_id
-                WHERE mdp1.username = ?
-                  AND mdp1.match_type = 'Ranked'
-                ORDER BY smc.match_date DESC
-                LIMIT {MAX_CITATIONS}
-                """,
-                (teammate, self.username),
-            )
-        columns = [d[0] for d in cur.description]
-        return [dict(zip(columns, row)) for row in cur.fetchall()]
+        rows = []
+        for me in self._data.matches:
+            if result_filter and me["result"] != result_filter:
+                continue
+            for mate in self._data.same_team(me):
+                if mate["username"] == teammate:
+                    map_name = self._data.map_name(me["match_id"])
+                    rows.append({
+                        "match_id": me["match_id"],
+                        "result":   me["result"],
+                        "kills":    me["kills"],
+                        "deaths":   me["deaths"],
+                        "map_name": map_name if map_name is not None else "?",
+                        "_date":    self._data.match_date(me["match_id"]),
+                    })
+        # SQLite sorts NULL dates last under DESC.
+        rows.sort(key=lambda r: (r["_date"] is not None, r["_date"] or ""), reverse=True)
+        for r in rows:
+            del r["_date"]
+        return rows[:MAX_CITATIONS]
 
     @staticmethod
     def _cite_matches(matches: list[dict]) -> str:
@@ -11,9 +11,10 @@ that death is considered traded. If C kills A's killer, it's a direct refrag.
 from __future__ import annotations
 
 from datetime import datetime
-import json
 from typing import Any
 
+from src import card_payloads
+
 TRADE_WINDOW_SECONDS = 5.0
 MIN_DEATHS_FOR_RELIABLE = 8
 MAX_CITATIONS = 3
@@ -253,26 +254,21 @@ class TradeAnalysisPlugin:
     def _fetch_matches(self) -> list[dict]:
         cur = self._conn.cursor()
         cur.execute(
-            """
-            SELECT match_id, map_name, mode, rounds_json
+            f"""
+            SELECT id, match_id, map_name, mode
             FROM scraped_match_cards
             WHERE username = ?
-              AND rounds_json IS NOT NULL
-              AND TRIM(rounds_json) != ''
-              AND TRIM(rounds_json) != '[]'
+              AND {card_payloads.present_sql("rounds")}
             ORDER BY id DESC
             """,
             (self.username,),
         )
+        items = [dict(row) for row in cur.fetchall() if _safe_mode_ranked(row["mode"])]
+        payloads = card_payloads.load(self._conn, [item["id"] for item in items], ("rounds",))
         out = []
-        for row in cur.fetchall():
-            item = dict(row)
-            if not _safe_mode_ranked(item.get("mode")):
-                continue
-            try:
-                rounds = json.loads(item.get("rounds_json") or "[]")
-            except json.JSONDecodeError:
-                rounds = []
+        for item in items:
+            stored = payloads.get(item["id"], {}).get("rounds")
+            rounds = stored.json([]) if stored is not None else []
             if not isinstance(rounds, list) or not rounds:
                 continue
             out.append(
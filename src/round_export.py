@@ -0,0 +1,243 @@
+"""
+Bulk export of round-level rows: player_rounds joined with round_outcomes and the
+match's latest card metadata, for one player's workspace scope.
+
+Rows are read in keyset batches ordered by `pr_id`, so an export holds one batch
+in memory at a time and can resume from any `pr_id` it already delivered:
+`after_id` is the last `pr_id` received. Each batch is an independent query, which
+lets the web app run them on pooled reader connections between sends.
+
+Encoders turn batches into bytes for NDJSON, CSV or an Arrow IPC stream. Arrow
+needs `pyarrow`; without it `make_encoder("arrow")` raises RuntimeError.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # optional; only the arrow format needs it
+    pyarrow = None
+
+EXPORT_FORMATS = ("ndjson", "csv", "arrow")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+FILE_EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "arrow": "arrows"}
+DEFAULT_BATCH_SIZE = 2000
+MAX_BATCH_SIZE = 20000
+
+# (column, select expression, arrow type name); pr_id first, it is the resume key.
+EXPORT_COLUMNS: Sequence[tuple] = (
+    ("pr_id", "pr.id", "int64"),
+    ("player_id", "pr.player_id", "int64"),
+    ("match_id", "pr.match_id", "string"),
+    ("round_id", "pr.round_id", "int64"),
+    ("username", "pr.username", "string"),
+    ("player_id_tracker", "pr.player_id_tracker", "string"),
+    ("team_id", "pr.team_id", "int64"),
+    ("side", "pr.side", "string"),
+    ("operator", "pr.operator", "string"),
+    ("operator_key", "pr.operator_key", "string"),
+    ("killed_by_player_id", "pr.killed_by_player_id", "string"),
+    ("killed_by_operator", "pr.killed_by_operator", "string"),
+    ("result", "pr.result", "string"),
+    ("is_disconnected", "pr.is_disconnected", "int64"),
+    ("kills", "pr.kills", "int64"),
+    ("deaths", "pr.deaths", "int64"),
+    ("assists", "pr.assists", "int64"),
+    ("headshots", "pr.headshots", "int64"),
+    ("first_blood", "pr.first_blood", "int64"),
+    ("first_death", "pr.first_death", "int64"),
+    ("clutch_won", "pr.clutch_won", "int64"),
+    ("clutch_lost", "pr.clutch_lost", "int64"),
+    ("hs_pct", "pr.hs_pct", "float64"),
+    ("esr", "pr.esr", "float64"),
+    ("match_type", "pr.match_type", "string"),
+    ("match_type_key", "pr.match_type_key", "string"),
+    ("winner_side", "ro.winner_side", "string"),
+    ("end_reason", "ro.end_reason", "string"),
+    ("card_id", "lc.card_id", "int64"),
+    ("map_name", "lc.map_name", "string"),
+    ("card_mode", "lc.mode", "string"),
+    ("mode_key", "lc.mode_key", "string"),
+    ("match_date", "lc.match_date", "string"),
+    ("match_ts", "lc.match_ts", "int64"),
+    ("scraped_at", "lc.scraped_at", "string"),
+)
+COLUMN_NAMES = [name for name, _, _ in EXPORT_COLUMNS]
+
+
+def fetch_batch(
+    cursor,
+    player_id: int,
+    match_ids_json: str,
+    *,
+    after_id: int = 0,
+    limit: int = DEFAULT_BATCH_SIZE,
+    search: str = "",
+) -> List[Dict[str, Any]]:
+    """
+    The next `limit` rows with pr_id > `after_id`. `match_ids_json` is the scope's
+    match ids as one JSON array, bound as a single parameter however large it is.
+    `search` keeps rows whose operator or username contains it, as the workspace does.
+    """
+    select = ",\n            ".join(f"{expr} AS {name}" for name, expr, _ in EXPORT_COLUMNS)
+    sql = f"""
+        SELECT
+            {select}
+        FROM player_rounds pr
+        JOIN match_latest_card lc
+          ON lc.match_id = pr.match_id
+        LEFT JOIN round_outcomes ro
+          ON ro.player_id = pr.player_id
+         AND ro.match_id = pr.match_id
+         AND ro.round_id = pr.round_id
+        WHERE pr.player_id = ?
+          AND pr.id > ?
+          AND pr.match_id IN (SELECT value FROM json_each(?))
+    """
+    params: List[Any] = [int(player_id), int(after_id), match_ids_json]
+    search_key = str(search or "").strip().lower()
+    if search_key:
+        sql += " AND (LOWER(COALESCE(pr.operator, '')) LIKE ? OR LOWER(COALESCE(pr.username, '')) LIKE ?)"
+        like = f"%{search_key}%"
+        params.extend([like, like])
+    sql += " ORDER BY pr.id LIMIT ?"
+    params.append(max(1, int(limit)))
+    cursor.execute(sql, tuple(params))
+    # round_outcomes is not unique per round; a round stored twice keeps its first outcome.
+    out: List[Dict[str, Any]] = []
+    last_id = None
+    for row in cursor.fetchall():
+        item = dict(row)
+        if item["pr_id"] == last_id:
+            continue
+        last_id = item["pr_id"]
+        out.append(item)
+    return out
+
+
+def iter_batches(cursor, player_id: int, match_ids: Sequence[str], **kwargs: Any) -> Iterator[List[Dict[str, Any]]]:
+    """Every batch of a scope, for callers that own a connection (scripts, tests)."""
+    match_ids_json = json.dumps(list(match_ids))
+    after_id = int(kwargs.pop("after_id", 0) or 0)
+    while True:
+        batch = fetch_batch(cursor, player_id, match_ids_json, after_id=after_id, **kwargs)
+        if not batch:
+            return
+        yield batch
+        after_id = batch[-1]["pr_id"]
+
+
+class _NdjsonEncoder:
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        return "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows).encode("utf-8")
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class _CsvEncoder:
+    def __init__(self, with_header: bool = True) -> None:
+        self.with_header = with_header
+
+    def _write(self, rows: List[List[Any]]) -> bytes:
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(rows)
+        return buf.getvalue().encode("utf-8")
+
+    def header(self) -> bytes:
+        return self._write([COLUMN_NAMES]) if self.with_header else b""
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        return self._write([[row.get(name) for name in COLUMN_NAMES] for row in rows])
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class _ArrowEncoder:
+    def __init__(self) -> None:
+        self.schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, _, kind in EXPORT_COLUMNS])
+        self.sink = io.BytesIO()
+        self.writer = pyarrow.ipc.new_stream(self.sink, self.schema)
+
+    def _drain(self) -> bytes:
+        data = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return data
+
+    def header(self) -> bytes:
+        return self._drain()
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        self.writer.write_batch(pyarrow.RecordBatch.from_pylist(rows, schema=self.schema))
+        return self._drain()
+
+    def footer(self) -> bytes:
+        self.writer.close()
+        return self._drain()
+
+
+def make_encoder(fmt: str, *, csv_header: bool = True):
+    """An encoder with header()/encode(rows)/footer() returning bytes for `fmt`."""
+    if fmt == "ndjson":
+        return _NdjsonEncoder()
+    if fmt == "csv":
+        return _CsvEncoder(with_header=csv_header)
+    if fmt == "arrow":
+        if pyarrow is None:
+            raise RuntimeError("Arrow export needs pyarrow (pip install pyarrow)")
+        return _ArrowEncoder()
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def resume_point(path: str, fmt: str) -> Tuple[int, int]:
+    """
+    Where to pick up a partial NDJSON or CSV export file: (after_id, keep_bytes),
+    the pr_id of its last complete row and the file length through that row's
+    newline. A line cut off mid-write is dropped. (0, 0) when there are no rows.
+    """
+    if fmt not in ("ndjson", "csv"):
+        raise ValueError(f"Cannot resume a {fmt} export file")
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, io.SEEK_END)
+            pos = f.tell()
+            tail = b""
+            # Read backwards until the last complete line is in hand.
+            while pos > 0:
+                step = min(65536, pos)
+                pos -= step
+                f.seek(pos)
+                tail = f.read(step) + tail
+                end = tail.rfind(b"\n")
+                if end < 0:
+                    continue
+                start = tail.rfind(b"\n", 0, end) + 1
+                if start == 0 and pos > 0:
+                    continue
+                line = tail[start:end]
+                keep = pos + end + 1
+                try:
+                    if fmt == "ndjson":
+                        return int(json.loads(line)["pr_id"]), keep
+                    return int(next(csv.reader([line.decode("utf-8")]))[0]), keep
+                except (ValueError, KeyError, IndexError, StopIteration):
+                    # The CSV header (or an unreadable line): nothing to skip past it.
+                    return 0, keep
+    except FileNotFoundError:
+        pass
+    return 0, 0
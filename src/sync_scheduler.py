@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.error import HTTPError
+
+from src.async_api_client import AsyncTrackerAPIClient
+from src.database import Database
+
+PLAYER_JOB_KINDS = ("match_list", "profile", "maps", "operators")
+
+
+def _job_key(kind: str, subject: str) -> str:
+    return f"{kind}:{subject}"
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class SyncScheduler:
+    """
+    Sync several tracked players as one interleaved job queue.
+
+    Every unit of network work (profile, map stats, operator stats, match list,
+    match detail) is a row in `sync_jobs`. Match details are keyed by match_id
+    rather than by player, so a match shared by stack-mates is fetched once and
+    saved for each owner. All requests draw from the client's shared limiter, so
+    the worker count only bounds concurrency; the rate budget is shared by all of them.
+    Finished jobs are recorded as they complete, and `run(resume=True)` picks up
+    the newest unfinished run for the same players.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        client: AsyncTrackerAPIClient,
+        persist_profile: Callable[[str, Dict[str, Any], List[Dict], List[Dict]], Any],
+        initial_match_cap: Optional[int] = 20,
+        default_match_cap: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_attempts: int = 3,
+        show_progress: bool = True,
+    ):
+        self.db = db
+        self.client = client
+        self.persist_profile = persist_profile
+        self.initial_match_cap = initial_match_cap
+        self.default_match_cap = default_match_cap
+        self.workers = max(1, int(workers or getattr(client, "max_in_flight", 4)))
+        self.max_attempts = max(1, int(max_attempts))
+        self.show_progress = show_progress
+        self.run_id: Optional[int] = None
+        self.resumed = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._details: Dict[str, Dict[str, Any]] = {}
+        self._player_ids: Dict[str, int] = {}
+        self._done_count = 0
+
+    def _log(self, message: str) -> None:
+        if self.show_progress:
+            print(f"[SYNC] {message}")
+
+    # ------------------------------------------------------------------
+    # Job bookkeeping
+    # ------------------------------------------------------------------
+    def _add_job(self, job_key: str, kind: str, username: Optional[str] = None,
+                 match_id: Optional[str] = None, owners: Optional[List[str]] = None,
+                 meta: Optional[Dict[str, Any]] = None) -> bool:
+        created = self.db.add_sync_job(
+            self.run_id, job_key, kind, username=username, match_id=match_id, owners=owners, meta=meta
+        )
+        job = self._jobs.get(job_key)
+        if created or job is None:
+            self._jobs[job_key] = {
+                "job_key": job_key,
+                "kind": kind,
+                "username": username,
+                "match_id": match_id,
+                "status": "pending",
+                "attempts": 0,
+                "owners": sorted(set(owners or [])),
+                "meta": meta,
+                "result": None,
+            }
+        elif owners:
+            job["owners"] = sorted(set(job["owners"]) | set(owners))
+        return created
+
+    def _finish_job(self, job: Dict[str, Any], status: str, result: Any = None,
+                    error: Optional[str] = None, count_attempt: bool = False) -> None:
+        job["status"] = status
+        if result is not None:
+            job["result"] = result
+        if error is not None:
+            job["error"] = error
+        self.db.update_sync_job(
+            self.run_id, job["job_key"], status, result=result, error=error, count_attempt=count_attempt
+        )
+        self._done_count += 1
+
+    def _match_lists_pending(self) -> bool:
+        return any(job["kind"] == "match_list" and job["status"] == "pending" for job in self._jobs.values())
+
+    def _seed(self, usernames: List[str]) -> None:
+        # Kind-major order interleaves players: every match list starts before
+        # any player's profile, so detail discovery overlaps the stat fetches.
+        for kind in PLAYER_JOB_KINDS:
+            for username in usernames:
+                meta = None
+                if kind == "match_list":
+                    last_synced_at = self.db.get_player_last_match_synced_at(username)
+                    is_initial = last_synced_at is None
+                    meta = {
+                        "initial": is_initial,
+                        "since_date": None if is_initial else last_synced_at,
+                        "cap": self.initial_match_cap if is_initial else self.default_match_cap,
+                    }
+                self._add_job(_job_key(kind, username), kind, username=username, meta=meta)
+
+    # ------------------------------------------------------------------
+    # Job handlers
+    # ------------------------------------------------------------------
+    async def _run_profile(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        username = job["username"]
+        profile = await self.client.get_profile(username)
+        season_raw = profile.get("season_stats") or {}
+        if not season_raw:
+            raise RuntimeError("Season stats missing")
+        tracker_uuid = profile.get("uuid")
+        if tracker_uuid:
+            self.db.update_player_tracker_uuid(username, tracker_uuid)
+        return {"season_stats": self.client.season_stats_to_snapshot(season_raw)}
+
+    async def _run_maps(self, job: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await self.client.get_map_stats(job["username"])
+
+    async def _run_operators(self, job: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await self.client.get_operator_stats(job["username"])
+
+    async def _run_match_list(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        username = job["username"]
+        meta = job.get("meta") or {}
+        cap = meta.get("cap")
+        pages = max(1, (cap + 19) // 20) if cap is not None else None
+        matches = await self.client.get_all_matches(username, max_pages=pages, since_date=meta.get("since_date"))
+        if cap is not None:
+            matches = matches[:cap]
+
+        existing_ids = self.db.get_existing_match_detail_ids(self._player_ids[username])
+        queued = 0
+        shared = 0
+        for match in matches:
+            match_id = match.get("match_id")
+            if not match_id or match_id in existing_ids:
+                continue
+            key = _job_key("detail", match_id)
+            prior = self._jobs.get(key)
+            created = self._add_job(key, "detail", match_id=match_id, owners=[username], meta={"match_meta": match})
+            if created:
+                self._queue.put_nowait(key)
+                queued += 1
+                continue
+            shared += 1
+            if prior is not None and prior["status"] == "done" and username not in (prior.get("result") or {}).get("saved_for", []):
+                # Detail already fetched for another owner before this list arrived.
+                detail = self._details.get(match_id)
+                if detail is not None:
+                    self._save_detail_for(prior, detail, [username])
+                else:
+                    # Fetched in an earlier process (or no longer held); fetch again for the new owner.
+                    prior["status"] = "pending"
+                    self.db.update_sync_job(self.run_id, key, "pending")
+                    self._queue.put_nowait(key)
+        return {"listed": len(matches), "queued": queued, "shared": shared}
+
+    def _save_detail_for(self, job: Dict[str, Any], detail: Dict[str, Any], owners: List[str]) -> None:
+        result = dict(job.get("result") or {})
+        saved_for = set(result.get("saved_for") or [])
+        rounds = int(result.get("round_rows") or 0)
+        for owner in owners:
+            if owner in saved_for:
+                continue
+            summary = self.db.save_full_match_detail_history(self._player_ids[owner], [detail])
+            rounds += int(summary.get("round_rows", 0))
+            saved_for.add(owner)
+        result["saved_for"] = sorted(saved_for)
+        result["round_rows"] = rounds
+        job["result"] = result
+        self.db.update_sync_job(self.run_id, job["job_key"], "done", result=result)
+
+    async def _run_detail(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        match_id = job["match_id"]
+        detail = await self.client.get_match_detail(match_id)
+        detail["match_meta"] = (job.get("meta") or {}).get("match_meta") or {}
+        if self._match_lists_pending():
+            # A match list still in flight may add an owner; keep the detail until they all finish.
+            self._details[match_id] = detail
+        # Owners may have grown while the request was in flight; read them now.
+        self._save_detail_for(job, detail, list(self._jobs[job["job_key"]]["owners"]))
+        return job["result"]
+
+    # ------------------------------------------------------------------
+    # Snapshot + per-player finalization
+    # ------------------------------------------------------------------
+    def _maybe_persist_snapshot(self, username: str) -> None:
+        key = _job_key("snapshot", username)
+        snap = self._jobs.get(key)
+        if snap is not None and snap["status"] == "done":
+            return
+        parts = {kind: self._jobs.get(_job_key(kind, username)) for kind in ("profile", "maps", "operators")}
+        if any(part is None or part["status"] == "pending" for part in parts.values()):
+            return
+        if snap is None:
+            self._add_job(key, "snapshot", username=username)
+            snap = self._jobs[key]
+        profile = parts["profile"]
+        if profile["status"] != "done":
+            self._finish_job(snap, "failed", error="profile fetch failed")
+            return
+        try:
+            self.persist_profile(
+                username,
+                (profile.get("result") or {}).get("season_stats") or {},
+                parts["maps"].get("result") or [],
+                parts["operators"].get("result") or [],
+            )
+        except Exception as exc:
+            self._finish_job(snap, "failed", error=str(exc))
+            self._log(f"{username}: snapshot failed: {exc}")
+            return
+        self._finish_job(snap, "done", result={"saved": True})
+        self._log(f"{username}: profile snapshot saved")
+
+    def _finalize_player(self, username: str) -> Dict[str, Any]:
+        list_job = self._jobs.get(_job_key("match_list", username)) or {}
+        snap = self._jobs.get(_job_key("snapshot", username)) or {}
+        errors = [
+            f"{job['kind']} failed: {job.get('error') or 'gave up'}"
+            for kind in PLAYER_JOB_KINDS
+            for job in [self._jobs.get(_job_key(kind, username)) or {}]
+            if job.get("status") == "failed"
+        ]
+        errors.extend(
+            f"detail {job['match_id']} failed: {job.get('error') or 'gave up'}"
+            for job in self._jobs.values()
+            if job["kind"] == "detail" and job["status"] == "failed" and username in (job.get("owners") or [])
+        )
+        owned = [
+            job for job in self._jobs.values()
+            if job["kind"] == "detail" and job["status"] == "done"
+            and username in ((job.get("result") or {}).get("saved_for") or [])
+        ]
+        stamps = [
+            (dt, ts)
+            for job in owned
+            for ts in [((job.get("meta") or {}).get("match_meta") or {}).get("timestamp")]
+            for dt in [_parse_ts(ts)]
+            if dt is not None
+        ]
+        if list_job.get("status") == "done":
+            if stamps:
+                self.db.update_player_last_match_synced_at(username, max(stamps)[0].isoformat())
+            if (list_job.get("meta") or {}).get("initial"):
+                self.db.update_backfill_state(
+                    username,
+                    oldest_match_synced_at=min(stamps)[0].isoformat() if stamps else None,
+                    backfill_next_page=1,
+                    backfill_complete=False,
+                )
+        return {
+            "username": username,
+            "ok": snap.get("status") == "done",
+            "matches": len(owned),
+            "round_rows": sum(int((job.get("result") or {}).get("round_rows") or 0) for job in owned),
+            "errors": errors,
+        }
+
+    # ------------------------------------------------------------------
+    # Run loop
+    # ------------------------------------------------------------------
+    async def _worker(self) -> None:
+        handlers = {
+            "profile": self._run_profile,
+            "maps": self._run_maps,
+            "operators": self._run_operators,
+            "match_list": self._run_match_list,
+            "detail": self._run_detail,
+        }
+        while True:
+            key = await self._queue.get()
+            try:
+                job = self._jobs[key]
+                if job["status"] != "pending":
+                    continue
+                try:
+                    result = await handlers[job["kind"]](job)
+                except Exception as exc:
+                    job["attempts"] = int(job.get("attempts") or 0) + 1
+                    not_found = isinstance(exc, HTTPError) and exc.code == 404
+                    if not_found or job["attempts"] >= self.max_attempts:
+                        self._finish_job(job, "failed", error=str(exc), count_attempt=True)
+                        if job["kind"] != "detail":
+                            self._log(f"{job['username']}: {job['kind']} failed: {exc}")
+                    else:
+                        self.db.update_sync_job(self.run_id, key, "pending", error=str(exc), count_attempt=True)
+                        self._queue.put_nowait(key)
+                else:
+                    if job["kind"] == "detail":
+                        job["status"] = "done"
+                        self._done_count += 1
+                    else:
+                        self._finish_job(job, "done", result=result)
+                if job["kind"] in ("profile", "maps", "operators"):
+                    self._maybe_persist_snapshot(job["username"])
+                if job["kind"] == "match_list" and not self._match_lists_pending():
+                    # No new owners can appear now; details already saved are not needed again.
+                    self._details.clear()
+                if self.show_progress and job["kind"] == "detail":
+                    pending = sum(1 for j in self._jobs.values() if j["status"] == "pending")
+                    print(f"\r[SYNC] jobs done {self._done_count}, pending {pending}   ", end="")
+            finally:
+                self._queue.task_done()
+
+    async def run(self, usernames: List[str], resume: bool = True) -> Dict[str, Any]:
+        """Sync `usernames` and return a per-player summary."""
+        started = time.monotonic()
+        usernames = list(dict.fromkeys(usernames))
+        for username in usernames:
+            player = self.db.get_player(username)
+            if not player:
+                raise RuntimeError(f"Player '{username}' is not tracked")
+            self._player_ids[username] = int(player["player_id"])
+
+        self._jobs = {}
+        self._details = {}
+        self._done_count = 0
+        self._queue = asyncio.Queue()
+        open_run = self.db.get_open_sync_run()
+        if open_run and resume and sorted(open_run["usernames"]) == sorted(usernames):
+            self.run_id = int(open_run["run_id"])
+            self.resumed = True
+            for job in self.db.get_sync_jobs(self.run_id):
+                self._jobs[job["job_key"]] = job
+        else:
+            if open_run:
+                self.db.finish_sync_run(int(open_run["run_id"]), status="abandoned")
+            self.run_id = self.db.create_sync_run(usernames)
+            self.resumed = False
+            self._seed(usernames)
+
+        if self.resumed:
+            done = sum(1 for job in self._jobs.values() if job["status"] != "pending")
+            self._log(f"Resuming run {self.run_id}: {done}/{len(self._jobs)} jobs already finished")
+        for username in usernames:
+            self._maybe_persist_snapshot(username)
+        for key, job in self._jobs.items():
+            if job["status"] == "pending" and job["kind"] != "snapshot":
+                self._queue.put_nowait(key)
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await self._queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        if self.show_progress:
+            print("")
+
+        players = [self._finalize_player(username) for username in usernames]
+        details = [job for job in self._jobs.values() if job["kind"] == "detail"]
+        self.db.finish_sync_run(self.run_id)
+        return {
+            "run_id": self.run_id,
+            "resumed": self.resumed,
+            "players": players,
+            "succeeded": sum(1 for p in players if p["ok"]),
+            "failed": sum(1 for p in players if not p["ok"]),
+            "details_fetched": sum(1 for job in details if job["status"] == "done"),
+            "details_failed": sum(1 for job in details if job["status"] == "failed"),
+            "shared_matches": sum(1 for job in details if len(job.get("owners") or []) > 1),
+            "elapsed_seconds": round(time.monotonic() - started, 2),
+        }
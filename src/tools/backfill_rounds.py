@@ -12,6 +12,7 @@ import os
 from pathlib import Path
 from typing import Any
 
+from src import card_payloads
 from src.database import Database
 
 
@@ -36,13 +37,10 @@ def pending_count(
 ) -> int:
     cursor = db.conn.cursor()
     params: list[Any] = []
-    query = """
+    query = f"""
         SELECT COUNT(*)
         FROM scraped_match_cards
-        WHERE summary_json IS NOT NULL
-          AND TRIM(summary_json) != ''
-          AND TRIM(summary_json) != '{}'
-          AND LOWER(TRIM(summary_json)) != 'null'
+        WHERE {card_payloads.present_sql("summary")}
           AND match_id IS NOT NULL
           AND TRIM(match_id) != ''
           AND (COALESCE(has_rounds, 0) = 0 OR COALESCE(has_outcomes, 0) = 0)
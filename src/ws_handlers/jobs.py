@@ -0,0 +1,65 @@
+import asyncio
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+job_manager = None
+
+
+def configure_jobs(*, job_manager_dep) -> None:
+    global job_manager
+    job_manager = job_manager_dep
+
+
+async def stream_jobs(websocket: WebSocket) -> None:
+    """
+    Push job snapshots as they change.
+
+    On connect the client gets {"type": "jobs_snapshot", "jobs": [...]} with the
+    recent jobs, then one {"type": "job", "job": {...}} per state change or
+    progress tick. Clients may send {"type": "cancel", "job_id": N}.
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_job(snapshot: dict) -> None:
+        # Called from job worker threads.
+        loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+
+    async def pump() -> None:
+        while True:
+            snapshot = await queue.get()
+            await websocket.send_json({"type": "job", "job": snapshot})
+
+    job_manager.add_listener(on_job)
+    sender = None
+    try:
+        jobs = await asyncio.to_thread(job_manager.list, None, None, 50)
+        await websocket.send_json({"type": "jobs_snapshot", "jobs": jobs})
+        sender = asyncio.create_task(pump())
+        while True:
+            data = await websocket.receive_json()
+            if data.get("type") == "cancel":
+                try:
+                    job_id = int(data.get("job_id"))
+                except (TypeError, ValueError):
+                    await websocket.send_json({"type": "error", "message": "cancel needs a numeric job_id"})
+                    continue
+                job = await asyncio.to_thread(job_manager.cancel, job_id)
+                if job is None:
+                    await websocket.send_json({"type": "error", "message": f"Job {job_id} not found"})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        try:
+            await websocket.send_json({"type": "error", "message": str(e)})
+        except Exception:
+            pass
+    finally:
+        job_manager.remove_listener(on_job)
+        if sender is not None:
+            sender.cancel()
+
+
+def register_jobs_routes(app) -> None:
+    app.websocket("/ws/jobs")(stream_jobs)
@@ -5,6 +5,10 @@ import re
 from fastapi import WebSocket, WebSocketDisconnect
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
 
+from src.browser_capture import CaptureMode
+
+# Awaitable database facade (src.db_access.AsyncDatabase): reads use the reader pool
+# and saves queue on the writer thread, so the progress stream never blocks on SQLite.
 db = None
 
 
@@ -55,6 +59,9 @@ async def scrape_match_history(
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         )
         page = await context.new_page()
+        # Rows are read and clicked in the DOM; the v2 summary XHR is captured alongside.
+        # A debug browser is for clearing challenges by hand; block nothing there.
+        capture = await CaptureMode(("profile_dom", "v2_match"), mode="off" if debug_browser else None).attach(page)
 
         try:
             url = f"https://r6.tracker.network/r6siege/profile/ubi/{username}/matches"
@@ -438,8 +445,8 @@ async def scrape_match_history(
             existing_match_ids = set()
             fully_scraped_match_ids = set()
             try:
-                existing_match_ids = db.get_existing_scraped_match_ids(username)
-                fully_scraped_match_ids = db.get_fully_scraped_match_ids(username)
+                existing_match_ids = await db.get_existing_scraped_match_ids(username)
+                fully_scraped_match_ids = await db.get_fully_scraped_match_ids(username)
                 await websocket.send_json(
                     {
                         "type": "debug",
@@ -480,7 +487,7 @@ async def scrape_match_history(
                 checkpoint_filter_key = ",".join(sorted(allowed_types_norm)) if allowed_types_norm else "*"
                 resume_skip_remaining = 0
                 try:
-                    checkpoint_seed = db.get_scrape_checkpoint_skip_count(
+                    checkpoint_seed = await db.get_scrape_checkpoint_skip_count(
                         username,
                         checkpoint_mode_key,
                         checkpoint_filter_key,
@@ -488,7 +495,7 @@ async def scrape_match_history(
                     if checkpoint_seed > 0:
                         resume_skip_remaining = checkpoint_seed
                     else:
-                        resume_skip_remaining = db.count_fully_scraped_match_ids(username, allowed_types_norm)
+                        resume_skip_remaining = await db.count_fully_scraped_match_ids(username, allowed_types_norm)
                 except Exception:
                     resume_skip_remaining = 0
                 resume_skip_checkpoint = resume_skip_remaining
@@ -1430,8 +1437,8 @@ async def scrape_match_history(
             try:
                 save_payload = list(matches_data)
                 save_payload.extend(matches_backfill)
-                db.save_scraped_match_cards(username, save_payload)
-                unpack_stats = db.unpack_pending_scraped_match_cards(username=username, limit=5000)
+                await db.save_scraped_match_cards(username, save_payload)
+                unpack_stats = await db.unpack_pending_scraped_match_cards(username=username, limit=5000)
                 await websocket.send_json(
                     {
                         "type": "matches_saved",
@@ -1449,7 +1456,7 @@ async def scrape_match_history(
                 )
                 if full_backfill:
                     try:
-                        db.set_scrape_checkpoint_skip_count(
+                        await db.set_scrape_checkpoint_skip_count(
                             username,
                             checkpoint_mode_key,
                             checkpoint_filter_key,
@@ -1481,6 +1488,7 @@ async def scrape_match_history(
                 )
 
         finally:
+            print(f"[CAPTURE] Match scrape {username}: {capture.report()}")
             if browser:
                 await browser.close()
 
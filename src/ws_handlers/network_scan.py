@@ -1,21 +1,157 @@
 from collections import deque
+from datetime import datetime, timezone
 import random
 import re
+import time
 import traceback
 
 from fastapi import WebSocket, WebSocketDisconnect
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
 
+from src.browser_capture import CaptureMode
+from src.database import Database
+from src.jakal_scraper.scraper.pool import PagePool
+
 error_tracker = None
 track_call = None
 get_rate_status = None
+db = None
+governor = None
+
+SCAN_SOURCES = ("auto", "local", "scrape")
+# Options that change the graph a scan produces; a run only resumes when they match.
+SCAN_RUN_OPTION_KEYS = ("source", "min_matches", "max_neighbors", "queue")
+SCAN_MAX_PAGES = 4
+SCAN_DEFAULT_CACHE_TTL_HOURS = 24.0
+SCAN_PROFILE_TIMEOUT_S = 120.0
 
 
-def configure_network_scan(*, error_tracker_dep, track_call_dep, get_rate_status_dep) -> None:
-    global error_tracker, track_call, get_rate_status
+def configure_network_scan(
+    *, error_tracker_dep, track_call_dep, get_rate_status_dep, db_dep=None, governor_dep=None
+) -> None:
+    global error_tracker, track_call, get_rate_status, db, governor
     error_tracker = error_tracker_dep
     track_call = track_call_dep
     get_rate_status = get_rate_status_dep
+    db = db_dep
+    governor = governor_dep
+
+
+def _scan_options(data: dict) -> dict:
+    source = str(data.get("source") or "auto").strip().lower()
+    ttl_hours = data.get("cache_ttl_hours")
+    return {
+        "source": source if source in SCAN_SOURCES else "auto",
+        "min_matches": max(1, int(data.get("min_matches") or 2)),
+        "max_neighbors": max(1, min(int(data.get("max_neighbors") or 50), 500)),
+        "queue": str(data.get("queue") or "").strip() or None,
+        "pages": max(1, min(int(data.get("pages") or 2), SCAN_MAX_PAGES)),
+        # 0 ignores cached Encounters pages and never resumes an earlier run.
+        "cache_ttl_s": max(0.0, float(ttl_hours if ttl_hours is not None else SCAN_DEFAULT_CACHE_TTL_HOURS)) * 3600,
+        "resume": bool(data.get("resume", True)),
+    }
+
+
+def _last_played(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat() if ts else ""
+
+
+async def _expand_local(websocket, name, depth, max_depth, options, state, to_scan) -> None:
+    """Emit one player's encounters from the local graph, the same messages a scrape sends."""
+    best_distance, node_depth_sent, scanned = state["best_distance"], state["node_depth_sent"], state["scanned"]
+    await websocket.send_json(
+        {"type": "scanning", "username": name, "depth": depth, "distance": depth, "source": "local"}
+    )
+    neighbors = await db.get_encounter_neighbors(
+        name, options["min_matches"], options["max_neighbors"], options["queue"]
+    )
+    node_stats = await db.get_encounter_nodes([name] + [n["username"] for n in neighbors])
+
+    def stats_for(username: str) -> dict:
+        item = node_stats.get(Database._username_key(username)) or {}
+        return {
+            "rank_points": item.get("rank_points", 0),
+            "kd": item.get("kd", 0.0),
+            "win_pct": item.get("win_pct", 0.0),
+        }
+
+    if depth < node_depth_sent.get(name, float("inf")):
+        await websocket.send_json(
+            {"type": "node_discovered", "username": name, "depth": depth, "stats": stats_for(name), "source": "local"}
+        )
+        node_depth_sent[name] = depth
+    await websocket.send_json(
+        {"type": "encounters_found", "username": name, "count": len(neighbors), "source": "local"}
+    )
+
+    for neighbor in neighbors:
+        next_name = neighbor["username"]
+        next_distance = depth + 1
+        known_distance = best_distance.get(next_name, float("inf"))
+        if next_distance < known_distance:
+            best_distance[next_name] = next_distance
+        emit_distance = best_distance.get(next_name, next_distance)
+        if emit_distance < node_depth_sent.get(next_name, float("inf")):
+            await websocket.send_json(
+                {
+                    "type": "node_discovered",
+                    "username": next_name,
+                    "depth": emit_distance,
+                    "stats": stats_for(next_name),
+                    "source": "local",
+                }
+            )
+            node_depth_sent[next_name] = emit_distance
+        await websocket.send_json(
+            {
+                "type": "edge_discovered",
+                "from": name,
+                "to": next_name,
+                "match_count": neighbor["matches"],
+                "last_played": _last_played(neighbor["last_ts"]),
+                "with": neighbor["with"],
+                "against": neighbor["against"],
+                "queues": neighbor["queues"],
+                "source": "local",
+            }
+        )
+        if next_distance <= max_depth and next_distance < known_distance and next_name not in scanned:
+            to_scan.append((next_name, next_distance))
+    scanned.add(name)
+
+
+async def _scan_local(websocket, username, max_depth, options, state) -> deque:
+    """
+    Walk the network through players whose matches are synced locally. Returns the
+    frontier that still needs the Tracker encounters page, in BFS order.
+    """
+    remote = deque()
+    if options["source"] == "scrape" or db is None:
+        remote.append((username, 0))
+        return remote
+    refreshed = await db.refresh_encounter_graph()
+    if refreshed.get("matches") or refreshed.get("refolded") or refreshed.get("rebuilt"):
+        await websocket.send_json(
+            {
+                "type": "debug",
+                "message": (
+                    f"Encounter graph updated: {refreshed['matches']} new matches, "
+                    f"{refreshed.get('refolded', 0)} refolded in {refreshed['elapsed_seconds']}s{' (rebuilt)' if refreshed['rebuilt'] else ''}"
+                ),
+            }
+        )
+    state["covered"] = await db.get_encounter_covered_keys()
+
+    local_queue = deque([(username, 0)])
+    while local_queue:
+        name, depth = local_queue.popleft()
+        if depth > max_depth or depth > state["best_distance"].get(name, float("inf")) or name in state["scanned"]:
+            continue
+        if Database._username_key(name) in state["covered"]:
+            await _expand_local(websocket, name, depth, max_depth, options, state, local_queue)
+        else:
+            remote.append((name, depth))
+    return remote
 
 
 async def scan_network(websocket: WebSocket) -> None:
@@ -26,6 +162,7 @@ async def scan_network(websocket: WebSocket) -> None:
         username = data.get("username")
         max_depth = data.get("max_depth", 2)
         debug_browser = bool(data.get("debug_browser", False))
+        options = _scan_options(data)
 
         await websocket.send_json(
             {
@@ -33,10 +170,11 @@ async def scan_network(websocket: WebSocket) -> None:
                 "username": username,
                 "max_depth": max_depth,
                 "debug_browser": debug_browser,
+                "source": options["source"],
             }
         )
 
-        await scan_player_network(websocket, username, max_depth, debug_browser)
+        await scan_player_network(websocket, username, max_depth, debug_browser, options)
         await websocket.send_json({"type": "scan_complete"})
 
     except WebSocketDisconnect:
@@ -44,566 +182,714 @@ async def scan_network(websocket: WebSocket) -> None:
     except Exception as e:
         await websocket.send_json({"type": "error", "message": str(e)})
 
-async def scan_player_network(websocket: WebSocket, username: str, max_depth: int, debug_browser: bool) -> None:
-    """
-    Scan network using Playwright browser automation.
-    Includes comprehensive error handling and graceful degradation.
-    """
-    browser = None
+async def _recover_challenge(page, debug_browser: bool, max_attempts: int, capture=None) -> bool:
+    # The challenge needs resources the capture mode would block; load everything until it clears.
+    if capture is not None:
+        capture.suspend()
+    try:
+        for _ in range(max_attempts if debug_browser else 2):
+            try:
+                # In debug mode this allows manual challenge completion.
+                await page.wait_for_selector(".giant-stat", timeout=15000)
+                return True
+            except PlaywrightTimeout:
+                try:
+                    await page.reload(wait_until="domcontentloaded", timeout=20000)
+                except Exception:
+                    pass
+        return False
+    finally:
+        if capture is not None:
+            capture.resume()
 
-    # Reset per-scan error counters
-    error_tracker["consecutive_failures"] = 0
-    error_tracker["total_failures"] = 0
-    error_tracker["last_error"] = None
 
+def _record_failure(message: str) -> None:
+    error_tracker["consecutive_failures"] += 1
+    error_tracker["total_failures"] += 1
+    error_tracker["last_error"] = message
+
+
+async def _scrape_root_stats(page, websocket, username: str) -> dict | None:
+    """Open the overview's stats drawer and read RP, K/D and win %."""
+    try:
+        await page.wait_for_load_state("domcontentloaded")
+        await page.wait_for_timeout(random.randint(2000, 3000))
+    except Exception:
+        pass
+
+    try:
+        view_stats_btn = page.get_by_role("button", name="View All Stats")
+        await view_stats_btn.scroll_into_view_if_needed()
+        await page.wait_for_timeout(random.randint(500, 1000))
+        await view_stats_btn.click()
+        await page.wait_for_timeout(random.randint(1500, 2500))
+        try:
+            await page.wait_for_selector("text=/K\\/D/", timeout=5000)
+        except Exception:
+            pass
+    except Exception as e:
+        await websocket.send_json(
+            {
+                "type": "error",
+                "username": username,
+                "message": f"Could not open stats drawer: {str(e)}",
+            }
+        )
+        return None
+
+    # Close the ad if it appears.
+    try:
+        ad_close = page.locator("#closeIconHit")
+        await ad_close.click(timeout=2000)
+        await page.wait_for_timeout(500)
+    except Exception:
+        pass
+
+    rank_points = 0
+    kd = 0.0
+    win_pct = 0.0
+
+    try:
+        await page.mouse.wheel(0, 300)
+        await page.wait_for_timeout(random.randint(800, 1500))
+
+        # Primary approach: parse from full rendered text in drawer.
+        try:
+            body_text = await page.inner_text("body")
+            compact = re.sub(r"\s+", " ", body_text)
+
+            rp_match = re.search(r"Rank Points\s*([0-9][0-9,]*)", compact, re.IGNORECASE)
+            if rp_match:
+                rank_points = int(rp_match.group(1).replace(",", ""))
+
+            win_match = re.search(
+                r"(?:Win %|Win Rate)\s*([0-9]+(?:\.[0-9]+)?)%?",
+                compact,
+                re.IGNORECASE,
+            )
+            if win_match:
+                win_pct = float(win_match.group(1))
+        except Exception:
+            pass
+
+        # Fallback selectors if text parsing misses anything.
+        if rank_points == 0:
+            try:
+                rp_elem = await page.query_selector("text=/Rank Points/")
+                if rp_elem:
+                    rp_text = await rp_elem.inner_text()
+                    rp_number = rp_text.replace("Rank Points", "").replace(",", "").strip()
+                    if rp_number:
+                        rank_points = int(rp_number)
+            except Exception:
+                pass
+
+        # Extract K/D from drawer (format: K/D1.11)
+        try:
+            await page.mouse.wheel(0, 200)
+            await page.wait_for_timeout(500)
+            kd_elem = await page.query_selector("text=/K\\/D[0-9.]/")
+            if kd_elem:
+                kd_text = await kd_elem.inner_text()
+                kd_number = kd_text.replace("K/D", "").strip()
+                if kd_number:
+                    kd = float(kd_number)
+        except Exception:
+            pass
+
+        if win_pct == 0.0:
+            try:
+                win_elem = await page.query_selector("text=/Win %/")
+                if win_elem:
+                    win_text = await win_elem.inner_text()
+                    win_number = win_text.replace("Win %", "").replace("%", "").strip()
+                    if win_number:
+                        win_pct = float(win_number)
+            except Exception:
+                pass
+    except Exception as e:
+        await websocket.send_json(
+            {
+                "type": "warning",
+                "message": f"Error extracting stats: {str(e)}",
+            }
+        )
+
+    try:
+        close_drawer = page.locator(".size-6.cursor-pointer").first
+        await close_drawer.click()
+        await page.wait_for_timeout(random.randint(800, 1500))
+    except Exception as e:
+        await websocket.send_json(
+            {
+                "type": "warning",
+                "message": f"Could not close stats drawer: {str(e)}",
+            }
+        )
+
+    return {"rank_points": rank_points, "kd": kd, "win_pct": win_pct}
+
+
+async def _scrape_encounter_rows(page, websocket, username: str) -> list[dict]:
+    encounters = []
     try:
-        async with async_playwright() as p:
+        row_selector = 'tr[class*="group/row"], table tbody tr, [class*="played-with"] tr'
+        await page.wait_for_selector(row_selector, timeout=7000)
+        await page.mouse.wheel(0, random.randint(300, 600))
+        await page.wait_for_timeout(random.randint(800, 1500))
+        encounter_rows = await page.query_selector_all(row_selector)
+
+        for row in encounter_rows:
             try:
-                browser = await p.chromium.launch(
-                    headless=not debug_browser,
+                cells = await row.query_selector_all("td")
+                if len(cells) < 2:
+                    continue
+
+                name_elem = await cells[0].query_selector("span.truncate, a, [class*='name']")
+                if not name_elem:
+                    name_elem = await row.query_selector("a[href*='/profile/'], span.truncate")
+                if not name_elem:
+                    continue
+
+                encounter_name = await name_elem.inner_text()
+                encounter_name = encounter_name.strip()
+                if not encounter_name or encounter_name == username:
+                    continue
+
+                # 0 Player | 1 Encountered | 2 Rank | 3 Win Rate | 4 KD | 5 Matches | 6 Last Match
+                encountered_count = 0
+                rank_points = 0
+                win_rate = 0.0
+                kd_ratio = 0.0
+                matches_played = 0
+                last_match = ""
+                try:
+                    if len(cells) >= 2:
+                        encountered_text = await cells[1].inner_text()
+                        digits = "".join(ch for ch in encountered_text if ch.isdigit())
+                        encountered_count = int(digits) if digits else 0
+
+                    if len(cells) >= 3:
+                        rank_text = await cells[2].inner_text()
+                        digits = "".join(ch for ch in rank_text if ch.isdigit())
+                        rank_points = int(digits) if digits else 0
+
+                    if len(cells) >= 4:
+                        win_text = (await cells[3].inner_text()).replace("%", "").strip()
+                        win_rate = float(win_text) if win_text else 0.0
+
+                    if len(cells) >= 5:
+                        kd_text = (await cells[4].inner_text()).strip()
+                        kd_ratio = float(kd_text) if kd_text else 0.0
+
+                    if len(cells) >= 6:
+                        matches_text = await cells[5].inner_text()
+                        digits = "".join(ch for ch in matches_text if ch.isdigit())
+                        matches_played = int(digits) if digits else 0
+
+                    if len(cells) >= 7:
+                        last_match = (await cells[6].inner_text()).strip()
+                except Exception:
+                    pass
+
+                if encountered_count <= 0:
+                    continue
+
+                encounters.append(
+                    {
+                        "name": encounter_name,
+                        "count": encountered_count,
+                        "rank_points": rank_points,
+                        "kd": kd_ratio,
+                        "win_pct": win_rate,
+                        "matches_played": matches_played,
+                        "last_match": last_match,
+                    }
+                )
+            except Exception:
+                continue
+    except PlaywrightTimeout:
+        pass
+    except Exception as e:
+        await websocket.send_json(
+            {
+                "type": "warning",
+                "message": f"Error extracting encounters: {str(e)}",
+            }
+        )
+    return encounters
+
+
+async def _scrape_profile(
+    page, websocket, username: str, is_root: bool, debug_browser: bool, capture=None
+) -> dict | None:
+    """
+    Scrape one player's Encounters page (and, for the scan root, the overview stats)
+    on `page`. Returns {"status", "stats", "encounters"}, with status "not_found"
+    for a 404, or None after reporting a failure to the client. `capture` is the
+    page's PageCapture, suspended while a challenge is being cleared.
+    """
+    encoded_username = username.replace(" ", "%20")
+    overview_url = f"https://r6.tracker.network/r6siege/profile/ubi/{encoded_username}/overview"
+    encounters_url = f"https://r6.tracker.network/r6siege/profile/ubi/{encoded_username}/encounters"
+
+    try:
+        response = await page.goto(overview_url if is_root else encounters_url, wait_until="domcontentloaded", timeout=20000)
+        if response and response.status >= 400:
+            if response.status == 429:
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "username": username,
+                        "message": "Rate limited (429). Pausing scan.",
+                    }
                 )
-                context = await browser.new_context(
-                    viewport={"width": 1920, "height": 1080},
-                    user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/120.0.0.0 Safari/537.36"
-                    ),
+                _record_failure("429 Rate Limit")
+                # Pauses every tab, not just this one.
+                if governor is not None:
+                    governor.penalize(30.0)
+                else:
+                    await page.wait_for_timeout(30000)
+                return None
+            if response.status == 403:
+                await websocket.send_json(
+                    {
+                        "type": "warning",
+                        "username": username,
+                        "message": "403/challenge detected. Attempting Playwright recovery.",
+                    }
                 )
-                page = await context.new_page()
-            except Exception as e:
+                if not await _recover_challenge(page, debug_browser, 6, capture):
+                    await websocket.send_json(
+                        {
+                            "type": "error",
+                            "username": username,
+                            "message": "Access still blocked after recovery attempts.",
+                        }
+                    )
+                    _record_failure("403 Forbidden")
+                    return None
+            if response.status == 404:
                 await websocket.send_json(
                     {
                         "type": "error",
-                        "message": f"Failed to launch browser: {str(e)}",
+                        "username": username,
+                        "message": "Profile not found (404)",
                     }
                 )
-                return
+                error_tracker["consecutive_failures"] = 0
+                return {"status": "not_found", "stats": None, "encounters": []}
+    except PlaywrightTimeout:
+        await websocket.send_json(
+            {
+                "type": "error",
+                "username": username,
+                "message": "Page load timeout (20s). Possible blocking.",
+            }
+        )
+        _record_failure("Timeout")
+        return None
+
+    # Scroll to load content below the initial viewport.
+    await page.wait_for_load_state("domcontentloaded")
+    await page.wait_for_timeout(2000)
+    await page.evaluate("window.scrollTo(0, 600)")
+    await page.wait_for_timeout(1500)
+    await page.evaluate("window.scrollTo(0, 1200)")
+    await page.wait_for_timeout(1000)
+
+    try:
+        page_title = await page.title()
+        if "just a moment" in page_title.lower() or "attention required" in page_title.lower():
+            await websocket.send_json(
+                {
+                    "type": "warning",
+                    "username": username,
+                    "message": "Challenge page detected. Waiting for clearance.",
+                }
+            )
+            if not await _recover_challenge(page, debug_browser, 8, capture):
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "username": username,
+                        "message": "Challenge not cleared in time.",
+                    }
+                )
+                _record_failure("Challenge not cleared")
+                return None
+    except Exception:
+        pass
+
+    stats = None
+    if is_root:
+        stats = await _scrape_root_stats(page, websocket, username)
+        if stats is None:
+            return None
+        try:
+            encounters_response = await page.goto(encounters_url, wait_until="domcontentloaded", timeout=20000)
+            if encounters_response and encounters_response.status >= 400:
+                raise RuntimeError(f"Encounters page status {encounters_response.status}")
+            await page.wait_for_timeout(random.randint(1800, 3200))
+        except Exception as e:
+            await websocket.send_json(
+                {
+                    "type": "error",
+                    "username": username,
+                    "message": f"Could not open Encounters page: {str(e)}",
+                }
+            )
+            return None
 
-            scanned = set()
-            best_distance = {username: 0}
-            node_depth_sent = {}
-            to_scan = deque([(username, 0)])
+    track_call(f"/encounters/{username}")
+    await websocket.send_json({"type": "rate_status", **get_rate_status()})
+    encounters = await _scrape_encounter_rows(page, websocket, username)
+    error_tracker["consecutive_failures"] = 0
+    return {"status": "ok", "stats": stats, "encounters": encounters}
 
-            await page.wait_for_timeout(random.randint(500, 1500))
 
-            while to_scan:
-                current_username, depth = to_scan.popleft()
+async def _expand_profile(websocket, name, depth, max_depth, profile, state, to_scan, source) -> None:
+    """Emit a scraped (or cached) Encounters page and queue the next BFS layer."""
+    best_distance, node_depth_sent, scanned = state["best_distance"], state["node_depth_sent"], state["scanned"]
+    tag = {} if source == "scrape" else {"source": source}
+    if source != "scrape":
+        await websocket.send_json({"type": "scanning", "username": name, "depth": depth, "distance": depth, **tag})
+    if profile.get("stats") is not None and depth < node_depth_sent.get(name, float("inf")):
+        await websocket.send_json(
+            {"type": "node_discovered", "username": name, "depth": depth, "stats": profile["stats"], **tag}
+        )
+        node_depth_sent[name] = depth
 
-                if depth > max_depth:
-                    continue
-                if depth > best_distance.get(current_username, float("inf")):
-                    continue
-                if current_username in scanned:
-                    continue
+    encounters = profile.get("encounters") or []
+    await websocket.send_json({"type": "encounters_found", "username": name, "count": len(encounters), **tag})
+
+    for encounter in encounters:
+        next_name = encounter["name"]
+        next_distance = depth + 1
+        known_distance = best_distance.get(next_name, float("inf"))
+
+        if next_distance < known_distance:
+            best_distance[next_name] = next_distance
+        emit_distance = best_distance.get(next_name, next_distance)
+
+        if emit_distance < node_depth_sent.get(next_name, float("inf")):
+            await websocket.send_json(
+                {
+                    "type": "node_discovered",
+                    "username": next_name,
+                    "depth": emit_distance,
+                    "stats": {
+                        "rank_points": encounter.get("rank_points", 0),
+                        "kd": encounter.get("kd", 0.0),
+                        "win_pct": encounter.get("win_pct", 0.0),
+                    },
+                    **tag,
+                }
+            )
+            node_depth_sent[next_name] = emit_distance
+
+        await websocket.send_json(
+            {
+                "type": "edge_discovered",
+                "from": name,
+                "to": next_name,
+                "match_count": encounter["count"],
+                "last_played": encounter.get("last_match", ""),
+                **tag,
+            }
+        )
+
+        if next_distance <= max_depth and next_distance < known_distance and next_name not in scanned:
+            to_scan.append((next_name, next_distance))
+    scanned.add(name)
+
+
+class _ScanSocket:
+    """Forwards send_json and remembers when the client went away, so the page tabs stop."""
+
+    def __init__(self, websocket) -> None:
+        self.websocket = websocket
+        self.closed = False
+
+    async def send_json(self, data: dict) -> None:
+        if self.closed:
+            raise WebSocketDisconnect()
+        try:
+            await self.websocket.send_json(data)
+        except Exception:
+            self.closed = True
+            raise
+
+
+async def _open_run(websocket, username, max_depth, options) -> dict | None:
+    """The persisted run this scan records its frontier in, resumed when one is unfinished."""
+    if db is None:
+        return None
+    identity = {key: options[key] for key in SCAN_RUN_OPTION_KEYS}
+    run = await db.open_network_scan_run(
+        username, max_depth, identity, options["cache_ttl_s"] if options["resume"] else 0
+    )
+    run["done_keys"] = set()
+    if run["resumed"]:
+        done = await db.get_network_scan_frontier(run["run_id"], "done")
+        run["done_keys"] = {row["username_key"] for row in done}
+        await websocket.send_json(
+            {
+                "type": "scan_resumed",
+                "run_id": run["run_id"],
+                "done": run["frontier"]["done"],
+                "pending": run["frontier"]["pending"] + run["frontier"]["failed"],
+            }
+        )
+    return run
+
+
+async def _cached_profiles(names, is_root, options, run) -> dict:
+    """name -> cached profile still usable for this scan (fresh, or already done in this run)."""
+    if db is None or (options["cache_ttl_s"] <= 0 and not (run and run["done_keys"])):
+        return {}
+    cached = await db.get_network_profiles(names)
+    fresh_after = time.time() - options["cache_ttl_s"]
+    out = {}
+    for name in names:
+        key = Database._username_key(name)
+        profile = cached.get(key)
+        if profile is None:
+            continue
+        if profile["fetched_at"] < fresh_after and not (run and key in run["done_keys"]):
+            continue
+        if is_root(name) and profile["status"] == "ok" and profile["stats"] is None:
+            continue
+        out[name] = profile
+    return out
+
+
+async def scan_player_network(
+    websocket: WebSocket,
+    username: str,
+    max_depth: int,
+    debug_browser: bool,
+    options: dict | None = None,
+) -> None:
+    """
+    Scan the encounter network around `username`.
+
+    Players whose matches are synced locally are expanded from the encounter graph
+    in the DB; the rest come from the Encounters page cache when fresh enough, and
+    otherwise from Playwright, one BFS layer at a time across a small pool of tabs
+    under the shared rate governor (unless `options["source"]` is "local" or
+    "scrape"). Every scraped page is cached and the frontier persisted, so a scan
+    cut short by a disconnect or restart resumes where it stopped.
+    Includes comprehensive error handling and graceful degradation.
+    """
+    websocket = _ScanSocket(websocket)
+    playwright = None
+    browser = None
+    pool = None
+    options = options or _scan_options({})
+    state = {"scanned": set(), "best_distance": {username: 0}, "node_depth_sent": {}, "covered": set()}
+    run = None
+    completed = False
+
+    def is_root(name: str) -> bool:
+        return name == username
+
+    # Reset per-scan error counters
+    error_tracker["consecutive_failures"] = 0
+    error_tracker["total_failures"] = 0
+    error_tracker["last_error"] = None
+
+    def should_stop() -> bool:
+        return websocket.closed or error_tracker["consecutive_failures"] >= error_tracker["failure_threshold"]
 
-                if error_tracker["consecutive_failures"] >= error_tracker["failure_threshold"]:
+    try:
+        to_scan = await _scan_local(websocket, username, max_depth, options, state)
+        if not to_scan:
+            completed = True
+            return
+        if options["source"] == "local":
+            await websocket.send_json(
+                {
+                    "type": "warning",
+                    "message": f"{len(to_scan)} players are not synced locally; skipped (local-only scan).",
+                }
+            )
+            completed = True
+            return
+        if options["source"] == "auto":
+            await websocket.send_json(
+                {"type": "debug", "message": f"{len(to_scan)} players are not covered locally."}
+            )
+        run = await _open_run(websocket, username, max_depth, options)
+        scanned = state["scanned"]
+        best_distance = state["best_distance"]
+
+        while to_scan:
+            # One BFS layer at a time, so tabs running in parallel still settle every
+            # player at its shortest distance.
+            depth = min(d for _, d in to_scan)
+            layer = []
+            for _ in range(len(to_scan)):
+                name, d = to_scan.popleft()
+                if d != depth:
+                    to_scan.append((name, d))
+                elif d <= max_depth and d <= best_distance.get(name, float("inf")) and name not in scanned:
+                    if name not in layer:
+                        layer.append(name)
+            if not layer:
+                continue
+
+            remote = []
+            for name in layer:
+                if Database._username_key(name) in state["covered"]:
+                    await _expand_local(websocket, name, depth, max_depth, options, state, to_scan)
+                else:
+                    remote.append(name)
+            if not remote:
+                continue
+            if run is not None:
+                await db.queue_network_scan_nodes(run["run_id"], [(name, depth) for name in remote])
+
+            cached = await _cached_profiles(remote, is_root, options, run)
+            for name, profile in cached.items():
+                await _expand_profile(websocket, name, depth, max_depth, profile, state, to_scan, "cache")
+            if cached and run is not None:
+                await db.mark_network_scan_nodes(run["run_id"], list(cached), "done")
+            remote = [name for name in remote if name not in cached]
+            if not remote:
+                continue
+
+            if should_stop():
+                break
+            if pool is None:
+                await websocket.send_json(
+                    {
+                        "type": "debug",
+                        "message": f"Scraping with {options['pages']} browser tabs ({len(cached)} profiles from cache).",
+                    }
+                )
+                try:
+                    playwright = await async_playwright().start()
+                    browser = await playwright.chromium.launch(
+                        headless=not debug_browser,
+                    )
+                    context = await browser.new_context(
+                        viewport={"width": 1920, "height": 1080},
+                        user_agent=(
+                            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                            "AppleWebKit/537.36 (KHTML, like Gecko) "
+                            "Chrome/120.0.0.0 Safari/537.36"
+                        ),
+                    )
+                    pool = await PagePool(
+                        context,
+                        options["pages"],
+                        governor=governor,
+                        # A debug browser is for clearing challenges by hand; block nothing there.
+                        capture=CaptureMode(("profile_dom",), mode="off" if debug_browser else None),
+                    ).start()
+                except Exception as e:
                     await websocket.send_json(
                         {
                             "type": "error",
-                            "message": (
-                                f"Stopping scan: {error_tracker['failure_threshold']} consecutive failures. "
-                                "Possible rate limit or blocking."
-                            ),
-                            "total_failures": error_tracker["total_failures"],
-                            "last_error": error_tracker["last_error"],
+                            "message": f"Failed to launch browser: {str(e)}",
                         }
                     )
-                    break
+                    return
 
+            async def scrape(page, name: str, depth: int = depth) -> bool:
                 await websocket.send_json(
                     {
                         "type": "scanning",
-                        "username": current_username,
+                        "username": name,
                         "depth": depth,
                         "distance": depth,
                     }
                 )
-
-                track_call(f"/profile/{current_username}")
+                track_call(f"/profile/{name}")
                 await websocket.send_json({"type": "rate_status", **get_rate_status()})
-
                 try:
-                    encoded_username = current_username.replace(" ", "%20")
-                    overview_url = f"https://r6.tracker.network/r6siege/profile/ubi/{encoded_username}/overview"
-                    encounters_url = f"https://r6.tracker.network/r6siege/profile/ubi/{encoded_username}/encounters"
-                    is_root_profile = depth == 0 and current_username == username
-                    url = overview_url if is_root_profile else encounters_url
-
-                    try:
-                        response = await page.goto(url, wait_until="domcontentloaded", timeout=20000)
-                        if response and response.status >= 400:
-                            if response.status == 429:
-                                await websocket.send_json(
-                                    {
-                                        "type": "error",
-                                        "username": current_username,
-                                        "message": "Rate limited (429). Pausing scan.",
-                                    }
-                                )
-                                error_tracker["consecutive_failures"] += 1
-                                error_tracker["total_failures"] += 1
-                                error_tracker["last_error"] = "429 Rate Limit"
-                                scanned.add(current_username)
-                                await page.wait_for_timeout(30000)
-                                continue
-                            if response.status == 403:
-                                await websocket.send_json(
-                                    {
-                                        "type": "warning",
-                                        "username": current_username,
-                                        "message": "403/challenge detected. Attempting Playwright recovery.",
-                                    }
-                                )
-                                recovered = False
-                                max_attempts = 6 if debug_browser else 2
-                                for _ in range(max_attempts):
-                                    try:
-                                        # In debug mode this allows manual challenge completion.
-                                        await page.wait_for_selector(".giant-stat", timeout=15000)
-                                        recovered = True
-                                        break
-                                    except PlaywrightTimeout:
-                                        try:
-                                            await page.reload(wait_until="domcontentloaded", timeout=20000)
-                                        except Exception:
-                                            pass
-                                if not recovered:
-                                    await websocket.send_json(
-                                        {
-                                            "type": "error",
-                                            "username": current_username,
-                                            "message": "Access still blocked after recovery attempts.",
-                                        }
-                                    )
-                                    error_tracker["consecutive_failures"] += 1
-                                    error_tracker["total_failures"] += 1
-                                    error_tracker["last_error"] = "403 Forbidden"
-                                    scanned.add(current_username)
-                                    continue
-                            if response.status == 404:
-                                await websocket.send_json(
-                                    {
-                                        "type": "error",
-                                        "username": current_username,
-                                        "message": "Profile not found (404)",
-                                    }
-                                )
-                                error_tracker["consecutive_failures"] = 0
-                                scanned.add(current_username)
-                                continue
-                    except PlaywrightTimeout:
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "username": current_username,
-                                "message": "Page load timeout (20s). Possible blocking.",
-                            }
-                        )
-                        error_tracker["consecutive_failures"] += 1
-                        error_tracker["total_failures"] += 1
-                        error_tracker["last_error"] = "Timeout"
-                        scanned.add(current_username)
-                        continue
-
-                    # Scroll to load content below the initial viewport.
-                    await page.wait_for_load_state("domcontentloaded")
-                    await page.wait_for_timeout(2000)
-                    await page.evaluate("window.scrollTo(0, 600)")
-                    await page.wait_for_timeout(1500)
-                    await page.evaluate("window.scrollTo(0, 1200)")
-                    await page.wait_for_timeout(1000)
-
-                    try:
-                        page_title = await page.title()
-                        if "just a moment" in page_title.lower() or "attention required" in page_title.lower():
-                            await websocket.send_json(
-                                {
-                                    "type": "warning",
-                                    "username": current_username,
-                                    "message": "Challenge page detected. Waiting for clearance.",
-                                }
-                            )
-                            recovered = False
-                            max_attempts = 8 if debug_browser else 2
-                            for _ in range(max_attempts):
-                                try:
-                                    await page.wait_for_selector(".giant-stat", timeout=15000)
-                                    recovered = True
-                                    break
-                                except PlaywrightTimeout:
-                                    try:
-                                        await page.reload(wait_until="domcontentloaded", timeout=20000)
-                                    except Exception:
-                                        pass
-                            if not recovered:
-                                await websocket.send_json(
-                                    {
-                                        "type": "error",
-                                        "username": current_username,
-                                        "message": "Challenge not cleared in time.",
-                                    }
-                                )
-                                error_tracker["consecutive_failures"] += 1
-                                error_tracker["total_failures"] += 1
-                                error_tracker["last_error"] = "Challenge not cleared"
-                                scanned.add(current_username)
-                                continue
-                    except Exception:
-                        pass
-
-                    if is_root_profile:
-                        # ============================================================
-                        # WAIT FOR PAGE LOAD
-                        # ============================================================
-                        try:
-                            await page.wait_for_load_state("domcontentloaded")
-                            await page.wait_for_timeout(random.randint(2000, 3000))
-                        except Exception:
-                            pass
-
-                        # ============================================================
-                        # CLICK "VIEW ALL STATS" BUTTON
-                        # ============================================================
-                        try:
-                            view_stats_btn = page.get_by_role("button", name="View All Stats")
-                            await view_stats_btn.scroll_into_view_if_needed()
-                            await page.wait_for_timeout(random.randint(500, 1000))
-                            await view_stats_btn.click()
-                            await page.wait_for_timeout(random.randint(1500, 2500))
-                            try:
-                                await page.wait_for_selector("text=/K\\/D/", timeout=5000)
-                            except Exception:
-                                pass
-                        except Exception as e:
-                            await websocket.send_json(
-                                {
-                                    "type": "error",
-                                    "username": current_username,
-                                    "message": f"Could not open stats drawer: {str(e)}",
-                                }
-                            )
-                            scanned.add(current_username)
-                            continue
-
-                        # ============================================================
-                        # CLOSE AD IF IT APPEARS (optional)
-                        # ============================================================
-                        try:
-                            ad_close = page.locator("#closeIconHit")
-                            await ad_close.click(timeout=2000)
-                            await page.wait_for_timeout(500)
-                        except Exception:
-                            pass
-
-                        # ============================================================
-                        # EXTRACT STATS FROM DRAWER
-                        # ============================================================
-                        rank_points = 0
-                        kd = 0.0
-                        win_pct = 0.0
-
-                        try:
-                            await page.mouse.wheel(0, 300)
-                            await page.wait_for_timeout(random.randint(800, 1500))
-
-                            # Primary approach: parse from full rendered text in drawer.
-                            try:
-                                body_text = await page.inner_text("body")
-                                compact = re.sub(r"\s+", " ", body_text)
-
-                                rp_match = re.search(r"Rank Points\s*([0-9][0-9,]*)", compact, re.IGNORECASE)
-                                if rp_match:
-                                    rank_points = int(rp_match.group(1).replace(",", ""))
-
-                                win_match = re.search(
-                                    r"(?:Win %|Win Rate)\s*([0-9]+(?:\.[0-9]+)?)%?",
-                                    compact,
-                                    re.IGNORECASE,
-                                )
-                                if win_match:
-                                    win_pct = float(win_match.group(1))
-                            except Exception:
-                                pass
-
-                            # Fallback selectors if text parsing misses anything.
-                            if rank_points == 0:
-                                try:
-                                    rp_elem = await page.query_selector("text=/Rank Points/")
-                                    if rp_elem:
-                                        rp_text = await rp_elem.inner_text()
-                                        rp_number = rp_text.replace("Rank Points", "").replace(",", "").strip()
-                                        if rp_number:
-                                            rank_points = int(rp_number)
-                                except Exception:
-                                    pass
-
-                            # Extract K/D from drawer (format: K/D1.11)
-                            try:
-                                await page.mouse.wheel(0, 200)
-                                await page.wait_for_timeout(500)
-                                kd_elem = await page.query_selector("text=/K\\/D[0-9.]/")
-                                if kd_elem:
-                                    kd_text = await kd_elem.inner_text()
-                                    kd_number = kd_text.replace("K/D", "").strip()
-                                    if kd_number:
-                                        kd = float(kd_number)
-                            except Exception:
-                                pass
-
-                            if win_pct == 0.0:
-                                try:
-                                    win_elem = await page.query_selector("text=/Win %/")
-                                    if win_elem:
-                                        win_text = await win_elem.inner_text()
-                                        win_number = win_text.replace("Win %", "").replace("%", "").strip()
-                                        if win_number:
-                                            win_pct = float(win_number)
-                                except Exception:
-                                    pass
-                        except Exception as e:
-                            await websocket.send_json(
-                                {
-                                    "type": "warning",
-                                    "message": f"Error extracting stats: {str(e)}",
-                                }
-                            )
-
-                        # ============================================================
-                        # SEND NODE WITH STATS
-                        # ============================================================
-                        await websocket.send_json(
-                            {
-                                "type": "node_discovered",
-                                "username": current_username,
-                                "depth": depth,
-                                "stats": {
-                                    "rank_points": rank_points,
-                                    "kd": kd,
-                                    "win_pct": win_pct,
-                                },
-                            }
-                        )
-                        node_depth_sent[current_username] = depth
-
-                        error_tracker["consecutive_failures"] = 0
-
-                        # ============================================================
-                        # CLOSE STATS DRAWER
-                        # ============================================================
-                        try:
-                            close_drawer = page.locator(".size-6.cursor-pointer").first
-                            await close_drawer.click()
-                            await page.wait_for_timeout(random.randint(800, 1500))
-                        except Exception as e:
-                            await websocket.send_json(
-                                {
-                                    "type": "warning",
-                                    "message": f"Could not close stats drawer: {str(e)}",
-                                }
-                            )
-
-                    # ============================================================
-                    # NAVIGATE DIRECTLY TO ENCOUNTERS PAGE
-                    # ============================================================
-                    try:
-                        if is_root_profile:
-                            encounters_response = await page.goto(
-                                encounters_url,
-                                wait_until="domcontentloaded",
-                                timeout=20000,
-                            )
-                            if encounters_response and encounters_response.status >= 400:
-                                raise RuntimeError(f"Encounters page status {encounters_response.status}")
-                            await page.wait_for_timeout(random.randint(1800, 3200))
-                    except Exception as e:
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "username": current_username,
-                                "message": f"Could not open Encounters page: {str(e)}",
-                            }
-                        )
-                        scanned.add(current_username)
-                        continue
-
-                    # ============================================================
-                    # EXTRACT ENCOUNTERS FROM TABLE
-                    # ============================================================
-                    track_call(f"/encounters/{current_username}")
-                    await websocket.send_json({"type": "rate_status", **get_rate_status()})
-
-                    encounters = []
-
-                    try:
-                        row_selector = 'tr[class*="group/row"], table tbody tr, [class*="played-with"] tr'
-                        await page.wait_for_selector(row_selector, timeout=7000)
-                        await page.mouse.wheel(0, random.randint(300, 600))
-                        await page.wait_for_timeout(random.randint(800, 1500))
-                        encounter_rows = await page.query_selector_all(row_selector)
-
-                        for row in encounter_rows:
-                            try:
-                                cells = await row.query_selector_all("td")
-                                if len(cells) < 2:
-                                    continue
-
-                                name_elem = await cells[0].query_selector("span.truncate, a, [class*='name']")
-                                if not name_elem:
-                                    name_elem = await row.query_selector("a[href*='/profile/'], span.truncate")
-                                if not name_elem:
-                                    continue
-
-                                encounter_name = await name_elem.inner_text()
-                                encounter_name = encounter_name.strip()
-                                if not encounter_name or encounter_name == current_username:
-                                    continue
-
-                                # 0 Player | 1 Encountered | 2 Rank | 3 Win Rate | 4 KD | 5 Matches | 6 Last Match
-                                encountered_count = 0
-                                rank_points = 0
-                                win_rate = 0.0
-                                kd_ratio = 0.0
-                                matches_played = 0
-                                last_match = ""
-                                try:
-                                    if len(cells) >= 2:
-                                        encountered_text = await cells[1].inner_text()
-                                        digits = "".join(ch for ch in encountered_text if ch.isdigit())
-                                        encountered_count = int(digits) if digits else 0
-
-                                    if len(cells) >= 3:
-                                        rank_text = await cells[2].inner_text()
-                                        digits = "".join(ch for ch in rank_text if ch.isdigit())
-                                        rank_points = int(digits) if digits else 0
-
-                                    if len(cells) >= 4:
-                                        win_text = (await cells[3].inner_text()).replace("%", "").strip()
-                                        win_rate = float(win_text) if win_text else 0.0
-
-                                    if len(cells) >= 5:
-                                        kd_text = (await cells[4].inner_text()).strip()
-                                        kd_ratio = float(kd_text) if kd_text else 0.0
-
-                                    if len(cells) >= 6:
-                                        matches_text = await cells[5].inner_text()
-                                        digits = "".join(ch for ch in matches_text if ch.isdigit())
-                                        matches_played = int(digits) if digits else 0
-
-                                    if len(cells) >= 7:
-                                        last_match = (await cells[6].inner_text()).strip()
-                                except Exception:
-                                    pass
-
-                                if encountered_count <= 0:
-                                    continue
-
-                                encounters.append(
-                                    {
-                                        "name": encounter_name,
-                                        "count": encountered_count,
-                                        "rank_points": rank_points,
-                                        "kd": kd_ratio,
-                                        "win_pct": win_rate,
-                                        "matches_played": matches_played,
-                                        "last_match": last_match,
-                                    }
-                                )
-                            except Exception:
-                                continue
-                    except PlaywrightTimeout:
-                        pass
-                    except Exception as e:
-                        await websocket.send_json(
-                            {
-                                "type": "warning",
-                                "message": f"Error extracting encounters: {str(e)}",
-                            }
-                        )
-
-                    # ============================================================
-                    # SEND ENCOUNTERS
-                    # ============================================================
-                    await websocket.send_json(
-                        {
-                            "type": "encounters_found",
-                            "username": current_username,
-                            "count": len(encounters),
-                        }
-                    )
-
-                    for encounter in encounters:
-                        next_name = encounter["name"]
-                        next_distance = depth + 1
-                        known_distance = best_distance.get(next_name, float("inf"))
-
-                        if next_distance < known_distance:
-                            best_distance[next_name] = next_distance
-                        emit_distance = best_distance.get(next_name, next_distance)
-
-                        previously_sent_depth = node_depth_sent.get(next_name, float("inf"))
-                        if emit_distance < previously_sent_depth:
-                            await websocket.send_json(
-                                {
-                                    "type": "node_discovered",
-                                    "username": next_name,
-                                    "depth": emit_distance,
-                                    "stats": {
-                                        "rank_points": encounter.get("rank_points", 0),
-                                        "kd": encounter.get("kd", 0.0),
-                                        "win_pct": encounter.get("win_pct", 0.0),
-                                    },
-                                }
-                            )
-                            node_depth_sent[next_name] = emit_distance
-
-                        await websocket.send_json(
-                            {
-                                "type": "edge_discovered",
-                                "from": current_username,
-                                "to": next_name,
-                                "match_count": encounter["count"],
-                                "last_played": encounter.get("last_match", ""),
-                            }
-                        )
-
-                        if next_distance <= max_depth and next_distance < known_distance and next_name not in scanned:
-                            to_scan.append((next_name, next_distance))
-
-                    scanned.add(current_username)
-
-                    # ============================================================
-                    # DELAY BEFORE NEXT PLAYER
-                    # ============================================================
-                    delay = random.uniform(4.0, 7.0)
-                    await websocket.send_json(
-                        {
-                            "type": "delay",
-                            "seconds": round(delay, 1),
-                            "reason": "Moving to next player...",
-                        }
+                    profile = await _scrape_profile(
+                        page, websocket, name, depth == 0 and is_root(name), debug_browser, pool.capture_for(page)
                     )
-                    await page.wait_for_timeout(int(delay * 1000))
-
                 except Exception as e:
+                    if websocket.closed:
+                        raise
                     error_msg = f"{type(e).__name__}: {str(e)}"
-                    await websocket.send_json(
-                        {
-                            "type": "error",
-                            "username": current_username,
-                            "message": error_msg,
-                        }
-                    )
-                    print(f"Error scanning {current_username}:")
+                    await websocket.send_json({"type": "error", "username": name, "message": error_msg})
+                    print(f"Error scanning {name}:")
                     print(traceback.format_exc())
+                    _record_failure(error_msg)
+                    profile = None
+
+                if profile is None:
+                    scanned.add(name)
+                    if run is not None:
+                        await db.mark_network_scan_nodes(run["run_id"], [name], "failed")
+                    return False
+                if db is not None:
+                    await db.save_network_profile(name, profile["encounters"], profile["stats"], profile["status"])
+                if run is not None:
+                    await db.mark_network_scan_nodes(run["run_id"], [name], "done")
+                await _expand_profile(websocket, name, depth, max_depth, profile, state, to_scan, "scrape")
+
+                delay = random.uniform(4.0, 7.0)
+                await websocket.send_json(
+                    {
+                        "type": "delay",
+                        "seconds": round(delay, 1),
+                        "reason": "Moving to next player...",
+                    }
+                )
+                await page.wait_for_timeout(int(delay * 1000))
+                return True
+
+            result = await pool.run(
+                remote,
+                scrape,
+                timeout_s=SCAN_PROFILE_TIMEOUT_S * (3 if debug_browser else 1),
+                stop=should_stop,
+            )
+            if websocket.closed:
+                raise WebSocketDisconnect()
+            for name in result.timed_out:
+                _record_failure("Timeout")
+                scanned.add(name)
+                await websocket.send_json(
+                    {"type": "error", "username": name, "message": "Profile scan timed out. Possible blocking."}
+                )
+            if result.timed_out and run is not None:
+                await db.mark_network_scan_nodes(run["run_id"], result.timed_out, "failed")
 
-                    error_tracker["consecutive_failures"] += 1
-                    error_tracker["total_failures"] += 1
-                    error_tracker["last_error"] = error_msg
-                    scanned.add(current_username)
-                    continue
+            if error_tracker["consecutive_failures"] >= error_tracker["failure_threshold"]:
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "message": (
+                            f"Stopping scan: {error_tracker['failure_threshold']} consecutive failures. "
+                            "Possible rate limit or blocking."
+                        ),
+                        "total_failures": error_tracker["total_failures"],
+                        "last_error": error_tracker["last_error"],
+                    }
+                )
+                break
+            if pool.exhausted:
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "message": "Browser tabs keep failing; stopping scan. Run it again to resume.",
+                    }
+                )
+                break
+        else:
+            completed = True
 
+    except WebSocketDisconnect:
+        raise
     except Exception as e:
+        if websocket.closed:
+            raise WebSocketDisconnect()
         await websocket.send_json(
             {
                 "type": "error",
@@ -613,13 +899,27 @@ async def scan_player_network(websocket: WebSocket, username: str, max_depth: in
         print("Fatal error in scan:")
         print(traceback.format_exc())
     finally:
+        if run is not None and completed:
+            try:
+                await db.finish_network_scan_run(run["run_id"])
+            except Exception as e:
+                print(f"[DB] Warning: could not finish network scan run {run['run_id']}: {e}")
+        if pool is not None:
+            reports = [c.report() for c in pool.captures if c is not None]
+            print(f"[CAPTURE] Network scan {username}: {reports} tabs={pool.health_snapshot()}")
+            await pool.close()
         if browser:
             try:
                 await browser.close()
             except Exception:
                 pass
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception:
+                pass
 
-        if error_tracker["total_failures"] > 0:
+        if error_tracker["total_failures"] > 0 and not websocket.closed:
             await websocket.send_json(
                 {
                     "type": "scan_summary",
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.async_api_client import AsyncTrackerAPIClient, TokenBucketLimiter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _fixture_bytes(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class _StubTracker:
+    """Tiny Tracker API stand-in: match list, match detail, scripted 429s."""
+
+    def __init__(self, detail_delay: float = 0.05):
+        self.detail_delay = detail_delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.hits: list[str] = []
+        self.throttle_paths: dict[str, int] = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.hits.append(self.path)
+                    remaining = stub.throttle_paths.get(self.path, 0)
+                    if remaining:
+                        stub.throttle_paths[self.path] = remaining - 1
+                if remaining:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                if self.path.startswith("/matches/ubi/"):
+                    body = _fixture_bytes("saucedzyn_matchtab.json")
+                    payload = json.loads(body)
+                    payload["data"]["metadata"]["next"] = None
+                    body = json.dumps(payload).encode("utf-8")
+                elif self.path.startswith("/matches/missing"):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                elif self.path.startswith("/matches/"):
+                    with stub.lock:
+                        stub.in_flight += 1
+                        stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    time.sleep(stub.detail_delay)
+                    with stub.lock:
+                        stub.in_flight -= 1
+                    body = _fixture_bytes("match1.json")
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    with _StubTracker() as server:
+        yield server
+
+
+def _client(stub, **kwargs) -> AsyncTrackerAPIClient:
+    kwargs.setdefault("rate_per_second", 1000.0)
+    kwargs.setdefault("burst", 50)
+    client = AsyncTrackerAPIClient(**kwargs)
+    client.BASE = stub.base
+    return client
+
+
+def _match_list_payload_matches(client):
+    with open(os.path.join(FIXTURES, "saucedzyn_matchtab.json"), "r", encoding="utf-8") as f:
+        return client.parse_match_list(json.load(f))["matches"]
+
+
+def test_scrape_full_history_bounds_in_flight_and_keeps_order(stub):
+    client = _client(stub, max_in_flight=3)
+    matches = _match_list_payload_matches(client)
+    skip = {matches[0]["match_id"]}
+
+    details = asyncio.run(client.scrape_full_match_history("someone", skip_match_ids=skip))
+
+    assert [d["match_id"] for d in details] == [m["match_id"] for m in matches[1:]]
+    assert all(len(d["players"]) == 10 for d in details)
+    assert 1 < stub.max_in_flight <= 3
+
+
+def test_match_detail_parse_matches_sync_client(stub):
+    client = _client(stub)
+    detail = asyncio.run(client.get_match_detail("abc"))
+    with open(os.path.join(FIXTURES, "match1.json"), "r", encoding="utf-8") as f:
+        expected = client.parse_match_detail("abc", json.load(f))
+    assert detail == expected
+
+
+def test_429_penalizes_shared_limiter_and_retries(stub):
+    limiter = TokenBucketLimiter(rate_per_second=1000.0, burst=50)
+    client = _client(stub, limiter=limiter)
+    stub.throttle_paths["/matches/abc"] = 2
+
+    detail = asyncio.run(client.get_match_detail("abc"))
+
+    assert detail["match_id"] == "abc"
+    assert stub.hits.count("/matches/abc") == 3
+    assert limiter.throttled == 2
+    assert limiter.rate < limiter.target_rate
+
+
+def test_missing_detail_is_dropped(stub):
+    client = _client(stub)
+    details = asyncio.run(
+        client.fetch_match_details([{"match_id": "missing"}, {"match_id": "abc"}])
+    )
+    assert [d["match_id"] for d in details] == ["abc"]
+
+
+def test_parse_failure_is_not_dropped_as_missing(stub, monkeypatch):
+    client = _client(stub)
+
+    def broken(match_id, payload):
+        raise KeyError("segments")
+
+    monkeypatch.setattr(client, "parse_match_detail", broken)
+    with pytest.raises(KeyError):
+        asyncio.run(client.fetch_match_details([{"match_id": "abc"}]))
+
+
+def test_token_bucket_paces_after_burst():
+    limiter = TokenBucketLimiter(rate_per_second=20.0, burst=2)
+
+    async def _take(n):
+        for _ in range(n):
+            await limiter.acquire()
+
+    t0 = time.monotonic()
+    asyncio.run(_take(6))
+    elapsed = time.monotonic() - t0
+    # Two burst tokens are free; the remaining four refill at 20/s.
+    assert elapsed >= 0.18
+    assert limiter.acquired == 6
+    assert limiter.snapshot()["waited_seconds"] >= 0.15
+
+
+def test_token_bucket_penalty_blocks_then_recovers():
+    limiter = TokenBucketLimiter(rate_per_second=10.0, burst=1, recovery_per_success=5.0)
+    limiter.penalize(0.2)
+    assert limiter.snapshot()["blocked_seconds"] > 0
+    assert limiter.rate == 5.0
+
+    t0 = time.monotonic()
+    asyncio.run(limiter.acquire())
+    assert time.monotonic() - t0 >= 0.15
+
+    limiter.reward()
+    assert limiter.rate == 10.0
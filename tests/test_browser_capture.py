@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from src.browser_capture import TYPICAL_BYTES, CaptureMode
+
+
+class _Request:
+    def __init__(self, resource_type, url, size=1000):
+        self.resource_type = resource_type
+        self.url = url
+        self.size = size
+
+    async def sizes(self):
+        return {"responseBodySize": self.size, "responseHeadersSize": 0}
+
+
+class _Route:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+
+class _Page:
+    """Replays requests through the installed route handler like a browser would."""
+
+    def __init__(self):
+        self.route_handler = None
+        self.listeners = {}
+
+    async def route(self, pattern, handler):
+        self.route_handler = handler
+
+    def on(self, event, handler):
+        self.listeners[event] = handler
+
+    async def load(self, requests):
+        outcomes = []
+        for request in requests:
+            if self.route_handler is None:
+                outcomes.append("continued")
+                continue
+            route = _Route(request)
+            await self.route_handler(route)
+            outcomes.append(route.outcome)
+            if route.outcome == "continued":
+                await self.listeners["requestfinished"](request)
+        return outcomes
+
+
+MATCH_PAGE = [
+    _Request("document", "https://r6.tracker.network/r6siege/matches/abc", 50_000),
+    _Request("script", "https://trackercdn.com/app.js", 90_000),
+    _Request("stylesheet", "https://trackercdn.com/app.css", 20_000),
+    _Request("image", "https://trackercdn.com/op/ash.png", 30_000),
+    _Request("font", "https://fonts.gstatic.com/inter.woff2", 40_000),
+    _Request("script", "https://www.googletagmanager.com/gtm.js", 70_000),
+    _Request("xhr", "https://api.tracker.gg/api/v2/r6siege/standard/matches/abc", 8_000),
+]
+
+
+def test_block_mode_aborts_what_the_target_does_not_need():
+    async def main():
+        page = _Page()
+        capture = await CaptureMode(("v2_match", "v1_ingest"), mode="block").attach(page)
+        capture.begin()
+        outcomes = await page.load(MATCH_PAGE)
+        return outcomes, capture.end(), capture.report()
+
+    outcomes, load, totals = asyncio.run(main())
+    assert outcomes == ["continued", "continued", "aborted", "aborted", "aborted", "aborted", "continued"]
+    assert load["allowed_requests"] == 3 and load["allowed_bytes"] == 148_000
+    assert load["blocked_by_type"] == {"stylesheet": 1, "image": 1, "font": 1, "script": 1}
+    assert load["blocked_by_reason"] == {"type": 3, "host": 1}
+    assert load["bytes_saved"] == sum(TYPICAL_BYTES[t] for t in ("stylesheet", "image", "font", "script"))
+    assert load["time_saved_s"] is None
+    assert totals["blocked_requests"] == 4
+
+
+def test_observe_mode_measures_and_calibrates_block_estimates():
+    async def main():
+        mode = CaptureMode(("match_list",), mode="observe")
+        page = _Page()
+        capture = await mode.attach(page)
+        capture.begin()
+        outcomes = await page.load(MATCH_PAGE)
+        observed = capture.end()
+        mode.mode = "block"
+        capture.begin()
+        await page.load(MATCH_PAGE)
+        return outcomes, observed, capture.end()
+
+    outcomes, observed, blocked = asyncio.run(main())
+    assert set(outcomes) == {"continued"}
+    # The rendered match list keeps first-party stylesheets.
+    assert observed["bytes_saved"] == 30_000 + 40_000 + 70_000 and observed["bytes_saved_measured"]
+    assert blocked["blocked_by_type"] == {"image": 1, "font": 1, "script": 1}
+    assert blocked["bytes_saved"] == 30_000 + 40_000 + 70_000
+    assert blocked["time_saved_s"] is not None
+
+
+def test_off_mode_installs_no_route_and_unknown_targets_fail():
+    async def main():
+        page = _Page()
+        await CaptureMode(("profile_dom",), mode="off").attach(page)
+        return page
+
+    assert asyncio.run(main()).route_handler is None
+    with pytest.raises(ValueError):
+        CaptureMode(("v3_match",))
+
+
+def test_block_mode_lets_cloudflare_challenges_through():
+    challenge = [
+        _Request("document", "https://challenges.cloudflare.com/cdn-cgi/challenge-platform/turnstile/if/ov2"),
+        _Request("script", "https://challenges.cloudflare.com/turnstile/v0/api.js"),
+        _Request("image", "https://challenges.cloudflare.com/cdn-cgi/challenge-platform/h/g/pat/1"),
+        _Request("script", "https://r6.tracker.network/cdn-cgi/challenge-platform/scripts/jsd/main.js"),
+        _Request("script", "https://ads.example.com/cdn-cgi/x.js"),
+        _Request("image", "https://trackercdn.com/op/ash.png"),
+    ]
+
+    async def main():
+        page = _Page()
+        capture = await CaptureMode(("v2_match",), mode="block").attach(page)
+        first = await page.load(challenge)
+        capture.suspend()
+        suspended = await page.load(challenge)
+        capture.resume()
+        return first, suspended, await page.load(challenge)
+
+    first, suspended, resumed = asyncio.run(main())
+    assert first == ["continued"] * 4 + ["aborted", "aborted"]
+    assert suspended == ["continued"] * 6
+    assert resumed == first
@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from src.database import Database
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _summary():
+    with open(os.path.join(FIXTURES, "match1.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _seed_cards(db, count, username="alpha"):
+    summary = _summary()
+    db.save_scraped_match_cards(
+        username,
+        [
+            {"match_id": f"m{i:03d}", "map": "Bank", "mode": "Ranked", "match_summary": summary}
+            for i in range(count)
+        ],
+    )
+    # Simulate a backlog: cards stored before their summaries were normalized.
+    db.conn.execute("UPDATE scraped_match_cards SET has_rounds = 0, has_outcomes = 0")
+    for table in ("match_detail_players", "round_outcomes", "player_rounds"):
+        db.conn.execute(f"DELETE FROM {table}")
+    db.conn.commit()
+
+
+def _normalized_snapshot(db):
+    cur = db.conn.cursor()
+    out = {}
+    for table, cols in (
+        ("match_detail_players", "player_id, match_id, match_type, player_id_tracker, username, username_key, kills, deaths"),
+        ("round_outcomes", "player_id, match_id, round_id, end_reason, winner_side"),
+        ("player_rounds", "player_id, match_id, round_id, player_id_tracker, username, side, operator, result, first_blood"),
+    ):
+        cur.execute(f"SELECT {cols} FROM {table} ORDER BY {cols}")
+        out[table] = [tuple(r) for r in cur.fetchall()]
+    cur.execute("SELECT match_id, has_rounds, has_outcomes, round_data_source FROM scraped_match_cards ORDER BY match_id")
+    out["cards"] = [tuple(r) for r in cur.fetchall()]
+    return out
+
+
+def test_bulk_unpack_writes_all_tables_and_reports_throughput(db):
+    _seed_cards(db, 5)
+    seen = []
+
+    stats = db.unpack_pending_scraped_match_cards(batch_size=2, workers=0, progress=seen.append)
+
+    assert stats["unpacked_matches"] == 5
+    assert stats["errors"] == 0
+    assert stats["cards_per_second"] > 0
+    assert [p["processed"] for p in seen] == [2, 4, 5]
+    snap = _normalized_snapshot(db)
+    assert len(snap["match_detail_players"]) == 5 * 10
+    assert snap["round_outcomes"] and snap["player_rounds"]
+    assert all(card[1] == 1 and card[2] == 1 and card[3] == "summary" for card in snap["cards"])
+
+    again = db.unpack_pending_scraped_match_cards()
+    assert again["scanned"] == 0
+
+
+def test_process_pool_matches_inline_parse(db):
+    _seed_cards(db, 6)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    other = Database(path)
+    try:
+        _seed_cards(other, 6)
+        inline = db.unpack_pending_scraped_match_cards(workers=0)
+        pooled = other.unpack_pending_scraped_match_cards(batch_size=3, workers=2)
+        assert inline["unpacked_matches"] == pooled["unpacked_matches"] == 6
+        assert _normalized_snapshot(db) == _normalized_snapshot(other)
+    finally:
+        other.close()
+        os.remove(path)
+
+
+def test_bad_summary_counts_error_without_blocking_batch(db):
+    _seed_cards(db, 2)
+    db.conn.execute("UPDATE scraped_match_cards SET summary_json = '{not json' WHERE match_id = 'm000'")
+    db.conn.commit()
+
+    stats = db.unpack_pending_scraped_match_cards(workers=0)
+
+    assert stats["errors"] == 1
+    assert stats["unpacked_matches"] == 1
+
+
+def test_card_reads_page_by_id_project_fields_and_never_write(db):
+    _seed_cards(db, 5)
+    db.unpack_pending_scraped_match_cards(workers=0)
+    full = db.get_scraped_match_cards("alpha", limit=10)
+
+    pages, before = [], None
+    while True:
+        page = db.get_scraped_match_cards("alpha", limit=2, before_id=before, fields=["players"])
+        if not page:
+            break
+        pages.append(page)
+        before = page[-1]["card_id"]
+    listed = [card for page in pages for card in page]
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [c["card_id"] for c in listed] == [c["card_id"] for c in full]
+    assert all("match_summary" not in c and "round_data" not in c for c in listed)
+    assert [c["players"] for c in listed] == [c["players"] for c in full]
+    assert [c["round_data_missing"] for c in listed] == [c["round_data_missing"] for c in full]
+    # alpha is not in the fixture lobby; the owner columns come from their own detail row.
+    assert all(c["owner_rounds_won"] is None for c in listed)
+    _seed_cards(db, 1, username="Sugriva77")
+    db.unpack_pending_scraped_match_cards(workers=0)
+    owned = db.get_scraped_match_cards("Sugriva77", fields=())[0]
+    assert owned["owner_rounds_won"] is not None and owned["owner_rounds_lost"] is not None
+
+    one = db.get_scraped_match_cards("alpha", limit=1, match_id="m003")
+    assert one[0]["match_id"] == "m003" and one[0]["match_summary"] == _summary()
+    with pytest.raises(ValueError):
+        db.get_scraped_match_cards("alpha", fields=["summary_json"])
+
+    # Pending cards stay pending on read; unpacking is the write/job side's business.
+    _seed_cards(db, 1, username="bravo")
+    changes = db.conn.total_changes
+    db.get_scraped_match_cards("bravo")
+    assert db.conn.total_changes == changes
+    assert db.conn.execute("SELECT COUNT(*) FROM match_detail_players").fetchone()[0] == 0
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+import pytest
+
+from src.cache import CacheManager, SQLiteL2Cache, _encode, _encoded_bytes
+
+
+@pytest.fixture
+def l2():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    store = SQLiteL2Cache(path)
+    yield store
+    store.close()
+    os.remove(path)
+
+
+def _manager(**kwargs):
+    mgr = CacheManager(**kwargs)
+    mgr.register_namespace("a", ttl_seconds=60)
+    mgr.register_namespace("b", ttl_seconds=60)
+    return mgr
+
+
+def test_lru_evicts_least_recently_used_by_entry_count():
+    mgr = _manager(max_entries=2)
+    mgr.set("a", "k1", {"v": 1})
+    mgr.set("a", "k2", {"v": 2})
+    assert mgr.get("a", "k1") == {"v": 1}  # k1 is now most recent
+    mgr.set("a", "k3", {"v": 3})
+
+    assert mgr.get("a", "k2") is None
+    assert mgr.get("a", "k1") == {"v": 1}
+    stats = mgr.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_byte_budget_bounds_memory():
+    mgr = _manager(max_entries=100, max_bytes=200)
+    for i in range(10):
+        mgr.set("a", f"k{i}", {"blob": "x" * 50})
+    stats = mgr.stats()
+    assert stats["bytes"] <= 200
+    assert stats["entries"] < 10
+    # An entry larger than the whole budget is never kept.
+    mgr.set("b", "huge", {"blob": "x" * 500})
+    assert mgr.get("b", "huge") is None
+
+
+def test_byte_budget_counts_utf8_bytes():
+    mgr = _manager()
+    value = {"name": "Sugriva\u00e9\u2603"}
+    mgr.set("a", "k", value)
+    assert mgr.stats()["bytes"] == len(_encode(value).encode("utf-8"))
+    assert _encoded_bytes("\u00e9\u2603") == 5
+
+
+def test_db_revision_mismatch_is_a_miss_and_drops_entry():
+    mgr = _manager()
+    mgr.set("a", "k", {"v": 1}, db_rev="r1")
+    assert mgr.get("a", "k", db_rev="r2") is None
+    assert mgr.get("a", "k", db_rev="r1") is None
+    assert mgr.stats()["namespaces"]["a"]["stale"] == 1
+
+
+def test_invalidate_namespace_leaves_others():
+    mgr = _manager()
+    mgr.set("a", "k", {"v": 1})
+    mgr.set("b", "k", {"v": 2})
+    assert mgr.invalidate("a") == 1
+    assert mgr.get("a", "k") is None
+    assert mgr.get("b", "k") == {"v": 2}
+    with pytest.raises(KeyError):
+        mgr.invalidate("nope")
+
+
+def test_l2_serves_after_l1_eviction_and_expiry_is_purged(l2):
+    mgr = CacheManager(max_entries=1)
+    mgr.register_namespace("scope", ttl_seconds=60, use_l2=True)
+    mgr.register_namespace("short", ttl_seconds=0.05, use_l2=True)
+    mgr.attach_l2(l2)
+
+    mgr.set("scope", "k1", {"v": 1}, db_rev="r1")
+    mgr.set("scope", "k2", {"v": 2}, db_rev="r1")
+    assert mgr.get("scope", "k1", db_rev="r1") == {"v": 1}
+    assert mgr.stats()["namespaces"]["scope"]["l2_hits"] == 1
+    assert mgr.get("scope", "k1", db_rev="r2") is None
+
+    l2.set("short", "gone", "{}", "", ttl_seconds=1)
+    l2.conn.execute("UPDATE cache_entries SET expires_at = ? WHERE namespace = 'short'", (time.time() - 1,))
+    assert l2.get("short", "gone") is None
+    assert mgr.purge_expired() >= 1
+    assert l2.count() == 2
+
+
+def test_l2_drops_legacy_cache_tables():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE workspace_scope_cache (scope_key TEXT PRIMARY KEY)")
+    conn.commit()
+    conn.close()
+    store = SQLiteL2Cache(path)
+    try:
+        names = {r[0] for r in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "workspace_scope_cache" not in names
+        assert "cache_entries" in names
+    finally:
+        store.close()
+        os.remove(path)
+
+
+def test_l1_only_namespace_accepts_sized_objects():
+    mgr = CacheManager(max_bytes=100)
+    mgr.register_namespace("objs", ttl_seconds=60)
+    marker = object()
+    mgr.set("objs", "k", marker, db_rev="r1", size_bytes=40)
+    assert mgr.get("objs", "k", db_rev="r1") is marker
+    assert mgr.stats()["bytes"] == 40
@@ -0,0 +1,125 @@
+import json
+import os
+import pickle
+import tempfile
+
+import pytest
+
+from src import card_payloads
+from src.database import Database
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _summary():
+    with open(os.path.join(FIXTURES, "match1.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+PLAYERS = [{"team": "A", "username": "alpha", "kills": 5, "deaths": 3}, {"team": "B", "username": "bravo"}]
+
+
+def _legacy_cards(db):
+    cur = db.conn.cursor()
+    cur.execute(
+        "SELECT COUNT(*) FROM scraped_match_cards "
+        "WHERE players_json IS NOT NULL OR rounds_json IS NOT NULL "
+        "OR summary_json IS NOT NULL OR round_data_json IS NOT NULL"
+    )
+    return cur.fetchone()[0]
+
+
+def _card_view(db, username):
+    return [
+        {k: v for k, v in card.items() if k != "scraped_at"}
+        for card in db.get_scraped_match_cards(username)
+    ]
+
+
+def test_cards_are_stored_compressed_and_merge_only_decodes_what_it_replaces(db, monkeypatch):
+    summary = _summary()
+    db.save_scraped_match_cards("alpha", [{"match_id": "m1", "map": "Bank", "mode": "Ranked", "match_summary": summary}])
+
+    assert _legacy_cards(db) == 0
+    stats = db.get_scraped_card_payload_stats()
+    # The summary, plus the round data the save-time unpack derived from it and the
+    # players list rebuilt from the normalized rows.
+    assert stats["payloads"] == 3 and 0 < stats["stored_bytes"] * 20 < stats["raw_bytes"]
+
+    rebuilt = db.get_scraped_match_cards("alpha", fields=["players"])[0]["players"]
+    assert rebuilt and all(p["team"] in ("A", "B") for p in rebuilt)
+
+    stored_summary = db.conn.execute("SELECT payload FROM scraped_card_payloads WHERE kind = 'summary'").fetchone()[0]
+    decoded = []
+    real_decode = card_payloads.decode
+    monkeypatch.setattr(card_payloads, "decode", lambda codec, blob: decoded.append(bytes(blob)) or real_decode(codec, blob))
+    # A rescrape that only brings players may check the stored players, never the summary.
+    db.save_scraped_match_cards("alpha", [{"match_id": "m1", "players": PLAYERS, "rounds": []}])
+    assert bytes(stored_summary) not in decoded
+
+    card = db.get_scraped_match_cards("alpha")[0]
+    assert card["match_summary"] == summary
+    assert card["players"] == rebuilt
+    assert db.get_fully_scraped_match_ids("alpha") == {"m1"}
+
+
+def test_legacy_inline_cards_read_the_same_before_and_after_migration(db):
+    summary = _summary()
+    db.save_scraped_match_cards("alpha", [{"match_id": "m1", "mode": "Ranked", "match_summary": summary}])
+    db.conn.execute(
+        """
+        INSERT INTO scraped_match_cards (username, match_id, map_name, mode, mode_key, players_json, rounds_json, summary_json, round_data_json)
+        VALUES ('alpha', 'm2', 'Oregon', 'Ranked', 'ranked', ?, '[]', ?, '{}')
+        """,
+        (json.dumps(PLAYERS), json.dumps(summary)),
+    )
+    db.conn.commit()
+    unpacked = db.unpack_pending_scraped_match_cards(workers=0)
+    assert unpacked["unpacked_matches"] == 1 and unpacked["errors"] == 0
+    before = _card_view(db, "alpha")
+    fully = db.get_fully_scraped_match_ids("alpha")
+    assert fully == {"m1", "m2"}
+
+    # Unpacking already moved m2's derived round data into the side table.
+    stats = db.migrate_scraped_card_payloads(batch_size=1)
+    assert stats["cards"] == 1 and stats["payloads"] == 2 and stats["emptied"] == 1
+    assert 0 < stats["stored_bytes"] < stats["legacy_bytes"]
+    assert _legacy_cards(db) == 0
+    assert _card_view(db, "alpha") == before
+    assert db.get_fully_scraped_match_ids("alpha") == fully
+    assert db.migrate_scraped_card_payloads()["cards"] == 0
+
+
+def test_payload_handles_stay_compressed_until_read(db):
+    db.save_scraped_match_cards("alpha", [{"match_id": "m1", "players": PLAYERS, "match_summary": _summary()}])
+    card_id = db.conn.execute("SELECT id FROM scraped_match_cards").fetchone()[0]
+
+    stored = card_payloads.load(db.conn, [card_id])[card_id]
+    assert set(stored) == {"players", "summary", "round_data"}
+    assert not stored["summary"].decoded
+    shipped = pickle.loads(pickle.dumps(stored["summary"]))
+    assert len(pickle.dumps(stored["summary"])) < 50_000 and not shipped.decoded
+    assert shipped.json() == _summary()
+
+    # A raw write to the legacy column is newer than the side table and wins.
+    db.conn.execute("UPDATE scraped_match_cards SET players_json = '[]' WHERE id = ?", (card_id,))
+    assert "players" not in card_payloads.load(db.conn, [card_id])[card_id]
+
+    db.conn.execute("DELETE FROM scraped_match_cards")
+    assert db.conn.execute("SELECT COUNT(*) FROM scraped_card_payloads").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zlib-d1"] + (["zstd-d1"] if card_payloads.zstandard else []))
+def test_codecs_round_trip(codec):
+    text = card_payloads.dumps(PLAYERS)
+    assert card_payloads.decode(codec, card_payloads.encode(text, codec)) == text
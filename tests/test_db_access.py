@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+
+import pytest
+
+from src.database import Database
+from src.db_access import DatabaseAccess, is_read_method
+
+
+@pytest.fixture
+def access():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    primary = Database(path)
+    primary.add_player("alpha")
+    db_access = DatabaseAccess(path, readers=3)
+    yield db_access
+    db_access.close()
+    primary.close()
+    os.remove(path)
+
+
+def test_reader_connections_are_read_only(access):
+    def try_write():
+        access.current().conn.execute("INSERT INTO players (username) VALUES ('x')")
+
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(access.run_read(try_write))
+    assert asyncio.run(access.run_read(lambda: access.current().player_exists("alpha")))
+
+
+def test_writer_connection_skips_schema_migration(access, monkeypatch):
+    monkeypatch.setattr(Database, "_migrate_schema", lambda self: pytest.fail("writer re-ran migrations"))
+    assert asyncio.run(access.database.add_player("bravo"))
+    assert asyncio.run(access.database.player_exists("bravo"))
+
+
+def test_async_facade_routes_reads_and_writes(access):
+    adb = access.database
+
+    async def scenario():
+        await adb.save_scraped_match_cards("alpha", [{"match_id": "m1", "map": "Bank", "mode": "Ranked"}])
+        ids = await adb.get_existing_scraped_match_ids("alpha")
+        await adb.set_player_tag("bravo", "friend")
+        tagged = await adb.get_tagged_players(tag="friend")
+        return ids, tagged
+
+    ids, tagged = asyncio.run(scenario())
+    assert ids == {"m1"}
+    assert [row["username"] for row in tagged] == ["bravo"]
+    stats = access.stats()
+    assert stats["write"]["calls"] == 2 and stats["read"]["calls"] == 2
+    assert is_read_method("get_scraped_match_cards")
+    assert not is_read_method("get_or_create_player_id")
+    with pytest.raises(AttributeError):
+        adb.not_a_method
+
+
+def test_writes_serialize_while_reads_run_in_parallel(access):
+    writer_threads = set()
+    reader_threads = set()
+    gate = threading.Barrier(3, timeout=5)
+
+    def write(i):
+        writer_threads.add(threading.get_ident())
+        access.current().set_player_tag(f"p{i}", "friend")
+
+    def read():
+        reader_threads.add(threading.get_ident())
+        gate.wait()  # only passes if three readers are active at once
+        return len(access.current().get_all_players())
+
+    async def scenario():
+        return await asyncio.gather(
+            *(access.run_write(write, i) for i in range(10)),
+            *(access.run_read(read) for _ in range(3)),
+        )
+
+    results = asyncio.run(scenario())
+    assert len(writer_threads) == 1
+    assert len(reader_threads) == 3
+    assert all(isinstance(n, int) for n in results[10:])
+    assert len(asyncio.run(access.database.get_tagged_players(tag="friend"))) == 10
+
+
+def test_decorated_handler_keeps_signature_and_sees_pool_connection(access):
+    import inspect
+
+    @access.reads
+    def handler(username: str, limit: int = 5):
+        return access.current().get_player(username)["username"], limit
+
+    assert inspect.iscoroutinefunction(handler)
+    assert list(inspect.signature(handler).parameters) == ["username", "limit"]
+    assert asyncio.run(handler("alpha")) == ("alpha", 5)
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from src.database import Database
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _detail(match_id):
+    players = [
+        {"player_id_tracker": "t-a", "username": "Alpha", "team_id": 0, "result": "win"},
+        {"player_id_tracker": "t-c", "username": "charlie", "team_id": 1, "result": "loss"},
+    ]
+    return {"match_id": match_id, "mode": "Ranked", "players": players, "round_outcomes": [], "player_rounds": []}
+
+
+def test_card_and_detail_writes_bump_only_affected_players(db):
+    alpha = db.add_player("Alpha")
+    db.add_player("bravo")
+    alpha_before = db.get_revision_token("alpha")
+    bravo_before = db.get_revision_token("bravo")
+    global_before = db.get_db_revision()
+
+    db.save_scraped_match_cards("Alpha", [{"match_id": "m1", "map": "Bank", "mode": "Ranked"}])
+    assert db.get_revision_token("ALPHA ") != alpha_before
+    assert db.get_revision_token("bravo") == bravo_before
+    assert db.get_db_revision() > global_before
+    assert db.get_db_revision("table:scraped_match_cards") == 1
+
+    charlie_before = db.get_player_revision("charlie")
+    db.save_full_match_detail_history(alpha, [_detail("m1")])
+    # Participants of the match are bumped too; their stack/teammate views read these rows.
+    assert db.get_player_revision("charlie") > charlie_before
+    assert db.get_revision_token("bravo") == bravo_before
+    assert db.get_db_revision("table:player_rounds") >= 1
+
+
+def test_shared_scopes_and_raw_sql_writes_invalidate_every_player(db):
+    db.add_player("alpha")
+    before = db.get_revision_token("alpha")
+
+    db.set_player_tag("bravo", "friend")
+    after_tag = db.get_revision_token("alpha")
+    assert after_tag != before
+
+    # Triggers catch writes that bypass Database methods on low-volume tables.
+    db.conn.execute("INSERT INTO stacks (stack_name, stack_type) VALUES ('s', 'named')")
+    db.conn.commit()
+    assert db.get_revision_token("alpha") != after_tag
+
+
+def test_revisions_persist_across_reopen(db):
+    db.save_scraped_match_cards("alpha", [{"match_id": "m1", "map": "Bank", "mode": "Ranked"}])
+    token = db.get_revision_token("alpha")
+    reopened = Database(db.db_path)
+    try:
+        assert reopened.get_revision_token("alpha") == token
+    finally:
+        reopened.close()
+
+
+def test_bump_helper_works_on_a_raw_connection(db):
+    conn = sqlite3.connect(db.db_path)
+    try:
+        Database.bump_db_revisions(conn.cursor(), ("player_rounds",), all_players=True)
+        conn.commit()
+    finally:
+        conn.close()
+    assert db.get_db_revision("players:all") == 1
+    assert db.get_revision_token("anyone").startswith("p0.1.")
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from src.database import Database
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+OWNER = "Sugriva77"
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _save(db, *match_ids, owner=OWNER):
+    with open(os.path.join(FIXTURES, "match1.json"), "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    db.save_scraped_match_cards(
+        owner,
+        [{"match_id": mid, "map": "Bank", "mode": "Ranked", "match_summary": summary} for mid in match_ids],
+    )
+
+
+def _lobby(db, match_id="m1"):
+    return {
+        row["username_key"]: row["team_id"]
+        for row in db.conn.execute(
+            "SELECT username_key, team_id FROM match_detail_players WHERE match_id = ?", (match_id,)
+        )
+    }
+
+
+def test_graph_folds_each_lobby_once_with_side_and_queue(db):
+    _save(db, "m1", "m2")
+    stats = db.refresh_encounter_graph()
+    assert stats["matches"] == 2 and stats["rebuilt"] is False
+
+    lobby = _lobby(db)
+    owner_key = Database._username_key(OWNER)
+    neighbors = db.get_encounter_neighbors(OWNER)
+    assert {n["username_key"] for n in neighbors} == set(lobby) - {owner_key}
+    for n in neighbors:
+        assert n["matches"] == 2
+        assert n["queues"] == {"ranked": 2}
+        relation = "with" if lobby[n["username_key"]] == lobby[owner_key] else "against"
+        assert n[relation] == 2 and n["with"] + n["against"] == 2
+    assert db.get_encounter_neighbors(OWNER, min_matches=3) == []
+    assert len(db.get_encounter_neighbors(OWNER, limit=3)) == 3
+    assert all(n["with"] == 2 for n in db.get_encounter_neighbors(OWNER, relation="with"))
+
+    node = db.get_encounter_nodes([OWNER])[owner_key]
+    assert node["username"] == OWNER and node["matches"] == 2
+    assert db.get_encounter_covered_keys() == {owner_key}
+
+
+def test_graph_refresh_is_incremental_and_rebuilds_after_removals(db):
+    _save(db, "m1")
+    assert db.refresh_encounter_graph()["matches"] == 1
+    assert db.refresh_encounter_graph()["matches"] == 0
+
+    # The same lobby seen by a second synced owner is not counted twice.
+    other = next(k for k in _lobby(db) if k != Database._username_key(OWNER))
+    _save(db, "m1", owner=db.conn.execute(
+        "SELECT username FROM match_detail_players WHERE username_key = ?", (other,)
+    ).fetchone()[0])
+    _save(db, "m2")
+    stats = db.refresh_encounter_graph()
+    assert stats["matches"] == 1 and not stats["rebuilt"]
+    assert {n["matches"] for n in db.get_encounter_neighbors(OWNER)} == {2}
+
+    db.conn.execute("DELETE FROM match_detail_players WHERE match_id = 'm2'")
+    db.bump_db_revisions(db.conn.cursor(), ("match_detail_players",))
+    db.conn.commit()
+    stats = db.refresh_encounter_graph()
+    assert stats["rebuilt"] and stats["matches"] == 1
+    assert {n["matches"] for n in db.get_encounter_neighbors(OWNER)} == {1}
+    assert db.refresh_encounter_graph(full=True)["matches"] == 1
+
+
+def _player(name, team_id):
+    return {"player_id_tracker": f"t-{name}", "username": name, "team_id": team_id, "result": "win", "kills": 1}
+
+
+def _edge(db, a, b):
+    return dict(db.conn.execute(
+        "SELECT matches, last_ts FROM encounter_edges WHERE username_key = ? AND other_key = ?", (a, b)
+    ).fetchone())
+
+
+def test_late_card_and_new_players_refold_the_match(db):
+    owner_id = db.add_player("alpha")
+    db.save_match_detail_players(owner_id, "m1", [_player("alpha", 0), _player("bravo", 1)], match_type="Ranked")
+    assert db.refresh_encounter_graph()["matches"] == 1
+    assert _edge(db, "alpha", "bravo") == {"matches": 1, "last_ts": 0}
+
+    # The card lands after the fold; only the timestamp moves.
+    db.save_scraped_match_cards("alpha", [{"match_id": "m1", "map": "Bank", "mode": "Ranked", "date": "2026-01-05T20:00:00Z"}])
+    stats = db.refresh_encounter_graph()
+    assert stats["refolded"] == 1 and stats["matches"] == 0 and not stats["rebuilt"]
+    assert _edge(db, "alpha", "bravo") == {"matches": 1, "last_ts": 1767643200}
+    assert db.get_encounter_nodes(["alpha"])["alpha"]["last_ts"] == 1767643200
+
+    # A fuller lobby saved later adds the missing player without recounting the rest.
+    db.save_match_detail_players(
+        owner_id, "m1", [_player("alpha", 0), _player("bravo", 1), _player("charlie", 0)], match_type="Ranked"
+    )
+    stats = db.refresh_encounter_graph()
+    assert stats["refolded"] == 1 and not stats["rebuilt"]
+    assert _edge(db, "alpha", "bravo") == {"matches": 1, "last_ts": 1767643200}
+    assert _edge(db, "alpha", "charlie") == {"matches": 1, "last_ts": 1767643200}
+    nodes = db.get_encounter_nodes(["alpha", "charlie"])
+    assert nodes["alpha"]["matches"] == 1 and nodes["alpha"]["win_pct"] == 100.0
+    assert nodes["charlie"]["matches"] == 1
+
+    # Losing a player cannot be subtracted, so the graph is rebuilt.
+    db.save_match_detail_players(owner_id, "m1", [_player("alpha", 0), _player("bravo", 1)], match_type="Ranked")
+    stats = db.refresh_encounter_graph()
+    assert stats["rebuilt"] and stats["matches"] == 1
+    assert db.conn.execute("SELECT COUNT(*) FROM encounter_edges WHERE other_key = 'charlie'").fetchone()[0] == 0
+    assert db.refresh_encounter_graph()["refolded"] == 0
@@ -0,0 +1,104 @@
+import json
+import random
+
+import pytest
+
+from src.analytics import heatmap_engine
+from src.analytics.heatmap_engine import PairGrid, cell_options, compute_cells, scatter_pair_counts
+
+OPTIONS = [
+    (norm, lift, interval)
+    for norm in ("global", "attacker")
+    for lift in ("percent_delta", "logit_lift", "log_odds_ratio")
+    for interval in ("wilson", "wald")
+]
+
+
+def _rounds(count, seed):
+    rng = random.Random(seed)
+    attackers = [f"A{i}" for i in range(12)]
+    defenders = [f"D{i}" for i in range(12)]
+    out = []
+    for _ in range(count):
+        # Skewed picks so some pairs are rare, perfect or winless.
+        atk = set(rng.choices(attackers, weights=range(12, 0, -1), k=rng.randint(0, 5)))
+        dfn = set(rng.choices(defenders, weights=range(1, 13), k=rng.randint(1, 5)))
+        out.append((atk, dfn, int(rng.random() < 0.45)))
+    return out
+
+
+def _grid(rounds):
+    pair_stats, atk_counts, atk_wins, def_counts = {}, {}, {}, {}
+    valid = [r for r in rounds if r[0] and r[1]]
+    for atk, dfn, win in valid:
+        for a in atk:
+            atk_counts[a] = atk_counts.get(a, 0) + 1
+            atk_wins[a] = atk_wins.get(a, 0) + win
+            for d in dfn:
+                cell = pair_stats.setdefault((a, d), {"n": 0, "atk_wins": 0})
+                cell["n"] += 1
+                cell["atk_wins"] += win
+        for d in dfn:
+            def_counts[d] = def_counts.get(d, 0) + 1
+    return PairGrid(
+        pair_stats=pair_stats,
+        atk_counts=atk_counts,
+        atk_wins_by_op=atk_wins,
+        def_counts=def_counts,
+        total_units=len(valid),
+        atk_unit_wins=sum(r[2] for r in valid),
+    )
+
+
+@pytest.mark.parametrize("norm_key,lift_key,interval_key", OPTIONS)
+def test_vectorized_cells_match_scalar_cells(monkeypatch, norm_key, lift_key, interval_key):
+    pytest.importorskip("numpy")
+    grid = _grid(_rounds(600, seed=3))
+    kwargs = dict(norm_key=norm_key, lift_key=lift_key, interval_key=interval_key, pct_digits=1, lift_digits=3)
+    vectorized = compute_cells(grid, **kwargs)
+    monkeypatch.setattr(heatmap_engine, "np", None)
+    scalar = compute_cells(grid, **kwargs)
+    assert json.dumps(vectorized) == json.dumps(scalar)
+    cells, pathology = scalar
+    assert [(c["attacker"], c["defender"]) for c in cells] == [
+        (a, d) for a in grid.attackers for d in grid.defenders if (a, d) in grid.pair_stats
+    ]
+    if lift_key == "log_odds_ratio":
+        assert pathology["or_continuity_applied_count"] > 0
+
+
+def test_scatter_pair_counts_match_set_counting():
+    np = pytest.importorskip("numpy")
+    rounds = _rounds(400, seed=8)
+    names = sorted({op for atk, dfn, _w in rounds for op in atk | dfn})
+    index = {name: i for i, name in enumerate(names)}
+    atk = np.zeros((len(rounds), len(names)), dtype=np.uint8)
+    dfn = np.zeros_like(atk)
+    for row, (a_ops, d_ops, _w) in enumerate(rounds):
+        atk[row, [index[a] for a in a_ops]] = 1
+        dfn[row, [index[d] for d in d_ops]] = 1
+    counts = scatter_pair_counts(atk, dfn, [r[2] for r in rounds])
+
+    grid = _grid(rounds)
+    assert counts["units"] == grid.total_units
+    assert counts["atk_unit_wins"] == grid.atk_unit_wins
+    for (a, d), cell in grid.pair_stats.items():
+        assert counts["pair_n"][index[a], index[d]] == cell["n"]
+        assert counts["pair_w"][index[a], index[d]] == cell["atk_wins"]
+    assert counts["pair_n"].sum() == sum(c["n"] for c in grid.pair_stats.values())
+    assert {names[i]: int(v) for i, v in enumerate(counts["atk_n"]) if v} == grid.atk_counts
+
+
+def test_cell_options_fall_back_to_defaults():
+    assert cell_options("ATTACKER", " Logit_Lift ", "WALD") == ("attacker", "logit_lift", "wald")
+    assert cell_options("", None, "bogus") == ("global", "percent_delta", "wilson")
+
+
+def test_vectorized_rounding_matches_round_at_ties():
+    np = pytest.importorskip("numpy")
+    values = [0.05, 0.15, 0.25, 2.675, -2.675, 1.0005, -0.04, 12.345, 99.95, 1e-9, -0.0]
+    values += [k / 2000.0 for k in range(-400, 400)]
+    for places in (1, 3, 4):
+        expected = [round(v, places) for v in values]
+        got = heatmap_engine._round_array(np.array(values), places)
+        assert [repr(v) for v in got] == [repr(v) for v in expected]
@@ -0,0 +1,138 @@
+import os
+import tempfile
+
+import pytest
+
+from src.database import Database
+
+HOUR = 3600
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _detail(match_id, kills=3, result="win", operator="Ash"):
+    players = [
+        {"player_id_tracker": "t-a", "username": "alpha", "team_id": 0, "result": result, "kills": kills, "deaths": 1},
+        {"player_id_tracker": "t-b", "username": "bravo", "team_id": 0, "result": result, "kills": 1, "deaths": 2},
+        {"player_id_tracker": "t-e", "username": "enemy", "team_id": 1, "result": "loss", "kills": 2, "deaths": 4},
+    ]
+    rounds = [
+        {"round_id": r, "player_id_tracker": tid, "side": "attacker", "operator": operator, "result": "win", "kills": 1}
+        for r in (1, 2)
+        for tid in ("t-a", "t-b", "t-e")
+    ]
+    return {"match_id": match_id, "mode": "Ranked", "players": players, "round_outcomes": [], "player_rounds": rounds}
+
+
+def _card(match_id, ts, map_name="Bank"):
+    return {"match_id": match_id, "map": map_name, "mode": "Ranked", "date": ts}
+
+
+def _agg_state(db):
+    cur = db.conn.cursor()
+    out = {}
+    for table, order in (
+        ("agg_player_map", "tracker_player_id, match_type, map_name"),
+        ("agg_player_operator", "tracker_player_id, match_type, operator"),
+        ("agg_sessions", "tracker_player_id, started_at"),
+    ):
+        cur.execute(f"SELECT * FROM {table} ORDER BY {order}")
+        out[table] = [tuple(r) for r in cur.fetchall()]
+    return out
+
+
+def _assert_matches_full_rebuild(db):
+    incremental = _agg_state(db)
+    db.rebuild_all_aggregates()
+    assert incremental == _agg_state(db)
+
+
+def _ts(hours):
+    return f"2026-01-01T{hours:02d}:00:00Z"
+
+
+def test_incremental_equals_full_rebuild_across_resaves_and_owners(db):
+    alpha = db.add_player("alpha")
+    bravo = db.add_player("bravo")
+    db.save_scraped_match_cards("alpha", [_card("m1", _ts(1)), _card("m2", _ts(2)), _card("m3", _ts(9))])
+
+    db.save_full_match_detail_history(alpha, [_detail("m1"), _detail("m2")])
+    _assert_matches_full_rebuild(db)
+
+    # Same match saved for a second tracked owner must not double count.
+    db.save_full_match_detail_history(bravo, [_detail("m2")])
+    cur = db.conn.cursor()
+    cur.execute("SELECT matches FROM agg_player_map WHERE tracker_player_id = 't-a'")
+    assert cur.fetchone()["matches"] == 2
+    _assert_matches_full_rebuild(db)
+
+    # Re-save with corrected stats and a different operator replaces the old contribution.
+    db.save_full_match_detail_history(alpha, [_detail("m1", kills=10, result="loss", operator="Thermite")])
+    _assert_matches_full_rebuild(db)
+    cur.execute("SELECT operator FROM agg_player_operator WHERE tracker_player_id = 't-a' ORDER BY operator")
+    assert [r["operator"] for r in cur.fetchall()] == ["Ash", "Thermite"]
+
+    # A newer card moving the match to another map re-homes its contribution.
+    db.save_scraped_match_cards("bravo", [_card("m2", _ts(2), map_name="Villa")])
+    cur.execute("SELECT map_name, matches FROM agg_player_map WHERE tracker_player_id = 't-a' ORDER BY map_name")
+    assert [(r["map_name"], r["matches"]) for r in cur.fetchall()] == [("Bank", 1), ("Villa", 1)]
+    _assert_matches_full_rebuild(db)
+
+
+def test_session_window_merges_and_splits(db):
+    alpha = db.add_player("alpha")
+    db.save_scraped_match_cards(
+        "alpha",
+        [_card("s1", _ts(1)), _card("s3", _ts(3)), _card("s2", "2026-01-01T02:00:00Z"), _card("far", _ts(12))],
+    )
+    db.save_full_match_detail_history(alpha, [_detail("s1"), _detail("s3"), _detail("far")])
+    cur = db.conn.cursor()
+    cur.execute("SELECT COUNT(*) AS n FROM agg_sessions WHERE tracker_player_id = 't-a'")
+    assert cur.fetchone()["n"] == 3
+
+    # s2 bridges s1 and s3 (each within the 90 minute gap) into one session.
+    db.save_full_match_detail_history(alpha, [_detail("s2")])
+    cur.execute("SELECT matches FROM agg_sessions WHERE tracker_player_id = 't-a' ORDER BY started_at")
+    assert [r["matches"] for r in cur.fetchall()] == [3, 1]
+    _assert_matches_full_rebuild(db)
+
+    # Removing the bridge splits the session again.
+    db.conn.execute("DELETE FROM match_detail_players WHERE match_id = 's2'")
+    db.conn.execute("DELETE FROM player_rounds WHERE match_id = 's2'")
+    db.conn.commit()
+    db.refresh_aggregates_for_matches(["s2"])
+    cur.execute("SELECT matches FROM agg_sessions WHERE tracker_player_id = 't-a' ORDER BY started_at")
+    assert [r["matches"] for r in cur.fetchall()] == [1, 1, 1]
+    _assert_matches_full_rebuild(db)
+
+
+def test_unchanged_resave_touches_no_trackers(db):
+    alpha = db.add_player("alpha")
+    db.save_full_match_detail_history(alpha, [_detail("m1")])
+    assert db.refresh_aggregates_for_matches(["m1"]) == 0
+
+
+def test_ledger_bootstraps_on_open(db):
+    alpha = db.add_player("alpha")
+    db.save_full_match_detail_history(alpha, [_detail("m1")])
+    before = _agg_state(db)
+    db.conn.execute("DELETE FROM agg_match_contrib")
+    db.conn.execute("DELETE FROM agg_operator_contrib")
+    db.conn.commit()
+
+    reopened = Database(db.db_path)
+    try:
+        cur = reopened.conn.cursor()
+        cur.execute("SELECT COUNT(*) AS n FROM agg_match_contrib")
+        assert cur.fetchone()["n"] == 3
+        assert _agg_state(reopened) == before
+    finally:
+        reopened.close()
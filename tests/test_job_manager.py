@@ -0,0 +1,197 @@
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from src.database import Database
+from src.job_manager import JobManager
+
+
+@pytest.fixture
+def db_path():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    Database(path).close()
+    yield path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _manager(db_path, workers=3):
+    manager = JobManager(db_path, workers=workers, progress_interval_s=0.0)
+    log = []
+    lock = threading.Lock()
+    gates = {}
+
+    def work(ctx, username=None, tag=None, steps=1):
+        with lock:
+            log.append(("start", tag))
+        gate = gates.get(tag)
+        if gate is not None:
+            assert gate.wait(5)
+        for i in range(steps):
+            ctx.progress(i + 1, steps, f"step {i + 1}")
+        with lock:
+            log.append(("end", tag))
+        return {"tag": tag}
+
+    manager.register("work", work)
+    return manager, log, gates
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_same_player_jobs_serialize_while_other_players_run_in_parallel(db_path):
+    manager, log, gates = _manager(db_path)
+    gates["a1"] = threading.Event()
+    manager.start()
+    try:
+        a1 = manager.submit("work", {"username": "Alpha", "tag": "a1"})
+        a2 = manager.submit("work", {"username": "alpha", "tag": "a2"})
+        b1 = manager.submit("work", {"username": "bravo", "tag": "b1"})
+        assert a1["subject"] == a2["subject"] == "alpha"
+
+        assert manager.wait(b1["job_id"], 5)["status"] == "done"
+        assert ("start", "a2") not in log
+        assert manager.get(a2["job_id"])["status"] == "queued"
+
+        gates["a1"].set()
+        assert manager.wait(a2["job_id"], 5)["status"] == "done"
+        assert log.index(("end", "a1")) < log.index(("start", "a2"))
+    finally:
+        manager.close()
+
+
+def test_whole_database_job_runs_alone(db_path):
+    manager, log, gates = _manager(db_path)
+    gates["a"] = threading.Event()
+    manager.start()
+    try:
+        a = manager.submit("work", {"username": "alpha", "tag": "a"})
+        assert _wait_for(lambda: ("start", "a") in log)
+        assert manager.get(a["job_id"])["status"] == "running"
+        g = manager.submit("work", {"tag": "global"})
+        b = manager.submit("work", {"username": "bravo", "tag": "b"})
+        time.sleep(0.1)
+        # The global job waits for alpha, and bravo may not overtake the global job.
+        assert manager.get(g["job_id"])["status"] == "queued"
+        assert manager.get(b["job_id"])["status"] == "queued"
+
+        gates["a"].set()
+        assert manager.wait(b["job_id"], 5)["status"] == "done"
+        assert log.index(("end", "a")) < log.index(("start", "global"))
+        assert log.index(("end", "global")) < log.index(("start", "b"))
+    finally:
+        manager.close()
+
+
+def test_cancel_queued_and_running_jobs(db_path):
+    manager, log, gates = _manager(db_path, workers=1)
+    go = threading.Event()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(ctx, username=None):
+        assert go.wait(5)
+        ctx.db.conn.execute("INSERT INTO players (username) VALUES ('half-written')")
+        started.set()
+        release.wait(5)
+        ctx.progress(1, 2)
+        return {"unreachable": True}
+
+    manager.register("slow", slow)
+    manager.start()
+    try:
+        running = manager.submit("slow", {"username": "alpha"})
+        queued = manager.submit("work", {"username": "alpha", "tag": "q"})
+        go.set()
+        assert started.wait(5)
+
+        assert manager.cancel(queued["job_id"])["status"] == "cancelled"
+        assert manager.cancel(running["job_id"])["cancel_requested"] is True
+        release.set()
+        final = manager.wait(running["job_id"], 5)
+        assert final["status"] == "cancelled" and final["result"] is None
+        assert ("start", "q") not in log
+    finally:
+        manager.close()
+
+    db = Database(db_path)
+    try:
+        assert db.conn.execute("SELECT COUNT(*) FROM players WHERE username = 'half-written'").fetchone()[0] == 0
+        assert db.get_job(queued["job_id"])["status"] == "cancelled"
+    finally:
+        db.close()
+
+
+def test_progress_events_report_rate_and_eta(db_path):
+    manager, _, _ = _manager(db_path)
+    events = []
+    manager.add_listener(events.append)
+    manager.start()
+    try:
+        job = manager.submit("work", {"username": "alpha", "tag": "p", "steps": 4})
+        final = manager.wait(job["job_id"], 5)
+    finally:
+        manager.close()
+
+    assert [e["status"] for e in events][:2] == ["queued", "running"]
+    ticks = [e for e in events if e["status"] == "running" and e["progress"]["done"]]
+    assert [e["progress"]["done"] for e in ticks] == [1, 2, 3, 4]
+    assert ticks[1]["progress"]["total"] == 4 and ticks[1]["progress"]["percent"] == 50.0
+    assert ticks[1]["eta_seconds"] is not None
+    assert final["status"] == "done" and final["result"] == {"tag": "p"}
+    assert final["progress"]["message"] == "step 4"
+
+
+def test_jobs_persist_and_queued_jobs_resume_after_restart(db_path):
+    db = Database(db_path)
+    try:
+        interrupted = db.create_job("work", "alpha", {"username": "alpha", "tag": "x"}, time.time())
+        db.update_job(interrupted, status="running", started_at=time.time())
+        pending = db.create_job("work", "alpha", {"username": "alpha", "tag": "y"}, time.time())
+    finally:
+        db.close()
+
+    manager, log, _ = _manager(db_path)
+    manager.start()
+    try:
+        assert manager.wait(pending, 5)["status"] == "done"
+        assert manager.get(interrupted)["status"] == "failed"
+        listed = manager.list(kind="work")
+        assert [j["job_id"] for j in listed] == [pending, interrupted]
+        assert log == [("start", "y"), ("end", "y")]
+    finally:
+        manager.close()
+
+    db = Database(db_path)
+    try:
+        row = db.get_job(pending)
+        assert row["status"] == "done" and row["result"] == {"tag": "y"} and row["finished_at"]
+    finally:
+        db.close()
+
+
+def test_manager_connections_skip_schema_migration(db_path, monkeypatch):
+    migrations = []
+    original = Database._migrate_schema
+    monkeypatch.setattr(Database, "_migrate_schema", lambda self: (migrations.append(1), original(self)))
+
+    manager, _, _ = _manager(db_path, workers=2)
+    manager.start()
+    try:
+        job = manager.submit("work", {"username": "alpha", "tag": "m"})
+        assert manager.wait(job["job_id"], 5)["status"] == "done"
+    finally:
+        manager.close()
+    assert migrations == []
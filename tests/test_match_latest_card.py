@@ -0,0 +1,124 @@
+import os
+import tempfile
+
+import pytest
+
+from src.database import Database
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _card(match_id, map_name="Bank", mode="Ranked", date="2026-01-05T20:00:00Z"):
+    return {"match_id": match_id, "map": map_name, "mode": mode, "date": date}
+
+
+def _latest(db, match_id):
+    cur = db.conn.cursor()
+    cur.execute("SELECT * FROM match_latest_card WHERE match_id = ?", (match_id,))
+    row = cur.fetchone()
+    return dict(row) if row else None
+
+
+def test_latest_card_tracks_newest_card_per_match(db):
+    db.save_scraped_match_cards("alpha", [_card("m1", map_name="Bank")])
+    db.save_scraped_match_cards("bravo", [_card("m1", map_name="Clubhouse")])
+
+    cur = db.conn.cursor()
+    cur.execute("SELECT MAX(id) AS max_id FROM scraped_match_cards WHERE match_id = 'm1'")
+    newest_id = cur.fetchone()["max_id"]
+
+    row = _latest(db, "m1")
+    assert row["card_id"] == newest_id
+    assert row["map_name"] == "Clubhouse"
+    assert row["mode_key"] == "ranked"
+    assert row["match_ts"] == 1767643200
+
+
+def test_latest_card_follows_card_updates(db):
+    db.save_scraped_match_cards("alpha", [_card("m1", map_name="")])
+    assert _latest(db, "m1")["map_name"] == ""
+
+    db.save_scraped_match_cards("alpha", [_card("m1", map_name="Oregon")])
+    assert _latest(db, "m1")["map_name"] == "Oregon"
+
+
+def test_latest_card_repoints_after_delete(db):
+    db.save_scraped_match_cards("alpha", [dict(_card("m1", map_name="Bank"), rounds=[{"round": 1}])])
+    db.save_scraped_match_cards("bravo", [_card("m1", map_name="Chalet")])
+    assert _latest(db, "m1")["map_name"] == "Chalet"
+
+    db.delete_bad_scraped_matches("bravo")
+    assert _latest(db, "m1")["map_name"] == "Bank"
+
+    db.delete_bad_scraped_matches("alpha")
+    db.conn.execute("DELETE FROM scraped_match_cards WHERE match_id = 'm1'")
+    db.refresh_match_latest_cards(["m1"])
+    assert _latest(db, "m1") is None
+
+
+def test_migration_backfills_latest_card_table(db):
+    db.save_scraped_match_cards("alpha", [_card("m1"), _card("m2", map_name="Villa")])
+    db.conn.execute("DELETE FROM match_latest_card")
+    db.conn.commit()
+
+    reopened = Database(db.db_path)
+    try:
+        cur = reopened.conn.cursor()
+        cur.execute("SELECT match_id, map_name FROM match_latest_card ORDER BY match_id")
+        assert [(r["match_id"], r["map_name"]) for r in cur.fetchall()] == [("m1", "Bank"), ("m2", "Villa")]
+    finally:
+        reopened.close()
+
+
+def test_reopening_rebuilds_latest_cards_only_when_behind(db):
+    db.save_scraped_match_cards("alpha", [_card("m1"), _card("m2", map_name="Villa")])
+    # A marker a full rebuild would overwrite.
+    db.conn.execute("UPDATE match_latest_card SET map_name = 'untouched' WHERE match_id = 'm1'")
+    db.conn.commit()
+
+    Database(db.db_path).close()
+    assert _latest(db, "m1")["map_name"] == "untouched"
+
+    # A card written behind the table's back (older build, raw SQL) makes it stale.
+    db.conn.execute("INSERT INTO scraped_match_cards (username, match_id, map_name) VALUES ('bravo', 'm3', 'Oregon')")
+    db.conn.commit()
+    Database(db.db_path).close()
+    assert _latest(db, "m1")["map_name"] == "Bank"
+    assert _latest(db, "m3")["map_name"] == "Oregon"
+
+
+def test_aggregates_do_not_fan_out_over_duplicate_cards(db):
+    owner_id = db.add_player("alpha")
+    db.save_match_detail_players(
+        owner_id,
+        "m1",
+        [{"player_id_tracker": "t-1", "username": "alpha", "team_id": 0, "result": "win", "kills": 5, "deaths": 2}],
+        match_type="Ranked",
+    )
+    for owner in ("alpha", "bravo", "charlie", "delta"):
+        db.save_scraped_match_cards(owner, [_card("m1", map_name="Bank")])
+
+    db.refresh_aggregates_for_tracker_ids(["t-1"])
+    cur = db.conn.cursor()
+    cur.execute("SELECT map_name, matches, kills FROM agg_player_map WHERE tracker_player_id = 't-1'")
+    rows = [dict(r) for r in cur.fetchall()]
+    assert rows == [{"map_name": "Bank", "matches": 1, "kills": 5}]
+
+
+def test_padded_match_ids_are_stored_and_indexed_stripped(db):
+    db.save_scraped_match_cards("alpha", [_card(" m1 ", map_name="")])
+    assert _latest(db, "m1")["map_name"] == ""
+
+    db.save_scraped_match_cards("alpha", [_card("m1\n", map_name="Oregon")])
+    assert _latest(db, "m1")["map_name"] == "Oregon"
+    cur = db.conn.cursor()
+    cur.execute("SELECT match_id FROM scraped_match_cards")
+    assert [r["match_id"] for r in cur.fetchall()] == ["m1"]
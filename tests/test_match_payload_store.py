@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import tempfile
+
+import pytest
+
+from src.async_api_client import AsyncTrackerAPIClient
+from src.database import Database
+from src.db_access import DatabaseAccess
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _match_payload():
+    with open(os.path.join(FIXTURES, "match1.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_payload_round_trips_compressed(db):
+    payload = _match_payload()
+    db.save_match_detail_payload("m1", payload)
+
+    assert db.get_match_detail_payload("m1") == payload
+    assert db.get_match_detail_payload("missing") is None
+    stats = db.get_match_detail_payload_stats()
+    assert stats["payloads"] == 1
+    assert 0 < stats["stored_bytes"] < stats["raw_bytes"]
+
+
+def test_async_client_reads_through_store(db):
+    access = DatabaseAccess(db.db_path, readers=1)
+    client = AsyncTrackerAPIClient(rate_per_second=1000.0, burst=50)
+    client.payload_store = access.database
+    calls = []
+
+    async def _fake_get_json(url, retry_429=True):
+        calls.append(url)
+        return _match_payload()
+
+    client._get_json = _fake_get_json
+
+    try:
+        first = asyncio.run(client.get_match_detail("m1"))
+        second = asyncio.run(client.get_match_detail("m1"))
+    finally:
+        access.close()
+
+    assert len(calls) == 1
+    assert client.payload_store_hits == 1
+    assert first == second
+    assert db.get_match_detail_payload("m1") is not None
+
+
+def test_reparse_attaches_tracked_lobby_players_offline(db):
+    from scripts.reparse_match_payloads import reparse
+
+    client = AsyncTrackerAPIClient()
+    payload = _match_payload()
+    detail = client.parse_match_detail("m1", payload)
+    lobby = [p["username"] for p in detail["players"] if p.get("username")]
+    owner = db.add_player(lobby[0])
+    mate = db.add_player(lobby[1])
+    db.save_match_detail_payload("m1", payload)
+    db.save_full_match_detail_history(owner, [detail])
+
+    summary = reparse(db, attach_tracked=True)
+
+    assert summary["payloads"] == 1
+    assert summary["attached"] == 1
+    assert db.get_match_detail_owner_ids("m1") == sorted([owner, mate])
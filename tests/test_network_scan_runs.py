@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+import pytest
+
+from src.database import Database
+
+OPTIONS = {"source": "auto", "min_matches": 2, "max_neighbors": 50, "queue": None}
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def test_unfinished_run_resumes_with_its_frontier(db):
+    run = db.open_network_scan_run("Alpha", 2, OPTIONS, DAY, now=1000.0)
+    assert run["resumed"] is False
+
+    db.queue_network_scan_nodes(run["run_id"], [("Alpha", 0)])
+    db.queue_network_scan_nodes(run["run_id"], [("bravo", 2), ("Charlie", 1)])
+    db.queue_network_scan_nodes(run["run_id"], [("Bravo", 1)])
+    db.mark_network_scan_nodes(run["run_id"], ["alpha"], "done")
+    db.mark_network_scan_nodes(run["run_id"], ["charlie"], "failed")
+    frontier = db.get_network_scan_frontier(run["run_id"])
+    assert [(r["username_key"], r["depth"], r["status"]) for r in frontier] == [
+        ("alpha", 0, "done"),
+        ("bravo", 1, "pending"),
+        ("charlie", 1, "failed"),
+    ]
+
+    again = db.open_network_scan_run("alpha", 2, OPTIONS, DAY, now=2000.0)
+    assert again["run_id"] == run["run_id"] and again["resumed"] is True
+    assert again["frontier"] == {"pending": 1, "done": 1, "failed": 1}
+
+    # Different options, an expired window, or a finished run all start over.
+    assert not db.open_network_scan_run("alpha", 2, {**OPTIONS, "queue": "ranked"}, DAY, now=2000.0)["resumed"]
+    assert not db.open_network_scan_run("alpha", 2, OPTIONS, 10, now=5000.0)["resumed"]
+    db.finish_network_scan_run(run["run_id"])
+    fresh = db.open_network_scan_run("alpha", 2, OPTIONS, DAY, now=5000.0)
+    assert fresh["run_id"] != run["run_id"]
+    assert fresh["frontier"] == {"pending": 0, "done": 0, "failed": 0}
+
+    with pytest.raises(ValueError):
+        db.mark_network_scan_nodes(run["run_id"], ["alpha"], "skipped")
+
+
+def test_profile_cache_ttl_keeps_root_stats_and_prunes_old_entries(db):
+    encounters = [{"name": "bravo", "count": 3, "rank_points": 2500, "kd": 1.1, "win_pct": 50.0}]
+    stats = {"rank_points": 3100, "kd": 1.2, "win_pct": 55.0}
+    db.save_network_profile("Alpha", encounters, stats, fetched_at=1000.0)
+    db.save_network_profile("bravo", [], status="not_found", fetched_at=1000.0)
+
+    cached = db.get_network_profiles(["alpha", "BRAVO", "charlie"], max_age_s=500, now=1200.0)
+    assert set(cached) == {"alpha", "bravo"}
+    assert cached["alpha"]["encounters"] == encounters and cached["alpha"]["stats"] == stats
+    assert cached["bravo"]["status"] == "not_found"
+    assert db.get_network_profiles(["alpha"], max_age_s=100, now=1200.0) == {}
+
+    # A later non-root scrape refreshes the encounters without losing the stats.
+    db.save_network_profile("alpha", [], fetched_at=1300.0)
+    refreshed = db.get_network_profiles(["alpha"])["alpha"]
+    assert refreshed["encounters"] == [] and refreshed["stats"] == stats
+
+    db.open_network_scan_run("alpha", 1, OPTIONS, DAY, now=1300.0 + Database.NETWORK_SCAN_RETENTION_S - 1)
+    assert set(db.get_network_profiles(["alpha", "bravo"])) == {"alpha"}
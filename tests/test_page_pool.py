@@ -0,0 +1,95 @@
+import asyncio
+
+from src.async_api_client import TokenBucketLimiter
+from src.jakal_scraper.scraper.pool import PagePool
+
+
+class _FakePage:
+    def __init__(self, serial: int):
+        self.serial = serial
+        self.closed = False
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self):
+        self.opened = 0
+
+    async def new_page(self) -> _FakePage:
+        self.opened += 1
+        return _FakePage(self.opened)
+
+
+def test_pool_runs_items_concurrently_across_tabs():
+    in_flight = {"now": 0, "max": 0}
+    seen = {}
+
+    async def handle(page, item):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        seen[item] = page.serial
+        return True
+
+    async def main():
+        pool = await PagePool(_FakeContext(), 4).start()
+        return pool, await pool.run([f"m{i}" for i in range(20)], handle, timeout_s=1.0)
+
+    pool, result = asyncio.run(main())
+    assert result.processed == 20
+    assert not result.failed and not result.timed_out and not result.unfinished
+    assert in_flight["max"] == 4
+    assert set(seen.values()) == {1, 2, 3, 4}
+    assert sum(h["processed"] for h in pool.health_snapshot()) == 20
+
+
+def test_wedged_tab_is_replaced_without_stopping_the_others():
+    timed_out = []
+
+    async def handle(page, item):
+        # Tab opened first hangs on every navigation until it is replaced.
+        if page.serial == 1:
+            await asyncio.sleep(10)
+        await asyncio.sleep(0.005)
+        return item != "m3"
+
+    async def main():
+        context = _FakeContext()
+        pool = await PagePool(context, 2, max_consecutive_errors=2).start()
+        result = await pool.run([f"m{i}" for i in range(12)], handle, timeout_s=0.05, on_timeout=timed_out.append)
+        return context, pool, result
+
+    context, pool, result = asyncio.run(main())
+    assert not pool.exhausted
+    assert len(result.timed_out) == 2 and result.timed_out == timed_out
+    assert result.failed == ["m3"]
+    assert result.processed == 9 and not result.unfinished
+    health = pool.health_snapshot()
+    assert health[0]["restarts"] == 1 and health[0]["timeouts"] == 2
+    assert health[1]["restarts"] == 0
+    assert context.opened == 3
+    assert [p.serial for p in pool.pages] == [3, 2]
+
+
+def test_pool_reports_exhaustion_and_returns_unfinished_items():
+    async def handle(page, item):
+        page.closed = True
+        return False
+
+    async def main():
+        governor = TokenBucketLimiter(1000.0, burst=1)
+        pool = await PagePool(_FakeContext(), 1, governor=governor, max_tab_restarts=2).start()
+        return pool, governor, await pool.run([f"m{i}" for i in range(6)], handle, timeout_s=1.0)
+
+    pool, governor, result = asyncio.run(main())
+    assert pool.exhausted
+    assert pool.health[0].restarts == 2
+    assert result.failed == ["m0", "m1", "m2"]
+    assert result.unfinished == ["m3", "m4", "m5"]
+    assert governor.acquired == 3
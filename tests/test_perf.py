@@ -0,0 +1,113 @@
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from src import perf
+from src.cache import CacheManager
+from src.database import Database
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    fresh = perf.PerfRecorder()
+    monkeypatch.setattr(perf, "recorder", fresh)
+    return fresh
+
+
+@pytest.fixture
+def db(recorder, monkeypatch):
+    monkeypatch.setattr(Database, "CONNECTION_FACTORY", perf.PerfConnection)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def test_histogram_quantiles_stay_inside_their_bucket():
+    hist = perf.Histogram(perf.LATENCY_BUCKETS_S)
+    for _ in range(90):
+        hist.observe(0.004)
+    for _ in range(10):
+        hist.observe(0.3)
+    assert 0.0025 <= hist.quantile(0.5) <= 0.005
+    assert 0.25 <= hist.quantile(0.95) <= 0.3
+    assert hist.quantile(1.0) == pytest.approx(0.3)
+    assert hist.cumulative()[-1] == ("+Inf", 100)
+
+
+def test_queries_are_grouped_timed_and_attributed_to_the_request(db, recorder):
+    for name in ("alpha", "bravo", "charlie"):
+        db.conn.execute("INSERT INTO players (username) VALUES (?)", (name,))
+    stats, token = recorder.begin_request()
+    cur = db.conn.cursor()
+    cur.execute("SELECT username FROM players WHERE username IN (?, ?)", ("alpha", "bravo"))
+    assert len(cur.fetchall()) == 2
+    rows = list(db.conn.execute("SELECT username FROM   players\n WHERE username IN (?,?,?)", ("alpha", "bravo", "charlie")))
+    assert len(rows) == 3
+    recorder.end_request(token, stats, "GET", "/api/players/{username}", 200, 0.01)
+
+    # Schema setup ran hundreds of statements; look past the top-50 cut.
+    snap = recorder.snapshot(limit=10000)
+    query = next(q for q in snap["queries"] if q["sql"] == "SELECT username FROM players WHERE username IN (?, ...)")
+    assert query["count"] == 2 and query["rows"] == 5
+    assert query["routes"] == {"/api/players/{username}": 2}
+    route = snap["routes"][0]
+    assert route["route"] == "/api/players/{username}" and route["sql_calls"] == 2 and route["sql_rows"] == 5
+    # The inserts ran outside any request.
+    insert = next(q for q in snap["queries"] if q["sql"].startswith("INSERT INTO players"))
+    assert insert["count"] == 3 and insert["routes"] == {perf.NO_ROUTE: 3}
+
+
+def test_middleware_times_streamed_responses_and_tags_cache_lookups(recorder):
+    cache = CacheManager()
+    cache.register_namespace("scope", 60)
+    cache.observer = recorder.record_cache
+    cache.set("scope", "k", {"v": 1})
+
+    async def app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/api/export/{username}")
+        assert cache.get("scope", "k") == {"v": 1}
+        assert cache.get("scope", "missing") is None
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for chunk in (b"a", b"b"):
+            await asyncio.sleep(0.01)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def failing(scope, receive, send):
+        raise RuntimeError("boom")
+
+    async def run():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = perf.PerfMiddleware(app, recorder)
+        await middleware({"type": "http", "method": "GET", "path": "/api/export/x"}, None, send)
+        with pytest.raises(RuntimeError):
+            await perf.PerfMiddleware(failing, recorder)({"type": "http", "method": "POST", "path": "/nope"}, None, send)
+        return sent
+
+    sent = asyncio.run(run())
+    assert len(sent) == 4
+    assert cache.get("scope", "k") == {"v": 1}
+
+    snap = recorder.snapshot()
+    routes = {(r["method"], r["route"]): r for r in snap["routes"]}
+    export = routes[("GET", "/api/export/{username}")]
+    assert export["count"] == 1 and export["max_ms"] >= 20 and export["status"] == {"2xx": 1}
+    assert export["cache"] == {"scope": {"hits": 1, "misses": 1}}
+    assert routes[("POST", "(unmatched)")]["status"] == {"5xx": 1}
+    assert snap["cache"]["scope"] == {"hits": 1, "misses": 1, "background_hits": 1, "background_misses": 0}
+
+    text = recorder.prometheus()
+    assert '# TYPE jakal_http_request_duration_seconds histogram' in text
+    assert 'jakal_http_request_duration_seconds_count{method="GET",route="/api/export/{username}"} 1' in text
+    assert 'jakal_http_requests_total{method="POST",route="(unmatched)",status="5xx"} 1' in text
+    assert 'jakal_cache_lookups_total{namespace="scope",source="request",result="miss"} 1' in text
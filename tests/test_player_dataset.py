@@ -0,0 +1,146 @@
+import os
+import tempfile
+
+import pytest
+
+from src.analytics.player_dataset import PlayerDataset
+from src.database import Database
+from src.plugins.v2_map_stats import MapStatsPlugin
+from src.plugins.v2_operator_stats import OperatorStatsPlugin
+from src.plugins.v3_enemy_operator_threat import EnemyOperatorThreatPlugin
+from src.plugins.v3_lobby_quality import LobbyQualityPlugin
+from src.plugins.v3_round_analysis import RoundAnalysisPlugin
+from src.plugins.v3_team_analysis import TeamAnalysisPlugin
+from src.plugins.v3_teammate_chemistry import TeammateChemistryPlugin
+
+PLUGINS = (
+    RoundAnalysisPlugin,
+    TeammateChemistryPlugin,
+    LobbyQualityPlugin,
+    TeamAnalysisPlugin,
+    EnemyOperatorThreatPlugin,
+    OperatorStatsPlugin,
+    MapStatsPlugin,
+)
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    _seed(database)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _seed(db):
+    owner = db.add_player("me")
+    conn = db.conn
+    for m in range(12):
+        match_id = f"m{m:02d}"
+        won = m % 3 != 0
+        conn.execute(
+            "INSERT INTO scraped_match_cards (username, match_id, map_name, mode, match_date) VALUES (?, ?, ?, ?, ?)",
+            ("me", match_id, ("Bank", "Villa")[m % 2], "Ranked", f"2026-01-{m + 1:02d}T00:00:00Z"),
+        )
+        lobby = [("me", 0), ("pal1", 0), ("pal2", 0), ("foe1", 1), ("foe2", 1), ("foe3", 1)]
+        for name, team in lobby:
+            result = "win" if won == (team == 0) else "loss"
+            conn.execute(
+                """
+                INSERT INTO match_detail_players (player_id, match_id, match_type, username, team_id, result,
+                                                  kills, deaths, kd_ratio, rank_points, rank_points_delta)
+                VALUES (?, ?, 'Ranked', ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (owner, match_id, name, team, result, 5 + m % 4, 4, 1.2, 2500 + 10 * m, 20 if won else -18),
+            )
+        for round_id in range(1, 6):
+            side = ("attacker", "defender")[round_id % 2]
+            victory = (round_id + m) % 2 == 0
+            conn.execute(
+                "INSERT INTO round_outcomes (player_id, match_id, match_type, round_id, end_reason, winner_side) "
+                "VALUES (?, ?, 'Ranked', ?, 'bomb_exploded', ?)",
+                (owner, match_id, round_id, side if victory else ("defender" if side == "attacker" else "attacker")),
+            )
+            conn.execute(
+                """
+                INSERT INTO player_rounds (player_id, match_id, match_type, round_id, username, side, operator, result,
+                                           kills, deaths, first_blood, first_death, clutch_won, clutch_lost,
+                                           killed_by_operator)
+                VALUES (?, ?, 'Ranked', ?, 'me', ?, ?, ?, 1, ?, ?, 0, 0, 0, ?)
+                """,
+                (
+                    owner, match_id, round_id, side, ("Ash", "Jager", "Thermite")[round_id % 3],
+                    "victory" if victory else "defeat", 0 if victory else 1, int(round_id == 1),
+                    None if victory else "Smoke",
+                ),
+            )
+    conn.commit()
+    db.refresh_match_latest_cards()
+
+
+def test_plugins_give_the_same_result_from_a_shared_dataset(db):
+    dataset = PlayerDataset.load(db, " me ")
+    assert dataset.stats() == {"rounds": 60, "matches": 12, "participant_rows": 72, "cards": 12}
+    for plugin_cls in PLUGINS:
+        from_db = plugin_cls(db, "me").analyze()
+        assert from_db.get("error") is None, plugin_cls.__name__
+        assert plugin_cls(dataset, "me").analyze() == from_db, plugin_cls.__name__
+
+
+def test_shared_dataset_runs_a_fixed_number_of_queries(db):
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        dataset = PlayerDataset.load(db, "me")
+        load_queries = len(statements)
+        for plugin_cls in PLUGINS:
+            plugin_cls(dataset, "me").analyze()
+    finally:
+        db.conn.set_trace_callback(None)
+    assert load_queries == 5
+    assert len(statements) == load_queries
+
+
+def test_dataset_rejects_other_players(db):
+    dataset = PlayerDataset.load(db, "me")
+    with pytest.raises(ValueError):
+        OperatorStatsPlugin(dataset, "pal1").analyze()
+
+
+def test_rescraped_cards_do_not_fan_out_rounds_or_maps(db):
+    before = {cls: cls(db, "me").analyze() for cls in (RoundAnalysisPlugin, MapStatsPlugin)}
+    for _ in range(4):
+        db.conn.execute(
+            """
+            INSERT INTO scraped_match_cards (username, match_id, map_name, mode, match_date)
+            SELECT username, match_id, map_name, mode, match_date FROM scraped_match_cards
+            WHERE id IN (SELECT MIN(id) FROM scraped_match_cards GROUP BY match_id)
+            """
+        )
+    db.conn.commit()
+    db.refresh_match_latest_cards()
+
+    assert PlayerDataset.load(db, "me").stats()["rounds"] == 60
+    for cls, expected in before.items():
+        assert cls(db, "me").analyze() == expected, cls.__name__
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT match_id, map_name, mode, match_date FROM match_latest_card WHERE match_id IN (?, ?)",
+        ("m00", "m01"),
+    ).fetchall()
+    assert "PRIMARY KEY" in plan[0]["detail"]
+
+
+def test_rowid_latest_card_table_is_rebuilt_without_rowid(db):
+    db.conn.execute("DROP TABLE match_latest_card")
+    db.conn.execute("CREATE TABLE match_latest_card (match_id TEXT PRIMARY KEY, card_id INTEGER NOT NULL, map_name TEXT)")
+    db.conn.commit()
+    reopened = Database(db.db_path)
+    try:
+        sql = reopened.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'match_latest_card'").fetchone()[0]
+        assert "WITHOUT ROWID" in sql.upper()
+        assert reopened.conn.execute("SELECT COUNT(*) FROM match_latest_card").fetchone()[0] == 12
+    finally:
+        reopened.close()
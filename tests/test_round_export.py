@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+import pytest
+
+from src import round_export
+from src.database import Database
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+OWNER = "Sugriva77"
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    with open(os.path.join(FIXTURES, "match1.json"), "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    database.save_scraped_match_cards(
+        OWNER,
+        [{"match_id": mid, "map": "Bank", "mode": "Ranked", "match_summary": summary} for mid in ("m1", "m2")],
+    )
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _player_id(db):
+    return db.conn.execute("SELECT player_id FROM players WHERE username_key = ?", (OWNER.lower(),)).fetchone()[0]
+
+
+def _rows(db, match_ids, **kwargs):
+    return [row for batch in round_export.iter_batches(db.conn.cursor(), _player_id(db), match_ids, **kwargs) for row in batch]
+
+
+def test_batches_follow_scope_and_resume_from_any_row(db):
+    everything = _rows(db, ["m1", "m2"], limit=1000)
+    total = db.conn.execute("SELECT COUNT(*) FROM player_rounds").fetchone()[0]
+    assert len(everything) == total
+    assert [r["pr_id"] for r in everything] == sorted(r["pr_id"] for r in everything)
+    assert list(everything[0]) == round_export.COLUMN_NAMES
+    assert all(r["winner_side"] and r["map_name"] == "Bank" for r in everything)
+
+    batches = list(round_export.iter_batches(db.conn.cursor(), _player_id(db), ["m1", "m2"], limit=7))
+    assert max(len(b) for b in batches) == 7 and sum(len(b) for b in batches) == total
+    resumed = _rows(db, ["m1", "m2"], after_id=everything[41]["pr_id"], limit=7)
+    assert resumed == everything[42:]
+
+    assert {r["match_id"] for r in _rows(db, ["m1"])} == {"m1"}
+    searched = _rows(db, ["m1", "m2"], search="ASH")
+    assert searched and all("ash" in (r["operator"] or "").lower() or "ash" in r["username"].lower() for r in searched)
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_partial_files_resume_after_their_last_complete_row(db, fmt, tmp_path):
+    rows = _rows(db, ["m1", "m2"])
+    encoder = round_export.make_encoder(fmt)
+    data = encoder.header() + encoder.encode(rows[:10]) + encoder.footer()
+    path = tmp_path / f"export.{fmt}"
+    # The stream was cut off halfway through row 11.
+    path.write_bytes(data + encoder.encode(rows[10:11])[:25])
+
+    after_id, keep = round_export.resume_point(str(path), fmt)
+    assert (after_id, keep) == (rows[9]["pr_id"], len(data))
+
+    with open(path, "r+b") as f:
+        f.truncate(keep)
+    with open(path, "ab") as f:
+        f.write(round_export.make_encoder(fmt, csv_header=False).encode(rows[10:]))
+    text = path.read_text(encoding="utf-8")
+    if fmt == "ndjson":
+        assert [json.loads(line)["pr_id"] for line in text.splitlines()] == [r["pr_id"] for r in rows]
+    else:
+        parsed = list(csv.DictReader(io.StringIO(text)))
+        assert [int(r["pr_id"]) for r in parsed] == [r["pr_id"] for r in rows]
+
+    header_only = tmp_path / "header.csv"
+    header_only.write_bytes(round_export.make_encoder("csv").header())
+    assert round_export.resume_point(str(header_only), "csv")[0] == 0
+    assert round_export.resume_point(str(tmp_path / "missing.ndjson"), "ndjson") == (0, 0)
+
+
+def test_arrow_stream_round_trips(db):
+    pyarrow = pytest.importorskip("pyarrow")
+    rows = _rows(db, ["m1", "m2"])
+    encoder = round_export.make_encoder("arrow")
+    data = encoder.header() + encoder.encode(rows[:50]) + encoder.encode(rows[50:]) + encoder.footer()
+    table = pyarrow.ipc.open_stream(data).read_all()
+    assert table.column_names == round_export.COLUMN_NAMES
+    assert table.column("pr_id").to_pylist() == [r["pr_id"] for r in rows]
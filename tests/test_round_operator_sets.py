@@ -0,0 +1,153 @@
+import os
+import random
+import tempfile
+
+import pytest
+
+from src.analytics import round_operator_sets
+from src.analytics.round_operator_sets import count_operator_pairs, rounds_with_operators, window_matches
+from src.database import Database
+
+ATTACKERS = ["Ash", "Thermite", "Sledge", "Hibana"]
+DEFENDERS = ["Jager", "Bandit", "Mute", "Valkyrie"]
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(round_operator_sets, "np", None)
+    return request.param
+
+
+def _seed(db, matches=10, seed=5):
+    rng = random.Random(seed)
+    player_id = db.add_player("me")
+    db.save_scraped_match_cards("me", [{"match_id": f"m{m}", "map": "Bank", "mode": "Ranked"} for m in range(matches)])
+    for m in range(matches):
+        rounds, outcomes = [], []
+        for rid in range(1, rng.randint(3, 8)):
+            outcomes.append({"round_id": rid, "winner_side": rng.choice(["attacker", "defender", "Attacker", ""])})
+            # Some rounds are missing one side entirely.
+            sides = ("attacker", "defender") if rng.random() > 0.15 else ("attacker",)
+            for side in sides:
+                pool = ATTACKERS if side == "attacker" else DEFENDERS
+                for slot in range(5):
+                    rounds.append({"round_id": rid, "side": side, "operator": rng.choice(pool), "player_id_tracker": f"t{slot}"})
+        db.save_round_outcomes(player_id, f"m{m}", outcomes, match_type="Ranked")
+        db.save_player_rounds(player_id, f"m{m}", rounds, match_type="Ranked")
+    return player_id
+
+
+def _legacy_counts(db, player_id):
+    """The heatmap's original per-request Python counting over raw player-round rows."""
+    rows = db.conn.execute(
+        """
+        SELECT pr.match_id, pr.round_id, pr.side, pr.operator, ro.winner_side
+        FROM player_rounds pr
+        JOIN round_outcomes ro ON ro.player_id = pr.player_id AND ro.match_id = pr.match_id AND ro.round_id = pr.round_id
+        WHERE pr.player_id = ? AND pr.operator IS NOT NULL AND TRIM(pr.operator) != ''
+        ORDER BY pr.match_id, pr.round_id
+        """,
+        (player_id,),
+    ).fetchall()
+    rounds = {}
+    for r in rows:
+        b = rounds.setdefault((r["match_id"], r["round_id"]), {"winner": str(r["winner_side"] or ""), "atk": set(), "def": set()})
+        b["atk" if r["side"] == "attacker" else "def"].add(r["operator"])
+    valid = [v for v in rounds.values() if v["atk"] and v["def"]]
+    pair_stats, atk_counts, def_counts = {}, {}, {}
+    for v in valid:
+        win = 1 if v["winner"].lower() == "attacker" else 0
+        for a in v["atk"]:
+            atk_counts[a] = atk_counts.get(a, 0) + 1
+            for d in v["def"]:
+                cell = pair_stats.setdefault((a, d), {"n": 0, "atk_wins": 0})
+                cell["n"] += 1
+                cell["atk_wins"] += win
+        for d in v["def"]:
+            def_counts[d] = def_counts.get(d, 0) + 1
+    return rounds, valid, pair_stats, atk_counts, def_counts
+
+
+def _sets(db, player_id, match_id):
+    names = round_operator_sets.operator_names(db.conn.cursor())
+    cur = db.conn.execute(
+        "SELECT round_id, atk_mask, def_mask FROM round_operator_sets WHERE player_id = ? AND match_id = ? ORDER BY 1",
+        (player_id, match_id),
+    )
+
+    def ops(blob):
+        return sorted(names[c] for c in round_operator_sets._mask_codes(blob))
+
+    return [(r[0], ops(r[1]), ops(r[2])) for r in cur.fetchall()]
+
+
+def test_mask_pair_counts_match_per_row_counting(db, backend):
+    player_id = _seed(db)
+    match_ids = [m["match_id"] for m in window_matches(db.conn.cursor(), player_id, 90)]
+    assert len(match_ids) == 10
+
+    counts = count_operator_pairs(db.conn.cursor(), player_id, match_ids)
+    rounds, valid, pair_stats, atk_counts, def_counts = _legacy_counts(db, player_id)
+    assert counts["rounds_total"] == len(rounds)
+    assert counts["total_rounds"] == len(valid)
+    assert counts["pair_stats"] == pair_stats
+    assert counts["atk_counts"] == atk_counts
+    assert counts["def_counts"] == def_counts
+    assert counts["atk_round_wins"] == sum(1 for v in valid if v["winner"].lower() == "attacker")
+    assert counts["exposures_total"] == sum(c["n"] for c in pair_stats.values())
+
+
+def test_sets_follow_player_round_rewrites_and_deletes(db):
+    player_id = db.add_player("me")
+    db.save_player_rounds(
+        player_id,
+        "m1",
+        [
+            {"round_id": 1, "side": "Attacker ", "operator": "Ash"},
+            {"round_id": 1, "side": "attacker", "operator": "Ash"},
+            {"round_id": 2, "side": None, "operator": "Mute"},
+        ],
+    )
+    assert _sets(db, player_id, "m1") == [(1, ["Ash"], []), (2, [], [])]
+
+    db.save_player_rounds(player_id, "m1", [{"round_id": 1, "side": "defender", "operator": "Mute"}])
+    assert _sets(db, player_id, "m1") == [(1, [], ["Mute"])]
+
+    db.conn.execute("DELETE FROM round_operator_sets")
+    db.conn.commit()
+    reopened = Database(db.db_path)
+    try:
+        assert _sets(reopened, player_id, "m1") == [(1, [], ["Mute"])]
+    finally:
+        reopened.close()
+
+
+def test_rounds_with_operators_is_case_insensitive(db):
+    player_id = db.add_player("me")
+    db.save_player_rounds(
+        player_id,
+        "m1",
+        [
+            {"round_id": 1, "side": "attacker", "operator": "Ash"},
+            {"round_id": 1, "side": "defender", "operator": "Mute"},
+            {"round_id": 2, "side": "attacker", "operator": "Ash"},
+            {"round_id": 2, "side": "defender", "operator": "Jager"},
+        ],
+    )
+    cur = db.conn.cursor()
+    assert rounds_with_operators(cur, player_id, ["m1"], atk_op="ash") == {("m1", 1), ("m1", 2)}
+    assert rounds_with_operators(cur, player_id, ["m1"], atk_op="ASH", def_op="mute") == {("m1", 1)}
+    assert rounds_with_operators(cur, player_id, ["m1"], def_op="") == set()
@@ -0,0 +1,126 @@
+import random
+
+import pytest
+
+from src.analytics import round_store
+from src.analytics.round_store import RoundStore
+from src.analytics.workspace_panels import (
+    _compute_matchup_block,
+    _compute_operator_scatter,
+    _integrity_counters,
+)
+
+ATTACKERS = ["Ash", "Thermite", "Sledge", "Hibana", "Unknown"]
+DEFENDERS = ["Jager", "Bandit", "Mute", "Valk", ""]
+
+
+def _rows(seed=7, matches=12):
+    rng = random.Random(seed)
+    rows = []
+    for m in range(matches):
+        for rid in range(1, rng.randint(4, 9)):
+            winner = rng.choice(["attacker", "defender", "defender", "attacker", "Attacker", ""])
+            # Some rounds are short a player to exercise the integrity counters.
+            per_side = 5 if rng.random() > 0.2 else 4
+            for side, pool in (("attacker", ATTACKERS), ("defender", DEFENDERS)):
+                for slot in range(per_side):
+                    rows.append(
+                        {
+                            "match_id": f"m{m}",
+                            "round_id": rid,
+                            "side": side if rng.random() > 0.05 else "spectator",
+                            "operator": rng.choice(pool),
+                            "username": f"p{slot}-{side}",
+                            "winner_side": winner,
+                            "map_name": rng.choice(["Bank", "Villa"]),
+                            "scraped_at": f"2026-01-{1 + m % 20:02d}T00:00:00Z",
+                            "kills": rng.randint(0, 3),
+                            "deaths": rng.randint(0, 1),
+                            "assists": 0,
+                            "headshots": 0,
+                            "first_blood": 0,
+                            "first_death": 0,
+                            "clutch_won": 0,
+                            "clutch_lost": None,
+                        }
+                    )
+    return rows
+
+
+def _sorted_points(scatter):
+    out = dict(scatter)
+    out["points"] = sorted(scatter["points"], key=lambda p: (p["side"], p["operator"]))
+    return out
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(round_store, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("weighting", ["rounds", "matches"])
+@pytest.mark.parametrize("lift_mode", ["percent_delta", "logit_lift", "log_odds_ratio"])
+def test_store_panels_match_dict_path(backend, weighting, lift_mode):
+    rows = _rows()
+    store = RoundStore.from_rows(rows)
+
+    assert _sorted_points(_compute_operator_scatter(store, weighting=weighting)) == _sorted_points(
+        _compute_operator_scatter(rows, weighting=weighting)
+    )
+    for normalization in ("global", "attacker"):
+        kwargs = {"normalization": normalization, "lift_mode": lift_mode, "weighting": weighting, "min_n": 3}
+        assert _compute_matchup_block(store, **kwargs) == _compute_matchup_block(rows, **kwargs)
+    assert _integrity_counters(store) == _integrity_counters(rows)
+
+
+@pytest.mark.parametrize("weighting", ["rounds", "matches"])
+def test_scatter_points_keep_first_seen_order(backend, weighting):
+    def rnd(match_id, round_id, winner, atk, dfn):
+        return [
+            {"match_id": match_id, "round_id": round_id, "side": side, "operator": op, "winner_side": winner,
+             "username": f"{side}-{i}", "map_name": "Bank", "scraped_at": "", **{k: 0 for k in round_store.NUMERIC_COLUMNS}}
+            for side, ops in (("attacker", atk), ("defender", dfn))
+            for i, op in enumerate(ops)
+        ]
+
+    rows = (
+        rnd("m1", 1, "attacker", ["Iana", "Hibana"], ["Mute"])
+        + rnd("m1", 2, "attacker", ["Sledge", "Iana"], ["Bandit", "Mute"])
+        + rnd("m2", 1, "defender", ["Ace", "Zofia"], ["Azami"])
+    )
+    # By first unit, then name: matches fold m1's rounds, so Bandit ties Mute there.
+    defenders = ["Mute", "Bandit"] if weighting == "rounds" else ["Bandit", "Mute"]
+    expected = [("attacker", op) for op in ("Hibana", "Iana", "Sledge", "Ace", "Zofia")] + [
+        ("defender", op) for op in (*defenders, "Azami")
+    ]
+    for source in (rows, RoundStore.from_rows(rows)):
+        points = _compute_operator_scatter(source, weighting=weighting)["points"]
+        assert [(p["side"], p["operator"]) for p in points] == expected
+    assert _compute_operator_scatter(RoundStore.from_rows(_rows()), weighting=weighting) == _compute_operator_scatter(
+        _rows(), weighting=weighting
+    )
+
+
+def test_overview_search_and_empty_store(backend):
+    rows = _rows(seed=3, matches=4)
+    store = RoundStore.from_rows(rows, search="ash")
+    expected = [r for r in rows if "ash" in r["operator"].lower() or "ash" in r["username"].lower()]
+    assert len(store) == len(expected)
+    assert store.overview()["distinct_rounds"] == len({(r["match_id"], r["round_id"]) for r in expected})
+
+    empty = RoundStore.from_rows([])
+    assert not empty
+    assert _compute_operator_scatter(empty)["total_units"] == 0
+    assert "error" in _compute_matchup_block(empty)
+    assert _integrity_counters(empty)["rounds_total"] == 0
+
+
+def test_store_is_smaller_than_row_dicts():
+    rows = _rows(matches=40)
+    store = RoundStore.from_rows(rows)
+    # Interned codes + int32 columns stay well under the ~1KB each row dict costs.
+    assert store.nbytes < len(rows) * 200
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+
+from src.jakal_scraper.db import SQLiteStore
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "src" / "jakal_scraper" / "migrations"
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SQLiteStore.open(tmp_path / "scraper.sqlite")
+    s.apply_migrations(MIGRATIONS)
+    yield s
+    s.close()
+
+
+def _write_match(store, match_id, fail=False):
+    with store.transaction():
+        store.upsert_match({"match_id": match_id, "map_name": "Bank"})
+        store.upsert_rounds(match_id, [{"round_id": r} for r in range(1, 4)])
+        if fail:
+            raise RuntimeError("parse blew up")
+        store.mark_match_success(match_id, v2_done=True, v1_done=False)
+
+
+def _counts(path):
+    other = SQLiteStore.open(path)
+    try:
+        matches = other.conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        rounds = other.conn.execute("SELECT COUNT(*) FROM rounds").fetchone()[0]
+        done = other.conn.execute("SELECT COUNT(*) FROM scrape_match_status WHERE v2_done=1").fetchone()[0]
+        return matches, rounds, done
+    finally:
+        other.close()
+
+
+def test_transaction_commits_a_match_once_and_rolls_back_failures(store):
+    before = store.commits
+    _write_match(store, "m1")
+    assert store.commits == before + 1
+    with pytest.raises(RuntimeError):
+        _write_match(store, "m2", fail=True)
+    store.mark_match_failure("m2", error="parse blew up", max_attempts=3, cooldown_days=7)
+    assert _counts(store.path) == (1, 3, 1)
+    assert store.get_match_status("m2")["attempts"] == 1
+
+
+def test_write_behind_flushes_on_size_and_a_crash_loses_only_the_pending_batch(tmp_path):
+    store = SQLiteStore.open(tmp_path / "scraper.sqlite")
+    store.apply_migrations(MIGRATIONS)
+    store.begin_write_behind(max_units=3, max_age_s=3600)
+    for i in range(4):
+        _write_match(store, f"m{i}")
+    # A failing match inside the batch only rolls back its own savepoint.
+    with pytest.raises(RuntimeError):
+        _write_match(store, "bad", fail=True)
+    assert store.v2_done("m3") and not store.v2_done("bad")
+    assert _counts(store.path) == (3, 9, 3)
+
+    # Simulated crash: the connection goes away without a flush.
+    store.conn.close()
+    reopened = SQLiteStore.open(store.path)
+    try:
+        assert _counts(store.path) == (3, 9, 3)
+        assert not reopened.v2_done("m3")
+    finally:
+        reopened.close()
+
+
+def test_write_behind_flushes_on_age_and_on_exit(store):
+    with store.write_behind(max_units=100, max_age_s=0.0):
+        _write_match(store, "m1")
+        assert _counts(store.path) == (1, 3, 1)
+        store.mark_match_failure("m2", error="x", max_attempts=3, cooldown_days=7)
+    with store.write_behind(max_units=100, max_age_s=3600):
+        _write_match(store, "m3")
+        store.upsert_player_match_index("me", [{"match_id": "m3"}])
+        assert _counts(store.path) == (1, 3, 1)
+    assert _counts(store.path) == (2, 6, 2)
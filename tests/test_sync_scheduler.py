@@ -0,0 +1,156 @@
+import asyncio
+import os
+import tempfile
+from urllib.error import HTTPError
+
+import pytest
+
+from src.database import Database
+from src.sync_scheduler import SyncScheduler
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _detail(match_id, usernames):
+    return {
+        "match_id": match_id,
+        "players": [
+            {"player_id_tracker": f"t-{name}", "username": name, "team_id": 0, "result": "win"}
+            for name in usernames
+        ],
+        "round_outcomes": [],
+        "player_rounds": [],
+    }
+
+
+class FakeClient:
+    """In-process stand-in for AsyncTrackerAPIClient with scripted match lists."""
+
+    max_in_flight = 3
+
+    def __init__(self, match_lists, fail_details=(), missing_details=(), fail_maps=False):
+        self.match_lists = match_lists
+        self.fail_details = set(fail_details)
+        self.missing_details = set(missing_details)
+        self.fail_maps = fail_maps
+        self.detail_calls = []
+
+    async def get_profile(self, username):
+        return {"season_stats": {"kills": 1}, "uuid": f"uuid-{username}"}
+
+    def season_stats_to_snapshot(self, season_raw):
+        return dict(season_raw)
+
+    async def get_map_stats(self, username):
+        if self.fail_maps:
+            raise RuntimeError("map stats unavailable")
+        return []
+
+    async def get_operator_stats(self, username):
+        return []
+
+    async def get_all_matches(self, username, max_pages=None, since_date=None):
+        await asyncio.sleep(0)
+        return [
+            {"match_id": mid, "timestamp": f"2026-01-0{i + 1}T00:00:00Z", "mode": "Ranked"}
+            for i, mid in enumerate(self.match_lists[username])
+        ]
+
+    async def get_match_detail(self, match_id):
+        self.detail_calls.append(match_id)
+        await asyncio.sleep(0)
+        if match_id in self.fail_details:
+            raise KeyboardInterrupt("simulated crash")
+        if match_id in self.missing_details:
+            raise HTTPError(f"https://example.invalid/{match_id}", 404, "Not Found", None, None)
+        return _detail(match_id, ["alpha", "bravo"])
+
+
+def _scheduler(db, client, persisted):
+    def _persist(username, season_stats, map_stats, operator_stats):
+        assert map_stats == [] and operator_stats == []
+        persisted.append(username)
+
+    return SyncScheduler(db, client, persist_profile=_persist, show_progress=False)
+
+
+def test_shared_matches_are_fetched_once_and_saved_for_each_owner(db):
+    alpha = db.add_player("alpha")
+    bravo = db.add_player("bravo")
+    client = FakeClient({"alpha": ["m1", "m2", "m3"], "bravo": ["m2", "m3", "m4"]})
+    persisted = []
+
+    scheduler = _scheduler(db, client, persisted)
+    summary = asyncio.run(scheduler.run(["alpha", "bravo"]))
+
+    assert sorted(client.detail_calls) == ["m1", "m2", "m3", "m4"]
+    assert summary["succeeded"] == 2
+    assert summary["shared_matches"] == 2
+    assert sorted(persisted) == ["alpha", "bravo"]
+    assert db.get_existing_match_detail_ids(alpha) == {"m1", "m2", "m3"}
+    assert db.get_existing_match_detail_ids(bravo) == {"m2", "m3", "m4"}
+    assert db.get_player_last_match_synced_at("alpha").startswith("2026-01-03")
+    assert db.get_open_sync_run() is None
+    # Details are only held while a match list could still add an owner.
+    assert scheduler._details == {}
+
+
+def test_interrupted_run_resumes_without_refetching(db):
+    alpha = db.add_player("alpha")
+    db.add_player("bravo")
+    client = FakeClient({"alpha": ["m1", "m2"], "bravo": ["m2"]}, fail_details={"m2"})
+    persisted = []
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(_scheduler(db, client, persisted).run(["alpha", "bravo"]))
+    open_run = db.get_open_sync_run()
+    assert open_run is not None
+
+    client.fail_details.clear()
+    client.detail_calls.clear()
+    scheduler = _scheduler(db, client, persisted)
+    summary = asyncio.run(scheduler.run(["alpha", "bravo"]))
+
+    assert scheduler.resumed and summary["run_id"] == open_run["run_id"]
+    assert "m1" not in client.detail_calls
+    assert client.detail_calls.count("m2") == 1
+    assert db.get_existing_match_detail_ids(alpha) == {"m1", "m2"}
+    assert persisted.count("alpha") == 1
+
+
+def test_stat_failure_still_saves_the_profile_snapshot(db):
+    db.add_player("alpha")
+    client = FakeClient({"alpha": ["m1"]}, fail_maps=True)
+    persisted = []
+    scheduler = _scheduler(db, client, persisted)
+
+    summary = asyncio.run(scheduler.run(["alpha"]))
+
+    player = summary["players"][0]
+    assert persisted == ["alpha"] and player["ok"]
+    assert player["errors"] == ["maps failed: map stats unavailable"]
+    maps_job = scheduler._jobs["maps:alpha"]
+    assert maps_job["status"] == "failed"
+    assert [j for j in db.get_sync_jobs(summary["run_id"], kind="maps")][0]["status"] == "failed"
+
+
+def test_missing_match_detail_is_reported(db):
+    alpha = db.add_player("alpha")
+    client = FakeClient({"alpha": ["m1", "m2"]}, missing_details={"m2"})
+    persisted = []
+
+    summary = asyncio.run(_scheduler(db, client, persisted).run(["alpha"]))
+
+    assert client.detail_calls.count("m2") == 1
+    assert summary["details_fetched"] == 1 and summary["details_failed"] == 1
+    assert summary["players"][0]["errors"] == ["detail m2 failed: HTTP Error 404: Not Found"]
+    assert persisted == ["alpha"]
+    assert db.get_existing_match_detail_ids(alpha) == {"m1"}
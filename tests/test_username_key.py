@@ -0,0 +1,110 @@
+import os
+import tempfile
+
+import pytest
+
+from src.database import Database
+
+
+@pytest.fixture
+def db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database = Database(path)
+    yield database
+    database.close()
+    os.remove(path)
+
+
+def _detail(username, team_id, result, tracker):
+    return {"player_id_tracker": tracker, "username": username, "team_id": team_id, "result": result}
+
+
+def _seed_match(db, owner_id, match_id, me="  Alpha ", mates=("Bravo", "charlie")):
+    players = [_detail(me, 0, "win", "t-alpha")]
+    players += [_detail(name, 0, "win", f"t-{name.lower()}") for name in mates]
+    players += [_detail("Enemy", 1, "loss", "t-enemy")]
+    db.save_match_detail_players(owner_id, match_id, players, match_type="Ranked")
+
+
+def test_username_key_matches_sqlite_lower_trim(db):
+    cur = db.conn.cursor()
+    for raw in ["  MiXeD ", "Jäger", "\tTab", None]:
+        cur.execute("SELECT LOWER(TRIM(?)) AS k", (raw,))
+        assert Database._username_key(raw) == cur.fetchone()["k"]
+
+
+def test_inserts_fill_username_key(db):
+    owner_id = db.add_player(" Alpha")
+    _seed_match(db, owner_id, "m1")
+    db.save_player_rounds(
+        owner_id,
+        "m1",
+        [{"player_id_tracker": "t-bravo", "round_id": 1, "side": "attacker", "operator": "Ash", "result": "win"}],
+        usernames_by_tracker_id={"t-bravo": "Bravo"},
+    )
+    db.save_scraped_match_cards("ALPHA", [{"match_id": "m1", "map": "Bank", "mode": "Ranked"}])
+
+    cur = db.conn.cursor()
+    cur.execute("SELECT username_key FROM players WHERE player_id = ?", (owner_id,))
+    assert cur.fetchone()["username_key"] == "alpha"
+    cur.execute("SELECT username_key FROM match_detail_players WHERE match_id = 'm1' ORDER BY id")
+    assert [r["username_key"] for r in cur.fetchall()] == ["alpha", "bravo", "charlie", "enemy"]
+    cur.execute("SELECT username_key FROM player_rounds WHERE match_id = 'm1'")
+    assert cur.fetchone()["username_key"] == "bravo"
+    cur.execute("SELECT username_key FROM scraped_match_cards WHERE match_id = 'm1'")
+    assert cur.fetchone()["username_key"] == "alpha"
+
+
+def test_migration_backfills_missing_username_keys(db):
+    owner_id = db.add_player("Alpha")
+    _seed_match(db, owner_id, "m1")
+    db.conn.execute("UPDATE match_detail_players SET username_key = NULL")
+    db.conn.execute("UPDATE players SET username_key = NULL")
+    db.conn.commit()
+
+    reopened = Database(db.db_path)
+    try:
+        cur = reopened.conn.cursor()
+        cur.execute("SELECT COUNT(*) AS n FROM match_detail_players WHERE username_key IS NULL")
+        assert cur.fetchone()["n"] == 0
+        cur.execute("SELECT username_key FROM players WHERE player_id = ?", (owner_id,))
+        assert cur.fetchone()["username_key"] == "alpha"
+    finally:
+        reopened.close()
+
+
+def test_teammate_self_join_uses_username_key_index(db):
+    cur = db.conn.cursor()
+    cur.execute(
+        """
+        EXPLAIN QUERY PLAN
+        SELECT tm.username_key
+        FROM match_detail_players me
+        JOIN match_detail_players tm
+          ON tm.match_id = me.match_id
+         AND tm.team_id = me.team_id
+         AND tm.username_key != me.username_key
+        WHERE me.username_key = LOWER(TRIM(?))
+        """,
+        ("alpha",),
+    )
+    plan = " ".join(str(r["detail"]) for r in cur.fetchall())
+    assert "idx_match_detail_players_username_key_match" in plan
+    assert "SCAN" not in plan
+
+
+def test_encountered_players_and_stack_synergy_are_case_insensitive(db):
+    owner_id = db.add_player("Alpha")
+    db.add_player("BRAVO")
+    _seed_match(db, owner_id, "m1")
+    _seed_match(db, owner_id, "m2", mates=("Bravo",))
+
+    encountered = {r["username"].lower(): r for r in db.get_encountered_players("ALPHA")}
+    assert encountered["bravo"]["shared_matches"] == 2
+    assert encountered["bravo"]["player_id"] is not None
+    assert encountered["charlie"]["shared_matches"] == 1
+    assert "enemy" not in encountered
+
+    synergy = db.compute_stack_synergy(["alpha", "Bravo"])
+    assert "error" not in synergy
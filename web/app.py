@@ -1,5 +1,5 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import asyncio
 from collections import defaultdict, deque
@@ -10,14 +10,15 @@ import os
 import re
 import sys
 import time
-import math
 import base64
 import hashlib
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.api_client import TrackerAPIClient
+from src.async_api_client import get_shared_async_client
+from src import card_payloads, perf, round_export
 from src.database import Database
+from src.db_access import DatabaseAccess
 from src.plugins.v3_round_analysis import RoundAnalysisPlugin
 from src.plugins.v3_teammate_chemistry import TeammateChemistryPlugin
 from src.plugins.v3_lobby_quality import LobbyQualityPlugin
@@ -27,21 +28,44 @@ from src.plugins.v3_enemy_operator_threat import EnemyOperatorThreatPlugin
 from src.plugins.v2_operator_stats import OperatorStatsPlugin
 from src.plugins.v2_map_stats import MapStatsPlugin
 from src.db_standardizer import DatabaseStandardizer
+from src.job_manager import JobContext, JobManager
 from src.analytics.insights.engine import run_insight_engine, INSIGHTS_VERSION
+from src.analytics.heatmap_engine import PairGrid, cell_options, compute_cells
+from src.analytics.player_dataset import PlayerDataset
+from src.analytics.round_operator_sets import (
+    count_operator_pairs,
+    match_usernames,
+    player_row_counts,
+    rounds_with_operators,
+    window_matches,
+)
+from src.analytics.round_store import RoundStore
+from src.analytics.workspace_panels import (
+    _compute_matchup_block,
+    _compute_operator_scatter,
+    _integrity_counters,
+)
 from src.cache import (
     _ensure_workspace_cache_tables,
+    _player_dataset_cache_get,
+    _player_dataset_cache_set,
+    _workspace_cache_get,
+    _workspace_cache_set,
     _workspace_insights_cache_get,
     _workspace_insights_cache_set,
+    _workspace_rounds_cache_get,
+    _workspace_rounds_cache_set,
     _workspace_scope_cache_get,
     _workspace_scope_cache_set,
     _workspace_team_cache_get,
     _workspace_team_cache_set,
+    cache as workspace_cache,
     configure_workspace_cache,
 )
+from src.ws_handlers.jobs import configure_jobs, register_jobs_routes
 from src.ws_handlers.match_scrape import configure_match_scrape, register_match_scrape_routes
 from src.ws_handlers.network_scan import configure_network_scan, register_network_scan_routes
 from src.utils import (
-    _is_unknown_operator_name,
     _normalize_asset_key,
     _normalize_mode_key,
     _parse_iso_datetime,
@@ -51,6 +75,13 @@ from src.utils import (
 
 app = FastAPI()
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
+# Per-route latency, per-query SQL timings and cache hit/miss tags; see /api/perf.
+PERF_ENABLED = str(os.getenv("JAKAL_PERF", "1")).strip() in {"1", "true", "TRUE", "yes", "on"}
+perf.recorder.enabled = PERF_ENABLED
+if PERF_ENABLED:
+    perf.install()
+    app.add_middleware(perf.PerfMiddleware)
+    workspace_cache.observer = perf.recorder.record_cache
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 def _canonical_queue_key(raw_mode: object) -> str:
@@ -131,19 +162,108 @@ else:
         f"Searched: {', '.join(operator_image_candidates)}"
     )
 
-api_client = TrackerAPIClient()
+# This process's Tracker API rate budget; the network scanner paces page loads with its limiter.
+api_client = get_shared_async_client()
 db = Database(os.environ.get("JAKAL_DB_PATH", "data/jakal_fresh.db"))
 print(f"[DB] Using database at: {os.path.abspath(db.db_path)}")
-try:
-    unpack_stats = db.unpack_pending_scraped_match_cards()
+# Route handlers run their SQLite work on a pool of read-only WAL connections, with all
+# writes queued on one writer thread, so a slow query never stalls the event loop.
+db_access = DatabaseAccess(db.db_path, readers=int(os.environ.get("JAKAL_DB_READERS", "4")))
+adb = db_access.database
+# Long-running maintenance (unpack, repair, aggregate rebuilds, standardize) runs as
+# background jobs; see src/job_manager.py and /api/jobs, /ws/jobs.
+job_manager = JobManager(db.db_path, workers=int(os.environ.get("JAKAL_JOB_WORKERS", "2")))
+
+
+def _job_unpack_scraped_matches(ctx: JobContext, username: str | None = None, limit: int | None = None) -> dict:
+    def progress(stats: dict) -> None:
+        ctx.progress(
+            stats.get("processed", 0),
+            stats.get("scanned", 0),
+            f"{stats.get('unpacked_matches', 0)} unpacked, {stats.get('errors', 0)} errors",
+            detail=stats,
+        )
+
+    stats = ctx.db.unpack_pending_scraped_match_cards(username=username, limit=limit, progress=progress)
+    # Also catch cards unpacked before their players were repaired on the write side.
+    ctx.progress(stats.get("processed", 0), stats.get("scanned", 0), "Repairing player lists")
+    stats["repaired_players"] += ctx.db.repair_scraped_card_players(username)
     print(
-        "[DB] Auto-unpack complete: "
-        f"scanned={unpack_stats.get('scanned', 0)} "
-        f"unpacked={unpack_stats.get('unpacked_matches', 0)} "
-        f"errors={unpack_stats.get('errors', 0)}"
+        f"[DB] Unpack{' for ' + username if username else ''} complete: "
+        f"scanned={stats.get('scanned', 0)} "
+        f"unpacked={stats.get('unpacked_matches', 0)} "
+        f"errors={stats.get('errors', 0)} "
+        f"({stats.get('cards_per_second', 0.0)} cards/s)"
     )
-except Exception as e:
-    print(f"[DB] Warning: auto-unpack on startup failed: {e}")
+    return stats
+
+
+def _job_delete_bad_scraped_matches(ctx: JobContext, username: str) -> dict:
+    ctx.progress(0, 1, "Scanning stored cards")
+    stats = ctx.db.delete_bad_scraped_matches(username)
+    ctx.progress(1, 1, f"{stats.get('deleted_cards', 0)} cards deleted")
+    return stats
+
+
+def _job_rebuild_aggregates(ctx: JobContext) -> dict:
+    started = time.perf_counter()
+    trackers = ctx.db.rebuild_all_aggregates(progress=lambda done, total: ctx.progress(done, total, "trackers"))
+    return {"trackers": trackers, "elapsed_seconds": round(time.perf_counter() - started, 3)}
+
+
+def _job_db_standardize(ctx: JobContext, dry_run: bool = True, verbose: bool = False) -> dict:
+    standardizer = DatabaseStandardizer(ctx.db_path, dry_run=dry_run, verbose=verbose)
+    report = standardizer.run(progress=lambda done, total, step: ctx.progress(done, total, step))
+    return {
+        "db_path": report.db_path,
+        "run_at": report.run_at,
+        "total_matches": report.total_matches,
+        "total_player_rounds": report.total_player_rounds,
+        "total_round_outcomes": report.total_round_outcomes,
+        "null_usernames_found": report.null_usernames_found,
+        "null_usernames_fixed": report.null_usernames_fixed,
+        "bad_match_types_found": report.bad_match_types_found,
+        "bad_match_types_fixed": report.bad_match_types_fixed,
+        "summary_kills_missing": report.summary_kills_missing,
+        "summary_kills_reconstructed": report.summary_kills_reconstructed,
+        "owingest_stats_missing": report.owingest_stats_missing,
+        "owingest_stats_fixed": report.owingest_stats_fixed,
+        "killed_by_op_missing": report.killed_by_op_missing,
+        "killed_by_op_fixed": report.killed_by_op_fixed,
+        "data_quality_flags": report.data_quality_flags,
+    }
+
+
+job_manager.register("unpack_scraped_matches", _job_unpack_scraped_matches)
+job_manager.register("delete_bad_scraped_matches", _job_delete_bad_scraped_matches)
+job_manager.register("rebuild_aggregates", _job_rebuild_aggregates)
+job_manager.register("db_standardize", _job_db_standardize)
+
+# Pending scraped cards are unpacked by a whole-database job queued at startup, so the
+# server starts serving immediately; progress is exposed on /api/unpack-status.
+startup_unpack_job_id: int | None = None
+
+
+def _start_jobs() -> None:
+    global startup_unpack_job_id
+    job_manager.start()
+    # A startup unpack left queued by the previous run was re-enqueued by start().
+    for job in job_manager.list(kind="unpack_scraped_matches", limit=10):
+        if job["subject"] is None and job["status"] in ("queued", "running"):
+            startup_unpack_job_id = job["job_id"]
+            return
+    startup_unpack_job_id = job_manager.submit("unpack_scraped_matches")["job_id"]
+
+
+@app.on_event("startup")
+async def _start_background_jobs() -> None:
+    await asyncio.to_thread(_start_jobs)
+
+
+@app.on_event("shutdown")
+async def _close_db_access() -> None:
+    await asyncio.to_thread(job_manager.close)
+    db_access.close()
 
 rate_tracker = {
     "calls_made": 0,
@@ -163,12 +283,15 @@ error_tracker = {
 }
 
 WORKSPACE_API_VERSION = 1
-workspace_cache: dict[str, tuple[float, dict]] = {}
-WORKSPACE_CACHE_TTL_SECONDS = 90
+
+
+def _current_db() -> Database:
+    """The pool connection when called from a db_access thread, else the primary one."""
+    return db_access.current() or db
 
 
 def _get_db_cursor():
-    conn = getattr(db, "conn", None)
+    conn = getattr(_current_db(), "conn", None)
     if conn is None:
         raise RuntimeError("Database connection is not initialized.")
     return conn.cursor()
@@ -179,7 +302,7 @@ def _iter_chunks(values: list[str], size: int = 800):
         yield values[i : i + chunk_size]
 
 
-configure_workspace_cache(db, _get_db_cursor)
+configure_workspace_cache(db)
 
 try:
     _ensure_workspace_cache_tables()
@@ -249,7 +372,48 @@ async def root() -> HTMLResponse:
 
 @app.get("/api/rate-status")
 async def rate_status() -> dict:
-    return get_rate_status()
+    status = get_rate_status()
+    status["limiter"] = api_client.limiter.snapshot()
+    status["db_access"] = db_access.stats()
+    try:
+        status["payload_store"] = await adb.get_match_detail_payload_stats()
+    except Exception as e:
+        status["payload_store"] = {"error": str(e)}
+    return status
+
+
+@app.get("/api/cache-stats")
+async def cache_stats() -> dict:
+    return workspace_cache.stats()
+
+
+@app.get("/api/perf")
+async def perf_stats(format: str = "json", limit: int = 50):
+    """
+    Route latency histograms, the slowest SQL statement groups and cache hit/miss
+    counts since startup (or the last reset). `format=prometheus` returns the same
+    histograms as Prometheus text; SQL series are labelled by the query id shown here.
+    """
+    if str(format or "").strip().lower() == "prometheus":
+        return PlainTextResponse(perf.recorder.prometheus(), media_type="text/plain; version=0.0.4")
+    out = perf.recorder.snapshot(limit=limit)
+    out["db_access"] = db_access.stats()
+    return out
+
+
+@app.post("/api/perf/reset")
+async def perf_reset() -> dict:
+    perf.recorder.reset()
+    return {"ok": True}
+
+
+@app.post("/api/cache/invalidate")
+async def cache_invalidate(namespace: str = "") -> dict:
+    try:
+        removed = workspace_cache.invalidate(namespace.strip() or None)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ok": True, "namespace": namespace or "all", "removed": removed}
 
 
 @app.get("/api/operator-image-index")
@@ -262,38 +426,183 @@ async def operator_image_index() -> dict:
 
 
 @app.get("/api/scraped-matches/{username}")
-async def scraped_matches(username: str, limit: int = 50) -> dict:
+async def scraped_matches(
+    username: str,
+    limit: int = 50,
+    cursor: int | None = None,
+    fields: str | None = None,
+    match_id: str | None = None,
+) -> dict:
+    """
+    One page of stored cards, newest first. Pass `next_cursor` back as `cursor` for the
+    next page; `fields` (comma-separated: players, rounds, match_summary, round_data)
+    limits which payloads are decoded. Read-only: unpacking runs on save and as a job.
+    """
     safe_limit = max(1, min(limit, 10000))
+    wanted = None if fields is None else [f.strip() for f in fields.split(",") if f.strip()]
     try:
-        matches = db.get_scraped_match_cards(username, safe_limit)
-        return {"username": username, "matches": matches, "count": len(matches)}
+        matches = await adb.get_scraped_match_cards(
+            username, safe_limit, before_id=cursor, fields=wanted, match_id=match_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load saved matches: {str(e)}")
+    next_cursor = matches[-1]["card_id"] if len(matches) == safe_limit else None
+    return {"username": username, "matches": matches, "count": len(matches), "next_cursor": next_cursor}
 
 
-@app.post("/api/unpack-scraped-matches/{username}")
-async def unpack_scraped_matches(username: str, limit: int = 2000) -> dict:
-    safe_limit = max(1, min(limit, 5000))
+async def _submit_job(kind: str, params: dict, wait: bool, failure: str) -> dict:
+    """
+    Queue a job. With `wait` the request blocks until the job finishes and returns
+    its result; otherwise it returns {"job": snapshot} right away for polling
+    /api/jobs/{job_id} or following /ws/jobs.
+    """
     try:
-        stats = db.unpack_pending_scraped_match_cards(username=username, limit=safe_limit)
-        return {"username": username, "limit": safe_limit, "stats": stats}
+        job = await asyncio.to_thread(job_manager.submit, kind, params)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to unpack scraped matches: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"{failure}: {str(e)}")
+    if not wait:
+        return {"job": job}
+    job = await asyncio.to_thread(job_manager.wait, job["job_id"])
+    if job["status"] != "done":
+        raise HTTPException(status_code=500, detail=f"{failure}: {job['error'] or job['status']}")
+    return {"job": job, **(job["result"] or {})}
+
+
+@app.get("/api/jobs")
+async def list_jobs(status: str | None = None, kind: str | None = None, limit: int = 50) -> dict:
+    safe_limit = max(1, min(limit, 500))
+    try:
+        jobs = await asyncio.to_thread(job_manager.list, status, kind, safe_limit)
+        return {"jobs": jobs, "count": len(jobs)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list jobs: {str(e)}")
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: int) -> dict:
+    job = await asyncio.to_thread(job_manager.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: int) -> dict:
+    job = await asyncio.to_thread(job_manager.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@app.get("/api/unpack-status")
+async def unpack_status() -> dict:
+    job = await asyncio.to_thread(job_manager.get, startup_unpack_job_id) if startup_unpack_job_id else None
+    if job is None:
+        return {"state": "idle", "started_at": None, "finished_at": None, "stats": {}, "error": None, "percent": 0.0}
+    state = {"queued": "idle", "running": "running", "done": "done"}.get(job["status"], "failed")
+    return {
+        "state": state,
+        "job_id": job["job_id"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "stats": job["result"] or job["progress"]["detail"] or {},
+        "error": job["error"] or ("cancelled" if job["status"] == "cancelled" else None),
+        "percent": 100.0 if state == "done" else (job["progress"]["percent"] or 0.0),
+        "eta_seconds": job["eta_seconds"],
+    }
+
+
+@app.post("/api/unpack-scraped-matches/{username}")
+async def unpack_scraped_matches(username: str, limit: int = 2000, wait: bool = False) -> dict:
+    safe_limit = max(1, min(limit, 5000))
+    result = await _submit_job(
+        "unpack_scraped_matches",
+        {"username": username, "limit": safe_limit},
+        wait,
+        "Failed to unpack scraped matches",
+    )
+    job = result.pop("job")
+    return {"username": username, "limit": safe_limit, "job": job, **({"stats": result} if wait else {})}
 
 
 @app.post("/api/delete-bad-scraped-matches/{username}")
-async def delete_bad_scraped_matches(username: str) -> dict:
+async def delete_bad_scraped_matches(username: str, wait: bool = False) -> dict:
+    result = await _submit_job(
+        "delete_bad_scraped_matches", {"username": username}, wait, "Failed to delete bad scraped matches"
+    )
+    job = result.pop("job")
+    return {"username": username, "job": job, **({"stats": result} if wait else {})}
+
+
+def _load_player_dataset(username: str) -> PlayerDataset:
+    """One PlayerDataset per (username, player revision), shared by every analysis plugin."""
+    key = str(username or "").strip()
+    db_rev = _db_revision_token(key)
+    dataset = _player_dataset_cache_get(key, db_rev)
+    if dataset is None:
+        t0 = time.time()
+        dataset = PlayerDataset.load(_current_db(), key, revision=db_rev)
+        _player_dataset_cache_set(key, dataset, db_rev)
+        print(
+            f"[API] player-dataset username={key} rounds={len(dataset.rounds)} "
+            f"matches={len(dataset.matches)} bytes={dataset.nbytes} load_ms={int((time.time() - t0) * 1000)}"
+        )
+    return dataset
+
+
+def _analyze_plugin(plugin_cls, username: str, **kwargs) -> dict:
+    # Trade analysis reads raw card event JSON rather than the shared round tables.
+    source = _current_db() if plugin_cls is TradeAnalysisPlugin else _load_player_dataset(username)
+    return plugin_cls(source, str(username or "").strip(), **kwargs).analyze()
+
+
+ANALYSIS_BUNDLE_PLUGINS = (
+    ("round_analysis", RoundAnalysisPlugin),
+    ("teammate_chemistry", TeammateChemistryPlugin),
+    ("lobby_quality", LobbyQualityPlugin),
+    ("trade_analysis", TradeAnalysisPlugin),
+    ("team_analysis", TeamAnalysisPlugin),
+    ("enemy_operator_threat", EnemyOperatorThreatPlugin),
+    ("operator_stats", OperatorStatsPlugin),
+    ("map_stats", MapStatsPlugin),
+)
+
+
+@app.get("/api/analysis-bundle/{username}")
+@db_access.reads
+def analysis_bundle(username: str, window_seconds: float = 5.0) -> dict:
+    """Every analysis tab from one dataset load; a failing plugin reports its error in place."""
     try:
-        stats = db.delete_bad_scraped_matches(username)
-        return {"username": username, "stats": stats}
+        t0 = time.time()
+        dataset = _load_player_dataset(username)
+        load_ms = int((time.time() - t0) * 1000)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to delete bad scraped matches: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to load player dataset: {str(e)}")
+    analyses: dict = {}
+    timings_ms: dict = {"dataset": load_ms}
+    for name, plugin_cls in ANALYSIS_BUNDLE_PLUGINS:
+        t0 = time.time()
+        kwargs = {"window_seconds": window_seconds} if plugin_cls is TradeAnalysisPlugin else {}
+        try:
+            analyses[name] = _analyze_plugin(plugin_cls, username, **kwargs)
+        except Exception as e:
+            analyses[name] = {"error": f"Failed to run {name.replace('_', ' ')}: {str(e)}", "findings": []}
+        timings_ms[name] = int((time.time() - t0) * 1000)
+    return {
+        "username": username,
+        "db_rev": dataset.revision,
+        "dataset": dataset.stats(),
+        "analyses": analyses,
+        "timings_ms": timings_ms,
+    }
 
 
 @app.get("/api/round-analysis/{username}")
 async def round_analysis(username: str) -> dict:
     try:
-        analysis = RoundAnalysisPlugin(db, username).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, RoundAnalysisPlugin, username)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run round analysis: {str(e)}")
@@ -302,7 +611,7 @@ async def round_analysis(username: str) -> dict:
 @app.get("/api/teammate-chemistry/{username}")
 async def teammate_chemistry(username: str) -> dict:
     try:
-        analysis = TeammateChemistryPlugin(db, username).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, TeammateChemistryPlugin, username)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run teammate chemistry: {str(e)}")
@@ -311,7 +620,7 @@ async def teammate_chemistry(username: str) -> dict:
 @app.get("/api/lobby-quality/{username}")
 async def lobby_quality(username: str) -> dict:
     try:
-        analysis = LobbyQualityPlugin(db, username).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, LobbyQualityPlugin, username)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run lobby quality: {str(e)}")
@@ -320,7 +629,7 @@ async def lobby_quality(username: str) -> dict:
 @app.get("/api/trade-analysis/{username}")
 async def trade_analysis(username: str, window_seconds: float = 5.0) -> dict:
     try:
-        analysis = TradeAnalysisPlugin(db, username, window_seconds=window_seconds).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, TradeAnalysisPlugin, username, window_seconds=window_seconds)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run trade analysis: {str(e)}")
@@ -329,7 +638,7 @@ async def trade_analysis(username: str, window_seconds: float = 5.0) -> dict:
 @app.get("/api/team-analysis/{username}")
 async def team_analysis(username: str) -> dict:
     try:
-        analysis = TeamAnalysisPlugin(db, username).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, TeamAnalysisPlugin, username)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run team analysis: {str(e)}")
@@ -338,7 +647,7 @@ async def team_analysis(username: str) -> dict:
 @app.get("/api/enemy-operator-threat/{username}")
 async def enemy_operator_threat(username: str) -> dict:
     try:
-        analysis = EnemyOperatorThreatPlugin(db, username).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, EnemyOperatorThreatPlugin, username)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run enemy operator threat analysis: {str(e)}")
@@ -347,7 +656,7 @@ async def enemy_operator_threat(username: str) -> dict:
 @app.get("/api/operator-stats/{username}")
 async def operator_stats(username: str) -> dict:
     try:
-        analysis = OperatorStatsPlugin(db, username).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, OperatorStatsPlugin, username)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run operator stats: {str(e)}")
@@ -356,7 +665,7 @@ async def operator_stats(username: str) -> dict:
 @app.get("/api/map-stats/{username}")
 async def map_stats(username: str) -> dict:
     try:
-        analysis = MapStatsPlugin(db, username).analyze()
+        analysis = await db_access.run_read(_analyze_plugin, MapStatsPlugin, username)
         return {"username": username, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run map stats: {str(e)}")
@@ -365,7 +674,7 @@ async def map_stats(username: str) -> dict:
 @app.get("/api/players/encountered")
 async def players_encountered(username: str, match_type: str = "Ranked") -> dict:
     try:
-        rows = db.get_encountered_players(username, match_type=match_type)
+        rows = await adb.get_encountered_players(username, match_type=match_type)
         return {
             "username": username,
             "match_type": match_type,
@@ -379,7 +688,7 @@ async def players_encountered(username: str, match_type: str = "Ranked") -> dict
 @app.get("/api/players/friends")
 async def players_friends(tag: str = "friend") -> dict:
     try:
-        rows = db.get_tagged_players(tag=tag)
+        rows = await adb.get_tagged_players(tag=tag)
         return {"tag": tag, "players": rows, "count": len(rows)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load tagged players: {str(e)}")
@@ -399,7 +708,7 @@ async def players_tag(request: Request) -> dict:
     if not tag:
         raise HTTPException(status_code=400, detail="tag is required")
     try:
-        result = db.set_player_tag(username, tag, enabled=enabled)
+        result = await adb.set_player_tag(username, tag, enabled=enabled)
         return {"ok": True, "result": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update player tag: {str(e)}")
@@ -419,7 +728,7 @@ async def stack_synergy(players: str, match_type: str = "Ranked") -> dict:
     if len(dedup) < 2:
         raise HTTPException(status_code=400, detail="Provide at least 2 players in players query param.")
     try:
-        analysis = db.compute_stack_synergy(dedup, match_type=match_type)
+        analysis = await adb.compute_stack_synergy(dedup, match_type=match_type)
         return {"players": dedup, "match_type": match_type, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to compute stack synergy: {str(e)}")
@@ -439,7 +748,7 @@ async def stack_debug(players: str, match_type: str = "Ranked") -> dict:
     if len(dedup) < 2:
         raise HTTPException(status_code=400, detail="Provide at least 2 players in players query param.")
     try:
-        debug = db.debug_stack_synergy(dedup, match_type=match_type)
+        debug = await adb.debug_stack_synergy(dedup, match_type=match_type)
         return {"players": dedup, "match_type": match_type, "debug": debug}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to debug stack synergy: {str(e)}")
@@ -448,7 +757,7 @@ async def stack_debug(players: str, match_type: str = "Ranked") -> dict:
 @app.get("/api/players/list")
 async def players_list() -> dict:
     try:
-        rows = db.get_all_players()
+        rows = await adb.get_all_players()
         names = [str(r.get("username") or "").strip() for r in rows if str(r.get("username") or "").strip()]
         names = sorted(set(names), key=lambda x: x.lower())
         return {"players": names, "count": len(names)}
@@ -457,7 +766,8 @@ async def players_list() -> dict:
 
 
 @app.get("/api/operators/map-breakdown")
-async def operators_map_breakdown(
+@db_access.reads
+def operators_map_breakdown(
     username: str,
     stack: str = "all",
     match_type: str = "Ranked",
@@ -487,7 +797,7 @@ async def operators_map_breakdown(
         cursor = _get_db_cursor()
         cursor.execute(
             """
-            SELECT LOWER(TRIM(p.username)) AS username_key
+            SELECT p.username_key AS username_key
             FROM player_tags pt
             JOIN players p ON p.player_id = pt.player_id
             WHERE LOWER(TRIM(pt.tag)) = 'friend'
@@ -497,52 +807,53 @@ async def operators_map_breakdown(
 
         cursor.execute(
             """
-            SELECT match_id, team_id
+            SELECT match_id, team_id, match_type, match_type_key
             FROM match_detail_players
-            WHERE LOWER(TRIM(username)) = LOWER(TRIM(?))
+            WHERE username_key = LOWER(TRIM(?))
+            ORDER BY id
             """,
             (clean_username,),
         )
-        user_rows = cursor.fetchall()
         match_team_rows = []
-        for row in user_rows:
+        seen_match_teams: set[tuple[str, object]] = set()
+        match_key_by_id: dict[str, str] = {}
+        for row in cursor.fetchall():
             mid = str(row["match_id"] or "").strip()
             if not mid:
                 continue
-            team_id = row["team_id"]
-            cursor.execute(
-                """
-                SELECT match_type
-                     , match_type_key
-                FROM match_detail_players
-                WHERE match_id = ?
-                  AND LOWER(TRIM(username)) = LOWER(TRIM(?))
-                LIMIT 1
-                """,
-                (mid, clean_username),
-            )
-            mt = cursor.fetchone()
-            mk = _canonical_queue_key((mt["match_type_key"] if mt and "match_type_key" in mt.keys() else "") or (mt["match_type"] if mt else ""))
-            if mk != mode_key:
+            if mid not in match_key_by_id:
+                match_key_by_id[mid] = _canonical_queue_key(row["match_type_key"] or row["match_type"] or "")
+            if match_key_by_id[mid] != mode_key:
+                continue
+            if (mid, row["team_id"]) in seen_match_teams:
                 continue
-            match_team_rows.append((mid, team_id))
+            seen_match_teams.add((mid, row["team_id"]))
+            match_team_rows.append((mid, row["team_id"]))
 
         if not match_team_rows:
             return {"username": clean_username, "stack": stack_key, "match_type": match_type, "maps": [], "low_data_maps": [], "eligible_matches": 0}
 
+        cursor.execute(
+            """
+            SELECT tm.match_id, tm.team_id, tm.username_key AS teammate_key
+            FROM match_detail_players me
+            JOIN match_detail_players tm
+              ON tm.match_id = me.match_id
+             AND tm.team_id = me.team_id
+             AND tm.username_key != me.username_key
+            WHERE me.username_key = LOWER(TRIM(?))
+            """,
+            (clean_username,),
+        )
+        teammates_by_match_team: dict[tuple[str, object], set[str]] = defaultdict(set)
+        for r in cursor.fetchall():
+            teammate_key = str(r["teammate_key"] or "").strip().lower()
+            if teammate_key:
+                teammates_by_match_team[(str(r["match_id"] or "").strip(), r["team_id"])].add(teammate_key)
+
         eligible_match_ids = []
         for mid, team_id in match_team_rows:
-            cursor.execute(
-                """
-                SELECT LOWER(TRIM(username)) AS teammate_key
-                FROM match_detail_players
-                WHERE match_id = ?
-                  AND team_id = ?
-                  AND LOWER(TRIM(username)) != LOWER(TRIM(?))
-                """,
-                (mid, team_id, clean_username),
-            )
-            teammates = {str(r["teammate_key"] or "").strip().lower() for r in cursor.fetchall() if str(r["teammate_key"] or "").strip()}
+            teammates = teammates_by_match_team.get((mid, team_id), set())
             friend_count = sum(1 for t in teammates if t in friend_keys)
             if friend_target < 0 or friend_count == friend_target:
                 eligible_match_ids.append(mid)
@@ -556,13 +867,8 @@ async def operators_map_breakdown(
         cursor.execute(
             f"""
             WITH latest_cards AS (
-                SELECT smc.match_id, COALESCE(NULLIF(TRIM(smc.map_name), ''), 'Unknown') AS map_name
-                FROM scraped_match_cards smc
-                JOIN (
-                    SELECT match_id, MAX(id) AS max_id
-                    FROM scraped_match_cards
-                    GROUP BY match_id
-                ) last ON last.match_id = smc.match_id AND last.max_id = smc.id
+                SELECT match_id, COALESCE(NULLIF(TRIM(map_name), ''), 'Unknown') AS map_name
+                FROM match_latest_card
             )
             SELECT
                 COALESCE(NULLIF(TRIM(pr.operator_key), ''), 'unknown') AS operator_key,
@@ -576,7 +882,7 @@ async def operators_map_breakdown(
                 AVG(CAST(pr.kills AS FLOAT) / NULLIF(pr.deaths, 0)) AS kd
             FROM player_rounds pr
             LEFT JOIN latest_cards lc ON lc.match_id = pr.match_id
-            WHERE LOWER(TRIM(pr.username)) = LOWER(TRIM(?))
+            WHERE pr.username_key = LOWER(TRIM(?))
               AND pr.match_id IN ({placeholders})
             GROUP BY operator_key, side, map_name
             ORDER BY map_name, side, win_rate DESC
@@ -588,13 +894,8 @@ async def operators_map_breakdown(
         cursor.execute(
             f"""
             WITH latest_cards AS (
-                SELECT smc.match_id, COALESCE(NULLIF(TRIM(smc.map_name), ''), 'Unknown') AS map_name
-                FROM scraped_match_cards smc
-                JOIN (
-                    SELECT match_id, MAX(id) AS max_id
-                    FROM scraped_match_cards
-                    GROUP BY match_id
-                ) last ON last.match_id = smc.match_id AND last.max_id = smc.id
+                SELECT match_id, COALESCE(NULLIF(TRIM(map_name), ''), 'Unknown') AS map_name
+                FROM match_latest_card
             )
             SELECT
                 COALESCE(lc.map_name, 'Unknown') AS map_name,
@@ -603,7 +904,7 @@ async def operators_map_breakdown(
                 AVG(CASE WHEN LOWER(TRIM(COALESCE(pr.result, ''))) IN ('win', 'victory') THEN 1.0 ELSE 0.0 END) AS win_rate
             FROM player_rounds pr
             LEFT JOIN latest_cards lc ON lc.match_id = pr.match_id
-            WHERE LOWER(TRIM(pr.username)) = LOWER(TRIM(?))
+            WHERE pr.username_key = LOWER(TRIM(?))
               AND pr.match_id IN ({placeholders})
             GROUP BY map_name, side
             """,
@@ -694,7 +995,8 @@ async def operators_map_breakdown(
 
 
 @app.get("/api/dev/operators/diagnostics")
-async def dev_operator_diagnostics(
+@db_access.reads
+def dev_operator_diagnostics(
     username: str,
     map_name: str,
     side: str,
@@ -721,16 +1023,8 @@ async def dev_operator_diagnostics(
                 COUNT(*) AS baseline_n,
                 AVG(CASE WHEN LOWER(TRIM(COALESCE(pr.result, ''))) IN ('win', 'victory') THEN 1.0 ELSE 0.0 END) AS baseline_wr
             FROM player_rounds pr
-            LEFT JOIN (
-                SELECT smc.match_id, COALESCE(NULLIF(TRIM(smc.map_name), ''), 'Unknown') AS map_name
-                FROM scraped_match_cards smc
-                JOIN (
-                    SELECT match_id, MAX(id) AS max_id
-                    FROM scraped_match_cards
-                    GROUP BY match_id
-                ) last ON last.match_id = smc.match_id AND last.max_id = smc.id
-            ) lc ON lc.match_id = pr.match_id
-            WHERE LOWER(TRIM(pr.username)) = LOWER(TRIM(?))
+            LEFT JOIN match_latest_card lc ON lc.match_id = pr.match_id
+            WHERE pr.username_key = LOWER(TRIM(?))
               AND LOWER(TRIM(COALESCE(lc.map_name, 'Unknown'))) = LOWER(TRIM(?))
               AND LOWER(TRIM(COALESCE(pr.side, 'unknown'))) IN (?, ?)
               AND COALESCE(NULLIF(TRIM(pr.match_type_key), ''), ?) = ?
@@ -747,16 +1041,8 @@ async def dev_operator_diagnostics(
                 COUNT(*) AS n_rounds,
                 AVG(CASE WHEN LOWER(TRIM(COALESCE(pr.result, ''))) IN ('win', 'victory') THEN 1.0 ELSE 0.0 END) AS win_rate
             FROM player_rounds pr
-            LEFT JOIN (
-                SELECT smc.match_id, COALESCE(NULLIF(TRIM(smc.map_name), ''), 'Unknown') AS map_name
-                FROM scraped_match_cards smc
-                JOIN (
-                    SELECT match_id, MAX(id) AS max_id
-                    FROM scraped_match_cards
-                    GROUP BY match_id
-                ) last ON last.match_id = smc.match_id AND last.max_id = smc.id
-            ) lc ON lc.match_id = pr.match_id
-            WHERE LOWER(TRIM(pr.username)) = LOWER(TRIM(?))
+            LEFT JOIN match_latest_card lc ON lc.match_id = pr.match_id
+            WHERE pr.username_key = LOWER(TRIM(?))
               AND LOWER(TRIM(COALESCE(lc.map_name, 'Unknown'))) = LOWER(TRIM(?))
               AND LOWER(TRIM(COALESCE(pr.side, 'unknown'))) IN (?, ?)
               AND COALESCE(NULLIF(TRIM(pr.match_type_key), ''), ?) = ?
@@ -772,16 +1058,8 @@ async def dev_operator_diagnostics(
             """
             SELECT pr.match_id, pr.round_id, pr.operator, pr.result, pr.kills, pr.deaths, pr.assists
             FROM player_rounds pr
-            LEFT JOIN (
-                SELECT smc.match_id, COALESCE(NULLIF(TRIM(smc.map_name), ''), 'Unknown') AS map_name
-                FROM scraped_match_cards smc
-                JOIN (
-                    SELECT match_id, MAX(id) AS max_id
-                    FROM scraped_match_cards
-                    GROUP BY match_id
-                ) last ON last.match_id = smc.match_id AND last.max_id = smc.id
-            ) lc ON lc.match_id = pr.match_id
-            WHERE LOWER(TRIM(pr.username)) = LOWER(TRIM(?))
+            LEFT JOIN match_latest_card lc ON lc.match_id = pr.match_id
+            WHERE pr.username_key = LOWER(TRIM(?))
               AND LOWER(TRIM(COALESCE(lc.map_name, 'Unknown'))) = LOWER(TRIM(?))
               AND LOWER(TRIM(COALESCE(pr.side, 'unknown'))) IN (?, ?)
               AND COALESCE(NULLIF(TRIM(pr.match_type_key), ''), ?) = ?
@@ -815,38 +1093,23 @@ async def dev_operator_diagnostics(
         raise HTTPException(status_code=500, detail=f"Failed to build operator diagnostics: {str(e)}")
 
 
-@app.post("/api/settings/db-standardize")
-async def settings_db_standardize(dry_run: bool = True, verbose: bool = False) -> dict:
-    try:
-        def _run() -> dict:
-            standardizer = DatabaseStandardizer(db.db_path, dry_run=dry_run, verbose=verbose)
-            report = standardizer.run()
-            return {
-                "db_path": report.db_path,
-                "run_at": report.run_at,
-                "total_matches": report.total_matches,
-                "total_player_rounds": report.total_player_rounds,
-                "total_round_outcomes": report.total_round_outcomes,
-                "null_usernames_found": report.null_usernames_found,
-                "null_usernames_fixed": report.null_usernames_fixed,
-                "bad_match_types_found": report.bad_match_types_found,
-                "bad_match_types_fixed": report.bad_match_types_fixed,
-                "summary_kills_missing": report.summary_kills_missing,
-                "summary_kills_reconstructed": report.summary_kills_reconstructed,
-                "owingest_stats_missing": report.owingest_stats_missing,
-                "owingest_stats_fixed": report.owingest_stats_fixed,
-                "killed_by_op_missing": report.killed_by_op_missing,
-                "killed_by_op_fixed": report.killed_by_op_fixed,
-                "data_quality_flags": report.data_quality_flags,
-            }
+@app.post("/api/settings/rebuild-aggregates")
+async def settings_rebuild_aggregates(wait: bool = False) -> dict:
+    """Full repair of agg_* tables; normal saves maintain them incrementally."""
+    result = await _submit_job("rebuild_aggregates", {}, wait, "Failed to rebuild aggregates")
+    return {"ok": True, **result}
 
-        report_payload = await asyncio.to_thread(_run)
-        return {"ok": True, "dry_run": dry_run, "report": report_payload}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to standardize DB: {str(e)}")
+
+@app.post("/api/settings/db-standardize")
+async def settings_db_standardize(dry_run: bool = True, verbose: bool = False, wait: bool = False) -> dict:
+    result = await _submit_job(
+        "db_standardize", {"dry_run": dry_run, "verbose": verbose}, wait, "Failed to standardize DB"
+    )
+    job = result.pop("job")
+    return {"ok": True, "dry_run": dry_run, "job": job, **({"report": result} if wait else {})}
 
 def _extract_match_times(card_row: dict) -> tuple[datetime | None, datetime | None]:
-    summary = card_row.get("summary_json")
+    summary = card_payloads.payload_text(card_row.get("summary_json"))
     payload = {}
     if isinstance(summary, str) and summary.strip():
         try:
@@ -901,41 +1164,51 @@ def _decode_evidence_cursor(value: str) -> dict | None:
         return None
 
 
-def _db_revision_token() -> str:
-    cur = _get_db_cursor()
-    cur.execute("SELECT MAX(scraped_at) AS mx FROM scraped_match_cards")
-    row = cur.fetchone()
-    return str(row["mx"] if row and row["mx"] is not None else "")
-
-
-def _workspace_cache_get(key: str) -> dict | None:
-    item = workspace_cache.get(key)
-    if not item:
-        return None
-    ts, payload = item
-    if time.time() - ts > WORKSPACE_CACHE_TTL_SECONDS:
-        workspace_cache.pop(key, None)
-        return None
-    return payload
+def _db_revision_token(username: str | None = None) -> str:
+    # One primary-key lookup on db_revision; per-player when a username is given.
+    return _current_db().get_revision_token(username)
 
 
-def _workspace_cache_set(key: str, payload: dict) -> None:
-    workspace_cache[key] = (time.time(), payload)
+_WORKSPACE_ROW_COLS = """
+            pr.id AS pr_id,
+            pr.player_id,
+            pr.match_id,
+            pr.round_id,
+            pr.side,
+            pr.operator,
+            pr.operator_key,
+            pr.username,
+            pr.player_id_tracker,
+            pr.kills,
+            pr.deaths,
+            pr.assists,
+            pr.headshots,
+            pr.first_blood,
+            pr.first_death,
+            pr.clutch_won,
+            pr.clutch_lost,
+            pr.match_type,
+            pr.match_type_key,
+            ro.winner_side,
+            lc.map_name,
+            lc.mode AS card_mode,
+            lc.match_date,
+            lc.scraped_at
+"""
 
 
-def _load_workspace_rows(
+def _workspace_row_scope(
     username: str,
     *,
-    days: int = 90,
-    queue: str = "all",
-    playlist: str = "",
-    map_name: str = "",
-    stack_only: bool = False,
-    stack_id: int | None = None,
-    search: str = "",
-    legacy_mode: str = "",
-    columns_profile: str = "full",
-) -> tuple[int, list[dict], dict, list[str]]:
+    days: int,
+    queue: str,
+    playlist: str,
+    map_name: str,
+    stack_only: bool,
+    stack_id: int | None,
+    search: str,
+    legacy_mode: str,
+) -> tuple[dict, int, list[str], dict, list[str]]:
     scope = _build_workspace_scope(
         username=username,
         days=days,
@@ -958,92 +1231,22 @@ def _load_workspace_rows(
         "scope_build_ms": int(scope.get("compute_ms", 0)),
         "scope_match_ids": len(match_ids),
     }
-    if player_id <= 0:
-        return 0, [], ctx, warnings
-    if not match_ids:
-        return player_id, [], ctx, warnings
+    return scope, player_id, match_ids, ctx, warnings
 
-    t0 = time.time()
+
+def _iter_workspace_row_records(player_id: int, match_ids: list[str], profile: str):
+    """Yield sqlite3.Row player-round records for a scope; the full profile adds the card id."""
     cur = _get_db_cursor()
-    profile = str(columns_profile or "full").strip().lower()
     if profile in {"operators", "matchups"}:
-        selected_cols = """
-            pr.id AS pr_id,
-            pr.player_id,
-            pr.match_id,
-            pr.round_id,
-            pr.side,
-            pr.operator,
-            pr.operator_key,
-            pr.username,
-            pr.player_id_tracker,
-            pr.kills,
-            pr.deaths,
-            pr.assists,
-            pr.headshots,
-            pr.first_blood,
-            pr.first_death,
-            pr.clutch_won,
-            pr.clutch_lost,
-            pr.match_type,
-            pr.match_type_key,
-            ro.winner_side,
-            lc.map_name,
-            lc.mode AS card_mode,
-            lc.match_date,
-            lc.scraped_at
-        """
+        selected_cols = _WORKSPACE_ROW_COLS
     else:
-        selected_cols = """
-            pr.id AS pr_id,
-            pr.player_id,
-            pr.match_id,
-            pr.round_id,
-            pr.side,
-            pr.operator,
-            pr.operator_key,
-            pr.username,
-            pr.player_id_tracker,
-            pr.kills,
-            pr.deaths,
-            pr.assists,
-            pr.headshots,
-            pr.first_blood,
-            pr.first_death,
-            pr.clutch_won,
-            pr.clutch_lost,
-            pr.match_type,
-            pr.match_type_key,
-            ro.winner_side,
-            lc.map_name,
-            lc.mode AS card_mode,
-            lc.match_date,
-            lc.summary_json,
-            lc.scraped_at
-        """
+        # The card's summary blob is attached lazily by _load_workspace_rows, once per card.
+        selected_cols = _WORKSPACE_ROW_COLS.rstrip() + ",\n            lc.card_id\n"
     sql_template = """
-        WITH latest_card AS (
-            SELECT match_id, MAX(scraped_at) AS scraped_at
-            FROM scraped_match_cards
-            GROUP BY match_id
-        ),
-        latest_rows AS (
-            SELECT
-                smc.match_id,
-                smc.map_name,
-                smc.mode,
-                smc.match_date,
-                smc.summary_json,
-                lc.scraped_at
-            FROM latest_card lc
-            JOIN scraped_match_cards smc
-              ON smc.match_id = lc.match_id
-             AND smc.scraped_at = lc.scraped_at
-        )
         SELECT
             {selected_cols}
         FROM player_rounds pr
-        JOIN latest_rows lc
+        JOIN match_latest_card lc
           ON lc.match_id = pr.match_id
         JOIN round_outcomes ro
           ON ro.player_id = pr.player_id
@@ -1054,21 +1257,64 @@ def _load_workspace_rows(
           AND pr.operator IS NOT NULL
           AND TRIM(pr.operator) != ''
     """
-    filtered: list[dict] = []
     for chunk in _iter_chunks(match_ids):
         placeholders = ",".join("?" for _ in chunk)
         sql = sql_template.format(selected_cols=selected_cols, match_id_placeholders=placeholders)
-        params: list[object] = [player_id, *chunk]
-        cur.execute(sql, tuple(params))
-        filtered.extend(dict(r) for r in cur.fetchall())
+        cur.execute(sql, (player_id, *chunk))
+        yield from cur.fetchall()
+
+
+def _load_workspace_rows(
+    username: str,
+    *,
+    days: int = 90,
+    queue: str = "all",
+    playlist: str = "",
+    map_name: str = "",
+    stack_only: bool = False,
+    stack_id: int | None = None,
+    search: str = "",
+    legacy_mode: str = "",
+    columns_profile: str = "full",
+) -> tuple[int, list[dict], dict, list[str]]:
+    _scope, player_id, match_ids, ctx, warnings = _workspace_row_scope(
+        username,
+        days=days,
+        queue=queue,
+        playlist=playlist,
+        map_name=map_name,
+        stack_only=stack_only,
+        stack_id=stack_id,
+        search=search,
+        legacy_mode=legacy_mode,
+    )
+    if player_id <= 0:
+        return 0, [], ctx, warnings
+    if not match_ids:
+        return player_id, [], ctx, warnings
+
+    t0 = time.time()
+    profile = str(columns_profile or "full").strip().lower()
+    filtered = [dict(r) for r in _iter_workspace_row_records(player_id, match_ids, profile)]
+    if filtered and "card_id" in filtered[0]:
+        # One compressed handle per card, shared by its rows; decoded only if a consumer reads it.
+        summaries = card_payloads.load(_current_db().conn, {r["card_id"] for r in filtered}, ("summary",))
+        for r in filtered:
+            r["summary_json"] = summaries.get(r["card_id"], {}).get("summary")
     search_key = str(search or "").strip().lower()
     if search_key:
         filtered = [
             r for r in filtered
             if search_key in str(r.get("operator") or "").lower() or search_key in str(r.get("username") or "").lower()
         ]
+    ts_by_scraped_at: dict[str, float] = {}
     for r in filtered:
-        r["_order_primary"] = _parse_iso_datetime(r.get("scraped_at")).timestamp() if _parse_iso_datetime(r.get("scraped_at")) else 0.0
+        scraped_at = str(r.get("scraped_at") or "")
+        ts = ts_by_scraped_at.get(scraped_at)
+        if ts is None:
+            parsed = _parse_iso_datetime(scraped_at)
+            ts = ts_by_scraped_at[scraped_at] = parsed.timestamp() if parsed else 0.0
+        r["_order_primary"] = ts
     filtered.sort(
         key=lambda r: (
             float(r.get("_order_primary", 0.0)),
@@ -1088,6 +1334,55 @@ def _load_workspace_rows(
     return player_id, filtered, ctx, warnings
 
 
+def _load_workspace_round_store(
+    username: str,
+    *,
+    days: int = 90,
+    queue: str = "all",
+    playlist: str = "",
+    map_name: str = "",
+    stack_only: bool = False,
+    stack_id: int | None = None,
+    search: str = "",
+    legacy_mode: str = "",
+) -> tuple[int, RoundStore, dict, list[str]]:
+    """
+    Columnar counterpart of `_load_workspace_rows` for the aggregate panels.
+
+    Builds straight from cursor records (no per-row dicts) and keeps the store in
+    the workspace_rounds cache per scope and revision, so panel switches reuse it.
+    """
+    scope, player_id, match_ids, ctx, warnings = _workspace_row_scope(
+        username,
+        days=days,
+        queue=queue,
+        playlist=playlist,
+        map_name=map_name,
+        stack_only=stack_only,
+        stack_id=stack_id,
+        search=search,
+        legacy_mode=legacy_mode,
+    )
+    if player_id <= 0 or not match_ids:
+        return max(0, player_id), RoundStore.from_rows([]), ctx, warnings
+
+    t0 = time.time()
+    db_rev = str(scope.get("db_rev") or _db_revision_token(username))
+    store_key = _hash_payload({"scope_key": ctx.get("scope_key"), "search": str(search or "").strip().lower()})
+    store = _workspace_rounds_cache_get(store_key, db_rev)
+    ctx["round_store_cache_hit"] = store is not None
+    if store is None:
+        store = RoundStore.from_rows(_iter_workspace_row_records(player_id, match_ids, "operators"), search=search)
+        _workspace_rounds_cache_set(store_key, store, db_rev)
+    ctx["row_load_ms"] = int((time.time() - t0) * 1000)
+    print(
+        "[WORKSPACE] round-store "
+        f"scope_key={ctx.get('scope_key')} match_ids={len(match_ids)} rows={len(store)} "
+        f"bytes={store.nbytes} cache_hit={ctx['round_store_cache_hit']} row_ms={ctx.get('row_load_ms')}"
+    )
+    return player_id, store, ctx, warnings
+
+
 def _parse_workspace_scope_params(
     *,
     days: int = 90,
@@ -1143,7 +1438,7 @@ def _build_workspace_scope(
     t0 = time.time()
     cur = _get_db_cursor()
     cur.execute(
-        "SELECT player_id FROM players WHERE LOWER(TRIM(username)) = LOWER(TRIM(?)) ORDER BY player_id DESC LIMIT 1",
+        "SELECT player_id FROM players WHERE username_key = LOWER(TRIM(?)) ORDER BY player_id DESC LIMIT 1",
         (username,),
     )
     row = cur.fetchone()
@@ -1184,7 +1479,7 @@ def _build_workspace_scope(
         "stack_only": stack_only,
         "stack_id": stack_id,
     }
-    db_rev = _db_revision_token()
+    db_rev = _db_revision_token(username)
     scope_key = _hash_payload(scope_payload | {"db_rev": db_rev})
     cached = _workspace_scope_cache_get(scope_key, db_rev)
     if cached is not None:
@@ -1199,45 +1494,37 @@ def _build_workspace_scope(
         return cached_out
 
     sql = """
-        WITH latest_card AS (
-            SELECT match_id, MAX(scraped_at) AS scraped_at
-            FROM scraped_match_cards
-            GROUP BY match_id
-        )
         SELECT DISTINCT
             me.match_id,
             me.team_id,
-            COALESCE(NULLIF(TRIM(smc.mode_key), ''), 'other') AS mode_key,
+            COALESCE(NULLIF(TRIM(lc.mode_key), ''), 'other') AS mode_key,
             CASE
-                WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%unranked%' THEN 'unranked'
-                WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%ranked%' THEN 'ranked'
-                WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%standard%' THEN 'standard'
-                WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%quick%' OR LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%casual%' THEN 'quick'
-                WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%arcade%' THEN 'arcade'
-                WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%event%' THEN 'event'
+                WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%unranked%' THEN 'unranked'
+                WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%ranked%' THEN 'ranked'
+                WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%standard%' THEN 'standard'
+                WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%quick%' OR LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%casual%' THEN 'quick'
+                WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%arcade%' THEN 'arcade'
+                WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%event%' THEN 'event'
                 ELSE 'other'
             END AS mode_norm,
-            LOWER(TRIM(COALESCE(smc.map_name, ''))) AS map_name_norm,
+            LOWER(TRIM(COALESCE(lc.map_name, ''))) AS map_name_norm,
             lc.scraped_at AS last_scraped_at
         FROM match_detail_players me
-        JOIN latest_card lc
+        JOIN match_latest_card lc
           ON lc.match_id = me.match_id
-        JOIN scraped_match_cards smc
-          ON smc.match_id = lc.match_id
-         AND smc.scraped_at = lc.scraped_at
-        WHERE LOWER(TRIM(me.username)) = LOWER(TRIM(?))
+        WHERE me.username_key = LOWER(TRIM(?))
           AND DATETIME(COALESCE(lc.scraped_at, '1970-01-01 00:00:00')) >= DATETIME('now', ?)
     """
     params: list[object] = [username, f"-{safe_days} days"]
     if queue_key == "ranked":
-        sql += " AND LOWER(TRIM(COALESCE(smc.mode_key, ''))) = 'ranked'"
+        sql += " AND LOWER(TRIM(COALESCE(lc.mode_key, ''))) = 'ranked'"
     elif queue_key == "unranked":
-        sql += " AND LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%unranked%'"
+        sql += " AND LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%unranked%'"
     if playlist_key:
-        sql += " AND (CASE WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%unranked%' THEN 'unranked' WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%ranked%' THEN 'ranked' WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%standard%' THEN 'standard' WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%quick%' OR LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%casual%' THEN 'quick' WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%arcade%' THEN 'arcade' WHEN LOWER(TRIM(COALESCE(smc.mode, ''))) LIKE '%event%' THEN 'event' ELSE 'other' END) = ?"
+        sql += " AND (CASE WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%unranked%' THEN 'unranked' WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%ranked%' THEN 'ranked' WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%standard%' THEN 'standard' WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%quick%' OR LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%casual%' THEN 'quick' WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%arcade%' THEN 'arcade' WHEN LOWER(TRIM(COALESCE(lc.mode, ''))) LIKE '%event%' THEN 'event' ELSE 'other' END) = ?"
         params.append(playlist_key)
     if selected_map:
-        sql += " AND LOWER(TRIM(COALESCE(smc.map_name, ''))) = ?"
+        sql += " AND LOWER(TRIM(COALESCE(lc.map_name, ''))) = ?"
         params.append(selected_map)
     cur.execute(sql, tuple(params))
     match_rows = [dict(r) for r in cur.fetchall()]
@@ -1253,7 +1540,7 @@ def _build_workspace_scope(
                 FROM stacks s
                 JOIN stack_members sm ON sm.stack_id = s.stack_id
                 JOIN players p ON p.player_id = sm.player_id
-                WHERE LOWER(TRIM(p.username)) = LOWER(TRIM(?))
+                WHERE p.username_key = LOWER(TRIM(?))
                 ORDER BY s.stack_id ASC
                 LIMIT 1
                 """,
@@ -1287,13 +1574,13 @@ def _build_workspace_scope(
                     placeholders = ",".join("?" for _ in chunk)
                     cur.execute(
                         f"""
-                        SELECT tm.match_id, LOWER(TRIM(tm.username)) AS teammate_name
+                        SELECT tm.match_id, tm.username_key AS teammate_name
                         FROM match_detail_players me
                         JOIN match_detail_players tm
                           ON tm.match_id = me.match_id
                          AND tm.team_id = me.team_id
-                         AND LOWER(TRIM(tm.username)) != LOWER(TRIM(me.username))
-                        WHERE LOWER(TRIM(me.username)) = LOWER(TRIM(?))
+                         AND tm.username_key != me.username_key
+                        WHERE me.username_key = LOWER(TRIM(?))
                           AND me.match_id IN ({placeholders})
                         """,
                         (username, *chunk),
@@ -1318,6 +1605,7 @@ def _build_workspace_scope(
         "filters_applied": parsed,
         "stack_context": stack_context,
         "scope_key": scope_key,
+        "db_rev": db_rev,
         "warnings": warnings,
         "cache_hit": False,
         "time_min": f"-{safe_days} days",
@@ -1334,352 +1622,6 @@ def _build_workspace_scope(
     return scope_result
 
 
-def _compute_matchup_block(
-    rows: list[dict],
-    *,
-    normalization: str = "global",
-    lift_mode: str = "percent_delta",
-    interval_method: str = "wilson",
-    min_n: int = 0,
-    weighting: str = "rounds",
-) -> dict:
-    min_n_safe = max(0, min(int(min_n), 5000))
-    norm_key = str(normalization or "global").strip().lower()
-    if norm_key not in {"global", "attacker"}:
-        norm_key = "global"
-    lift_key = str(lift_mode or "percent_delta").strip().lower()
-    if lift_key not in {"percent_delta", "logit_lift", "log_odds_ratio"}:
-        lift_key = "percent_delta"
-    interval_key = str(interval_method or "wilson").strip().lower()
-    if interval_key not in {"wilson", "wald"}:
-        interval_key = "wilson"
-    weight_key = "matches" if str(weighting or "").strip().lower() == "matches" else "rounds"
-
-    rounds: dict[tuple[str, int], dict] = {}
-    for r in rows:
-        key = (str(r["match_id"]), int(r["round_id"]))
-        b = rounds.setdefault(key, {"winner_side": str(r.get("winner_side") or "").lower(), "atk_ops": set(), "def_ops": set()})
-        op = str(r.get("operator") or "").strip()
-        if _is_unknown_operator_name(op):
-            continue
-        side = str(r.get("side") or "").strip().lower()
-        if side == "attacker":
-            b["atk_ops"].add(op)
-        elif side == "defender":
-            b["def_ops"].add(op)
-
-    valid_rounds = [v for v in rounds.values() if v["atk_ops"] and v["def_ops"] and v["winner_side"] in {"attacker", "defender"}]
-    if not valid_rounds:
-        return {"error": "No valid rounds for matchup analysis.", "cells": [], "attackers": [], "defenders": []}
-
-    if weight_key == "matches":
-        by_match: dict[str, dict] = {}
-        for (mid, _rid), v in rounds.items():
-            if not v["atk_ops"] or not v["def_ops"]:
-                continue
-            m = by_match.setdefault(mid, {"atk_wins": 0, "def_wins": 0, "pairs": set(), "atk_ops": set(), "def_ops": set()})
-            if v["winner_side"] == "attacker":
-                m["atk_wins"] += 1
-            elif v["winner_side"] == "defender":
-                m["def_wins"] += 1
-            m["atk_ops"].update(v["atk_ops"])
-            m["def_ops"].update(v["def_ops"])
-            for a in v["atk_ops"]:
-                for d in v["def_ops"]:
-                    m["pairs"].add((a, d))
-        match_units = []
-        for m in by_match.values():
-            if m["atk_wins"] == m["def_wins"]:
-                continue
-            winner = "attacker" if m["atk_wins"] > m["def_wins"] else "defender"
-            match_units.append({"winner": winner, "atk_ops": sorted(m["atk_ops"]), "def_ops": sorted(m["def_ops"]), "pairs": m["pairs"]})
-        units = match_units
-    else:
-        units = [{"winner": v["winner_side"], "atk_ops": sorted(v["atk_ops"]), "def_ops": sorted(v["def_ops"])} for v in valid_rounds]
-
-    total_units = len(units)
-    atk_unit_wins = sum(1 for u in units if u["winner"] == "attacker")
-    global_baseline = (atk_unit_wins / total_units) * 100.0 if total_units else 0.0
-    pair_stats: dict[tuple[str, str], dict[str, int]] = {}
-    atk_counts: dict[str, int] = {}
-    def_counts: dict[str, int] = {}
-    atk_wins_by_op: dict[str, int] = {}
-    for u in units:
-        atk_win = 1 if u["winner"] == "attacker" else 0
-        atk_ops = u["atk_ops"]
-        def_ops = u["def_ops"]
-        for a in atk_ops:
-            atk_counts[a] = atk_counts.get(a, 0) + 1
-            atk_wins_by_op[a] = atk_wins_by_op.get(a, 0) + atk_win
-        for d in def_ops:
-            def_counts[d] = def_counts.get(d, 0) + 1
-        pairs = u.get("pairs")
-        if pairs is None:
-            for a in atk_ops:
-                for d in def_ops:
-                    p = (a, d)
-                    cell = pair_stats.setdefault(p, {"n": 0, "atk_wins": 0})
-                    cell["n"] += 1
-                    cell["atk_wins"] += atk_win
-        else:
-            for p in pairs:
-                cell = pair_stats.setdefault(p, {"n": 0, "atk_wins": 0})
-                cell["n"] += 1
-                cell["atk_wins"] += atk_win
-
-    attackers = sorted(atk_counts.keys(), key=lambda x: (-atk_counts.get(x, 0), x))
-    defenders = sorted(def_counts.keys(), key=lambda x: (-def_counts.get(x, 0), x))
-    cells = []
-    for a in attackers:
-        for d in defenders:
-            s = pair_stats.get((a, d))
-            if not s:
-                continue
-            n = int(s["n"])
-            wins = int(s["atk_wins"])
-            win_pct = (wins / n) * 100.0 if n > 0 else 0.0
-            row_baseline = (atk_wins_by_op.get(a, 0) / atk_counts.get(a, 1)) * 100.0 if atk_counts.get(a, 0) else global_baseline
-            baseline_used = row_baseline if norm_key == "attacker" else global_baseline
-            p = wins / n if n > 0 else 0.0
-            if interval_key == "wilson":
-                lo_p, hi_p = _wilson_ci(wins, n)
-            else:
-                z = 1.96
-                se = math.sqrt((p * (1.0 - p)) / n) if n > 0 else 0.0
-                lo_p, hi_p = max(0.0, p - z * se), min(1.0, p + z * se)
-            eps = 1e-6
-            baseline_prob = max(eps, min(1.0 - eps, baseline_used / 100.0))
-            lo_prob = max(eps, min(1.0 - eps, lo_p))
-            hi_prob = max(eps, min(1.0 - eps, hi_p))
-            if lift_key == "percent_delta":
-                metric = win_pct - baseline_used
-                ci_low, ci_high = (lo_p * 100.0) - baseline_used, (hi_p * 100.0) - baseline_used
-            elif lift_key == "logit_lift":
-                p_smooth = (wins + 0.5) / (n + 1.0)
-                p_smooth = max(eps, min(1.0 - eps, p_smooth))
-                base_logit = math.log(baseline_prob / (1.0 - baseline_prob))
-                metric = math.log(p_smooth / (1.0 - p_smooth)) - base_logit
-                ci_low = math.log(lo_prob / (1.0 - lo_prob)) - base_logit
-                ci_high = math.log(hi_prob / (1.0 - hi_prob)) - base_logit
-            else:
-                a_count = float(wins)
-                b_count = float(max(0, n - wins))
-                if norm_key == "attacker":
-                    row_total = float(atk_counts.get(a, 0))
-                    row_wins = float(atk_wins_by_op.get(a, 0))
-                    c_count = float(max(0.0, row_wins - a_count))
-                    d_count = float(max(0.0, (row_total - row_wins) - b_count))
-                else:
-                    total_wins = float(atk_unit_wins)
-                    total_losses = float(max(0, total_units - atk_unit_wins))
-                    c_count = float(max(0.0, total_wins - a_count))
-                    d_count = float(max(0.0, total_losses - b_count))
-                if min(a_count, b_count, c_count, d_count) <= 0:
-                    a_count += 0.5
-                    b_count += 0.5
-                    c_count += 0.5
-                    d_count += 0.5
-                metric = math.log((a_count * d_count) / (b_count * c_count))
-                se = math.sqrt((1.0 / a_count) + (1.0 / b_count) + (1.0 / c_count) + (1.0 / d_count))
-                ci_low, ci_high = metric - (1.96 * se), metric + (1.96 * se)
-            cells.append(
-                {
-                    "attacker": a,
-                    "defender": d,
-                    "n_rounds": n,
-                    "atk_wins": wins,
-                    "win_pct": round(win_pct, 3),
-                    "baseline_wr": round(baseline_used, 3),
-                    "win_ci_low": round(lo_p * 100.0, 3),
-                    "win_ci_high": round(hi_p * 100.0, 3),
-                    "lift": round(metric, 4 if lift_key != "percent_delta" else 3),
-                    "ci_low": round(ci_low, 4 if lift_key != "percent_delta" else 3),
-                    "ci_high": round(ci_high, 4 if lift_key != "percent_delta" else 3),
-                }
-            )
-
-    by_def, by_atk = {}, {}
-    for c in cells:
-        d, a = str(c["defender"]), str(c["attacker"])
-        n = int(c["n_rounds"])
-        lift = float(c["lift"])
-        def_rec = by_def.setdefault(d, {"neg_sum_raw": 0.0, "w_raw": 0, "neg_sum_vis": 0.0, "w_vis": 0, "cells_vis": 0})
-        atk_rec = by_atk.setdefault(a, {"neg_sum_raw": 0.0, "w_raw": 0, "neg_sum_vis": 0.0, "w_vis": 0, "cells_vis": 0})
-        penalty = max(0.0, -lift)
-        def_rec["neg_sum_raw"] += penalty * n
-        def_rec["w_raw"] += n
-        atk_rec["neg_sum_raw"] += penalty * n
-        atk_rec["w_raw"] += n
-        if n >= min_n_safe:
-            def_rec["neg_sum_vis"] += penalty * n
-            def_rec["w_vis"] += n
-            def_rec["cells_vis"] += 1
-            atk_rec["neg_sum_vis"] += penalty * n
-            atk_rec["w_vis"] += n
-            atk_rec["cells_vis"] += 1
-    total_side_units = max(1, total_units)
-    defender_threat = []
-    for d in defenders:
-        rec = by_def.get(d, {})
-        has_visible = int(rec.get("cells_vis", 0)) > 0
-        covered_visible = int(def_counts.get(d, 0)) if has_visible else 0
-        defender_threat.append(
-            {
-                "operator": d,
-                "index": round((float(rec.get("neg_sum_vis", 0.0)) / float(rec.get("w_vis", 1))) if rec.get("w_vis", 0) else 0.0, 4),
-                "n_rounds_total": total_side_units,
-                "n_rounds_covered_raw": int(def_counts.get(d, 0)),
-                "n_rounds_covered_visible": covered_visible,
-                "n_cells_visible": int(rec.get("cells_vis", 0)),
-                "coverage_pct_visible": round((covered_visible / total_side_units) * 100.0, 3),
-            }
-        )
-    attacker_vulnerability = []
-    for a in attackers:
-        rec = by_atk.get(a, {})
-        has_visible = int(rec.get("cells_vis", 0)) > 0
-        covered_visible = int(atk_counts.get(a, 0)) if has_visible else 0
-        attacker_vulnerability.append(
-            {
-                "operator": a,
-                "index": round((float(rec.get("neg_sum_vis", 0.0)) / float(rec.get("w_vis", 1))) if rec.get("w_vis", 0) else 0.0, 4),
-                "n_rounds_total": total_side_units,
-                "n_rounds_covered_raw": int(atk_counts.get(a, 0)),
-                "n_rounds_covered_visible": covered_visible,
-                "n_cells_visible": int(rec.get("cells_vis", 0)),
-                "coverage_pct_visible": round((covered_visible / total_side_units) * 100.0, 3),
-            }
-        )
-
-    defender_threat.sort(key=lambda x: (-float(x["index"]), -int(x["n_rounds_covered_visible"]), x["operator"]))
-    attacker_vulnerability.sort(key=lambda x: (-float(x["index"]), -int(x["n_rounds_covered_visible"]), x["operator"]))
-    return {
-        "baseline_atk_win_rate": round(global_baseline, 4),
-        "total_rounds": total_units,
-        "attackers": attackers,
-        "defenders": defenders,
-        "cells": cells,
-        "normalization": norm_key,
-        "lift_mode": lift_key,
-        "interval_method": interval_key,
-        "weighting": weight_key,
-        "filters": {"min_n": min_n_safe},
-        "threat_index": {
-            "defender_threat": defender_threat,
-            "attacker_vulnerability": attacker_vulnerability,
-        },
-        "clamp_defaults": {"clamp_mode": "percentile", "clamp_p_low": 5, "clamp_p_high": 95, "clamp_abs": 15},
-    }
-
-
-def _compute_operator_scatter(
-    rows: list[dict],
-    *,
-    weighting: str = "rounds",
-) -> dict:
-    rounds: dict[tuple[str, int], dict] = {}
-    for r in rows:
-        key = (str(r["match_id"]), int(r["round_id"]))
-        b = rounds.setdefault(key, {"winner_side": str(r.get("winner_side") or "").lower(), "atk_ops": set(), "def_ops": set()})
-        op = str(r.get("operator") or "").strip()
-        if _is_unknown_operator_name(op):
-            continue
-        side = str(r.get("side") or "").strip().lower()
-        if side == "attacker":
-            b["atk_ops"].add(op)
-        elif side == "defender":
-            b["def_ops"].add(op)
-    valid_rounds = [(mid, rid, v) for (mid, rid), v in rounds.items() if v["atk_ops"] and v["def_ops"] and v["winner_side"] in {"attacker", "defender"}]
-    if not valid_rounds:
-        return {"points": [], "baselines": {"attacker": 0.0, "defender": 0.0}, "total_units": 0}
-    weight_key = "matches" if str(weighting or "").strip().lower() == "matches" else "rounds"
-    if weight_key == "matches":
-        by_match: dict[str, dict] = {}
-        for mid, _rid, v in valid_rounds:
-            m = by_match.setdefault(mid, {"atk_wins": 0, "def_wins": 0, "atk_ops": set(), "def_ops": set()})
-            if v["winner_side"] == "attacker":
-                m["atk_wins"] += 1
-            else:
-                m["def_wins"] += 1
-            m["atk_ops"].update(v["atk_ops"])
-            m["def_ops"].update(v["def_ops"])
-        units = []
-        for m in by_match.values():
-            if m["atk_wins"] == m["def_wins"]:
-                continue
-            units.append({"winner_side": "attacker" if m["atk_wins"] > m["def_wins"] else "defender", "atk_ops": m["atk_ops"], "def_ops": m["def_ops"]})
-        total_matches = len(units)
-        if total_matches <= 0:
-            return {"points": [], "baselines": {"attacker": 0.0, "defender": 0.0}, "total_units": 0}
-        baseline_atk = (sum(1 for u in units if u["winner_side"] == "attacker") / total_matches) * 100.0
-        baseline_def = 100.0 - baseline_atk
-        points = []
-        for side in ("attacker", "defender"):
-            side_ops: dict[str, dict[str, int]] = {}
-            for u in units:
-                ops = u["atk_ops"] if side == "attacker" else u["def_ops"]
-                side_win = 1 if u["winner_side"] == side else 0
-                for op in ops:
-                    rec = side_ops.setdefault(op, {"n": 0, "wins": 0})
-                    rec["n"] += 1
-                    rec["wins"] += side_win
-            for op, rec in side_ops.items():
-                n = rec["n"]
-                wins = rec["wins"]
-                win_pct = (wins / n) * 100.0 if n else 0.0
-                baseline = baseline_atk if side == "attacker" else baseline_def
-                lo, hi = _wilson_ci(wins, n)
-                points.append(
-                    {
-                        "operator": op,
-                        "side": side,
-                        "n_rounds": n,
-                        "presence_pct": round((n / total_matches) * 100.0, 4),
-                        "win_pct": round(win_pct, 4),
-                        "baseline_win_pct": round(baseline, 4),
-                        "win_delta": round(win_pct - baseline, 4),
-                        "ci_low": round((lo * 100.0), 4),
-                        "ci_high": round((hi * 100.0), 4),
-                    }
-                )
-        return {"points": points, "baselines": {"attacker": round(baseline_atk, 4), "defender": round(baseline_def, 4)}, "total_units": total_matches}
-
-    total_rounds = len(valid_rounds)
-    atk_wins = sum(1 for _m, _r, v in valid_rounds if v["winner_side"] == "attacker")
-    baseline_atk = (atk_wins / total_rounds) * 100.0
-    baseline_def = 100.0 - baseline_atk
-    points = []
-    for side in ("attacker", "defender"):
-        side_ops: dict[str, dict[str, int]] = {}
-        for _mid, _rid, v in valid_rounds:
-            ops = v["atk_ops"] if side == "attacker" else v["def_ops"]
-            side_win = 1 if v["winner_side"] == side else 0
-            for op in ops:
-                rec = side_ops.setdefault(op, {"n": 0, "wins": 0})
-                rec["n"] += 1
-                rec["wins"] += side_win
-        for op, rec in side_ops.items():
-            n = rec["n"]
-            wins = rec["wins"]
-            win_pct = (wins / n) * 100.0 if n else 0.0
-            baseline = baseline_atk if side == "attacker" else baseline_def
-            lo, hi = _wilson_ci(wins, n)
-            points.append(
-                {
-                    "operator": op,
-                    "side": side,
-                    "n_rounds": n,
-                    "presence_pct": round((n / total_rounds) * 100.0, 4),
-                    "win_pct": round(win_pct, 4),
-                    "baseline_win_pct": round(baseline, 4),
-                    "win_delta": round(win_pct - baseline, 4),
-                    "ci_low": round((lo * 100.0), 4),
-                    "ci_high": round((hi * 100.0), 4),
-                }
-            )
-    return {"points": points, "baselines": {"attacker": round(baseline_atk, 4), "defender": round(baseline_def, 4)}, "total_units": total_rounds}
-
-
 def _hash_payload(payload: dict) -> str:
     try:
         encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
@@ -1688,38 +1630,6 @@ def _hash_payload(payload: dict) -> str:
     return hashlib.sha1(encoded).hexdigest()
 
 
-def _integrity_counters(rows: list[dict]) -> dict:
-    rounds: dict[tuple[str, int], dict] = {}
-    for r in rows:
-        key = (str(r.get("match_id")), int(r.get("round_id") or 0))
-        b = rounds.setdefault(key, {"players": 0, "atk": 0, "def": 0, "ops_missing": 0, "winner_side": str(r.get("winner_side") or "").lower()})
-        b["players"] += 1
-        side = str(r.get("side") or "").lower()
-        if side == "attacker":
-            b["atk"] += 1
-        elif side == "defender":
-            b["def"] += 1
-        if not str(r.get("operator") or "").strip():
-            b["ops_missing"] += 1
-    counters = {
-        "rounds_total": len(rounds),
-        "rounds_missing_players": 0,
-        "rounds_not_5v5": 0,
-        "rounds_missing_operator_entries": 0,
-        "rounds_invalid_winner_side": 0,
-    }
-    for b in rounds.values():
-        if b["players"] < 10:
-            counters["rounds_missing_players"] += 1
-        if b["atk"] != 5 or b["def"] != 5:
-            counters["rounds_not_5v5"] += 1
-        if b["ops_missing"] > 0:
-            counters["rounds_missing_operator_entries"] += 1
-        if b["winner_side"] not in {"attacker", "defender"}:
-            counters["rounds_invalid_winner_side"] += 1
-    return counters
-
-
 def _compute_workspace_team_pairs(username: str, scope: dict) -> dict:
     t0 = time.time()
     player_id = int(scope.get("player_id") or 0)
@@ -1760,7 +1670,7 @@ def _compute_workspace_team_pairs(username: str, scope: dict) -> dict:
             f"""
             SELECT me.match_id, me.result, me.team_id
             FROM match_detail_players me
-            WHERE LOWER(TRIM(me.username)) = LOWER(TRIM(?))
+            WHERE me.username_key = LOWER(TRIM(?))
               AND me.match_id IN ({placeholders})
             """,
             (username, *chunk),
@@ -1783,13 +1693,13 @@ def _compute_workspace_team_pairs(username: str, scope: dict) -> dict:
         placeholders = ",".join("?" for _ in chunk)
         cur.execute(
             f"""
-            SELECT tm.match_id, LOWER(TRIM(tm.username)) AS teammate
+            SELECT tm.match_id, tm.username_key AS teammate
             FROM match_detail_players me
             JOIN match_detail_players tm
               ON tm.match_id = me.match_id
              AND tm.team_id = me.team_id
-             AND LOWER(TRIM(tm.username)) != LOWER(TRIM(me.username))
-            WHERE LOWER(TRIM(me.username)) = LOWER(TRIM(?))
+             AND tm.username_key != me.username_key
+            WHERE me.username_key = LOWER(TRIM(?))
               AND me.match_id IN ({placeholders})
             """,
             (username, *chunk),
@@ -1862,8 +1772,103 @@ def _compute_workspace_team_pairs(username: str, scope: dict) -> dict:
     }
 
 
+def _export_round_batch(player_id: int, match_ids_json: str, after_id: int, limit: int, search: str) -> list[dict]:
+    return round_export.fetch_batch(
+        _get_db_cursor(), player_id, match_ids_json, after_id=after_id, limit=limit, search=search
+    )
+
+
+@app.get("/api/export/rounds/{username}")
+async def export_rounds(
+    username: str,
+    format: str = "ndjson",
+    days: int = 90,
+    queue: str = "all",
+    playlist: str = "",
+    map_name: str = "",
+    stack_only: bool = False,
+    stack_id: int | None = None,
+    search: str = "",
+    mode: str = "",
+    after_id: int = 0,
+    limit: int | None = None,
+    batch_size: int = round_export.DEFAULT_BATCH_SIZE,
+):
+    """
+    Stream round-level rows (player_rounds joined with round_outcomes and the latest
+    card) for a workspace scope as NDJSON, CSV or Arrow IPC.
+
+    Rows come in pr_id order, one reader-pool batch at a time. To resume an
+    interrupted export pass the last pr_id received as `after_id`; CSV then skips
+    the header row. `scripts/export_rounds.py` does this against a partial file.
+    """
+    fmt = str(format or "").strip().lower()
+    if fmt not in round_export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(round_export.EXPORT_FORMATS)}")
+    start_after = max(0, int(after_id))
+    try:
+        encoder = round_export.make_encoder(fmt, csv_header=start_after == 0)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    try:
+        scope = await db_access.run_read(
+            _build_workspace_scope,
+            username=username,
+            days=days,
+            queue=queue,
+            playlist=playlist,
+            map_name=map_name,
+            stack_only=stack_only,
+            stack_id=stack_id,
+            search=search,
+            legacy_mode=mode,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build export scope: {str(e)}")
+    player_id = int(scope.get("player_id") or 0)
+    if player_id <= 0:
+        raise HTTPException(status_code=404, detail=f"Player '{username}' not found")
+    match_ids = scope.get("match_ids") or []
+    match_ids_json = json.dumps(match_ids)
+    batch = max(1, min(int(batch_size), round_export.MAX_BATCH_SIZE))
+    row_cap = None if limit is None else max(0, int(limit))
+
+    async def stream():
+        t0 = time.time()
+        last_id = start_after
+        sent = 0
+        yield encoder.header()
+        while match_ids and (row_cap is None or sent < row_cap):
+            size = batch if row_cap is None else min(batch, row_cap - sent)
+            rows = await db_access.run_read(_export_round_batch, player_id, match_ids_json, last_id, size, search)
+            if not rows:
+                break
+            last_id = rows[-1]["pr_id"]
+            sent += len(rows)
+            yield encoder.encode(rows)
+        yield encoder.footer()
+        print(
+            "[EXPORT] rounds "
+            f"player={username} format={fmt} scope_key={scope.get('scope_key')} match_ids={len(match_ids)} "
+            f"after_id={start_after} rows={sent} last_id={last_id} ms={int((time.time() - t0) * 1000)}"
+        )
+
+    filename = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', username)}-rounds.{round_export.FILE_EXTENSIONS[fmt]}"
+    return StreamingResponse(
+        stream(),
+        media_type=round_export.MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Scope-Key": str(scope.get("scope_key") or ""),
+            "X-Export-Match-Count": str(len(match_ids)),
+            "X-Export-After-Id": str(start_after),
+        },
+    )
+
+
 @app.get("/api/workspace/team/{username}")
-async def workspace_team(
+@db_access.reads
+def workspace_team(
     username: str,
     ws_days: int = 90,
     ws_queue: str = "all",
@@ -1887,7 +1892,7 @@ async def workspace_team(
             search=ws_search,
             legacy_mode=mode,
         )
-        db_rev = _db_revision_token()
+        db_rev = str(scope.get("db_rev") or _db_revision_token(username))
         scope_key = str(scope.get("scope_key") or "")
         team_key = _hash_payload({"scope_key": scope_key, "view": "pairs_v1", "db_rev": db_rev})
         if not force_refresh:
@@ -1926,7 +1931,8 @@ async def workspace_team(
 
 
 @app.get("/api/workspace/insights/{username}")
-async def workspace_insights(
+@db_access.reads
+def workspace_insights(
     username: str,
     ws_days: int = 90,
     ws_queue: str = "all",
@@ -1952,7 +1958,7 @@ async def workspace_insights(
             search=ws_search,
             legacy_mode=mode,
         )
-        db_rev = _db_revision_token()
+        db_rev = str(scope.get("db_rev") or _db_revision_token(username))
         scope_key = str(scope.get("scope_key") or "")
         insights_key = _hash_payload(
             {
@@ -2002,7 +2008,8 @@ async def workspace_insights(
 
 
 @app.get("/api/dashboard-workspace/{username}")
-async def dashboard_workspace(
+@db_access.reads
+def dashboard_workspace(
     username: str,
     panel: str = "all",
     days: int = 90,
@@ -2028,7 +2035,7 @@ async def dashboard_workspace(
         panel_key = str(panel or "all").strip().lower()
         if panel_key not in {"all", "overview", "operators", "matchups", "team"}:
             panel_key = "all"
-        db_rev = _db_revision_token()
+        db_rev = _db_revision_token(username)
         cache_key = _hash_payload(
             {
                 "u": username,
@@ -2054,7 +2061,7 @@ async def dashboard_workspace(
                 "db_rev": db_rev,
             }
         )
-        cached = _workspace_cache_get(cache_key)
+        cached = _workspace_cache_get(cache_key, db_rev)
         if cached is not None:
             return cached
 
@@ -2092,10 +2099,10 @@ async def dashboard_workspace(
                 "team": {"message": "Workspace Team now loads from /api/workspace/team/{username}."},
             }
             response["meta"]["hash"] = _hash_payload({"team": response.get("team"), "filters": response.get("filters_effective")})
-            _workspace_cache_set(cache_key, response)
+            _workspace_cache_set(cache_key, response, db_rev)
             return response
 
-        player_id, rows, ctx, warnings = _load_workspace_rows(
+        player_id, store, ctx, warnings = _load_workspace_round_store(
             username,
             days=days,
             queue=queue,
@@ -2105,7 +2112,6 @@ async def dashboard_workspace(
             stack_id=stack_id,
             search=search,
             legacy_mode=mode,
-            columns_profile=panel_key if panel_key in {"operators", "matchups"} else "full",
         )
         if player_id <= 0:
             return {"username": username, "analysis": {"error": "Player not found."}, "meta": {"api_version": WORKSPACE_API_VERSION}}
@@ -2143,23 +2149,23 @@ async def dashboard_workspace(
                 "panel": panel_key,
             },
         }
-        if not rows:
+        if not store:
             response["analysis"] = {"error": "No rows for current filters."}
             response["meta"]["hash"] = _hash_payload(response.get("analysis", {}))
-            _workspace_cache_set(cache_key, response)
+            _workspace_cache_set(cache_key, response, db_rev)
             return response
 
         include_ops = panel_key in {"all", "operators"}
         include_matchups = panel_key in {"all", "matchups"}
         if include_ops:
-            op_scatter = _compute_operator_scatter(rows, weighting=weighting)
+            op_scatter = _compute_operator_scatter(store, weighting=weighting)
             response["operators"] = {
                 "scatter": op_scatter,
                 "stack_context": stack_context,
             }
         if include_matchups:
             matchup = _compute_matchup_block(
-                rows,
+                store,
                 normalization=normalization,
                 lift_mode=lift_mode,
                 interval_method=interval_method,
@@ -2180,22 +2186,11 @@ async def dashboard_workspace(
         if panel_key in {"all", "team"}:
             response["team"] = {"message": "Phase 1 team workspace shell ready."}
         if panel_key in {"all", "overview"}:
-            side_counts = {"attacker": 0, "defender": 0}
-            for r in rows:
-                side = str(r.get("side") or "").lower()
-                if side in side_counts:
-                    side_counts[side] += 1
-            response["overview"] = {
-                "message": "Phase 1 overview workspace shell ready.",
-                "rows_after_filters": len(rows),
-                "distinct_matches": len({str(r.get("match_id") or "") for r in rows}),
-                "distinct_rounds": len({(str(r.get("match_id") or ""), int(r.get("round_id") or 0)) for r in rows}),
-                "side_rows": side_counts,
-            }
+            response["overview"] = {"message": "Phase 1 overview workspace shell ready.", **store.overview()}
         if debug:
             response["diagnostics"] = {
-                "integrity": _integrity_counters(rows),
-                "rows_after_filters": len(rows),
+                "integrity": _integrity_counters(store),
+                "rows_after_filters": len(store),
             }
         response["meta"]["hash"] = _hash_payload(
             {
@@ -2206,14 +2201,15 @@ async def dashboard_workspace(
                 "diagnostics": response.get("diagnostics"),
             }
         )
-        _workspace_cache_set(cache_key, response)
+        _workspace_cache_set(cache_key, response, db_rev)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to compute dashboard workspace: {str(e)}")
 
 
 @app.get("/api/dashboard-workspace/{username}/operator/{operator_name}")
-async def dashboard_workspace_operator(
+@db_access.reads
+def dashboard_workspace_operator(
     username: str,
     operator_name: str,
     days: int = 90,
@@ -2252,7 +2248,7 @@ async def dashboard_workspace_operator(
             and (side_key == "all" or str(r.get("side") or "").strip().lower() == side_key)
         ]
         ordering_mode = str(ctx.get("ordering_mode") or "ingestion_fallback")
-        db_rev = _db_revision_token()
+        db_rev = _db_revision_token(username)
         if not op_rows:
             return {
                 "username": username,
@@ -2339,7 +2335,8 @@ async def dashboard_workspace_operator(
 
 
 @app.get("/api/dashboard-workspace/{username}/evidence")
-async def dashboard_workspace_evidence(
+@db_access.reads
+def dashboard_workspace_evidence(
     username: str,
     days: int = 90,
     queue: str = "all",
@@ -2373,37 +2370,45 @@ async def dashboard_workspace_evidence(
             columns_profile="matchups",
         )
         ordering_mode = str(ctx.get("ordering_mode") or "ingestion_fallback")
-        db_rev = _db_revision_token()
+        db_rev = _db_revision_token(username)
         sel_type = str(selection_type or "").strip().lower()
         if sel_type not in {"operator", "matchup_cell", "matchup_row", "matchup_col"}:
             sel_type = ""
         filtered_rows = rows
-        round_ops: dict[tuple[str, int], dict] = {}
-        if sel_type in {"matchup_cell", "matchup_row", "matchup_col"}:
-            for r in rows:
-                key = (str(r["match_id"]), int(r["round_id"]))
-                b = round_ops.setdefault(key, {"atk": set(), "def": set()})
-                side = str(r.get("side") or "").lower()
-                op = str(r.get("operator") or "").strip()
-                if side == "attacker":
-                    b["atk"].add(op.lower())
-                elif side == "defender":
-                    b["def"].add(op.lower())
         if sel_type == "operator":
             target = str(operator or "").strip().lower()
             filtered_rows = [r for r in rows if str(r.get("operator") or "").strip().lower() == target]
-        elif sel_type == "matchup_cell":
-            a = str(atk_op or "").strip().lower()
-            d = str(def_op or "").strip().lower()
-            allowed = {k for k, v in round_ops.items() if a in v["atk"] and d in v["def"]}
-            filtered_rows = [r for r in rows if (str(r["match_id"]), int(r["round_id"])) in allowed]
-        elif sel_type == "matchup_row":
-            a = str(row_atk_op or "").strip().lower()
-            allowed = {k for k, v in round_ops.items() if a in v["atk"]}
-            filtered_rows = [r for r in rows if (str(r["match_id"]), int(r["round_id"])) in allowed]
-        elif sel_type == "matchup_col":
-            d = str(col_def_op or "").strip().lower()
-            allowed = {k for k, v in round_ops.items() if d in v["def"]}
+        elif sel_type in {"matchup_cell", "matchup_row", "matchup_col"}:
+            targets = {
+                "matchup_cell": (atk_op, def_op),
+                "matchup_row": (row_atk_op, None),
+                "matchup_col": (None, col_def_op),
+            }[sel_type]
+            atk_target, def_target = (None if t is None else str(t or "").strip().lower() for t in targets)
+            if str(search or "").strip():
+                # Search drops rows inside a round, so the round's operator sets come from the kept rows.
+                round_ops: dict[tuple[str, int], dict] = {}
+                for r in rows:
+                    key = (str(r["match_id"]), int(r["round_id"]))
+                    b = round_ops.setdefault(key, {"atk": set(), "def": set()})
+                    side = str(r.get("side") or "").lower()
+                    op = str(r.get("operator") or "").strip()
+                    if side == "attacker":
+                        b["atk"].add(op.lower())
+                    elif side == "defender":
+                        b["def"].add(op.lower())
+                allowed = {
+                    k for k, v in round_ops.items()
+                    if (atk_target is None or atk_target in v["atk"]) and (def_target is None or def_target in v["def"])
+                }
+            else:
+                allowed = rounds_with_operators(
+                    _get_db_cursor(),
+                    _pid,
+                    sorted({str(r["match_id"]) for r in rows}),
+                    atk_op=atk_target,
+                    def_op=def_target,
+                )
             filtered_rows = [r for r in rows if (str(r["match_id"]), int(r["round_id"])) in allowed]
 
         limit = max(1, min(int(evidence_limit), 1000))
@@ -2491,7 +2496,8 @@ async def dashboard_workspace_evidence(
 
 
 @app.get("/api/atk-def-heatmap/{username}")
-async def atk_def_heatmap(
+@db_access.reads
+def atk_def_heatmap(
     username: str,
     mode: str = "ranked",
     map_name: str = "",
@@ -2507,7 +2513,7 @@ async def atk_def_heatmap(
     try:
         cur = _get_db_cursor()
         cur.execute(
-            "SELECT player_id FROM players WHERE LOWER(TRIM(username)) = LOWER(TRIM(?)) ORDER BY player_id DESC LIMIT 1",
+            "SELECT player_id FROM players WHERE username_key = LOWER(TRIM(?)) ORDER BY player_id DESC LIMIT 1",
             (username,),
         )
         player = cur.fetchone()
@@ -2516,54 +2522,23 @@ async def atk_def_heatmap(
         player_id = int(player["player_id"])
 
         safe_days = max(1, min(int(days), 3650))
-        latest_card_sql = """
-            WITH latest_card AS (
-                SELECT
-                    smc.match_id,
-                    smc.map_name,
-                    smc.mode,
-                    smc.scraped_at,
-                    ROW_NUMBER() OVER (PARTITION BY smc.match_id ORDER BY smc.id DESC) AS rn
-                FROM scraped_match_cards smc
-            )
-            SELECT
-                pr.match_id,
-                pr.round_id,
-                pr.side,
-                pr.operator,
-                pr.username,
-                ro.winner_side,
-                lc.map_name,
-                lc.mode,
-                lc.scraped_at
-            FROM player_rounds pr
-            JOIN latest_card lc ON lc.match_id = pr.match_id AND lc.rn = 1
-            JOIN round_outcomes ro
-              ON ro.player_id = pr.player_id
-             AND ro.match_id = pr.match_id
-             AND ro.round_id = pr.round_id
-            WHERE pr.player_id = ?
-              AND pr.operator IS NOT NULL
-              AND TRIM(pr.operator) != ''
-              AND DATETIME(COALESCE(lc.scraped_at, '1970-01-01 00:00:00')) >= DATETIME('now', ?)
-            ORDER BY pr.match_id, pr.round_id
-        """
-        cur.execute(latest_card_sql, (player_id, f"-{safe_days} days"))
-        rows = [dict(r) for r in cur.fetchall()]
-        if not rows:
+        # Per-match scope first; operator sets and pair counts come from round_operator_sets.
+        window = window_matches(cur, player_id, safe_days)
+        if not window:
             return {"username": username, "analysis": {"error": "No round data for selected filters."}}
 
         mode_raw = str(mode or "").strip().lower()
         all_modes = mode_raw == "all"
         mode_key = _normalize_mode_key(mode_raw)
         selected_map = str(map_name or "").strip().lower()
-        filtered_mode = [r for r in rows if all_modes or _normalize_mode_key(r.get("mode")) == mode_key]
-        available_maps = sorted({str(r.get("map_name") or "").strip() for r in filtered_mode if str(r.get("map_name") or "").strip()})
+        filtered_mode = [m for m in window if all_modes or _normalize_mode_key(m.get("mode")) == mode_key]
+        available_maps = sorted({str(m.get("map_name") or "").strip() for m in filtered_mode if str(m.get("map_name") or "").strip()})
         filtered = filtered_mode
         if selected_map:
-            filtered = [r for r in filtered if str(r.get("map_name") or "").strip().lower() == selected_map]
+            filtered = [m for m in filtered if str(m.get("map_name") or "").strip().lower() == selected_map]
         if not filtered:
             return {"username": username, "analysis": {"error": "No rounds after mode/map filters.", "available_maps": available_maps}}
+        scope_match_ids = [m["match_id"] for m in filtered]
 
         stack_teammates: set[str] = set()
         stack_context = {
@@ -2582,7 +2557,7 @@ async def atk_def_heatmap(
                     FROM stacks s
                     JOIN stack_members sm ON sm.stack_id = s.stack_id
                     JOIN players p ON p.player_id = sm.player_id
-                    WHERE LOWER(TRIM(p.username)) = LOWER(TRIM(?))
+                    WHERE p.username_key = LOWER(TRIM(?))
                     ORDER BY s.stack_id ASC
                     LIMIT 1
                     """,
@@ -2611,9 +2586,7 @@ async def atk_def_heatmap(
             elif not stack_teammates:
                 stack_context["reason"] = "Stack has no teammates besides the player; showing all matches."
             else:
-                by_match_users: dict[str, set[str]] = {}
-                for r in filtered:
-                    by_match_users.setdefault(str(r["match_id"]), set()).add(str(r.get("username") or "").strip().lower())
+                by_match_users = match_usernames(cur, player_id, scope_match_ids)
                 allowed_matches = {
                     mid for mid, names in by_match_users.items()
                     if names.intersection(stack_teammates)
@@ -2625,190 +2598,45 @@ async def atk_def_heatmap(
                 })
                 stack_context["matched_teammates"] = matched
                 if allowed_matches:
-                    filtered = [r for r in filtered if str(r["match_id"]) in allowed_matches]
+                    scope_match_ids = [mid for mid in scope_match_ids if mid in allowed_matches]
                     stack_context["applied"] = True
                 else:
                     stack_context["reason"] = "No rounds matched stack teammates under current filters; showing all matches."
 
         min_n_safe = max(0, min(int(min_n), 5000))
-        rounds: dict[tuple[str, int], dict] = {}
-        for r in filtered:
-            key = (str(r["match_id"]), int(r["round_id"]))
-            bucket = rounds.setdefault(
-                key,
-                {
-                    "winner_side": str(r.get("winner_side") or ""),
-                    "atk_ops": set(),
-                    "def_ops": set(),
-                },
-            )
-            op = str(r.get("operator") or "").strip()
-            side = str(r.get("side") or "").strip().lower()
-            if not op:
-                continue
-            if side == "attacker":
-                bucket["atk_ops"].add(op)
-            elif side == "defender":
-                bucket["def_ops"].add(op)
-
-        valid_rounds = [v for v in rounds.values() if v["atk_ops"] and v["def_ops"]]
-        if not valid_rounds:
+        counts = count_operator_pairs(cur, player_id, scope_match_ids)
+        total_rounds = int(counts["total_rounds"])
+        if not total_rounds:
             return {"username": username, "analysis": {"error": "No valid rounds with both ATK and DEF operator sets.", "available_maps": available_maps}}
 
-        atk_round_wins = sum(1 for v in valid_rounds if str(v.get("winner_side") or "").lower() == "attacker")
-        total_rounds = len(valid_rounds)
+        atk_round_wins = int(counts["atk_round_wins"])
         global_baseline = (atk_round_wins / total_rounds) * 100.0 if total_rounds else 0.0
 
-        pair_stats: dict[tuple[str, str], dict[str, int]] = {}
-        atk_counts: dict[str, int] = {}
-        def_counts: dict[str, int] = {}
-        atk_wins_by_op: dict[str, int] = {}
-        exposures_total = 0
-        exposures_atk_wins = 0
-
-        for v in valid_rounds:
-            atk_ops = sorted(v["atk_ops"])
-            def_ops = sorted(v["def_ops"])
-            atk_win = 1 if str(v.get("winner_side") or "").lower() == "attacker" else 0
-            exposures = len(atk_ops) * len(def_ops)
-            exposures_total += exposures
-            exposures_atk_wins += exposures * atk_win
-            for a in atk_ops:
-                atk_counts[a] = atk_counts.get(a, 0) + 1
-                if atk_win:
-                    atk_wins_by_op[a] = atk_wins_by_op.get(a, 0) + 1
-                else:
-                    atk_wins_by_op.setdefault(a, atk_wins_by_op.get(a, 0))
-            for d in def_ops:
-                def_counts[d] = def_counts.get(d, 0) + 1
-            for a in atk_ops:
-                for d in def_ops:
-                    key = (a, d)
-                    cell = pair_stats.setdefault(key, {"n": 0, "atk_wins": 0})
-                    cell["n"] += 1
-                    cell["atk_wins"] += atk_win
-
-        attackers = [k for k, _ in sorted(atk_counts.items(), key=lambda x: (-x[1], x[0]))]
-        defenders = [k for k, _ in sorted(def_counts.items(), key=lambda x: (-x[1], x[0]))]
-
-        norm_key = str(normalization or "global").strip().lower()
-        if norm_key not in {"global", "attacker"}:
-            norm_key = "global"
-        lift_key = str(lift_mode or "percent_delta").strip().lower()
-        if lift_key not in {"percent_delta", "logit_lift", "log_odds_ratio"}:
-            lift_key = "percent_delta"
-        interval_key = str(interval_method or "wilson").strip().lower()
-        if interval_key not in {"wilson", "wald"}:
-            interval_key = "wilson"
-
-        cells = []
-        continuity_applied_count = 0
-        logit_eps_clips_count = 0
-        nan_or_inf_cells_count = 0
-        for a in attackers:
-            for d in defenders:
-                key = (a, d)
-                if key not in pair_stats:
-                    continue
-                n = int(pair_stats[key]["n"])
-                wins = int(pair_stats[key]["atk_wins"])
-                win_pct = (wins / n) * 100.0 if n > 0 else 0.0
-                row_baseline = (atk_wins_by_op.get(a, 0) / atk_counts.get(a, 1)) * 100.0 if atk_counts.get(a, 0) else global_baseline
-                baseline_used = row_baseline if norm_key == "attacker" else global_baseline
-                p = wins / n if n > 0 else 0.0
-                z = 1.96
-                if interval_key == "wilson":
-                    z2 = z * z
-                    denom = 1.0 + (z2 / n)
-                    center = (p + (z2 / (2.0 * n))) / denom
-                    half = (z / denom) * math.sqrt((p * (1.0 - p) / n) + (z2 / (4.0 * n * n)))
-                    lo_p = max(0.0, center - half)
-                    hi_p = min(1.0, center + half)
-                else:
-                    se = math.sqrt((p * (1.0 - p)) / n) if n > 0 else 0.0
-                    lo_p = max(0.0, p - z * se)
-                    hi_p = min(1.0, p + z * se)
-
-                eps = 1e-6
-                baseline_prob = max(eps, min(1.0 - eps, baseline_used / 100.0))
-                if baseline_prob in {eps, 1.0 - eps}:
-                    logit_eps_clips_count += 1
-                lo_prob = max(eps, min(1.0 - eps, lo_p))
-                if lo_prob in {eps, 1.0 - eps}:
-                    logit_eps_clips_count += 1
-                hi_prob = max(eps, min(1.0 - eps, hi_p))
-                if hi_prob in {eps, 1.0 - eps}:
-                    logit_eps_clips_count += 1
-                p_prob = max(eps, min(1.0 - eps, p))
-                if p_prob in {eps, 1.0 - eps}:
-                    logit_eps_clips_count += 1
-
-                if lift_key == "percent_delta":
-                    metric = win_pct - baseline_used
-                    ci_low = (lo_p * 100.0) - baseline_used
-                    ci_high = (hi_p * 100.0) - baseline_used
-                elif lift_key == "logit_lift":
-                    # Jeffreys-smoothed mean for stable logit when wins==0 or wins==n.
-                    p_smooth = (wins + 0.5) / (n + 1.0)
-                    p_smooth = max(eps, min(1.0 - eps, p_smooth))
-                    base_logit = math.log(baseline_prob / (1.0 - baseline_prob))
-                    metric = math.log(p_smooth / (1.0 - p_smooth)) - base_logit
-                    ci_low = math.log(lo_prob / (1.0 - lo_prob)) - base_logit
-                    ci_high = math.log(hi_prob / (1.0 - hi_prob)) - base_logit
-                else:
-                    # log_odds_ratio from 2x2 table:
-                    # present(pair) vs absent(pair) by ATK win/loss.
-                    a_count = float(wins)
-                    b_count = float(max(0, n - wins))
-                    if norm_key == "attacker":
-                        row_total = float(atk_counts.get(a, 0))
-                        row_wins = float(atk_wins_by_op.get(a, 0))
-                        c_count = float(max(0.0, row_wins - a_count))
-                        d_count = float(max(0.0, (row_total - row_wins) - b_count))
-                    else:
-                        total_wins = float(atk_round_wins)
-                        total_losses = float(max(0, total_rounds - atk_round_wins))
-                        c_count = float(max(0.0, total_wins - a_count))
-                        d_count = float(max(0.0, total_losses - b_count))
-
-                    # Continuity correction for zero cells to avoid infinities.
-                    if min(a_count, b_count, c_count, d_count) <= 0.0:
-                        continuity_applied_count += 1
-                        a_count += 0.5
-                        b_count += 0.5
-                        c_count += 0.5
-                        d_count += 0.5
-
-                    log_or = math.log((a_count * d_count) / (b_count * c_count))
-                    se_log_or = math.sqrt((1.0 / a_count) + (1.0 / b_count) + (1.0 / c_count) + (1.0 / d_count))
-                    metric = log_or
-                    ci_low = log_or - (1.96 * se_log_or)
-                    ci_high = log_or + (1.96 * se_log_or)
-
-                if not math.isfinite(metric):
-                    metric = 0.0
-                    nan_or_inf_cells_count += 1
-                if not math.isfinite(ci_low):
-                    ci_low = 0.0
-                    nan_or_inf_cells_count += 1
-                if not math.isfinite(ci_high):
-                    ci_high = 0.0
-                    nan_or_inf_cells_count += 1
-                cells.append(
-                    {
-                        "attacker": a,
-                        "defender": d,
-                        "n_rounds": n,
-                        "atk_wins": wins,
-                        "win_pct": round(win_pct, 1),
-                        "baseline_wr": round(baseline_used, 1),
-                        "win_ci_low": round(lo_p * 100.0, 1),
-                        "win_ci_high": round(hi_p * 100.0, 1),
-                        "lift": round(metric, 3 if lift_key != "percent_delta" else 1),
-                        "ci_low": round(ci_low, 3 if lift_key != "percent_delta" else 1),
-                        "ci_high": round(ci_high, 3 if lift_key != "percent_delta" else 1),
-                    }
-                )
+        pair_stats: dict[tuple[str, str], dict[str, int]] = counts["pair_stats"]
+        atk_counts: dict[str, int] = counts["atk_counts"]
+        def_counts: dict[str, int] = counts["def_counts"]
+        atk_wins_by_op: dict[str, int] = counts["atk_wins_by_op"]
+        exposures_total = int(counts["exposures_total"])
+        exposures_atk_wins = int(counts["exposures_atk_wins"])
+
+        norm_key, lift_key, interval_key = cell_options(normalization, lift_mode, interval_method)
+        grid = PairGrid(
+            pair_stats=pair_stats,
+            atk_counts=atk_counts,
+            atk_wins_by_op=atk_wins_by_op,
+            def_counts=def_counts,
+            total_units=total_rounds,
+            atk_unit_wins=atk_round_wins,
+        )
+        attackers, defenders = grid.attackers, grid.defenders
+        cells, pathology_counters = compute_cells(
+            grid,
+            norm_key=norm_key,
+            lift_key=lift_key,
+            interval_key=interval_key,
+            pct_digits=1,
+            lift_digits=3 if lift_key != "percent_delta" else 1,
+        )
 
         analysis = {
             "baseline_atk_win_rate": round(global_baseline, 1),
@@ -2859,25 +2687,22 @@ async def atk_def_heatmap(
                             "cells_total": len(row_cells),
                         }
                     )
+            row_counts = player_row_counts(cur, player_id, [m["match_id"] for m in window])
             analysis["diagnostics"] = {
                 "global_checks": {
                     "global_atk_baseline_wr": round(global_baseline, 4),
                     "exposure_weighted_baseline_wr": round(exposure_weighted_baseline, 4),
                     "weighted_mean_cell_wr": round(weighted_mean_cell_wr, 4),
-                    "rounds_total": len(rounds),
+                    "rounds_total": int(counts["rounds_total"]),
                     "rounds_valid": total_rounds,
-                    "rows_fetched": len(rows),
-                    "rows_after_mode_filter": len(filtered_mode),
-                    "rows_after_all_filters": len(filtered),
+                    "rows_fetched": sum(row_counts.values()),
+                    "rows_after_mode_filter": sum(row_counts.get(m["match_id"], 0) for m in filtered_mode),
+                    "rows_after_all_filters": sum(row_counts.get(mid, 0) for mid in scope_match_ids),
                     "cells_hidden_by_min_n": sum(1 for c in cells if int(c["n_rounds"]) < min_n_safe),
                     "cells_total": len(cells),
                 },
                 "row_checks": row_checks,
-                "pathology_counters": {
-                    "or_continuity_applied_count": continuity_applied_count,
-                    "logit_eps_clips_count": logit_eps_clips_count,
-                    "nan_or_inf_cells_count": nan_or_inf_cells_count,
-                },
+                "pathology_counters": pathology_counters,
             }
         return {"username": username, "analysis": analysis}
     except Exception as e:
@@ -2888,10 +2713,16 @@ configure_network_scan(
     error_tracker_dep=error_tracker,
     track_call_dep=track_call,
     get_rate_status_dep=get_rate_status,
+    db_dep=adb,
+    # Scans pace their tabs from the same budget as the Tracker API client.
+    governor_dep=api_client.limiter,
 )
 register_network_scan_routes(app)
 
-configure_match_scrape(db_dep=db)
+configure_jobs(job_manager_dep=job_manager)
+register_jobs_routes(app)
+
+configure_match_scrape(db_dep=adb)
 register_match_scrape_routes(app)
 
 
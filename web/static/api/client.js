@@ -56,8 +56,36 @@ export function createApiClient() {
                 method: "POST",
             });
         },
-        getScrapedMatches(username, limit = 10000) {
-            return this.request(`/api/scraped-matches/${encodeSegment(username)}?limit=${encodeSegment(limit)}`);
+        getJobs(params) {
+            const qs = queryString(params);
+            return this.request(`/api/jobs${qs ? `?${qs}` : ""}`);
+        },
+        getJob(jobId) {
+            return this.request(`/api/jobs/${encodeSegment(jobId)}`);
+        },
+        cancelJob(jobId) {
+            return this.request(`/api/jobs/${encodeSegment(jobId)}/cancel`, { method: "POST" });
+        },
+        openJobsWebSocket() {
+            return this.openWebSocket("/ws/jobs");
+        },
+        async waitForJob(jobId, onProgress = null, intervalMs = 750) {
+            // Polls until the job reaches done/failed/cancelled; resolves with the final snapshot.
+            for (;;) {
+                const resp = await this.getJob(jobId);
+                if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+                const job = await resp.json();
+                if (typeof onProgress === "function") onProgress(job);
+                if (job.status === "done" || job.status === "failed" || job.status === "cancelled") return job;
+                await new Promise((resolve) => setTimeout(resolve, intervalMs));
+            }
+        },
+        getScrapedMatches(username, limit = 10000, options = {}) {
+            const params = { limit };
+            if (options.cursor != null) params.cursor = options.cursor;
+            if (Array.isArray(options.fields)) params.fields = options.fields.join(",");
+            if (options.matchId) params.match_id = options.matchId;
+            return this.request(`/api/scraped-matches/${encodeSegment(username)}?${queryString(params)}`);
         },
         postDbStandardize(dryRun, verbose) {
             const qs = queryString({
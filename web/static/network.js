@@ -32,6 +32,8 @@ const STORED_VIRTUALIZE_THRESHOLD = 220;
 const STORED_VIRTUAL_CARD_MIN_WIDTH = 240;
 const STORED_VIRTUAL_CARD_GAP = 12;
 const STORED_VIRTUAL_ROW_HEIGHT = 154;
+const STORED_LIST_PAGE_SIZE = 500;
+const STORED_LIST_MAX_MATCHES = 10000;
 const MATCH_RESULTS_VIRTUALIZE_THRESHOLD = 220;
 const MATCH_RESULTS_CARD_MIN_WIDTH = 320;
 const MATCH_RESULTS_CARD_GAP = 6;
@@ -521,6 +523,7 @@ function startScan() {
     const username = document.getElementById("username").value.trim();
     const depth = parseInt(document.getElementById("depth").value, 10);
     const debugBrowser = document.getElementById("debug-browser").checked;
+    const source = document.getElementById("scan-source")?.value || "auto";
 
     if (!username) {
         alert("Please enter a username");
@@ -553,7 +556,7 @@ function startScan() {
 
     ws.onopen = () => {
         log("Connected to server");
-        ws.send(JSON.stringify({ username, max_depth: depth, debug_browser: debugBrowser }));
+        ws.send(JSON.stringify({ username, max_depth: depth, debug_browser: debugBrowser, source }));
     };
 
     ws.onmessage = (event) => {
@@ -818,6 +821,9 @@ function handleMessage(data) {
             }
             document.getElementById("scan-status").textContent = "Running";
             break;
+        case "scan_resumed":
+            log(`Resuming scan #${data.run_id}: ${toNumber(data.done, 0)} players done, ${toNumber(data.pending, 0)} pending`);
+            break;
         case "scanning":
             document.getElementById("current-scan").textContent = data.username;
             log(`Scanning ${data.username} (depth ${data.depth})...`);
@@ -1003,12 +1009,19 @@ function addEdge(data) {
         document.getElementById("node-count").textContent = nodes.length;
     }
     if (edges.get(edgeId)) return;
+    // Edges from the local DB also split the count by side and queue.
+    const queues = Object.entries(data.queues || {})
+        .map(([queue, count]) => `${queue}: ${toNumber(count, 0)}`)
+        .join(", ");
+    const detail = data.source === "local"
+        ? `\nWith: ${toNumber(data.with, 0)} | Against: ${toNumber(data.against, 0)}${queues ? `\n${queues}` : ""}`
+        : "";
     edges.add({
         id: edgeId,
         from: from,
         to: to,
         label: `${encounterCount}`,
-        title: `${from} -> ${to}: ${encounterCount} encounters`,
+        title: `${from} -> ${to}: ${encounterCount} encounters${detail}`,
         width: Math.min(1 + encounterCount / 10, 6),
     });
 
@@ -2135,6 +2148,16 @@ function inferTeamPerspective(matchData, username = "") {
         return { myScore: segmentScore.myScore, oppScore: segmentScore.oppScore, result };
     }
 
+    // List pages skip match_summary; the server sends the owner's score from the normalized rows.
+    const ownerWon = matchData?.owner_rounds_won;
+    const ownerLost = matchData?.owner_rounds_lost;
+    if (ownerWon != null && ownerLost != null && Number.isFinite(Number(ownerWon)) && Number.isFinite(Number(ownerLost))) {
+        const myScore = Number(ownerWon);
+        const oppScore = Number(ownerLost);
+        const result = myScore === oppScore ? "Unknown" : (myScore > oppScore ? "Win" : "Loss");
+        return { myScore, oppScore, result };
+    }
+
     const scoreA = toNumber(matchData?.score_team_a, 0);
     const scoreB = toNumber(matchData?.score_team_b, 0);
     const normalized = String(username || "").trim().toLowerCase();
@@ -3160,19 +3183,60 @@ function renderStoredDetail(match, username) {
         `</div>`;
 }
 
-function selectStoredMatch(index, username) {
+async function selectStoredMatch(index, username) {
     if (!Array.isArray(storedMatchesCache) || index < 0 || index >= storedMatchesCache.length) {
         return;
     }
     selectedStoredMatchIndex = index;
     selectedStoredRoundIndex = -1;
-    renderStoredDetail(storedMatchesCache[index], username);
+    const match = storedMatchesCache[index];
+    if (match && match.match_summary === undefined && match.match_id) {
+        try {
+            const res = await api.getScrapedMatches(username, 1, { matchId: match.match_id, cursor: match.card_id + 1 });
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            const full = (await res.json())?.matches?.[0];
+            if (full) Object.assign(match, full);
+        } catch (err) {
+            logMatch(`Failed to load stored match ${match.match_id}: ${err}`, "error");
+        }
+        if (selectedStoredMatchIndex !== index) return;
+    }
+    renderStoredDetail(match, username);
 }
 
 function closeStoredDetail() {
     document.getElementById("stored-detail").classList.add("hidden");
 }
 
+function formatJobProgress(job) {
+    const progress = job?.progress || {};
+    const parts = [];
+    if (progress.total) {
+        parts.push(`${toNumber(progress.done, 0)}/${toNumber(progress.total, 0)} (${formatFixed(progress.percent, 1)}%)`);
+    }
+    if (progress.message) parts.push(String(progress.message));
+    if (job?.eta_seconds != null) parts.push(`ETA ${Math.ceil(Number(job.eta_seconds))}s`);
+    return parts.join(" - ") || String(job?.status || "");
+}
+
+let lastJobProgressLog = 0;
+
+async function waitForJobResult(job, onProgress = null) {
+    // Background job endpoints return {job}; follow it until it finishes.
+    if (!job?.job_id) throw new Error("Server did not return a job");
+    const finished = await api.waitForJob(job.job_id, (snapshot) => {
+        if (typeof onProgress !== "function" || snapshot.status !== "running") return;
+        const now = Date.now();
+        if (now - lastJobProgressLog < 2000) return;
+        lastJobProgressLog = now;
+        onProgress(snapshot);
+    });
+    if (finished.status !== "done") {
+        throw new Error(finished.error || `job ${finished.status}`);
+    }
+    return finished.result || {};
+}
+
 async function unpackStoredMatches(explicitUsername = "") {
     const username = (explicitUsername || document.getElementById("stored-username").value || "").trim();
     if (!username) {
@@ -3187,7 +3251,12 @@ async function unpackStoredMatches(explicitUsername = "") {
             throw new Error(`HTTP ${resp.status}`);
         }
         const payload = await resp.json();
-        const stats = payload?.stats || {};
+        const stats = await waitForJobResult(payload?.job, (job) => {
+            const progress = job?.progress || {};
+            if (progress.total) {
+                logMatch(`Unpacking ${username}: ${formatJobProgress(job)}`, "info");
+            }
+        });
         logMatch(
             `Unpack complete for ${username}: scanned=${toNumber(stats.scanned, 0)}, ` +
             `unpacked=${toNumber(stats.unpacked_matches, 0)}, skipped=${toNumber(stats.skipped, 0)}, ` +
@@ -3221,7 +3290,7 @@ async function deleteBadStoredMatches(explicitUsername = "") {
             throw new Error(`HTTP ${resp.status}`);
         }
         const payload = await resp.json();
-        const stats = payload?.stats || {};
+        const stats = await waitForJobResult(payload?.job);
         logMatch(
             `Deleted bad matches for ${username}: cards=${toNumber(stats.deleted_cards, 0)}, ` +
             `match_ids=${toNumber(stats.deleted_match_ids, 0)}, detail_rows=${toNumber(stats.deleted_detail_rows, 0)}, ` +
@@ -3248,12 +3317,19 @@ async function loadStoredMatchesView(explicitUsername = "", silent = false) {
     currentStoredUsername = username;
     renderStoredLoadingSkeleton();
     try {
-        const res = await api.getScrapedMatches(username, 10000);
-        if (!res.ok) {
-            throw new Error(`HTTP ${res.status}`);
-        }
-        const payload = await res.json();
-        const matches = Array.isArray(payload.matches) ? payload.matches : [];
+        // The list only needs players; summaries and round data load when a card is opened.
+        const matches = [];
+        let cursor = null;
+        do {
+            const res = await api.getScrapedMatches(username, STORED_LIST_PAGE_SIZE, { cursor, fields: ["players"] });
+            if (!res.ok) {
+                throw new Error(`HTTP ${res.status}`);
+            }
+            const payload = await res.json();
+            if (Array.isArray(payload.matches)) matches.push(...payload.matches);
+            cursor = payload.next_cursor ?? null;
+        } while (cursor != null && matches.length < STORED_LIST_MAX_MATCHES && currentStoredUsername === username);
+        if (currentStoredUsername !== username) return;
         renderStoredMatches(matches, username);
         if (!silent) {
             logMatch(`Loaded stored view for ${username} (${matches.length} matches)`, "success");
@@ -3318,7 +3394,10 @@ async function runDbStandardizerFromSettings() {
             throw new Error(`HTTP ${res.status}: ${detail}`);
         }
         const payload = await res.json();
-        output.textContent = renderStandardizerReport(payload);
+        const report = await waitForJobResult(payload?.job, (job) => {
+            output.textContent = `Running DB standardizer... ${formatJobProgress(job)}`;
+        });
+        output.textContent = renderStandardizerReport({ ...payload, report });
         logCompute("DB standardizer finished via Settings.", "success");
     } catch (err) {
         output.textContent = `Failed to run DB standardizer:\n${String(err)}`;